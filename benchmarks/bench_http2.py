@@ -0,0 +1,93 @@
+"""Concurrent streams over HTTP/1.1 connection pools versus HTTP/2 multiplexing.
+
+Each round opens `concurrency` SSE streams at once. The HTTP/1.1 side uses
+the urllib3 transport against the threaded stub upstream, which needs one TCP
+connection per concurrent stream; the HTTP/2 side uses the `http2` transport
+(prior knowledge) against a local h2c stand-in server and spreads the same
+streams over a few connections. Requires the `http2` extra for the HTTP/2
+rows.
+
+Run from the repository root:
+
+    python benchmarks/bench_http2.py --concurrency 50,200,500 --rounds 3
+"""
+
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_upstream import StubUpstream  # noqa: E402
+
+from ai_prompt_runner.services.provider_factory import create_provider  # noqa: E402
+from ai_prompt_runner.services.transport import (  # noqa: E402
+    Http2Transport,
+    Transport,
+    Urllib3Transport,
+)
+
+
+def _run_streams(endpoint: str, transport: Transport, concurrency: int, rounds: int) -> float:
+    """Run `rounds` waves of `concurrency` simultaneous streams; return elapsed seconds."""
+
+    def _one_stream(_index: int) -> int:
+        # Providers keep per-call state, so each stream gets its own instance
+        # over the shared transport (as PromptClient does).
+        provider = create_provider(
+            "openai_compatible",
+            api_endpoint=endpoint,
+            api_key="bench",
+            api_model="stub-model",
+            transport=transport,
+        )
+        return sum(len(chunk) for chunk in provider.generate_stream("ping"))
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(rounds):
+            list(executor.map(_one_stream, range(concurrency)))
+    return perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", default="50,200,500", help="Comma-separated concurrent stream counts.")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--response-chars", type=int, default=4_000)
+    parser.add_argument("--max-streams-per-connection", type=int, default=100)
+    args = parser.parse_args()
+
+    try:
+        from h2_stub_upstream import H2StubUpstream
+    except ImportError as exc:
+        H2StubUpstream = None
+        print(f"HTTP/2 rows skipped: {exc}")
+
+    print(f"{'protocol':>8} {'streams':>7} {'seconds':>8} {'streams/s':>10} {'tcp conns':>9}")
+    for concurrency in (int(value) for value in args.concurrency.split(",")):
+        total = concurrency * args.rounds
+
+        with StubUpstream(response_chars=args.response_chars) as upstream:
+            transport = Urllib3Transport(pool_maxsize=concurrency)
+            elapsed = _run_streams(upstream.url, transport, concurrency, args.rounds)
+            transport.close()
+            print(f"{'http/1.1':>8} {concurrency:>7} {elapsed:>8.2f} {total / elapsed:>10.1f} {upstream.connections:>9}")
+
+        if H2StubUpstream is None:
+            continue
+        with H2StubUpstream(response_chars=args.response_chars) as upstream:
+            transport = Http2Transport(
+                pool_maxsize=concurrency,
+                max_streams_per_connection=args.max_streams_per_connection,
+                prior_knowledge=True,
+            )
+            elapsed = _run_streams(upstream.url, transport, concurrency, args.rounds)
+            transport.close()
+            print(f"{'http/2':>8} {concurrency:>7} {elapsed:>8.2f} {total / elapsed:>10.1f} {upstream.connections:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Scaling curve of batch execution with `--processes` against a local stub.
+
+Each request returns a large response so that JSON decoding, payload
+validation and serialization dominate, which is the GIL-bound work the
+process pool is meant to spread across cores.
+
+Run from the repository root:
+
+    python benchmarks/bench_process_pool.py --items 400 --response-chars 200000
+"""
+
+import argparse
+import os
+import sys
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_upstream import StubUpstream  # noqa: E402
+
+from ai_prompt_runner.core.batch import (  # noqa: E402
+    BatchItem,
+    BatchRequestDefaults,
+    request_from_record,
+    run_batch,
+)
+from ai_prompt_runner.core.parallel import run_batch_parallel  # noqa: E402
+from ai_prompt_runner.core.runner import PromptRunner  # noqa: E402
+from ai_prompt_runner.services.provider_factory import create_provider  # noqa: E402
+
+
+def _items(count: int) -> list[BatchItem]:
+    defaults = BatchRequestDefaults(provider="openai_compatible")
+    return [
+        BatchItem(index=i, request=request_from_record({"prompt": f"p{i}"}, i, defaults))
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=400)
+    parser.add_argument("--response-chars", type=int, default=200_000)
+    parser.add_argument(
+        "--processes",
+        default=",".join(str(n) for n in (1, 2, 4, 8) if n <= (os.cpu_count() or 1)),
+        help="Comma-separated process counts to measure.",
+    )
+    args = parser.parse_args()
+
+    with StubUpstream(response_chars=args.response_chars) as upstream:
+        factory = partial(
+            create_provider,
+            provider_name="openai_compatible",
+            api_endpoint=upstream.url,
+            api_key="bench",
+            api_model="stub-model",
+        )
+        sink_bytes = 0
+
+        def _sink(result) -> None:
+            nonlocal sink_bytes
+            sink_bytes += len(result.to_json())
+
+        print(f"{'processes':>9} {'seconds':>8} {'items/s':>9} {'speedup':>8}")
+        baseline: float | None = None
+        for processes in (int(value) for value in args.processes.split(",")):
+            start = perf_counter()
+            if processes == 1:
+                run_batch(
+                    PromptRunner(provider=factory()),
+                    _items(args.items),
+                    provider="openai_compatible",
+                    on_result=_sink,
+                )
+            else:
+                run_batch_parallel(
+                    factory,
+                    _items(args.items),
+                    provider="openai_compatible",
+                    on_result=_sink,
+                    processes=processes,
+                )
+            elapsed = perf_counter() - start
+            baseline = baseline or elapsed
+            print(
+                f"{processes:>9} {elapsed:>8.2f} {args.items / elapsed:>9.1f} "
+                f"{baseline / elapsed:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Lookup latency of the near-duplicate similarity cache as the index grows.
+
+Fills a cache file with random signatures in bulk (no provider calls, no
+prompt hashing), then times lookups of real prompts: misses, near-duplicate
+hits and the signature computation on its own. Install the `similarity`
+extra to measure the vectorized NumPy signature path.
+
+Run from the repository root:
+
+    python benchmarks/bench_similarity_cache.py --entries 1000000
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from ai_prompt_runner.core.models import PromptRequest
+from ai_prompt_runner.core.similarity_cache import SimilarityCache, similarity_scope
+
+_PROMPT = (
+    "Summarize the following support ticket opened at {timestamp} in two sentences: "
+    "the customer reports that the login page shows a blank screen on Safari after "
+    "submitting the form, clearing the cache did not help, and the issue started "
+    "after the latest release. Ticket number {number}."
+)
+_INSERT_BATCH = 10_000
+
+
+def _fill(cache: SimilarityCache, scope: bytes, entries: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for start in range(0, entries, _INSERT_BATCH):
+        cache.store_signatures(
+            (
+                scope,
+                [rng.getrandbits(32) for _ in range(cache.num_perm)],
+                "stored response",
+                "stub-model",
+                "sha256:" + "0" * 64,
+            )
+            for _ in range(min(_INSERT_BATCH, entries - start))
+        )
+
+
+def _timed_ms(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        samples.append((perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<22} p50 {statistics.median(ordered):8.3f} ms   p99 {p99:8.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=2_000)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SimilarityCache(Path(tmp) / "similarity.sqlite", threshold=args.threshold)
+        scope = similarity_scope(PromptRequest(prompt_text="", provider="openai"), "stub-model")
+        start = perf_counter()
+        _fill(cache, scope, args.entries, seed=7)
+        print(f"filled {args.entries} entries in {perf_counter() - start:.1f} s ({cache.bands} bands x {cache.rows} rows)")
+
+        stored = _PROMPT.format(timestamp="2024-05-01T10:22:03Z", number=4812)
+        cache.store(scope, stored, "hit", "stub-model", "sha256:" + "1" * 64)
+        near_duplicate = _PROMPT.format(timestamp="2025-02-11T08:00:00Z", number=4812)
+        miss = _PROMPT.format(timestamp="2024-05-01T10:22:03Z", number=9) + " Reply in French, please."
+        signature = cache.signature(near_duplicate)
+        keys = cache._bucket_keys(scope, signature)
+
+        assert cache.lookup(scope, near_duplicate) is not None
+        _report("signature only", _timed_ms(lambda: cache.signature(near_duplicate), args.lookups))
+        _report("index probe only", _timed_ms(lambda: cache._candidates(keys, scope), args.lookups))
+        _report("lookup (hit)", _timed_ms(lambda: cache.lookup(scope, near_duplicate), args.lookups))
+        _report("lookup (miss)", _timed_ms(lambda: cache.lookup(scope, miss), args.lookups))
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Per-request overhead of each HTTP transport against a local stub.
+
+Every transport keeps its connections pooled, so the numbers compare the
+client-side cost of building, sending and parsing requests rather than
+connection setup. Small responses keep the measurement on that overhead;
+stream time-to-first-chunk shows how quickly each engine hands over the
+first SSE event.
+
+Run from the repository root:
+
+    python benchmarks/bench_transports.py --requests 500 --transports requests,urllib3,httpx
+"""
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_upstream import StubUpstream  # noqa: E402
+
+from ai_prompt_runner.services.provider_factory import create_provider  # noqa: E402
+from ai_prompt_runner.services.transport import TRANSPORTS, create_transport  # noqa: E402
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500, help="Non-stream requests per transport.")
+    parser.add_argument("--streams", type=int, default=100, help="Streaming requests per transport.")
+    parser.add_argument("--response-chars", type=int, default=2_000)
+    parser.add_argument(
+        "--transports",
+        default=",".join(TRANSPORTS),
+        help="Comma-separated transports to measure (missing optional ones are skipped).",
+    )
+    args = parser.parse_args()
+
+    with StubUpstream(response_chars=args.response_chars) as upstream:
+        print(f"{'transport':>9} {'req/s':>8} {'p50 ms':>7} {'p99 ms':>7} {'ttfc p50 ms':>12}")
+        for name in args.transports.split(","):
+            try:
+                transport = create_transport(name)
+            except ImportError as exc:
+                print(f"{name:>9} skipped: {exc}")
+                continue
+            provider = create_provider(
+                "openai_compatible",
+                api_endpoint=upstream.url,
+                api_key="bench",
+                api_model="stub-model",
+                transport=transport,
+            )
+            # Warm the pool so connection setup is not measured.
+            provider.generate("warm-up")
+
+            latencies: list[float] = []
+            start = perf_counter()
+            for _ in range(args.requests):
+                sent = perf_counter()
+                provider.generate("ping")
+                latencies.append(perf_counter() - sent)
+            elapsed = perf_counter() - start
+
+            first_chunk: list[float] = []
+            for _ in range(args.streams):
+                sent = perf_counter()
+                for index, _chunk in enumerate(provider.generate_stream("ping")):
+                    if index == 0:
+                        first_chunk.append(perf_counter() - sent)
+            transport.close()
+
+            print(
+                f"{name:>9} {args.requests / elapsed:>8.1f} "
+                f"{statistics.median(latencies) * 1000:>7.2f} "
+                f"{_percentile(latencies, 0.99) * 1000:>7.2f} "
+                f"{statistics.median(first_chunk) * 1000:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
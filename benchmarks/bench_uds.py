@@ -0,0 +1,80 @@
+"""Request latency over loopback TCP versus a Unix domain socket.
+
+Local inference servers often listen on a Unix socket as well as a TCP
+port. This runs the same pooled, keep-alive request loop against the stub
+upstream on both, so the difference is the kernel socket path alone: no
+TCP/IP stack, checksums or loopback interface for the Unix socket.
+
+Run from the repository root:
+
+    python benchmarks/bench_uds.py --requests 2000 --response-chars 2000
+"""
+
+import argparse
+import statistics
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_upstream import StubUpstream, UnixStubUpstream  # noqa: E402
+
+from ai_prompt_runner.services.provider_factory import create_provider  # noqa: E402
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _measure(endpoint: str, transport: str, requests: int, streams: int) -> tuple[list[float], list[float]]:
+    """Return (request latencies, stream time-to-first-chunk) in seconds."""
+    provider = create_provider(
+        "openai_compatible",
+        api_endpoint=endpoint,
+        api_key="bench",
+        api_model="stub-model",
+        transport=transport,
+    )
+    # Warm the pool so connection setup is not measured.
+    provider.generate("warm-up")
+
+    latencies: list[float] = []
+    for _ in range(requests):
+        sent = perf_counter()
+        provider.generate("ping")
+        latencies.append(perf_counter() - sent)
+
+    first_chunk: list[float] = []
+    for _ in range(streams):
+        sent = perf_counter()
+        for index, _chunk in enumerate(provider.generate_stream("ping")):
+            if index == 0:
+                first_chunk.append(perf_counter() - sent)
+    provider.config.transport.close()
+    return latencies, first_chunk
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2_000, help="Non-stream requests per socket type.")
+    parser.add_argument("--streams", type=int, default=200, help="Streaming requests per socket type.")
+    parser.add_argument("--response-chars", type=int, default=2_000)
+    args = parser.parse_args()
+
+    print(f"{'socket':>6} {'req/s':>8} {'p50 ms':>7} {'p99 ms':>7} {'ttfc p50 ms':>12}")
+    for label, upstream_cls in (("tcp", StubUpstream), ("unix", UnixStubUpstream)):
+        with upstream_cls(response_chars=args.response_chars) as upstream:
+            # Both sides use the urllib3 engine, which Unix socket endpoints require.
+            latencies, first_chunk = _measure(upstream.url, "urllib3", args.requests, args.streams)
+        print(
+            f"{label:>6} {args.requests / sum(latencies):>8.1f} "
+            f"{statistics.median(latencies) * 1000:>7.3f} "
+            f"{_percentile(latencies, 0.99) * 1000:>7.3f} "
+            f"{statistics.median(first_chunk) * 1000:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
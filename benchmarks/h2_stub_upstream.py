@@ -0,0 +1,145 @@
+"""Local cleartext HTTP/2 (h2c, prior knowledge) stand-in for the stub upstream.
+
+Serves the same canned responses as `stub_upstream.StubUpstream`, but
+multiplexes every request over HTTP/2 streams, honours flow-control windows
+and counts accepted TCP connections so benchmarks can report how many
+sockets a client needed. Requires the `h2` package.
+
+Usage from a benchmark:
+
+    with H2StubUpstream(response_chars=2_000) as upstream:
+        endpoint = upstream.url  # speak HTTP/2 with prior knowledge
+        ...
+        upstream.connections  # TCP connections accepted so far
+"""
+
+import asyncio
+import json
+import threading
+
+import h2.config
+import h2.connection
+import h2.events
+import h2.exceptions
+import h2.settings
+
+from stub_upstream import render_response, stub_text
+
+
+class _H2Protocol(asyncio.Protocol):
+    def __init__(self, upstream: "H2StubUpstream") -> None:
+        self._upstream = upstream
+        self._conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding="utf-8")
+        )
+        self._requests: dict[int, tuple[str, bytearray]] = {}
+        # Response bytes waiting for flow-control window, per stream.
+        self._pending: dict[int, bytes] = {}
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self._transport = transport
+        self._upstream.connections += 1
+        # Advertised in the initial SETTINGS frame so the limit applies before
+        # any stream is opened.
+        self._conn.local_settings = h2.settings.Settings(
+            client=False,
+            initial_values={
+                h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: self._upstream.max_concurrent_streams
+            },
+        )
+        self._conn.initiate_connection()
+        transport.write(self._conn.data_to_send())
+
+    def data_received(self, data: bytes) -> None:
+        try:
+            events = self._conn.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self._transport.write(self._conn.data_to_send())
+            self._transport.close()
+            return
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                path = dict(event.headers).get(":path", "/")
+                self._requests[event.stream_id] = (path, bytearray())
+            elif isinstance(event, h2.events.DataReceived):
+                self._requests[event.stream_id][1].extend(event.data)
+                self._conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded):
+                self._respond(event.stream_id)
+            elif isinstance(event, h2.events.StreamReset):
+                self._requests.pop(event.stream_id, None)
+                self._pending.pop(event.stream_id, None)
+            elif isinstance(event, h2.events.WindowUpdated):
+                self._flush()
+        self._transport.write(self._conn.data_to_send())
+
+    def _respond(self, stream_id: int) -> None:
+        path, raw = self._requests.pop(stream_id)
+        try:
+            request = json.loads(raw or b"{}")
+        except ValueError:
+            request = {}
+        body, content_type = render_response(
+            path,
+            request if isinstance(request, dict) else {},
+            self._upstream.response_text,
+            self._upstream.stream_chunk_chars,
+        )
+        self._conn.send_headers(
+            stream_id,
+            [(":status", "200"), ("content-type", content_type), ("content-length", str(len(body)))],
+        )
+        self._pending[stream_id] = body
+        self._flush()
+
+    def _flush(self) -> None:
+        for stream_id, body in list(self._pending.items()):
+            while body:
+                window = min(
+                    self._conn.local_flow_control_window(stream_id),
+                    self._conn.max_outbound_frame_size,
+                )
+                if window <= 0:
+                    break
+                self._conn.send_data(stream_id, body[:window])
+                body = body[window:]
+            if body:
+                self._pending[stream_id] = body
+            else:
+                del self._pending[stream_id]
+                self._conn.end_stream(stream_id)
+
+
+class H2StubUpstream:
+    """Context manager running the h2c stub server on an ephemeral localhost port."""
+
+    def __init__(
+        self,
+        response_chars: int = 1000,
+        stream_chunk_chars: int = 64,
+        max_concurrent_streams: int = 250,
+    ) -> None:
+        self.response_text = stub_text(response_chars)
+        self.stream_chunk_chars = stream_chunk_chars
+        self.max_concurrent_streams = max_concurrent_streams
+        self.connections = 0
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(
+            self._loop.create_server(lambda: _H2Protocol(self), "127.0.0.1", 0)
+        )
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "H2StubUpstream":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
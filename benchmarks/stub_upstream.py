@@ -0,0 +1,159 @@
+"""Local stub upstream used by benchmarks (no network, no credentials).
+
+Serves canned responses for the provider protocols supported by the runner:
+
+- OpenAI-compatible: POST .../chat/completions (JSON or SSE when "stream": true)
+- generic http-json: any other POST path, returns {"response": "..."}
+
+Usage from a benchmark:
+
+    with StubUpstream(response_chars=200_000) as upstream:
+        endpoint = upstream.url  # e.g. http://127.0.0.1:54321
+
+`UnixStubUpstream` serves the same responses on a Unix domain socket.
+"""
+
+import json
+import os
+import socketserver
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_text(response_chars: int) -> str:
+    """Canned response text of exactly `response_chars` characters."""
+    return ("lorem ipsum dolor sit amet " * (response_chars // 27 + 1))[:response_chars]
+
+
+def render_response(path: str, request: dict, text: str, stream_chunk_chars: int) -> tuple[bytes, str]:
+    """Return (body, content type) answering `request` on `path` with `text`."""
+    if path.rstrip("/").endswith("/chat/completions"):
+        if request.get("stream"):
+            events = [
+                {"choices": [{"delta": {"content": text[i : i + stream_chunk_chars]}}]}
+                for i in range(0, len(text), stream_chunk_chars)
+            ]
+            events.append(
+                {"choices": [], "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30}}
+            )
+            body = "".join(f"data: {json.dumps(event)}\n\n" for event in events)
+            body += "data: [DONE]\n\n"
+            return body.encode("utf-8"), "text/event-stream"
+        completion = {
+            "model": request.get("model", "stub-model"),
+            "choices": [{"message": {"role": "assistant", "content": text}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30},
+        }
+        return json.dumps(completion).encode("utf-8"), "application/json"
+    return json.dumps({"response": text}).encode("utf-8"), "application/json"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # client's delayed ACK adds ~40 ms to every keep-alive request.
+    disable_nagle_algorithm = True
+    server: "_StubServer"
+
+    def log_message(self, format, *args) -> None:  # noqa: A002 - stdlib signature
+        """Silence per-request logging."""
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", "0"))
+        raw = self.rfile.read(length) if length else b"{}"
+        try:
+            body = json.loads(raw)
+        except ValueError:
+            return {}
+        return body if isinstance(body, dict) else {}
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:  # noqa: N802 - stdlib naming
+        body, content_type = render_response(
+            self.path,
+            self._read_json(),
+            self.server.response_text,
+            self.server.stream_chunk_chars,
+        )
+        self._send(200, body, content_type)
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    response_text: str
+    stream_chunk_chars: int
+    connections = 0
+
+    def verify_request(self, request, client_address) -> bool:
+        # Called once per accepted TCP connection.
+        self.connections += 1
+        return True
+
+
+class StubUpstream:
+    """Context manager running the stub server on an ephemeral localhost port."""
+
+    def __init__(self, response_chars: int = 1000, stream_chunk_chars: int = 64) -> None:
+        self._server = _StubServer(("127.0.0.1", 0), _StubHandler)
+        self._server.response_text = stub_text(response_chars)
+        self._server.stream_chunk_chars = stream_chunk_chars
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def connections(self) -> int:
+        """TCP connections accepted so far."""
+        return self._server.connections
+
+    def __enter__(self) -> "StubUpstream":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+class _UnixStubHandler(_StubHandler):
+    # TCP_NODELAY does not apply to AF_UNIX sockets.
+    disable_nagle_algorithm = False
+
+
+class _UnixStubServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    response_text: str
+    stream_chunk_chars: int
+    connections = 0
+    verify_request = _StubServer.verify_request
+
+
+class UnixStubUpstream(StubUpstream):
+    """Context manager running the stub server on a Unix socket in a temporary directory."""
+
+    def __init__(self, response_chars: int = 1000, stream_chunk_chars: int = 64) -> None:
+        self._directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self._directory.name, "stub.sock")
+        self._server = _UnixStubServer(self.socket_path, _UnixStubHandler)
+        self._server.response_text = stub_text(response_chars)
+        self._server.stream_chunk_chars = stream_chunk_chars
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"unix://{self.socket_path}"
+
+    def __exit__(self, *exc_info) -> None:
+        super().__exit__(*exc_info)
+        self._directory.cleanup()
@@ -1,5 +1,15 @@
 """ai_prompt_runner package."""
 
-from ai_prompt_runner.api import run_prompt
+from ai_prompt_runner.api import PromptClient, astream_prompt, run_prompt, stream_prompt
+from ai_prompt_runner.core.cancellation import CancellationToken
+from ai_prompt_runner.core.models import StreamChunkEvent, StreamCompletedEvent
 
-__all__ = ["run_prompt"]
+__all__ = [
+    "CancellationToken",
+    "PromptClient",
+    "StreamChunkEvent",
+    "StreamCompletedEvent",
+    "astream_prompt",
+    "run_prompt",
+    "stream_prompt",
+]
@@ -1,8 +1,51 @@
-"""Public Python API for one-shot prompt execution."""
+"""Public Python API for one-shot and long-lived prompt execution."""
 
-from ai_prompt_runner.core.models import PromptRequest
+import asyncio
+import queue
+import threading
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from ai_prompt_runner.core.cancellation import CancellationToken
+from ai_prompt_runner.core.errors import PromptRunnerError
+from ai_prompt_runner.core.models import PromptRequest, StreamEvent
 from ai_prompt_runner.core.runner import PromptRunner
-from ai_prompt_runner.services.provider_factory import create_provider
+from ai_prompt_runner.core.similarity_cache import DEFAULT_THRESHOLD, SimilarityCache
+from ai_prompt_runner.core.token_budget import TokenBudget, TokenRateLimiter
+from ai_prompt_runner.services.base import BaseProvider
+from ai_prompt_runner.services.mock_provider import MockProfile
+from ai_prompt_runner.services.provider_factory import (
+    ProviderRuntimeConfig,
+    ProviderSpec,
+    build_provider,
+    build_token_budget,
+    create_provider,
+    get_provider_spec,
+    resolve_provider_config,
+    resolve_transport,
+    wrap_cassette_transport,
+)
+from ai_prompt_runner.services.transport import Transport
+
+
+def _token_budget_for(
+    provider_name: str,
+    runner_provider: BaseProvider,
+    context_window: int | None,
+    context_policy: str,
+    tokens_per_minute: int | None,
+) -> TokenBudget:
+    """Build the pre-flight budget for a provider created by `create_provider`."""
+    return build_token_budget(
+        get_provider_spec(provider_name),
+        getattr(getattr(runner_provider, "config", None), "model", None),
+        context_window=context_window,
+        context_policy=context_policy,
+        tokens_per_minute=tokens_per_minute,
+    )
 
 
 def run_prompt(
@@ -14,17 +57,73 @@ def run_prompt(
     api_key: str | None = None,
     api_model: str | None = None,
     stream: bool = False,
+    stream_replays: int = 0,
     temperature: float | None = None,
     max_tokens: int | None = None,
     top_p: float | None = None,
+    stop: Sequence[str] | None = None,
+    max_response_chars: int | None = None,
+    samples: int | None = None,
     timeout_seconds: int | None = None,
     max_retries: int | None = None,
+    connect_timeout_seconds: float | None = None,
+    first_chunk_timeout_seconds: float | None = None,
+    stream_idle_timeout_seconds: float | None = None,
+    prompt_cache: bool = False,
+    keep_alive: str | None = None,
+    http_stream_mode: str | None = None,
+    transport: str = "requests",
+    context_window: int | None = None,
+    context_policy: str = "reject",
+    tokens_per_minute: int | None = None,
+    similarity_cache: str | Path | None = None,
+    similarity_threshold: float = DEFAULT_THRESHOLD,
+    record_dir: str | Path | None = None,
+    replay_dir: str | Path | None = None,
+    replay_timing: str = "instant",
+    mock_profile: str | Mapping[str, object] | MockProfile | None = None,
+    mock_seed: int | None = None,
+    deadline_seconds: float | None = None,
+    cancel_token: CancellationToken | None = None,
 ) -> dict:
     """
     Execute a prompt through the configured provider and return normalized payload.
 
     This function is intentionally thin and reuses the same execution pipeline as the CLI:
     provider creation -> PromptRunner -> normalized response contract.
+
+    `deadline_seconds` bounds the whole run (connection, retries and the full
+    stream); `cancel_token` aborts it from another thread. Both raise a
+    `PromptRunnerError` subclass and release the in-flight connection.
+    `stream_replays` (streaming with `temperature=0` only) re-issues a stream
+    that failed mid-way and skips the text that was already received.
+    `stop` and `max_response_chars` cut the response client-side; a stream
+    is closed as soon as either limit is met and the payload records it in
+    `metadata.truncation`. `prompt_cache` caches `system_prompt` as a
+    provider-side prefix (Anthropic and Google); cache hits and writes are
+    reported in `metadata.usage`. `keep_alive` (Ollama only) keeps the model
+    loaded between calls, e.g. `"30m"` or `"-1"`. `http_stream_mode`
+    (`ndjson`, `sse` or `text`) lets the `http` provider stream. `samples` above 1 (non-stream only) adds a
+    `responses` array with every completion; `response` is the first one.
+    `transport` selects the HTTP engine: `requests`, `urllib3` or `httpx`
+    (optional extra). Before dispatch the prompt and `max_tokens` are checked
+    against the model's context window (`context_window` overrides the
+    built-in table): `context_policy="reject"` raises
+    `ContextWindowExceededError`, `"trim"` shortens the prompt and `"off"`
+    skips the check. `tokens_per_minute` paces calls client-side.
+    `similarity_cache` names a near-duplicate cache file: a prompt whose
+    normalized text reaches `similarity_threshold` (estimated Jaccard
+    similarity) against a stored one with the same provider, model and
+    settings is answered from it, marked in `metadata.similarity_cache`.
+    `record_dir` saves every HTTP exchange (stream chunks with their timing,
+    credentials scrubbed) as a cassette; `replay_dir` answers from saved
+    cassettes without network access, `replay_timing="recorded"` pacing them
+    like the original exchange. A request that was never recorded raises
+    `CassetteMissError`.
+    `mock_profile` (provider `mock` only) simulates latency, throughput and
+    transient failures: a built-in name (`instant`, `fast`, `slow`,
+    `flaky`), a dict of profile fields or a `MockProfile`; `mock_seed`
+    makes its random draws reproducible.
     """
     runner_provider = create_provider(
         provider_name=provider,
@@ -33,8 +132,26 @@ def run_prompt(
         api_model=api_model,
         timeout_seconds=timeout_seconds,
         max_retries=max_retries,
+        connect_timeout_seconds=connect_timeout_seconds,
+        first_chunk_timeout_seconds=first_chunk_timeout_seconds,
+        stream_idle_timeout_seconds=stream_idle_timeout_seconds,
+        prompt_cache=prompt_cache,
+        keep_alive=keep_alive,
+        http_stream_mode=http_stream_mode,
+        transport=transport,
+        record_dir=record_dir,
+        replay_dir=replay_dir,
+        replay_timing=replay_timing,
+        mock_profile=mock_profile,
+        mock_seed=mock_seed,
+    )
+    runner = PromptRunner(
+        provider=runner_provider,
+        deadline_seconds=deadline_seconds,
+        token_budget=_token_budget_for(
+            provider, runner_provider, context_window, context_policy, tokens_per_minute
+        ),
     )
-    runner = PromptRunner(provider=runner_provider)
 
     request = PromptRequest(
         prompt_text=prompt,
@@ -43,8 +160,498 @@ def run_prompt(
         temperature=temperature,
         max_tokens=max_tokens,
         top_p=top_p,
+        stop=tuple(stop) if stop else None,
+        max_response_chars=max_response_chars,
+        samples=samples,
         stream=stream,
+        stream_replays=stream_replays,
+    )
+
+    if similarity_cache is not None:
+        runner.similarity_cache = SimilarityCache(similarity_cache, threshold=similarity_threshold)
+    try:
+        # Library mode does not stream to stdout; callers consume final payload only.
+        return runner.run(request=request, cancel_token=cancel_token)
+    finally:
+        if runner.similarity_cache is not None:
+            runner.similarity_cache.close()
+
+
+
+def stream_prompt(
+    prompt: str,
+    *,
+    provider: str = "openai",
+    system_prompt: str | None = None,
+    api_endpoint: str | None = None,
+    api_key: str | None = None,
+    api_model: str | None = None,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    top_p: float | None = None,
+    stop: Sequence[str] | None = None,
+    max_response_chars: int | None = None,
+    stream_replays: int = 0,
+    timeout_seconds: int | None = None,
+    max_retries: int | None = None,
+    connect_timeout_seconds: float | None = None,
+    first_chunk_timeout_seconds: float | None = None,
+    stream_idle_timeout_seconds: float | None = None,
+    prompt_cache: bool = False,
+    keep_alive: str | None = None,
+    http_stream_mode: str | None = None,
+    transport: str = "requests",
+    context_window: int | None = None,
+    context_policy: str = "reject",
+    tokens_per_minute: int | None = None,
+    similarity_cache: str | Path | None = None,
+    similarity_threshold: float = DEFAULT_THRESHOLD,
+    record_dir: str | Path | None = None,
+    replay_dir: str | Path | None = None,
+    replay_timing: str = "instant",
+    mock_profile: str | Mapping[str, object] | MockProfile | None = None,
+    mock_seed: int | None = None,
+    deadline_seconds: float | None = None,
+    cancel_token: CancellationToken | None = None,
+) -> Iterator[StreamEvent]:
+    """
+    Execute a prompt in streaming mode and yield typed events as they arrive.
+
+    Yields `StreamChunkEvent` objects for response fragments, then one
+    `StreamCompletedEvent` whose `payload` matches `run_prompt` and whose
+    `usage` carries provider token usage when available. Closing the
+    iterator early stops reading the provider stream. Deadline and
+    cancellation behave as in `run_prompt`; `first_chunk_timeout_seconds`
+    and `stream_idle_timeout_seconds` fail stalled streams early (a stall
+    before the first chunk is retried like a transport error). The context
+    window check, `tokens_per_minute` pacing, `similarity_cache` and the
+    record/replay and mock options behave as in `run_prompt`; a cached response
+    arrives as one chunk.
+    """
+    runner_provider = create_provider(
+        provider_name=provider,
+        api_endpoint=api_endpoint,
+        api_key=api_key,
+        api_model=api_model,
+        timeout_seconds=timeout_seconds,
+        max_retries=max_retries,
+        connect_timeout_seconds=connect_timeout_seconds,
+        first_chunk_timeout_seconds=first_chunk_timeout_seconds,
+        stream_idle_timeout_seconds=stream_idle_timeout_seconds,
+        prompt_cache=prompt_cache,
+        keep_alive=keep_alive,
+        http_stream_mode=http_stream_mode,
+        transport=transport,
+        record_dir=record_dir,
+        replay_dir=replay_dir,
+        replay_timing=replay_timing,
+        mock_profile=mock_profile,
+        mock_seed=mock_seed,
+    )
+    request = PromptRequest(
+        prompt_text=prompt,
+        provider=provider,
+        system_prompt=system_prompt,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        top_p=top_p,
+        stop=tuple(stop) if stop else None,
+        max_response_chars=max_response_chars,
+        stream=True,
+        stream_replays=stream_replays,
+    )
+    runner = PromptRunner(
+        provider=runner_provider,
+        deadline_seconds=deadline_seconds,
+        token_budget=_token_budget_for(
+            provider, runner_provider, context_window, context_policy, tokens_per_minute
+        ),
     )
+    if similarity_cache is not None:
+        runner.similarity_cache = SimilarityCache(similarity_cache, threshold=similarity_threshold)
+    try:
+        yield from runner.iter_run(request, cancel_token=cancel_token)
+    finally:
+        if runner.similarity_cache is not None:
+            runner.similarity_cache.close()
+
+
+async def _aiter_in_thread(iterator: Iterator[StreamEvent]) -> AsyncIterator[StreamEvent]:
+    """
+    Drive a blocking event iterator on one worker thread for async consumers.
+
+    Each event is handed to the loop as soon as it is produced (no per-chunk
+    thread hop). When the consumer stops early, the producer stops at the next
+    event and closes the underlying stream.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    finished = object()
+
+    def _publish(item: object, error: BaseException | None = None) -> None:
+        try:
+            loop.call_soon_threadsafe(events.put_nowait, (item, error))
+        except RuntimeError:
+            # The event loop closed while the stream was still running.
+            stop.set()
+
+    def _produce() -> None:
+        try:
+            for event in iterator:
+                if stop.is_set():
+                    break
+                _publish(event)
+        except BaseException as exc:  # noqa: BLE001 - re-raised in the consumer
+            _publish(finished, exc)
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if callable(close):
+                close()
+        _publish(finished)
+
+    threading.Thread(target=_produce, name="stream-prompt", daemon=True).start()
+    try:
+        while True:
+            item, error = await events.get()
+            if item is finished:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+async def astream_prompt(prompt: str, **options) -> AsyncIterator[StreamEvent]:
+    """
+    Async variant of `stream_prompt` with the same options and events.
+
+    Provider I/O stays blocking (`requests`), so one worker thread runs the
+    stream for its whole duration and publishes events to the running loop.
+    """
+    async for event in _aiter_in_thread(stream_prompt(prompt, **options)):
+        yield event
+
+
+@dataclass
+class _ProviderPool:
+    """Resolved config, shared transport and idle provider instances for one key."""
+
+    spec: ProviderSpec
+    config: ProviderRuntimeConfig
+    transport: Transport
+    token_budget: TokenBudget
+    idle: "queue.SimpleQueue[BaseProvider]"
+
+
+class PromptClient:
+    """
+    Long-lived prompt client with resolved configuration and pooled connections.
+
+    Configuration is resolved once per (provider, model) pair and every pair
+    owns one HTTP transport whose connections are reused across calls. Provider
+    instances keep per-call state (usage, resolved model), so each call checks
+    one out exclusively and returns it afterwards; concurrent calls therefore
+    never share an instance.
+
+    Payloads follow the same contract as `run_prompt`; `transport` and the
+    context window options behave as there. `tokens_per_minute` is one
+    budget shared by every call of the client, across threads and models;
+    `similarity_cache` is opened once and shared the same way. `record_dir`,
+    `replay_dir` and `replay_timing` wrap the pooled transports as in
+    `run_prompt`, and `mock_profile` / `mock_seed` configure the `mock`
+    provider as there.
+    """
+
+    def __init__(
+        self,
+        *,
+        provider: str = "openai",
+        api_endpoint: str | None = None,
+        api_key: str | None = None,
+        api_model: str | None = None,
+        timeout_seconds: int | None = None,
+        max_retries: int | None = None,
+        connect_timeout_seconds: float | None = None,
+        first_chunk_timeout_seconds: float | None = None,
+        stream_idle_timeout_seconds: float | None = None,
+        prompt_cache: bool = False,
+        keep_alive: str | None = None,
+        http_stream_mode: str | None = None,
+        transport: str = "requests",
+        context_window: int | None = None,
+        context_policy: str = "reject",
+        tokens_per_minute: int | None = None,
+        similarity_cache: str | Path | None = None,
+        similarity_threshold: float = DEFAULT_THRESHOLD,
+        record_dir: str | Path | None = None,
+        replay_dir: str | Path | None = None,
+        replay_timing: str = "instant",
+        mock_profile: str | Mapping[str, object] | MockProfile | None = None,
+        mock_seed: int | None = None,
+        max_workers: int = 8,
+    ) -> None:
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0.")
+        self.provider = provider
+        self.api_model = api_model
+        self.max_workers = max_workers
+        self._api_endpoint = api_endpoint
+        self._api_key = api_key
+        self._timeout_seconds = timeout_seconds
+        self._max_retries = max_retries
+        self._connect_timeout_seconds = connect_timeout_seconds
+        self._first_chunk_timeout_seconds = first_chunk_timeout_seconds
+        self._stream_idle_timeout_seconds = stream_idle_timeout_seconds
+        self._prompt_cache = prompt_cache
+        self._keep_alive = keep_alive
+        self._http_stream_mode = http_stream_mode
+        self._transport = transport
+        self._record_dir = record_dir
+        self._replay_dir = replay_dir
+        self._replay_timing = replay_timing
+        self._mock_profile = mock_profile
+        self._mock_seed = mock_seed
+        self._context_window = context_window
+        self._context_policy = context_policy
+        self._rate_limiter = (
+            TokenRateLimiter(tokens_per_minute) if tokens_per_minute is not None else None
+        )
+        self._similarity_cache = (
+            SimilarityCache(similarity_cache, threshold=similarity_threshold)
+            if similarity_cache is not None
+            else None
+        )
+        self._pools: dict[tuple[str, str | None], _ProviderPool] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        # Fail fast on invalid configuration instead of on the first call.
+        self._pool(provider, api_model)
+
+    def __enter__(self) -> "PromptClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _pool(self, provider: str, api_model: str | None) -> _ProviderPool:
+        """Return the pool for one (provider, model) pair, resolving it once."""
+        key = (provider, api_model)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("PromptClient is closed.")
+            pool = self._pools.get(key)
+            if pool is None:
+                spec, config = resolve_provider_config(
+                    provider_name=provider,
+                    api_endpoint=self._api_endpoint,
+                    api_key=self._api_key,
+                    api_model=api_model,
+                    timeout_seconds=self._timeout_seconds,
+                    max_retries=self._max_retries,
+                    connect_timeout_seconds=self._connect_timeout_seconds,
+                    first_chunk_timeout_seconds=self._first_chunk_timeout_seconds,
+                    stream_idle_timeout_seconds=self._stream_idle_timeout_seconds,
+                    prompt_cache=self._prompt_cache,
+                    keep_alive=self._keep_alive,
+                    http_stream_mode=self._http_stream_mode,
+                    mock_profile=self._mock_profile,
+                    mock_seed=self._mock_seed,
+                )
+                transport = wrap_cassette_transport(
+                    resolve_transport(self._transport, pool_maxsize=self.max_workers, endpoint=config.endpoint),
+                    config,
+                    self._record_dir,
+                    self._replay_dir,
+                    self._replay_timing,
+                )
+                pool = _ProviderPool(
+                    spec=spec,
+                    config=replace(config, transport=transport),
+                    transport=transport,
+                    token_budget=build_token_budget(
+                        spec,
+                        config.model,
+                        context_window=self._context_window,
+                        context_policy=self._context_policy,
+                        tokens_per_minute=self._rate_limiter,
+                    ),
+                    idle=queue.SimpleQueue(),
+                )
+                self._pools[key] = pool
+            return pool
+
+    @contextmanager
+    def _checkout(
+        self,
+        provider: str | None,
+        api_model: str | None,
+        deadline_seconds: float | None,
+    ) -> Iterator[PromptRunner]:
+        """Lend a runner over one pooled provider instance for the duration of a call."""
+        pool = self._pool(provider or self.provider, api_model or self.api_model)
+        try:
+            instance = pool.idle.get_nowait()
+        except queue.Empty:
+            instance = build_provider(pool.spec, pool.config)
+        try:
+            yield PromptRunner(
+                provider=instance,
+                deadline_seconds=deadline_seconds,
+                token_budget=pool.token_budget,
+                similarity_cache=self._similarity_cache,
+            )
+        finally:
+            pool.idle.put(instance)
+
+    def run(
+        self,
+        prompt: str,
+        *,
+        system_prompt: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        top_p: float | None = None,
+        stop: Sequence[str] | None = None,
+        max_response_chars: int | None = None,
+        samples: int | None = None,
+        provider: str | None = None,
+        api_model: str | None = None,
+        deadline_seconds: float | None = None,
+        cancel_token: CancellationToken | None = None,
+    ) -> dict:
+        """Execute one prompt and return the normalized payload."""
+        with self._checkout(provider, api_model, deadline_seconds) as runner:
+            return runner.run(
+                PromptRequest(
+                    prompt_text=prompt,
+                    provider=provider or self.provider,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    top_p=top_p,
+                    stop=tuple(stop) if stop else None,
+                    max_response_chars=max_response_chars,
+                    samples=samples,
+                ),
+                cancel_token=cancel_token,
+            )
+
+    def stream(
+        self,
+        prompt: str,
+        on_chunk: Callable[[str], None],
+        *,
+        system_prompt: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        top_p: float | None = None,
+        stop: Sequence[str] | None = None,
+        max_response_chars: int | None = None,
+        stream_replays: int = 0,
+        provider: str | None = None,
+        api_model: str | None = None,
+        deadline_seconds: float | None = None,
+        cancel_token: CancellationToken | None = None,
+    ) -> dict:
+        """
+        Execute one prompt in streaming mode.
+
+        Chunks are handed to `on_chunk` as they arrive; the normalized payload
+        is returned once the stream completes.
+        """
+        with self._checkout(provider, api_model, deadline_seconds) as runner:
+            return runner.run(
+                PromptRequest(
+                    prompt_text=prompt,
+                    provider=provider or self.provider,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    top_p=top_p,
+                    stop=tuple(stop) if stop else None,
+                    max_response_chars=max_response_chars,
+                    stream=True,
+                    stream_replays=stream_replays,
+                ),
+                on_stream_chunk=on_chunk,
+                cancel_token=cancel_token,
+            )
+
+    def iter_stream(
+        self,
+        prompt: str,
+        *,
+        system_prompt: str | None = None,
+        temperature: float | None = None,
+        max_tokens: int | None = None,
+        top_p: float | None = None,
+        stop: Sequence[str] | None = None,
+        max_response_chars: int | None = None,
+        stream_replays: int = 0,
+        provider: str | None = None,
+        api_model: str | None = None,
+        deadline_seconds: float | None = None,
+        cancel_token: CancellationToken | None = None,
+    ) -> Iterator[StreamEvent]:
+        """
+        Execute one prompt and yield typed stream events (see `stream_prompt`).
+
+        The pooled provider instance stays checked out until the iterator is
+        exhausted or closed.
+        """
+        with self._checkout(provider, api_model, deadline_seconds) as runner:
+            yield from runner.iter_run(
+                PromptRequest(
+                    prompt_text=prompt,
+                    provider=provider or self.provider,
+                    system_prompt=system_prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    top_p=top_p,
+                    stop=tuple(stop) if stop else None,
+                    max_response_chars=max_response_chars,
+                    stream=True,
+                    stream_replays=stream_replays,
+                ),
+                cancel_token=cancel_token,
+            )
+
+    def run_many(
+        self,
+        prompts: Iterable[str],
+        *,
+        return_exceptions: bool = False,
+        **request_options,
+    ) -> list[dict | PromptRunnerError]:
+        """
+        Execute prompts concurrently (up to `max_workers`) and keep input order.
+
+        With `return_exceptions=True`, failed prompts yield their
+        `PromptRunnerError` in place of a payload instead of raising.
+        `request_options` are forwarded to `run` for every prompt.
+        """
+
+        def _run_one(prompt: str) -> dict | PromptRunnerError:
+            try:
+                return self.run(prompt, **request_options)
+            except PromptRunnerError as exc:
+                if return_exceptions:
+                    return exc
+                raise
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(_run_one, prompts))
 
-    # Library mode does not stream to stdout; callers consume final payload only.
-    return runner.run(request=request)
+    def close(self) -> None:
+        """Release pooled connections; the client cannot be used afterwards."""
+        with self._lock:
+            self._closed = True
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.transport.close()
+        if self._similarity_cache is not None:
+            self._similarity_cache.close()
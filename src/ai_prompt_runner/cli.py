@@ -3,27 +3,76 @@
 import argparse
 import json
 import os
+import socket
 import sys
 import tomllib
-from dataclasses import asdict
+from collections.abc import Iterator
+from contextlib import closing
+from dataclasses import asdict, replace
 from datetime import datetime, timezone
+from functools import partial
 from hashlib import sha256
 from pathlib import Path
 
 from importlib.metadata import PackageNotFoundError, version
 from dotenv import load_dotenv
 
+from ai_prompt_runner.core.batch import (
+    BatchItem,
+    BatchRequestDefaults,
+    BatchSummary,
+    filter_hash_shard,
+    iter_batch_items,
+    run_batch,
+)
+from ai_prompt_runner.core.cache_schedule import run_batch_cache_scheduled
+from ai_prompt_runner.core.dedup import DedupPlan, ResultFanOut, dedup_key
 from ai_prompt_runner.core.error_taxonomy import normalize_runtime_error
 from ai_prompt_runner.core.errors import PromptRunnerError
+from ai_prompt_runner.core.loadtest import ARRIVAL_SCHEDULES, LoadTestProgress, LoadTestSettings, run_load_test
 from ai_prompt_runner.core.models import PromptRequest
+from ai_prompt_runner.core.parallel import pooled_provider, run_batch_parallel
 from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.core.similarity_cache import SimilarityCache, SimilarityCacheError
+from ai_prompt_runner.core.token_budget import CONTEXT_POLICIES, TokenBudget
+from ai_prompt_runner.core.shard_merge import (
+    MergeReport,
+    apply_summaries,
+    iter_result_lines,
+    load_shard_run_log,
+    merge_result_streams,
+    merge_run_logs,
+)
+from ai_prompt_runner.core.work_queue import WorkQueue, run_worker
+from ai_prompt_runner.services.native_batch import (
+    NativeBatchJob,
+    collect_native_batch,
+    file_sha256,
+    native_batch_adapter,
+    new_job,
+    submit_native_batch,
+    wait_for_batch,
+)
+from ai_prompt_runner.services.cassette import REPLAY_TIMINGS
+from ai_prompt_runner.services.http_provider import HTTP_STREAM_MODES
+from ai_prompt_runner.services.mock_provider import MOCK_PROFILES, resolve_mock_profile
+from ai_prompt_runner.services.ollama_provider import normalize_keep_alive
 from ai_prompt_runner.services.provider_factory import (
     ConfigurationError,
     ProviderSpec,
+    build_token_budget,
     create_provider,
+    effective_capabilities,
     get_provider_spec,
 )
-from ai_prompt_runner.utils.file_io import write_json, write_markdown
+from ai_prompt_runner.services.transport import TRANSPORTS, unix_socket_url
+from ai_prompt_runner.utils.file_io import JsonlWriter, write_json, write_markdown
+from ai_prompt_runner.utils.jsonl_input import (
+    JsonlInputReader,
+    ShardSpec,
+    iter_read_ahead,
+    parse_shard_spec,
+)
 
 # Define exit codes
 EXIT_OK = 0
@@ -57,12 +106,18 @@ def _non_blank_text(value: str) -> str:
 
 
 def _http_url(value: str) -> str:
-    """Argparse validator: endpoint must be an http/https URL."""
+    """Argparse validator: endpoint must be an http/https URL or a Unix socket endpoint."""
     normalized = value.strip()
     if not normalized:
         raise argparse.ArgumentTypeError("api-endpoint must not be empty.")
-    if not (normalized.startswith("http://") or normalized.startswith("https://")):
-        raise argparse.ArgumentTypeError("api-endpoint must start with http:// or https://.")
+    try:
+        is_unix_socket = unix_socket_url(normalized) is not None
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"api-endpoint: {exc}") from exc
+    if not (is_unix_socket or normalized.startswith("http://") or normalized.startswith("https://")):
+        raise argparse.ArgumentTypeError(
+            "api-endpoint must start with http://, https://, unix:// or http+unix://."
+        )
     return normalized
     
 def _positive_int(value: str) -> int:
@@ -77,6 +132,50 @@ def _positive_int(value: str) -> int:
     return parsed
 
 
+def _keep_alive(value: str) -> str:
+    """Argparse validator: seconds or a duration string such as 30m, 1h or -1."""
+    try:
+        return normalize_keep_alive(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+
+
+def _positive_float(value: str) -> float:
+    """Argparse validator: duration must be a strictly positive float."""
+    try:
+        parsed = float(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError("value must be a number.") from exc
+
+    if parsed <= 0:
+        raise argparse.ArgumentTypeError("value must be greater than 0.")
+    return parsed
+
+
+def _similarity_threshold(value: str) -> float:
+    """Argparse validator: Jaccard threshold in (0, 1]."""
+    try:
+        parsed = float(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError("value must be a number.") from exc
+
+    if not 0 < parsed <= 1:
+        raise argparse.ArgumentTypeError("value must be greater than 0 and at most 1.")
+    return parsed
+
+
+def _stop_sequence(value: str) -> str:
+    """Argparse validator: a stop sequence must be a non-empty string."""
+    if not value:
+        raise argparse.ArgumentTypeError("stop sequence must not be empty.")
+    return value
+
+
+def _stop_sequences(args: argparse.Namespace) -> tuple[str, ...] | None:
+    """Return the configured stop sequences in request form."""
+    return tuple(args.stop) if args.stop else None
+
+
 def _non_negative_float(value: str) -> float:
     """Argparse validator: temperature must be a float >= 0."""
     try:
@@ -108,6 +207,23 @@ def _prompt_file_text(value: str) -> str:
         raise argparse.ArgumentTypeError(f"prompt-file could not be read: {exc}") from exc
     return _non_blank_text(content)
 
+
+def _input_jsonl_path(value: str) -> str:
+    """Argparse validator: batch input must be an existing regular file."""
+    path = Path(value)
+    if not path.is_file():
+        raise argparse.ArgumentTypeError(f"input-jsonl could not be read: {value}")
+    return str(path)
+
+
+def _shard_spec(value: str) -> ShardSpec:
+    """Argparse validator: shard must use the `i/N` form with 0 <= i < N."""
+    try:
+        return parse_shard_spec(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+
+
 def _resolve_prompt_text(args: argparse.Namespace) -> str:
     """Resolve prompt from CLI args first, then piped stdin."""
     if args.prompt is not None:
@@ -173,6 +289,14 @@ def _build_run_request_log_payload(
             "top_p": args.top_p,
         },
     }
+    if args.input_jsonl is not None:
+        payload["batch"] = {
+            "input_jsonl": args.input_jsonl,
+            "shard": args.shard.label() if args.shard is not None else None,
+            "shard_by": args.shard_by,
+            "dedup": args.dedup,
+            "schedule": args.schedule,
+        }
     if effective_config is not None:
         payload["effective_config"] = effective_config
     return payload
@@ -220,6 +344,13 @@ def _write_run_response_log(run_log_dir: Path | None, payload: dict) -> None:
     write_json(run_log_dir / "response.json", payload)
 
 
+def _write_run_summary_log(run_log_dir: Path | None, summary: BatchSummary) -> None:
+    """Write aggregated batch counters for run diagnostics."""
+    if run_log_dir is None:
+        return
+    write_json(run_log_dir / "summary.json", summary.to_dict())
+
+
 def _runtime_secret_candidates(api_key: str | None) -> tuple[str, ...]:
     """Collect runtime secret values that must never be persisted in logs."""
     candidates: list[str] = []
@@ -294,8 +425,31 @@ def _merge_runtime_config(args: argparse.Namespace) -> argparse.Namespace:
         "top_p",
         "timeout",
         "retries",
+        "connect_timeout",
+        "first_chunk_timeout",
+        "stream_idle_timeout",
+        "deadline",
+        "stream_replays",
+        "stop",
+        "max_response_chars",
+        "samples",
+        "prompt_cache",
+        "keep_alive",
+        "http_stream_mode",
+        "transport",
+        "context_window",
+        "context_policy",
+        "tokens_per_minute",
+        "similarity_cache",
+        "similarity_threshold",
+        "record_dir",
+        "replay_dir",
+        "replay_timing",
+        "mock_profile",
+        "mock_seed",
         "out_json",
         "out_md",
+        "out_jsonl",
         "log_run_dir",
     }
     unknown_keys = sorted(set(config.keys()) - allowed_keys)
@@ -327,8 +481,31 @@ def _merge_runtime_config(args: argparse.Namespace) -> argparse.Namespace:
     args.top_p = _pick_no_env(getattr(args, "top_p", None), "top_p", None)
     args.timeout = _pick_no_env(getattr(args, "timeout", None), "timeout", 30)
     args.retries = _pick_no_env(getattr(args, "retries", None), "retries", 0)
+    args.connect_timeout = _pick_no_env(getattr(args, "connect_timeout", None), "connect_timeout", None)
+    args.first_chunk_timeout = _pick_no_env(getattr(args, "first_chunk_timeout", None), "first_chunk_timeout", None)
+    args.stream_idle_timeout = _pick_no_env(getattr(args, "stream_idle_timeout", None), "stream_idle_timeout", None)
+    args.deadline = _pick_no_env(getattr(args, "deadline", None), "deadline", None)
+    args.stream_replays = _pick_no_env(getattr(args, "stream_replays", None), "stream_replays", 0)
+    args.stop = _pick_no_env(getattr(args, "stop", None), "stop", None)
+    args.max_response_chars = _pick_no_env(getattr(args, "max_response_chars", None), "max_response_chars", None)
+    args.samples = _pick_no_env(getattr(args, "samples", None), "samples", None)
+    args.prompt_cache = _pick_no_env(getattr(args, "prompt_cache", None), "prompt_cache", False)
+    args.keep_alive = _pick_no_env(getattr(args, "keep_alive", None), "keep_alive", None)
+    args.http_stream_mode = _pick_no_env(getattr(args, "http_stream_mode", None), "http_stream_mode", None)
+    args.transport = _pick_no_env(getattr(args, "transport", None), "transport", "requests")
+    args.context_window = _pick_no_env(getattr(args, "context_window", None), "context_window", None)
+    args.context_policy = _pick_no_env(getattr(args, "context_policy", None), "context_policy", "reject")
+    args.tokens_per_minute = _pick_no_env(getattr(args, "tokens_per_minute", None), "tokens_per_minute", None)
+    args.similarity_cache = _pick_no_env(getattr(args, "similarity_cache", None), "similarity_cache", None)
+    args.similarity_threshold = _pick_no_env(getattr(args, "similarity_threshold", None), "similarity_threshold", 0.9)
+    args.record_dir = _pick_no_env(getattr(args, "record_dir", None), "record_dir", None)
+    args.replay_dir = _pick_no_env(getattr(args, "replay_dir", None), "replay_dir", None)
+    args.replay_timing = _pick_no_env(getattr(args, "replay_timing", None), "replay_timing", "instant")
+    args.mock_profile = _pick_no_env(getattr(args, "mock_profile", None), "mock_profile", None)
+    args.mock_seed = _pick_no_env(getattr(args, "mock_seed", None), "mock_seed", None)
     args.out_json = _pick_no_env(getattr(args, "out_json", None), "out_json", "outputs/response.json")
     args.out_md = _pick_no_env(getattr(args, "out_md", None), "out_md", "outputs/response.md")
+    args.out_jsonl = _pick_no_env(getattr(args, "out_jsonl", None), "out_jsonl", "outputs/responses.jsonl")
     args.log_run_dir = _pick_no_env(getattr(args, "log_run_dir", None), "log_run_dir", None)
 
     # Validate TOML-provided values with the same CLI validators where applicable.
@@ -346,12 +523,68 @@ def _merge_runtime_config(args: argparse.Namespace) -> argparse.Namespace:
         args.timeout = _positive_int(str(args.timeout))
     if "retries" in config:
         args.retries = _non_negative_int(str(args.retries))
+    if "connect_timeout" in config and args.connect_timeout is not None:
+        args.connect_timeout = _positive_float(str(args.connect_timeout))
+    if "first_chunk_timeout" in config and args.first_chunk_timeout is not None:
+        args.first_chunk_timeout = _positive_float(str(args.first_chunk_timeout))
+    if "stream_idle_timeout" in config and args.stream_idle_timeout is not None:
+        args.stream_idle_timeout = _positive_float(str(args.stream_idle_timeout))
+    if "deadline" in config and args.deadline is not None:
+        args.deadline = _positive_float(str(args.deadline))
+    if "stream_replays" in config:
+        args.stream_replays = _non_negative_int(str(args.stream_replays))
+    if "stop" in config and args.stop is not None:
+        if isinstance(args.stop, str) or not isinstance(args.stop, list):
+            raise argparse.ArgumentTypeError("config key 'stop' must be a list of strings.")
+        args.stop = [_stop_sequence(str(sequence)) for sequence in args.stop]
+    if "max_response_chars" in config and args.max_response_chars is not None:
+        args.max_response_chars = _positive_int(str(args.max_response_chars))
+    if "samples" in config and args.samples is not None:
+        args.samples = _positive_int(str(args.samples))
+    if "prompt_cache" in config and not isinstance(args.prompt_cache, bool):
+        raise argparse.ArgumentTypeError("config key 'prompt_cache' must be a boolean.")
+    if "keep_alive" in config and args.keep_alive is not None:
+        args.keep_alive = _keep_alive(str(args.keep_alive))
+    if "http_stream_mode" in config and args.http_stream_mode not in HTTP_STREAM_MODES:
+        raise argparse.ArgumentTypeError(
+            f"config key 'http_stream_mode' must be one of: {', '.join(HTTP_STREAM_MODES)}."
+        )
+    if "transport" in config and args.transport not in TRANSPORTS:
+        raise argparse.ArgumentTypeError(f"config key 'transport' must be one of: {', '.join(TRANSPORTS)}.")
+    if "context_window" in config and args.context_window is not None:
+        args.context_window = _positive_int(str(args.context_window))
+    if "context_policy" in config and args.context_policy not in CONTEXT_POLICIES:
+        raise argparse.ArgumentTypeError(
+            f"config key 'context_policy' must be one of: {', '.join(CONTEXT_POLICIES)}."
+        )
+    if "tokens_per_minute" in config and args.tokens_per_minute is not None:
+        args.tokens_per_minute = _positive_int(str(args.tokens_per_minute))
+    if "similarity_cache" in config and args.similarity_cache is not None:
+        args.similarity_cache = str(args.similarity_cache)
+    if "similarity_threshold" in config:
+        args.similarity_threshold = _similarity_threshold(str(args.similarity_threshold))
+    if "record_dir" in config and args.record_dir is not None:
+        args.record_dir = str(args.record_dir)
+    if "replay_dir" in config and args.replay_dir is not None:
+        args.replay_dir = str(args.replay_dir)
+    if "replay_timing" in config and args.replay_timing not in REPLAY_TIMINGS:
+        raise argparse.ArgumentTypeError(f"config key 'replay_timing' must be one of: {', '.join(REPLAY_TIMINGS)}.")
+    if "mock_profile" in config and isinstance(args.mock_profile, (str, dict)):
+        # A name selects a built-in profile; a table defines a custom one.
+        try:
+            args.mock_profile = resolve_mock_profile(args.mock_profile)
+        except ValueError as exc:
+            raise argparse.ArgumentTypeError(f"config key 'mock_profile': {exc}") from exc
+    if "mock_seed" in config and args.mock_seed is not None:
+        args.mock_seed = _non_negative_int(str(args.mock_seed))
     if "provider" in config:
         args.provider = str(args.provider).strip() or "http"
     if "out_json" in config:
         args.out_json = str(args.out_json)
     if "out_md" in config:
         args.out_md = str(args.out_md)
+    if "out_jsonl" in config:
+        args.out_jsonl = str(args.out_jsonl)
     if "log_run_dir" in config and args.log_run_dir is not None:
         args.log_run_dir = str(args.log_run_dir).strip() or None
 
@@ -384,12 +617,13 @@ def _evaluate_provider_capabilities(
     errors: list[str] = []
 
     requested = _requested_capabilities(args)
+    capabilities = effective_capabilities(provider_spec, getattr(args, "http_stream_mode", None))
 
     for capability_name, is_requested in requested.items():
         if not is_requested:
             continue
 
-        capability_state = getattr(provider_spec.capabilities, capability_name)
+        capability_state = getattr(capabilities, capability_name)
         if capability_state == "supported":
             continue
 
@@ -410,6 +644,11 @@ def _evaluate_provider_capabilities(
     return warnings, errors
 
 
+def _resolved_model(provider, args: argparse.Namespace) -> str | None:
+    """Return the model the provider was built with, falling back to --api-model."""
+    return getattr(getattr(provider, "config", None), "model", args.api_model)
+
+
 def _provider_runtime_snapshot(provider, args: argparse.Namespace) -> dict[str, object]:
     """
     Build a sanitized runtime snapshot from provider config when available.
@@ -421,6 +660,15 @@ def _provider_runtime_snapshot(provider, args: argparse.Namespace) -> dict[str,
     model = getattr(config, "model", args.api_model)
     timeout_seconds = getattr(config, "timeout_seconds", args.timeout)
     max_retries = getattr(config, "max_retries", args.retries)
+    connect_timeout_seconds = getattr(config, "connect_timeout_seconds", args.connect_timeout)
+    first_chunk_timeout_seconds = getattr(config, "first_chunk_timeout_seconds", args.first_chunk_timeout)
+    stream_idle_timeout_seconds = getattr(config, "stream_idle_timeout_seconds", args.stream_idle_timeout)
+    prompt_cache = getattr(config, "prompt_cache", args.prompt_cache)
+    keep_alive = getattr(config, "keep_alive", args.keep_alive)
+    http_stream_mode = getattr(config, "stream_mode", args.http_stream_mode)
+    configured_transport = getattr(config, "transport", None)
+    # A recording transport reports the engine it sends through.
+    transport = getattr(getattr(configured_transport, "inner", configured_transport), "name", args.transport)
     raw_api_key = getattr(config, "api_key", None)
 
     return {
@@ -429,6 +677,14 @@ def _provider_runtime_snapshot(provider, args: argparse.Namespace) -> dict[str,
         "model": model,
         "timeout_seconds": timeout_seconds,
         "max_retries": max_retries,
+        "connect_timeout_seconds": connect_timeout_seconds,
+        "first_chunk_timeout_seconds": first_chunk_timeout_seconds,
+        "stream_idle_timeout_seconds": stream_idle_timeout_seconds,
+        "prompt_cache": prompt_cache,
+        "keep_alive": keep_alive,
+        "http_stream_mode": http_stream_mode,
+        "transport": transport,
+        "deadline_seconds": args.deadline,
     }
 
 
@@ -439,9 +695,10 @@ def _build_effective_config_payload(
     warnings: list[str],
     errors: list[str],
     prompt_text: str | None,
+    token_budget: TokenBudget | None = None,
 ) -> dict[str, object]:
     """Return JSON-serializable effective configuration diagnostics."""
-    return {
+    payload = {
         "provider": {
             "name": provider_spec.provider_id,
             **_provider_runtime_snapshot(provider, args),
@@ -453,6 +710,9 @@ def _build_effective_config_payload(
             "temperature": args.temperature,
             "max_tokens": args.max_tokens,
             "top_p": args.top_p,
+            "stop": list(args.stop) if args.stop else None,
+            "max_response_chars": args.max_response_chars,
+            "samples": args.samples,
         },
         "capabilities": asdict(provider_spec.capabilities),
         "capability_validation": {
@@ -461,6 +721,783 @@ def _build_effective_config_payload(
             "errors": errors,
         },
     }
+    if token_budget is not None:
+        payload["token_budget"] = {
+            "token_family": token_budget.family,
+            "context_window": token_budget.context_window,
+            "context_policy": token_budget.policy,
+            "tokens_per_minute": args.tokens_per_minute,
+        }
+    if args.similarity_cache is not None:
+        payload["similarity_cache"] = {
+            "path": args.similarity_cache,
+            "threshold": args.similarity_threshold,
+        }
+    if args.record_dir is not None:
+        payload["cassettes"] = {"mode": "record", "directory": args.record_dir}
+    elif args.replay_dir is not None:
+        payload["cassettes"] = {"mode": "replay", "directory": args.replay_dir, "timing": args.replay_timing}
+    if args.mock_profile is not None:
+        payload["mock"] = {
+            "profile": asdict(resolve_mock_profile(args.mock_profile)),
+            "seed": args.mock_seed,
+        }
+    return payload
+
+
+def _single_run_request(args: argparse.Namespace, prompt_text: str | None) -> PromptRequest:
+    """Build the request of a single (non-batch) run from resolved arguments."""
+    return PromptRequest(
+        prompt_text=prompt_text or "",
+        provider=args.provider,
+        system_prompt=args.system,
+        temperature=args.temperature,
+        max_tokens=args.max_tokens,
+        top_p=args.top_p,
+        stream=args.stream,
+        stream_replays=args.stream_replays,
+        stop=_stop_sequences(args),
+        max_response_chars=args.max_response_chars,
+        samples=args.samples,
+    )
+
+
+def _run_batch(
+    args: argparse.Namespace,
+    runner: PromptRunner,
+    run_log_dir: Path | None,
+    secret_values: tuple[str, ...],
+) -> int:
+    """
+    Execute every record of --input-jsonl (or one shard of it).
+
+    Per-item failures are written to the output JSONL and do not stop the run;
+    only input/output failures abort the batch.
+    """
+    defaults = BatchRequestDefaults(
+        provider=args.provider,
+        system_prompt=args.system,
+        temperature=args.temperature,
+        max_tokens=args.max_tokens,
+        top_p=args.top_p,
+        stop=_stop_sequences(args),
+        max_response_chars=args.max_response_chars,
+        samples=args.samples,
+    )
+
+    try:
+        with JsonlInputReader(args.input_jsonl) as reader, JsonlWriter(
+            Path(args.out_jsonl)
+        ) as writer:
+            byte_shard = args.shard if args.shard_by == "bytes" else None
+
+            def _iter_items() -> Iterator[BatchItem]:
+                batch_items = iter_batch_items(reader.iter_records(byte_shard), defaults)
+                if args.shard is not None and args.shard_by == "hash":
+                    batch_items = filter_hash_shard(
+                        batch_items,
+                        shard_index=args.shard.index,
+                        shard_count=args.shard.count,
+                    )
+                return batch_items
+
+            fan_out = None
+            if args.dedup:
+                # Planning re-reads the memory-mapped input (two cheap passes)
+                # so execution knows exactly how often each request repeats.
+                plan = DedupPlan.build(
+                    keys=lambda: (
+                        dedup_key(item.request, args.api_model)
+                        for item in _iter_items()
+                        if item.request is not None
+                    ),
+                    expected_items=reader.line_count,
+                )
+                fan_out = ResultFanOut(plan=plan, model=args.api_model)
+
+            items = iter_read_ahead(_iter_items(), max_pending=args.read_ahead)
+            shard_label = args.shard.label() if args.shard is not None else None
+            with closing(items):
+                if args.processes > 1:
+                    # Each worker process builds its own provider, with its own
+                    # connection pool, from the already-resolved CLI settings.
+                    summary = run_batch_parallel(
+                        provider_factory=partial(
+                            pooled_provider,
+                            create_provider,
+                            provider_name=args.provider,
+                            api_endpoint=args.api_endpoint,
+                            api_key=args.api_key,
+                            api_model=args.api_model,
+                            timeout_seconds=args.timeout,
+                            max_retries=args.retries,
+                            connect_timeout_seconds=args.connect_timeout,
+                            first_chunk_timeout_seconds=args.first_chunk_timeout,
+                            stream_idle_timeout_seconds=args.stream_idle_timeout,
+                            prompt_cache=args.prompt_cache,
+                            keep_alive=args.keep_alive,
+                            http_stream_mode=args.http_stream_mode,
+                            transport=args.transport,
+                            record_dir=args.record_dir,
+                            replay_dir=args.replay_dir,
+                            replay_timing=args.replay_timing,
+                            mock_profile=args.mock_profile,
+                            mock_seed=args.mock_seed,
+                        ),
+                        items=items,
+                        provider=args.provider,
+                        on_result=lambda result: writer.write_line(result.to_json()),
+                        processes=args.processes,
+                        # Every process paces its share of --tokens-per-minute.
+                        token_budget_factory=partial(
+                            build_token_budget,
+                            get_provider_spec(args.provider),
+                            _resolved_model(runner.provider, args),
+                            context_window=args.context_window,
+                            context_policy=args.context_policy,
+                            tokens_per_minute=(
+                                max(args.tokens_per_minute // args.processes, 1)
+                                if args.tokens_per_minute is not None
+                                else None
+                            ),
+                        ),
+                        # Each process opens its own connection to the cache file.
+                        similarity_cache_factory=(
+                            partial(
+                                SimilarityCache,
+                                args.similarity_cache,
+                                threshold=args.similarity_threshold,
+                            )
+                            if args.similarity_cache is not None
+                            else None
+                        ),
+                        shard=shard_label,
+                        fan_out=fan_out,
+                        deadline_seconds=args.deadline,
+                        cache_schedule=args.schedule == "cache",
+                        min_prefix_chars=args.schedule_prefix_chars,
+                        cache_schedule_window=args.schedule_window,
+                    )
+                elif args.schedule == "cache":
+                    summary = run_batch_cache_scheduled(
+                        runner=runner,
+                        items=items,
+                        provider=args.provider,
+                        on_result=lambda result: writer.write_line(result.to_json()),
+                        min_prefix_chars=args.schedule_prefix_chars,
+                        shard=shard_label,
+                        fan_out=fan_out,
+                        window=args.schedule_window,
+                    )
+                else:
+                    summary = run_batch(
+                        runner=runner,
+                        items=items,
+                        provider=args.provider,
+                        on_result=lambda result: writer.write_line(result.to_json()),
+                        shard=shard_label,
+                        fan_out=fan_out,
+                    )
+    except (PromptRunnerError, OSError) as exc:
+        try:
+            _write_run_error_log(
+                run_log_dir=run_log_dir,
+                exc=exc,
+                provider=args.provider,
+                secret_values=secret_values,
+            )
+        except OSError:
+            pass
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+
+    try:
+        _write_run_summary_log(run_log_dir=run_log_dir, summary=summary)
+    except OSError as exc:
+        print(f"Error: run log directory is not writable: {exc}", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+
+    print(json.dumps(summary.to_dict(), indent=2, ensure_ascii=False))
+    if summary.failed:
+        return EXIT_RUNTIME_ERROR
+    return EXIT_OK
+
+
+def build_merge_parser() -> argparse.ArgumentParser:
+    """Build the `merge` subcommand parser."""
+    parser = argparse.ArgumentParser(
+        prog="ai-prompt-runner merge",
+        description=(
+            "Merge per-shard --out-jsonl files into one result set ordered by input index.\n"
+            "Duplicate indexes keep the first successful line."
+        ),
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument("inputs", nargs="+", help="Shard output JSONL files.")
+    parser.add_argument("--summary", action="append", default=[], help="Shard summary.json file or batch run-log directory (repeatable).")
+    parser.add_argument("--out-jsonl", default="outputs/responses.jsonl", help="Merged JSONL output path.")
+    parser.add_argument("--log-run-dir", default=None, help="Optional directory root for merged request/summary/error artifacts.")
+    return parser
+
+
+def _run_merge(argv: list[str]) -> int:
+    """Entry point for `ai-prompt-runner merge`."""
+    parser = build_merge_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        run_log_dir = _create_run_log_dir(args.log_run_dir)
+    except OSError as exc:
+        print(f"Error: run log directory is not writable: {exc}", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+
+    try:
+        run_logs = [load_shard_run_log(Path(value)) for value in args.summary]
+        if run_log_dir is not None:
+            # Shard request and error logs are combined next to the merged summary.
+            shard_requests, shard_errors = merge_run_logs(run_logs)
+            write_json(
+                run_log_dir / "request.json",
+                {
+                    "timestamp_utc": datetime.now(timezone.utc).isoformat(),
+                    "mode": "merge",
+                    "inputs": args.inputs,
+                    "summaries": args.summary,
+                    "shard_requests": shard_requests,
+                },
+            )
+            if shard_errors:
+                write_json(run_log_dir / "shard_errors.json", {"errors": shard_errors})
+        report = apply_summaries(MergeReport(), (run_log.summary for run_log in run_logs))
+        with JsonlWriter(Path(args.out_jsonl)) as writer:
+            merge_result_streams(
+                (iter_result_lines(Path(value)) for value in args.inputs),
+                on_line=writer.write,
+                report=report,
+            )
+        if run_log_dir is not None:
+            write_json(run_log_dir / "summary.json", report.to_dict())
+    except (PromptRunnerError, OSError) as exc:
+        try:
+            _write_run_error_log(run_log_dir=run_log_dir, exc=exc, provider=None)
+        except OSError:
+            pass
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+
+    if report.duplicates:
+        print(f"Warning: {report.duplicates} duplicate index line(s) were dropped.", file=sys.stderr)
+    print(json.dumps(report.to_dict(), indent=2, ensure_ascii=False))
+    return EXIT_OK
+
+
+def _subcommand_provider_options(args: argparse.Namespace) -> dict:
+    """Return the `create_provider` keyword arguments of resolved CLI arguments."""
+    return {
+        "provider_name": args.provider,
+        "api_endpoint": args.api_endpoint,
+        "api_key": args.api_key,
+        "api_model": args.api_model,
+        "timeout_seconds": args.timeout,
+        "max_retries": args.retries,
+        "connect_timeout_seconds": args.connect_timeout,
+        "first_chunk_timeout_seconds": args.first_chunk_timeout,
+        "stream_idle_timeout_seconds": args.stream_idle_timeout,
+        "prompt_cache": args.prompt_cache,
+        "keep_alive": args.keep_alive,
+        "http_stream_mode": args.http_stream_mode,
+        "transport": args.transport,
+        "record_dir": args.record_dir,
+        "replay_dir": args.replay_dir,
+        "replay_timing": args.replay_timing,
+        "mock_profile": args.mock_profile,
+        "mock_seed": args.mock_seed,
+    }
+
+
+def _create_provider_for_subcommand(args: argparse.Namespace):
+    """
+    Resolve provider spec, capability checks and provider instance.
+
+    Mirrors the main execution path for subcommands that drive the runner.
+    Returns None after printing diagnostics when the provider cannot be used.
+    """
+    try:
+        provider_spec = get_provider_spec(args.provider)
+    except ConfigurationError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return None
+
+    warnings, errors = _evaluate_provider_capabilities(provider_spec, args)
+    for warning in warnings:
+        print(f"Warning: {warning}", file=sys.stderr)
+    if errors:
+        for error in errors:
+            print(f"Error: capability check failed: {error}", file=sys.stderr)
+        return None
+
+    try:
+        return create_provider(**_subcommand_provider_options(args))
+    except ConfigurationError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return None
+
+
+def _add_queue_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the shared --queue option to queue subcommand parsers."""
+    parser.add_argument("--queue", required=True, help="Path to the SQLite work queue file (shared storage for multi-host workers).")
+
+
+def _run_enqueue(argv: list[str]) -> int:
+    """Entry point for `ai-prompt-runner enqueue`."""
+    parser = argparse.ArgumentParser(
+        prog="ai-prompt-runner enqueue",
+        description="Load JSONL records into a work queue. Re-running with the same input is idempotent.",
+    )
+    _add_queue_argument(parser)
+    parser.add_argument("--input-jsonl", type=_input_jsonl_path, required=True, help="JSONL file with one {\"prompt\": ...} object per line.")
+    args = parser.parse_args(argv)
+
+    try:
+        with JsonlInputReader(args.input_jsonl) as reader, WorkQueue(args.queue) as queue:
+            inserted = queue.enqueue(
+                (record.index, record.raw.decode("utf-8", errors="replace"))
+                for record in reader.iter_records()
+            )
+            counts = queue.counts()
+    except PromptRunnerError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+
+    print(json.dumps({"enqueued": inserted, **counts}, indent=2, ensure_ascii=False))
+    return EXIT_OK
+
+
+def _run_worker(argv: list[str]) -> int:
+    """
+    Entry point for `ai-prompt-runner worker`.
+
+    Accepts the same provider/runtime options as a one-shot run; prompts are
+    claimed from --queue instead of --prompt/--input-jsonl.
+    """
+    load_dotenv()
+    parser = build_parser()
+    parser.prog = "ai-prompt-runner worker"
+    parser.description = "Claim and execute work-queue items until the queue is drained."
+    _add_queue_argument(parser)
+    parser.add_argument("--lease-seconds", type=_positive_float, default=300.0, help="Lease duration before an unfinished item is re-queued (renewed by heartbeat while running).")
+    parser.add_argument("--max-attempts", type=_positive_int, default=3, help="Give up on an item after this many expired leases.")
+    parser.add_argument("--worker-id", default=None, help="Stable worker identity (default: <hostname>:<pid>).")
+    parser.add_argument("--poll-interval", type=_positive_float, default=1.0, help="Seconds between polls while other workers still hold leases.")
+    args = parser.parse_args(argv)
+    try:
+        args = _merge_runtime_config(args)
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+    if args.prompt is not None or args.prompt_file is not None or args.input_jsonl is not None:
+        parser.error("worker reads prompts from --queue; prompt input options are not allowed.")
+    if args.stream:
+        parser.error("--stream is not supported by worker.")
+
+    provider = _create_provider_for_subcommand(args)
+    if provider is None:
+        return EXIT_RUNTIME_ERROR
+
+    defaults = BatchRequestDefaults(
+        provider=args.provider,
+        system_prompt=args.system,
+        temperature=args.temperature,
+        max_tokens=args.max_tokens,
+        top_p=args.top_p,
+        stop=_stop_sequences(args),
+        max_response_chars=args.max_response_chars,
+        samples=args.samples,
+    )
+    runner = PromptRunner(provider=provider)
+    runner.deadline_seconds = args.deadline
+    worker_id = args.worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    try:
+        with WorkQueue(
+            args.queue,
+            lease_seconds=args.lease_seconds,
+            max_attempts=args.max_attempts,
+        ) as queue:
+            summary = run_worker(
+                queue=queue,
+                runner=runner,
+                defaults=defaults,
+                worker_id=worker_id,
+                poll_interval=args.poll_interval,
+            )
+    except PromptRunnerError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+
+    print(json.dumps({"worker_id": worker_id, **summary.to_dict()}, indent=2, ensure_ascii=False))
+    if summary.failed:
+        return EXIT_RUNTIME_ERROR
+    return EXIT_OK
+
+
+def _run_collect(argv: list[str]) -> int:
+    """Entry point for `ai-prompt-runner collect`."""
+    parser = argparse.ArgumentParser(
+        prog="ai-prompt-runner collect",
+        description="Write completed work-queue results to JSONL ordered by input index.",
+    )
+    _add_queue_argument(parser)
+    parser.add_argument("--out-jsonl", default="outputs/responses.jsonl", help="JSONL output path.")
+    args = parser.parse_args(argv)
+
+    report = MergeReport()
+    try:
+        with WorkQueue(args.queue) as queue, JsonlWriter(Path(args.out_jsonl)) as writer:
+            for line in queue.iter_results():
+                report.record(line)
+                writer.write(line)
+            counts = queue.counts()
+    except (PromptRunnerError, OSError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+
+    remaining = counts["pending"] + counts["leased"]
+    if remaining:
+        print(f"Warning: queue is not drained; {remaining} item(s) are still pending or leased.", file=sys.stderr)
+    payload = {
+        **counts,
+        "succeeded": report.succeeded,
+        "failed": report.failed,
+        "error_codes": dict(sorted(report.error_codes.items())),
+    }
+    print(json.dumps(payload, indent=2, ensure_ascii=False))
+    return EXIT_OK
+
+
+def _add_job_file_argument(parser: argparse.ArgumentParser) -> None:
+    """Add the shared --job-file option to native batch subcommand parsers."""
+    parser.add_argument("--job-file", default="outputs/native_batch.json", help="Batch job record written by batch-submit and read by batch-status/batch-collect.")
+
+
+def _run_batch_submit(argv: list[str]) -> int:
+    """
+    Entry point for `ai-prompt-runner batch-submit`.
+
+    Accepts the same provider/runtime options as a one-shot run and uploads
+    every valid --input-jsonl record to the provider's native batch API.
+    """
+    load_dotenv()
+    parser = build_parser()
+    parser.prog = "ai-prompt-runner batch-submit"
+    parser.description = "Submit --input-jsonl records to the provider's asynchronous batch API."
+    _add_job_file_argument(parser)
+    args = parser.parse_args(argv)
+    try:
+        args = _merge_runtime_config(args)
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+    if args.input_jsonl is None:
+        parser.error("batch-submit requires --input-jsonl.")
+    if args.stream:
+        parser.error("--stream is not supported by batch-submit.")
+    if args.shard is not None or args.dedup or args.schedule != "input" or args.processes != 1:
+        parser.error("--shard, --dedup, --schedule and --processes do not apply to batch-submit.")
+    if args.similarity_cache is not None:
+        parser.error("--similarity-cache does not apply to batch-submit.")
+
+    provider = _create_provider_for_subcommand(args)
+    if provider is None:
+        return EXIT_RUNTIME_ERROR
+    if args.samples is not None and args.samples > 1 and not hasattr(provider, "_extract_samples"):
+        parser.error("--samples greater than 1 needs a native sample count (openai_compatible or google) in batch-submit.")
+
+    defaults = BatchRequestDefaults(
+        provider=args.provider,
+        system_prompt=args.system,
+        temperature=args.temperature,
+        max_tokens=args.max_tokens,
+        top_p=args.top_p,
+        stop=_stop_sequences(args),
+        max_response_chars=args.max_response_chars,
+        samples=args.samples,
+    )
+    try:
+        adapter = native_batch_adapter(provider)
+        input_sha256 = file_sha256(args.input_jsonl)
+        with JsonlInputReader(args.input_jsonl) as reader:
+            total = reader.line_count
+            batch_id, submitted = submit_native_batch(
+                adapter,
+                iter_batch_items(reader.iter_records(), defaults),
+            )
+        job = new_job(
+            provider_name=args.provider,
+            provider=provider,
+            batch_id=batch_id,
+            input_jsonl=str(Path(args.input_jsonl).resolve()),
+            input_sha256=input_sha256,
+            defaults=defaults,
+            submitted=submitted,
+        )
+        job.save(args.job_file)
+    except (PromptRunnerError, OSError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+
+    payload = {
+        "batch_id": batch_id,
+        "provider": args.provider,
+        "total": total,
+        "submitted": submitted,
+        "invalid": total - submitted,
+        "job_file": args.job_file,
+    }
+    print(json.dumps(payload, indent=2, ensure_ascii=False))
+    return EXIT_OK
+
+
+def _build_native_batch_parser(prog: str, description: str) -> argparse.ArgumentParser:
+    """Build the shared parser of `batch-status` and `batch-collect`."""
+    parser = argparse.ArgumentParser(prog=prog, description=description)
+    _add_job_file_argument(parser)
+    parser.add_argument("--api-key", help="AI API key (default: env AI_API_KEY). The provider, endpoint and model come from the job file.")
+    parser.add_argument("--timeout", type=_positive_int, default=None, help="HTTP timeout in seconds for each status/result request.")
+    parser.add_argument("--transport", choices=tuple(TRANSPORTS), default=None, help="HTTP engine for status/result requests (see the run options).")
+    parser.add_argument("--record-dir", default=None, help="Save every status/result exchange to this directory as a JSON cassette.")
+    parser.add_argument("--replay-dir", default=None, help="Answer status/result requests from cassettes saved with --record-dir.")
+    parser.add_argument("--wait", action="store_true", help="Poll until the batch is finished instead of reporting its current state once.")
+    parser.add_argument("--poll-interval", type=_positive_float, default=5.0, help="With --wait: seconds before the first re-poll; doubled after each poll.")
+    parser.add_argument("--max-poll-interval", type=_positive_float, default=60.0, help="With --wait: upper bound for the poll interval in seconds.")
+    parser.add_argument("--wait-timeout", type=_positive_float, default=None, help="With --wait: give up after this many seconds (default: wait indefinitely).")
+    return parser
+
+
+def _native_batch_status(args: argparse.Namespace):
+    """Load the job file and return (job, adapter, status), polling with --wait."""
+    job = NativeBatchJob.load(args.job_file)
+    provider = create_provider(
+        provider_name=job.provider,
+        api_endpoint=job.api_endpoint,
+        api_key=args.api_key,
+        api_model=job.api_model,
+        timeout_seconds=args.timeout,
+        transport=args.transport,
+        record_dir=args.record_dir,
+        replay_dir=args.replay_dir,
+    )
+    adapter = native_batch_adapter(provider)
+    if not args.wait:
+        return job, adapter, adapter.status(job.batch_id)
+    status = wait_for_batch(
+        adapter,
+        job.batch_id,
+        poll_interval=args.poll_interval,
+        max_poll_interval=max(args.max_poll_interval, args.poll_interval),
+        timeout=args.wait_timeout,
+    )
+    return job, adapter, status
+
+
+def _run_batch_status(argv: list[str]) -> int:
+    """Entry point for `ai-prompt-runner batch-status`."""
+    load_dotenv()
+    parser = _build_native_batch_parser(
+        "ai-prompt-runner batch-status",
+        "Report the state of a batch submitted with batch-submit.",
+    )
+    args = parser.parse_args(argv)
+    try:
+        _, _, status = _native_batch_status(args)
+    except PromptRunnerError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+
+    print(json.dumps(status.to_dict(), indent=2, ensure_ascii=False))
+    return EXIT_OK
+
+
+def _run_batch_collect(argv: list[str]) -> int:
+    """Entry point for `ai-prompt-runner batch-collect`."""
+    load_dotenv()
+    parser = _build_native_batch_parser(
+        "ai-prompt-runner batch-collect",
+        "Write the results of a finished native batch to JSONL in input order.",
+    )
+    parser.add_argument("--out-jsonl", default="outputs/responses.jsonl", help="JSONL output path.")
+    args = parser.parse_args(argv)
+
+    try:
+        job, adapter, status = _native_batch_status(args)
+        if not status.done:
+            print(
+                f"Error: batch {job.batch_id} is still in progress "
+                f"({status.provider_status}); retry later or use --wait.",
+                file=sys.stderr,
+            )
+            return EXIT_RUNTIME_ERROR
+        if file_sha256(job.input_jsonl) != job.input_sha256:
+            raise ConfigurationError(
+                f"Input file {job.input_jsonl} changed after batch-submit; results cannot be matched."
+            )
+        with JsonlInputReader(job.input_jsonl) as reader, JsonlWriter(
+            Path(args.out_jsonl)
+        ) as writer:
+            summary = collect_native_batch(
+                adapter,
+                status,
+                iter_batch_items(reader.iter_records(), job.defaults),
+                provider=job.provider,
+                on_result=lambda result: writer.write_line(result.to_json()),
+            )
+    except (PromptRunnerError, OSError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+
+    print(json.dumps({**status.to_dict(), **summary.to_dict()}, indent=2, ensure_ascii=False))
+    if summary.failed:
+        return EXIT_RUNTIME_ERROR
+    return EXIT_OK
+
+
+def _loadtest_requests(args: argparse.Namespace) -> list[PromptRequest]:
+    """Build the prompt corpus of a load test from --input-jsonl or a single prompt."""
+    if args.input_jsonl is None:
+        return [_single_run_request(args, _resolve_prompt_text(args))]
+    defaults = BatchRequestDefaults(
+        provider=args.provider,
+        system_prompt=args.system,
+        temperature=args.temperature,
+        max_tokens=args.max_tokens,
+        top_p=args.top_p,
+        stop=_stop_sequences(args),
+        max_response_chars=args.max_response_chars,
+        samples=args.samples,
+    )
+    requests: list[PromptRequest] = []
+    invalid = 0
+    with JsonlInputReader(args.input_jsonl) as reader:
+        for item in iter_batch_items(reader.iter_records(), defaults):
+            if item.request is None:
+                invalid += 1
+                continue
+            requests.append(replace(item.request, stream=args.stream, stream_replays=args.stream_replays))
+    if invalid:
+        print(f"Warning: {invalid} invalid corpus record(s) were skipped.", file=sys.stderr)
+    return requests
+
+
+def _print_loadtest_progress(progress: LoadTestProgress) -> None:
+    """Write one live readout line to stderr."""
+    p50 = "-" if progress.p50_ms is None else f"{progress.p50_ms:.0f}ms"
+    p99 = "-" if progress.p99_ms is None else f"{progress.p99_ms:.0f}ms"
+    print(
+        f"[{progress.elapsed_seconds:6.1f}s] sent={progress.scheduled} done={progress.completed} "
+        f"in_flight={progress.in_flight} ok={progress.succeeded} err={progress.failed} "
+        f"rps={progress.achieved_rps:.1f} p50={p50} p99={p99}",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def _run_loadtest(argv: list[str]) -> int:
+    """
+    Entry point for `ai-prompt-runner loadtest`.
+
+    Accepts the same provider/runtime options as a one-shot run and offers
+    the prompt corpus at a target request rate; the report goes to stdout
+    and a live readout to stderr.
+    """
+    load_dotenv()
+    parser = build_parser()
+    parser.prog = "ai-prompt-runner loadtest"
+    parser.description = "Drive an open-loop request rate through the runner and report latency, errors and throughput."
+    parser.add_argument("--rps", type=_positive_float, required=True, help="Target requests per second (the final rate with --arrival ramp).")
+    parser.add_argument("--duration", type=_positive_float, default=10.0, help="Seconds during which requests are started; in-flight requests are then awaited.")
+    parser.add_argument("--arrival", choices=ARRIVAL_SCHEDULES, default="constant", help="Arrival schedule: evenly spaced, linear ramp from --ramp-from-rps, or Poisson (exponential gaps).")
+    parser.add_argument("--ramp-from-rps", type=_non_negative_float, default=0.0, help="With --arrival ramp: request rate at the start of the run.")
+    parser.add_argument("--arrival-seed", type=_non_negative_int, default=None, help="With --arrival poisson: seed for reproducible arrival times.")
+    parser.add_argument("--concurrency", type=_positive_int, default=32, help="Maximum requests in flight; later arrivals wait for a slot and the wait counts in their latency.")
+    parser.add_argument("--progress-interval", type=_positive_float, default=1.0, help="Seconds between live readout lines on stderr.")
+    args = parser.parse_args(argv)
+    try:
+        args = _merge_runtime_config(args)
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+    if args.shard is not None or args.dedup or args.schedule != "input" or args.processes != 1:
+        parser.error("--shard, --dedup, --schedule and --processes do not apply to loadtest.")
+    if args.similarity_cache is not None:
+        parser.error("--similarity-cache does not apply to loadtest; cached answers would skew the measurements.")
+
+    provider = _create_provider_for_subcommand(args)
+    if provider is None:
+        return EXIT_RUNTIME_ERROR
+    try:
+        requests = _loadtest_requests(args)
+        # One budget for all workers, so --tokens-per-minute caps the whole test.
+        token_budget = build_token_budget(
+            get_provider_spec(args.provider),
+            _resolved_model(provider, args),
+            context_window=args.context_window,
+            context_policy=args.context_policy,
+            tokens_per_minute=args.tokens_per_minute,
+        )
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+    except PromptRunnerError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+    if not requests:
+        print("Error: the prompt corpus has no valid records.", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+
+    options = _subcommand_provider_options(args)
+
+    def runner_factory(worker_index: int) -> PromptRunner:
+        # Each worker gets its own connection pool and, with --mock-seed,
+        # its own reproducible random stream.
+        worker_options = dict(options)
+        if args.mock_seed is not None:
+            worker_options["mock_seed"] = args.mock_seed + worker_index
+        return PromptRunner(
+            provider=pooled_provider(create_provider, **worker_options),
+            deadline_seconds=args.deadline,
+            token_budget=token_budget,
+        )
+
+    settings = LoadTestSettings(
+        schedule=args.arrival,
+        rps=args.rps,
+        duration_seconds=args.duration,
+        concurrency=args.concurrency,
+        ramp_start_rps=args.ramp_from_rps,
+        seed=args.arrival_seed,
+    )
+    try:
+        report = run_load_test(
+            runner_factory,
+            requests,
+            settings,
+            on_progress=_print_loadtest_progress,
+            progress_interval_seconds=args.progress_interval,
+        )
+    except PromptRunnerError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return EXIT_RUNTIME_ERROR
+    print(json.dumps({"provider": args.provider, **report.to_dict()}, indent=2, ensure_ascii=False))
+    return EXIT_OK
+
+
+# Subcommands are dispatched on the first argument so the historical
+# flag-only invocation (`ai-prompt-runner --prompt ...`) keeps working.
+SUBCOMMANDS = {
+    "merge": _run_merge,
+    "enqueue": _run_enqueue,
+    "worker": _run_worker,
+    "collect": _run_collect,
+    "batch-submit": _run_batch_submit,
+    "batch-status": _run_batch_status,
+    "batch-collect": _run_batch_collect,
+    "loadtest": _run_loadtest,
+}
 
 
 # Build safe preview values for --help without leaking secrets.
@@ -487,6 +1524,16 @@ def build_parser() -> argparse.ArgumentParser:
             "  ai-prompt-runner --prompt \"Hello\" --provider http\n"
             "  ai-prompt-runner --prompt-file prompts/hello.txt --provider http\n"
             "  echo \"Hello\" | ai-prompt-runner --provider http\n"
+            "  ai-prompt-runner --input-jsonl prompts.jsonl --shard 0/4 --provider http\n"
+            "\n"
+            "Subcommands:\n"
+            "  merge          Merge per-shard --out-jsonl results (see: ai-prompt-runner merge --help)\n"
+            "  enqueue        Load a JSONL file into a shared work queue\n"
+            "  worker         Drain a work queue (run any number of workers on any host)\n"
+            "  collect        Export completed work-queue results to JSONL\n"
+            "  batch-submit   Upload --input-jsonl to the provider's asynchronous batch API\n"
+            "  batch-status   Report (or --wait for) the state of a submitted batch\n"
+            "  batch-collect  Write the results of a finished batch to JSONL\n"
             "\n"
             "Exit codes:\n"
             f"  {EXIT_OK}  Success\n"
@@ -498,6 +1545,7 @@ def build_parser() -> argparse.ArgumentParser:
     prompt_group = parser.add_mutually_exclusive_group(required=False)
     prompt_group.add_argument("--prompt", type=_non_blank_text, help="Prompt text to send (mutually exclusive with --prompt-file).")
     prompt_group.add_argument("--prompt-file", type=_prompt_file_text, help="Path to a UTF-8 text file containing the prompt (mutually exclusive with --prompt).")
+    prompt_group.add_argument("--input-jsonl", type=_input_jsonl_path, help="Batch mode: JSONL file with one {\"prompt\": ...} object per line.")
     parser.add_argument("--system", type=_non_blank_text, help="Optional one-shot system instruction applied before the prompt.")
     parser.add_argument("--provider", default=None, help="Provider name (currently: http).")
     parser.add_argument("--config", type=_load_config_file, help="Path to a TOML config file (optional; CLI overrides env and config).")
@@ -508,6 +1556,15 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--out-json", default=None, help="JSON output path.")
     parser.add_argument("--out-md", default=None, help="Markdown output path.")
     parser.add_argument("--log-run-dir", default=None, help="Optional directory root for per-run request/response/error artifacts.")
+    parser.add_argument("--out-jsonl", default=None, help="Batch mode: JSONL output path (one result per input line).")
+    parser.add_argument("--shard", type=_shard_spec, default=None, help="Batch mode: process only byte-range shard i of N (for example 0/4).")
+    parser.add_argument("--shard-by", choices=("bytes", "hash"), default="bytes", help="Batch mode: split shards by input byte range (default) or by prompt hash (stable across input reordering).")
+    parser.add_argument("--processes", type=_positive_int, default=1, help="Batch mode: worker processes for execution and response post-processing (default 1: in-process).")
+    parser.add_argument("--read-ahead", type=_positive_int, default=64, help="Batch mode: maximum decoded input records buffered ahead of execution.")
+    parser.add_argument("--dedup", action="store_true", help="Batch mode: execute identical requests once and copy the result to every matching input position.")
+    parser.add_argument("--schedule", choices=("input", "cache"), default="input", help="Batch mode: execution order. 'cache' groups records by system prompt and shared prompt prefix (within --schedule-window records) and warms each group with one request before the rest; output stays in input order.")
+    parser.add_argument("--schedule-prefix-chars", type=_non_negative_int, default=0, help="Batch mode with --schedule cache: also split groups where neighbouring prompts share fewer than N leading characters (default 0: group by system prompt only).")
+    parser.add_argument("--schedule-window", type=_positive_int, default=10000, help="Batch mode with --schedule cache: records planned and held in memory at a time; groups only form within a window (default 10000).")
     parser.add_argument("--stream", action="store_true", help="Stream response chunks to stdout when supported by the provider; final JSON/Markdown outputs are still written after completion.")
     parser.add_argument("--strict-capabilities", action="store_true", help="Fail when requested options are unsupported or unknown for the selected provider.")
     parser.add_argument("--dry-run", action="store_true", help="Validate configuration/capabilities and exit without provider execution.")
@@ -517,12 +1574,39 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--top-p", type=_top_p_float, default=None, help="Optional nucleus sampling value (0 < top-p <= 1).")
     parser.add_argument("--timeout", type=_positive_int, default=None, help="HTTP timeout in seconds (must be > 0).")
     parser.add_argument("--retries", type=_non_negative_int, default=None, help="Maximum retry attempts on network errors (must be >= 0).")
+    parser.add_argument("--connect-timeout", type=_positive_float, default=None, help="Connection setup timeout in seconds (default: same as --timeout, which then bounds each read).")
+    parser.add_argument("--first-chunk-timeout", type=_positive_float, default=None, help="Streaming: seconds to wait for the first response chunk before the attempt is treated as stalled (retried with --retries); keep-alive events do not count.")
+    parser.add_argument("--stream-idle-timeout", type=_positive_float, default=None, help="Streaming: maximum seconds between response chunks once output has started; keep-alive events do not count.")
+    parser.add_argument("--stream-replays", type=_non_negative_int, default=None, help="Streaming: re-issue a deterministic (--temperature 0) stream up to N times after a mid-stream network failure, skipping text already printed.")
+    parser.add_argument("--stop", action="append", type=_stop_sequence, default=None, help="Stop sequence (repeatable): output is cut before the first occurrence and a stream is closed as soon as it appears.")
+    parser.add_argument("--max-response-chars", type=_positive_int, default=None, help="Cap the response at this many characters; a stream is closed once the cap is reached.")
+    parser.add_argument("--samples", type=_positive_int, default=None, help="Completions to sample per prompt (openai-compatible: n, google: candidateCount, others: concurrent calls); more than 1 adds a 'responses' array.")
+    parser.add_argument("--context-window", type=_positive_int, default=None, help="Context window of the model in tokens, overriding the provider's model table (needed for self-hosted or unlisted models).")
+    parser.add_argument("--context-policy", choices=CONTEXT_POLICIES, default=None, help="What to do when the estimated prompt plus --max-tokens exceeds the context window: reject (default, fail before sending), trim (remove the middle of the prompt) or off.")
+    parser.add_argument("--tokens-per-minute", type=_positive_int, default=None, help="Client-side rate limit: pace requests so their estimated prompt plus --max-tokens stays within this many tokens per minute (shared across --processes).")
+    parser.add_argument("--similarity-cache", default=None, help="Near-duplicate response cache file (SQLite, created on first use): prompts whose normalized text is similar enough to a stored one, with the same provider, model, system prompt and generation settings, are answered from it without a provider call.")
+    parser.add_argument("--similarity-threshold", type=_similarity_threshold, default=None, help="Minimum estimated Jaccard similarity (0-1] of normalized prompts for a --similarity-cache hit. Default: 0.9.")
+    parser.add_argument("--record-dir", default=None, help="Save every provider HTTP exchange to this directory as a JSON cassette (stream chunks with their arrival times; API keys and credential headers scrubbed) for later --replay-dir runs.")
+    parser.add_argument("--replay-dir", default=None, help="Answer provider calls from cassettes saved with --record-dir instead of the network; a request that was never recorded fails. Requests are matched by URL path and JSON body.")
+    parser.add_argument("--replay-timing", choices=REPLAY_TIMINGS, default=None, help="With --replay-dir: serve cassettes instantly (default) or at their recorded time to first byte and inter-chunk gaps.")
+    parser.add_argument("--mock-profile", choices=tuple(MOCK_PROFILES), default=None, help="mock provider: simulated latency profile (first-chunk delay, tokens per second, chunk sizes, response length, usage and transient failures). Custom profiles are defined as a mock_profile table in the config file. Default: instant.")
+    parser.add_argument("--mock-seed", type=_non_negative_int, default=None, help="mock provider: seed of the profile's random draws, for reproducible benchmarks. Default: random.")
+    parser.add_argument("--prompt-cache", action="store_true", default=None, help="Cache the --system prompt as a provider-side prefix (anthropic: cache_control, google: cachedContents); reported as cache_read_tokens/cache_write_tokens in usage.")
+    parser.add_argument("--keep-alive", type=_keep_alive, default=None, help="ollama: how long the server keeps the model loaded after each call, as seconds or a duration (30m, 1h; -1 keeps it loaded) to avoid cold reloads between runs. Default: server setting (5m).")
+    parser.add_argument("--http-stream-mode", choices=HTTP_STREAM_MODES, default=None, help="http provider: wire format of streamed responses with --stream: ndjson (one JSON object per line with a 'response' delta), sse (data: events with the same objects) or text (raw chunked text). Default: no streaming.")
+    parser.add_argument("--transport", choices=tuple(TRANSPORTS), default=None, help="HTTP engine for provider requests: requests (default), urllib3 (direct connection pool, lower overhead), httpx (requires the 'httpx' extra) or http2 (multiplexed HTTP/2 with HTTP/1.1 fallback; requires the 'http2' extra).")
+    parser.add_argument("--deadline", type=_positive_float, default=None, help="Overall time limit in seconds for a run, covering connection, retries and the full stream (per record in batch mode).")
     return parser
 
 
 def main(argv: list[str] | None = None) -> int:
     """CLI entrypoint returning process exit code."""
 
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+
     load_dotenv()  # Load .env before building the parser so dynamic help reflects env values.
     parser = build_parser()  # Build CLI definition (arguments, help text, version flag).
     args = parser.parse_args(argv)  # Parse runtime arguments into a namespace.
@@ -531,8 +1615,23 @@ def main(argv: list[str] | None = None) -> int:
     except argparse.ArgumentTypeError as exc:
         parser.error(str(exc))
 
-    # Resolve prompt text unless dry-run mode is requested.
-    if args.dry_run:
+    if args.input_jsonl is None and args.shard is not None:
+        parser.error("--shard requires --input-jsonl.")
+    if args.input_jsonl is None and args.dedup:
+        parser.error("--dedup requires --input-jsonl.")
+    if args.input_jsonl is None and args.schedule != "input":
+        parser.error("--schedule requires --input-jsonl.")
+    if args.input_jsonl is not None and args.stream:
+        parser.error("--stream is not supported with --input-jsonl.")
+    if args.stream_replays and not args.stream:
+        parser.error("--stream-replays requires --stream.")
+    if args.stream_replays and args.temperature != 0:
+        parser.error("--stream-replays requires --temperature 0 (deterministic output).")
+    if args.stream and args.samples is not None and args.samples > 1:
+        parser.error("--samples greater than 1 is not supported with --stream.")
+
+    # Resolve prompt text unless dry-run or batch mode is requested.
+    if args.dry_run or args.input_jsonl is not None:
         prompt_text = _resolve_optional_prompt_text_for_dry_run(args)
     else:
         try:
@@ -596,6 +1695,25 @@ def main(argv: list[str] | None = None) -> int:
             api_model=args.api_model,
             timeout_seconds=args.timeout,
             max_retries=args.retries,
+            connect_timeout_seconds=args.connect_timeout,
+            first_chunk_timeout_seconds=args.first_chunk_timeout,
+            stream_idle_timeout_seconds=args.stream_idle_timeout,
+            prompt_cache=args.prompt_cache,
+            keep_alive=args.keep_alive,
+            http_stream_mode=args.http_stream_mode,
+            transport=args.transport,
+            record_dir=args.record_dir,
+            replay_dir=args.replay_dir,
+            replay_timing=args.replay_timing,
+            mock_profile=args.mock_profile,
+            mock_seed=args.mock_seed,
+        )
+        token_budget = build_token_budget(
+            provider_spec,
+            _resolved_model(provider, args),
+            context_window=args.context_window,
+            context_policy=args.context_policy,
+            tokens_per_minute=args.tokens_per_minute,
         )
     except ConfigurationError as exc:
         try:
@@ -617,6 +1735,7 @@ def main(argv: list[str] | None = None) -> int:
         warnings=warnings,
         errors=errors,
         prompt_text=prompt_text,
+        token_budget=token_budget,
     )
 
     if args.print_effective_config:
@@ -639,6 +1758,23 @@ def main(argv: list[str] | None = None) -> int:
             "status": "ok",
             "effective_config": effective_config,
         }
+        if prompt_text is not None and args.input_jsonl is None:
+            # Same pre-flight check the run would apply, without sending anything.
+            try:
+                _, estimate = token_budget.apply(_single_run_request(args, prompt_text))
+            except PromptRunnerError as exc:
+                try:
+                    _write_run_error_log(
+                        run_log_dir=run_log_dir,
+                        exc=exc,
+                        provider=args.provider,
+                        secret_values=secret_values,
+                    )
+                except OSError:
+                    pass
+                print(f"Error: {exc}", file=sys.stderr)
+                return EXIT_RUNTIME_ERROR
+            dry_run_payload["token_estimate"] = estimate.to_dict()
         try:
             _write_run_response_log(
                 run_log_dir=run_log_dir,
@@ -657,6 +1793,23 @@ def main(argv: list[str] | None = None) -> int:
         return EXIT_OK
 
     runner = PromptRunner(provider=provider)
+    # --deadline bounds each run (each record in batch mode) end to end.
+    runner.deadline_seconds = args.deadline
+    runner.token_budget = token_budget
+    if args.similarity_cache is not None:
+        try:
+            runner.similarity_cache = SimilarityCache(args.similarity_cache, threshold=args.similarity_threshold)
+        except SimilarityCacheError as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            return EXIT_RUNTIME_ERROR
+
+    if args.input_jsonl is not None:
+        return _run_batch(
+            args=args,
+            runner=runner,
+            run_log_dir=run_log_dir,
+            secret_values=secret_values,
+        )
 
     def _print_stream_chunk(chunk: str) -> None:
         """Render stream chunks progressively without buffering delays."""
@@ -664,16 +1817,7 @@ def main(argv: list[str] | None = None) -> int:
 
     try:
         payload = runner.run(
-            PromptRequest(
-                prompt_text=prompt_text or "",
-                provider=args.provider,
-                system_prompt=args.system,
-                temperature=args.temperature,
-                max_tokens=args.max_tokens,
-                top_p=args.top_p,
-                stream=args.stream,
-            )
-            ,
+            _single_run_request(args, prompt_text),
             on_stream_chunk=_print_stream_chunk if args.stream else None,
         )
 
@@ -0,0 +1,370 @@
+"""Batch execution of many independent prompt requests."""
+
+import json
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field, replace
+from time import perf_counter
+
+from ai_prompt_runner.core.cancellation import CancellationToken
+from ai_prompt_runner.core.dedup import ResultFanOut
+from ai_prompt_runner.core.error_taxonomy import RuntimeErrorPayload, normalize_runtime_error
+from ai_prompt_runner.core.errors import InputValidationError, PromptRunnerError
+from ai_prompt_runner.core.models import PromptRequest, UsageMetadata
+from ai_prompt_runner.core.runner import PromptRunner, prompt_hash
+
+# Keys accepted on each JSONL input record. Anything else is rejected to keep
+# input mistakes visible instead of silently ignored.
+BATCH_RECORD_KEYS = frozenset({"prompt", "system", "temperature", "max_tokens", "top_p"})
+
+
+@dataclass(frozen=True)
+class BatchRequestDefaults:
+    """Run-level values applied to records that do not override them."""
+
+    provider: str
+    system_prompt: str | None = None
+    temperature: float | None = None
+    max_tokens: int | None = None
+    top_p: float | None = None
+    stop: tuple[str, ...] | None = None
+    max_response_chars: int | None = None
+    samples: int | None = None
+
+
+def _optional_number(record: dict, key: str, line: int) -> float | None:
+    value = record.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise InputValidationError(f"Input line {line}: '{key}' must be a number.")
+    return value
+
+
+def request_from_record(
+    record: dict,
+    index: int,
+    defaults: BatchRequestDefaults,
+) -> PromptRequest:
+    """
+    Build a PromptRequest from one decoded JSONL record.
+
+    Record fields override run-level defaults. Validation mirrors the CLI
+    argument rules so batch and one-shot runs accept the same values.
+    """
+    line = index + 1
+    unknown_keys = sorted(set(record.keys()) - BATCH_RECORD_KEYS)
+    if unknown_keys:
+        raise InputValidationError(f"Input line {line}: unsupported keys {unknown_keys}.")
+
+    prompt = record.get("prompt")
+    if not isinstance(prompt, str) or not prompt.strip():
+        raise InputValidationError(f"Input line {line}: 'prompt' must be a non-empty string.")
+
+    system_prompt = record.get("system", defaults.system_prompt)
+    if system_prompt is not None and (
+        not isinstance(system_prompt, str) or not system_prompt.strip()
+    ):
+        raise InputValidationError(f"Input line {line}: 'system' must be a non-empty string.")
+
+    temperature = _optional_number(record, "temperature", line)
+    if temperature is not None and temperature < 0:
+        raise InputValidationError(
+            f"Input line {line}: 'temperature' must be greater than or equal to 0."
+        )
+
+    top_p = _optional_number(record, "top_p", line)
+    if top_p is not None and not 0 < top_p <= 1:
+        raise InputValidationError(
+            f"Input line {line}: 'top_p' must be greater than 0 and less than or equal to 1."
+        )
+
+    max_tokens = record.get("max_tokens")
+    if max_tokens is not None and (
+        isinstance(max_tokens, bool) or not isinstance(max_tokens, int) or max_tokens <= 0
+    ):
+        raise InputValidationError(
+            f"Input line {line}: 'max_tokens' must be a positive integer."
+        )
+
+    return PromptRequest(
+        prompt_text=prompt.strip(),
+        provider=defaults.provider,
+        system_prompt=system_prompt.strip() if system_prompt is not None else None,
+        temperature=temperature if temperature is not None else defaults.temperature,
+        max_tokens=max_tokens if max_tokens is not None else defaults.max_tokens,
+        top_p=top_p if top_p is not None else defaults.top_p,
+        stop=defaults.stop,
+        max_response_chars=defaults.max_response_chars,
+        samples=defaults.samples,
+    )
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """
+    One batch position.
+
+    `error` carries an input-level failure (for example an invalid record) so
+    it is reported at its original position instead of aborting the batch.
+    """
+
+    index: int
+    request: PromptRequest | None = None
+    error: PromptRunnerError | None = None
+
+
+@dataclass(frozen=True)
+class BatchItemResult:
+    """
+    Outcome of one batch position, serialized as one JSONL output line.
+
+    `usage` is what executing this position cost; it is None for positions
+    served from another position's result, so summaries never count it twice.
+    """
+
+    index: int
+    payload: dict | None = None
+    error: RuntimeErrorPayload | None = None
+    usage: UsageMetadata | None = field(default=None, compare=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def error_code(self) -> str | None:
+        """Taxonomy code for failed positions, None on success."""
+        return self.error.code if self.error is not None else None
+
+    def to_dict(self) -> dict:
+        """Return the JSON-serializable output line for this position."""
+        if self.error is not None:
+            return {"index": self.index, "status": "error", "error": self.error.to_dict()}
+        return {"index": self.index, "status": "ok", "payload": self.payload}
+
+    def to_json(self) -> str:
+        """Return the compact JSONL representation of this position."""
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    def encode(self) -> "EncodedBatchItemResult":
+        """Serialize once so the result can cross a process boundary cheaply."""
+        return EncodedBatchItemResult(
+            index=self.index,
+            error_code=self.error_code,
+            line=self.to_json(),
+            usage=self.usage,
+        )
+
+    def with_index(self, index: int) -> "BatchItemResult":
+        """Return the same outcome reported at another input position."""
+        return replace(self, index=index, usage=None)
+
+
+@dataclass(frozen=True)
+class EncodedBatchItemResult:
+    """
+    Pre-serialized batch result.
+
+    Produced by worker processes so the parent only forwards the JSONL line
+    instead of re-encoding large payloads on its own core.
+    """
+
+    index: int
+    error_code: str | None
+    line: str
+    usage: UsageMetadata | None = field(default=None, compare=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.error_code is None
+
+    def to_dict(self) -> dict:
+        """Decode the stored line (tests and diagnostics only)."""
+        return json.loads(self.line)
+
+    def to_json(self) -> str:
+        """Return the stored JSONL line unchanged."""
+        return self.line
+
+    def with_index(self, index: int) -> "EncodedBatchItemResult":
+        """
+        Return the same outcome reported at another input position.
+
+        `index` is always the first key of a serialized line, so only that
+        prefix is rewritten instead of re-encoding the payload.
+        """
+        prefix = f'{{"index": {self.index}, '
+        if not self.line.startswith(prefix):
+            raise ValueError("Encoded result line does not start with its index.")
+        return EncodedBatchItemResult(
+            index=index,
+            error_code=self.error_code,
+            line=f'{{"index": {index}, ' + self.line[len(prefix) :],
+        )
+
+
+@dataclass
+class BatchSummary:
+    """Aggregated counters for one batch run."""
+
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    execution_ms: int = 0
+    shard: str | None = None
+    error_codes: dict[str, int] = field(default_factory=dict)
+    deduplicated: int = 0
+    # Provider-reported input tokens of executed positions, and the parts
+    # served from (read) or written into (write) a provider prefix cache.
+    prompt_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+    def record(self, result: "BatchItemResult | EncodedBatchItemResult") -> None:
+        """Account for one completed position."""
+        self.total += 1
+        if result.usage is not None:
+            self.prompt_tokens += result.usage.prompt_tokens or 0
+            self.cache_read_tokens += result.usage.cache_read_tokens or 0
+            self.cache_write_tokens += result.usage.cache_write_tokens or 0
+        code = result.error_code
+        if code is None:
+            self.succeeded += 1
+            return
+        self.failed += 1
+        self.error_codes[code] = self.error_codes.get(code, 0) + 1
+
+    def to_dict(self) -> dict:
+        """Serialize summary counters in a stable structure."""
+        return {
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "execution_ms": self.execution_ms,
+            "shard": self.shard,
+            "error_codes": dict(sorted(self.error_codes.items())),
+            "deduplicated": self.deduplicated,
+            "dedup_ratio": round(self.deduplicated / self.total, 4) if self.total else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "cache_hit_ratio": (
+                round(self.cache_read_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0
+            ),
+        }
+
+
+def execute_batch_item(
+    runner: PromptRunner,
+    item: BatchItem,
+    provider: str,
+    cancel_token: CancellationToken | None = None,
+) -> BatchItemResult:
+    """
+    Run one batch position, converting runtime failures to taxonomy errors.
+
+    `cancel_token` lets the caller abort the in-flight request, for example
+    when the work-queue lease for this position is lost.
+    """
+    if item.error is not None:
+        return BatchItemResult(
+            index=item.index,
+            error=normalize_runtime_error(item.error, provider=provider),
+        )
+    try:
+        if cancel_token is None:
+            payload = runner.run(item.request)
+        else:
+            payload = runner.run(item.request, cancel_token=cancel_token)
+    except PromptRunnerError as exc:
+        return BatchItemResult(
+            index=item.index,
+            error=normalize_runtime_error(exc, provider=provider),
+        )
+    return BatchItemResult(index=item.index, payload=payload, usage=_payload_usage(payload))
+
+
+def _payload_usage(payload: dict) -> UsageMetadata | None:
+    """Rebuild usage from a validated payload (its keys match UsageMetadata)."""
+    usage = payload.get("metadata", {}).get("usage")
+    return UsageMetadata(**usage) if isinstance(usage, dict) else None
+
+
+def run_batch(
+    runner: PromptRunner,
+    items: Iterable[BatchItem],
+    provider: str,
+    on_result: Callable[[BatchItemResult], None],
+    shard: str | None = None,
+    fan_out: ResultFanOut[BatchItemResult] | None = None,
+) -> BatchSummary:
+    """
+    Execute batch items sequentially and hand each result to `on_result`.
+
+    Results are produced in input order and never accumulated, so callers can
+    stream them to disk with flat memory use. With `fan_out`, repeated
+    requests are executed once and their result is reported at every position.
+    """
+    summary = BatchSummary(shard=shard)
+    start = perf_counter()
+    for item in items:
+        key = fan_out.key_for(item.request) if fan_out is not None else None
+        if key is not None and not fan_out.first_occurrence(key):
+            result = fan_out.take(key).with_index(item.index)
+        else:
+            result = execute_batch_item(runner, item, provider)
+            if key is not None:
+                fan_out.store(key, result)
+        summary.record(result)
+        on_result(result)
+    if fan_out is not None:
+        summary.deduplicated = fan_out.deduplicated
+    summary.execution_ms = int((perf_counter() - start) * 1000)
+    return summary
+
+
+def iter_batch_items(records: Iterable, defaults: BatchRequestDefaults) -> Iterator[BatchItem]:
+    """
+    Convert decoded input records into batch items.
+
+    `records` yields objects exposing `index` and `decode()` (for example
+    `JsonlRecord`). Malformed records become error items at their position.
+    """
+    for record in records:
+        try:
+            request = request_from_record(record.decode(), record.index, defaults)
+        except InputValidationError as exc:
+            yield BatchItem(index=record.index, error=exc)
+            continue
+        yield BatchItem(index=record.index, request=request)
+
+
+def shard_for_prompt_hash(request_hash: str, shard_count: int) -> int:
+    """
+    Map a `sha256:<hex>` prompt hash to a shard number in `[0, shard_count)`.
+
+    Only the hash is used, so assignment survives re-runs, input reordering
+    and changes to unrelated records.
+    """
+    _, _, hex_digest = request_hash.partition(":")
+    return int(hex_digest[:16], 16) % shard_count
+
+
+def filter_hash_shard(
+    items: Iterable[BatchItem],
+    shard_index: int,
+    shard_count: int,
+) -> Iterator[BatchItem]:
+    """
+    Keep only the items owned by one prompt-hash shard.
+
+    Items without a request (invalid records) have no prompt hash and are
+    assigned by input index instead, so each one is still reported once.
+    """
+    for item in items:
+        if item.request is None:
+            owner = item.index % shard_count
+        else:
+            owner = shard_for_prompt_hash(prompt_hash(item.request), shard_count)
+        if owner == shard_index:
+            yield item
@@ -0,0 +1,254 @@
+"""Cache-aware batch scheduling: group work by shared prompt prefix."""
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass
+from itertools import islice
+from os.path import commonprefix
+from time import perf_counter
+from typing import Generic, TypeVar
+
+from ai_prompt_runner.core.batch import (
+    BatchItem,
+    BatchItemResult,
+    BatchSummary,
+    EncodedBatchItemResult,
+    execute_batch_item,
+)
+from ai_prompt_runner.core.dedup import ResultFanOut
+from ai_prompt_runner.core.runner import PromptRunner
+
+ResultT = TypeVar("ResultT", BatchItemResult, EncodedBatchItemResult)
+
+
+@dataclass
+class CacheGroup:
+    """
+    Batch items that share a system prompt and a prompt prefix.
+
+    The first item is the warm-up request: it runs alone so the provider
+    writes the shared prefix into its cache before the followers read it.
+    """
+
+    items: list[BatchItem]
+
+    @property
+    def warmup(self) -> BatchItem:
+        return self.items[0]
+
+    @property
+    def followers(self) -> list[BatchItem]:
+        return self.items[1:]
+
+
+def _schedule_key(item: BatchItem) -> tuple[str, str, int]:
+    request = item.request
+    return (request.system_prompt or "", request.prompt_text, item.index)
+
+
+def plan_cache_groups(items: Iterable[BatchItem], min_prefix_chars: int = 0) -> list[CacheGroup]:
+    """
+    Order and group batch items so requests sharing a prefix run together.
+
+    Items are sorted by system prompt, then prompt text, which places the
+    prompts with the longest common prefix next to each other. A new group
+    starts when the system prompt changes or, with `min_prefix_chars`, when
+    a prompt shares fewer than that many leading characters with the one
+    before it. Groups run in order of their earliest input position so
+    in-order output is released as early as possible. Invalid records never
+    reach a provider and form one group of their own.
+    """
+    if min_prefix_chars < 0:
+        raise ValueError("min_prefix_chars must be greater than or equal to 0.")
+
+    invalid: list[BatchItem] = []
+    valid: list[BatchItem] = []
+    for item in items:
+        (invalid if item.request is None else valid).append(item)
+    valid.sort(key=_schedule_key)
+
+    groups = [CacheGroup(items=invalid)] if invalid else []
+    previous: BatchItem | None = None
+    for item in valid:
+        if previous is None or not _shares_prefix(previous, item, min_prefix_chars):
+            groups.append(CacheGroup(items=[]))
+        groups[-1].items.append(item)
+        previous = item
+    groups.sort(key=lambda group: min(item.index for item in group.items))
+    return groups
+
+
+def _shares_prefix(previous: BatchItem, item: BatchItem, min_prefix_chars: int) -> bool:
+    if previous.request.system_prompt != item.request.system_prompt:
+        return False
+    if min_prefix_chars == 0:
+        return True
+    shared = commonprefix([previous.request.prompt_text, item.request.prompt_text])
+    return len(shared) >= min_prefix_chars
+
+
+def iter_group_completions(
+    groups: Iterable[CacheGroup],
+    submit: Callable[[BatchItem], "Future[ResultT]"],
+    max_in_flight: int,
+) -> Iterator[tuple[BatchItem, ResultT]]:
+    """
+    Run grouped items with warm-up barriers and yield them as they complete.
+
+    A group's followers are released only once its warm-up request has
+    finished (successfully or not). Released followers take priority over
+    the next group's warm-up, so cache entries are read soon after they are
+    written; idle capacity starts the next warm-up instead of waiting.
+    """
+    if max_in_flight <= 0:
+        raise ValueError("max_in_flight must be greater than 0.")
+
+    pending_groups = deque(groups)
+    released: deque[BatchItem] = deque()
+    in_flight: dict[Future, tuple[BatchItem, list[BatchItem]]] = {}
+
+    while pending_groups or released or in_flight:
+        while len(in_flight) < max_in_flight and (released or pending_groups):
+            if released:
+                item = released.popleft()
+                in_flight[submit(item)] = (item, [])
+            else:
+                group = pending_groups.popleft()
+                in_flight[submit(group.warmup)] = (group.warmup, group.followers)
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            item, followers = in_flight.pop(future)
+            released.extend(followers)
+            yield item, future.result()
+
+
+class InputOrderBuffer(Generic[ResultT]):
+    """Hold results that complete out of order until their turn in the input."""
+
+    def __init__(self, indices: Iterable[int]) -> None:
+        self._order = deque(indices)
+        self._ready: dict[int, ResultT] = {}
+
+    def put(self, result: ResultT) -> None:
+        self._ready[result.index] = result
+
+    def drain(self) -> Iterator[ResultT]:
+        """Yield every buffered result whose predecessors have all been yielded."""
+        while self._order and self._order[0] in self._ready:
+            yield self._ready.pop(self._order.popleft())
+
+
+def run_cache_scheduled(
+    items: Iterable[BatchItem],
+    submit: Callable[[BatchItem], "Future[ResultT]"],
+    on_result: Callable[[ResultT], None],
+    max_in_flight: int,
+    min_prefix_chars: int = 0,
+    shard: str | None = None,
+    fan_out: ResultFanOut[ResultT] | None = None,
+    window: int | None = None,
+) -> BatchSummary:
+    """
+    Execute batch items in cache-friendly order and report them in input order.
+
+    Items are planned and executed `window` at a time (the whole input when
+    None), so a streamed input is never held in memory beyond one window;
+    groups only form within a window. Completed results wait in memory until
+    every earlier position has been written. With `fan_out`, the first
+    scheduled occurrence of a repeated request runs and its duplicates are
+    filled in as soon as it completes.
+    """
+    if window is not None and window <= 0:
+        raise ValueError("window must be greater than 0.")
+    summary = BatchSummary(shard=shard)
+    start = perf_counter()
+
+    pending = iter(items)
+    while True:
+        batch = list(islice(pending, window))
+        if not batch:
+            break
+        _run_window(batch, submit, on_result, max_in_flight, min_prefix_chars, fan_out, summary)
+
+    if fan_out is not None:
+        summary.deduplicated = fan_out.deduplicated
+    summary.execution_ms = int((perf_counter() - start) * 1000)
+    return summary
+
+
+def _run_window(
+    items: list[BatchItem],
+    submit: Callable[[BatchItem], "Future[ResultT]"],
+    on_result: Callable[[ResultT], None],
+    max_in_flight: int,
+    min_prefix_chars: int,
+    fan_out: ResultFanOut[ResultT] | None,
+    summary: BatchSummary,
+) -> None:
+    """Plan and run one window; every position of it is reported before returning."""
+    buffer: InputOrderBuffer[ResultT] = InputOrderBuffer(item.index for item in items)
+    groups = plan_cache_groups(items, min_prefix_chars)
+    duplicates: dict[bytes, list[int]] = {}
+    if fan_out is not None:
+        for group in groups:
+            executed = []
+            for item in group.items:
+                key = fan_out.key_for(item.request)
+                if key is None or fan_out.first_occurrence(key):
+                    executed.append(item)
+                elif fan_out.has_result(key):
+                    # Executed in an earlier window.
+                    buffer.put(fan_out.take(key).with_index(item.index))
+                else:
+                    duplicates.setdefault(key, []).append(item.index)
+            group.items = executed
+        groups = [group for group in groups if group.items]
+
+    for ready in buffer.drain():
+        summary.record(ready)
+        on_result(ready)
+    for item, result in iter_group_completions(groups, submit, max_in_flight):
+        buffer.put(result)
+        key = fan_out.key_for(item.request) if fan_out is not None else None
+        if key is not None:
+            fan_out.store(key, result)
+            for index in duplicates.pop(key, ()):
+                buffer.put(fan_out.take(key).with_index(index))
+        for ready in buffer.drain():
+            summary.record(ready)
+            on_result(ready)
+
+
+def run_batch_cache_scheduled(
+    runner: PromptRunner,
+    items: Iterable[BatchItem],
+    provider: str,
+    on_result: Callable[[BatchItemResult], None],
+    min_prefix_chars: int = 0,
+    shard: str | None = None,
+    fan_out: ResultFanOut[BatchItemResult] | None = None,
+    window: int | None = None,
+) -> BatchSummary:
+    """
+    In-process counterpart of `run_batch` with cache-aware ordering.
+
+    Items run one at a time, so each group's warm-up finishes before its
+    followers start without any extra waiting.
+    """
+
+    def _submit(item: BatchItem) -> "Future[BatchItemResult]":
+        future: Future[BatchItemResult] = Future()
+        future.set_result(execute_batch_item(runner, item, provider))
+        return future
+
+    return run_cache_scheduled(
+        items,
+        submit=_submit,
+        on_result=on_result,
+        max_in_flight=1,
+        min_prefix_chars=min_prefix_chars,
+        shard=shard,
+        fan_out=fan_out,
+        window=window,
+    )
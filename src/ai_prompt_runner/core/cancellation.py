@@ -0,0 +1,134 @@
+"""Overall deadlines and cooperative cancellation for prompt runs."""
+
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from ai_prompt_runner.core.errors import DeadlineExceededError, RunCancelledError
+
+
+class CancellationToken:
+    """
+    Thread-safe cancellation signal shared between a caller and a running call.
+
+    Callbacks registered by in-flight requests run as soon as `cancel()` is
+    called, so blocked network reads are interrupted instead of polled.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Request cancellation and run every registered abort callback once."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:  # noqa: BLE001 - aborting is best effort
+                pass
+
+    def register(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Register an abort callback and return a function that unregisters it.
+
+        The callback runs immediately when the token is already cancelled.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def _unregister(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class RunControl:
+    """
+    Deadline and cancellation state for one run.
+
+    The deadline covers the whole run (connect, retries and the complete
+    stream); it starts when the control is created.
+    """
+
+    def __init__(
+        self,
+        deadline_seconds: float | None = None,
+        token: CancellationToken | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if deadline_seconds is not None and deadline_seconds <= 0:
+            raise ValueError("deadline_seconds must be greater than 0.")
+        self.deadline_seconds = deadline_seconds
+        self.token = token
+        self._clock = clock
+        self._expires_at = clock() + deadline_seconds if deadline_seconds is not None else None
+
+    def remaining(self) -> float | None:
+        """Seconds left before the deadline, or None without a deadline."""
+        if self._expires_at is None:
+            return None
+        return self._expires_at - self._clock()
+
+    @property
+    def stopped(self) -> bool:
+        """True once the run was cancelled or its deadline passed."""
+        if self.token is not None and self.token.cancelled:
+            return True
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self) -> None:
+        """Raise the matching error when the run must stop."""
+        if self.token is not None and self.token.cancelled:
+            raise RunCancelledError("Run was cancelled.")
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceededError(
+                f"Run exceeded its deadline of {self.deadline_seconds:g} second(s)."
+            )
+
+    def request_timeout(self, connect_seconds: float, read_seconds: float) -> tuple[float, float]:
+        """Clamp per-request (connect, read) timeouts to the remaining deadline."""
+        self.check()
+        remaining = self.remaining()
+        if remaining is None:
+            return connect_seconds, read_seconds
+        return min(connect_seconds, remaining), min(read_seconds, remaining)
+
+    @contextmanager
+    def abort_on_stop(self, abort: Callable[[], None]) -> Iterator[None]:
+        """
+        Run `abort` if the run is cancelled or the deadline passes in this block.
+
+        Used around one network exchange so a blocked read is interrupted
+        promptly instead of waiting for its socket timeout.
+        """
+        unregister = self.token.register(abort) if self.token is not None else None
+        timer = None
+        remaining = self.remaining()
+        if remaining is not None:
+            timer = threading.Timer(max(remaining, 0.0), abort)
+            timer.daemon = True
+            timer.start()
+        try:
+            yield
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if unregister is not None:
+                unregister()
@@ -0,0 +1,176 @@
+"""Deduplication of identical batch requests with result fan-out."""
+
+import json
+import math
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from hashlib import sha256
+from typing import Generic, TypeVar
+
+from ai_prompt_runner.core.models import PromptRequest
+from ai_prompt_runner.core.runner import prompt_hash
+
+# 128 bits keep accidental collisions negligible for billions of keys while
+# halving per-key memory compared with a full SHA-256 digest.
+_KEY_BYTES = 16
+
+ResultT = TypeVar("ResultT")
+
+
+def dedup_key(request: PromptRequest, model: str | None) -> bytes:
+    """
+    Return the identity of one request for deduplication purposes.
+
+    Two requests share a key when they send the same effective prompt (the
+    provenance `prompt_hash`) to the same provider and model with the same
+    generation config, early-stop limits and sample count.
+    """
+    identity = json.dumps(
+        [
+            prompt_hash(request),
+            request.provider,
+            model,
+            request.temperature,
+            request.max_tokens,
+            request.top_p,
+            request.stop,
+            request.max_response_chars,
+            request.samples,
+        ],
+        separators=(",", ":"),
+    )
+    return sha256(identity.encode("utf-8")).digest()[:_KEY_BYTES]
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set for pre-hashed keys (no false negatives)."""
+
+    def __init__(self, expected_items: int, false_positive_rate: float = 0.01) -> None:
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be between 0 and 1.")
+        expected_items = max(expected_items, 1)
+        bit_count = math.ceil(-expected_items * math.log(false_positive_rate) / math.log(2) ** 2)
+        self._bit_count = max(bit_count, 8)
+        self._hash_count = max(round(self._bit_count / expected_items * math.log(2)), 1)
+        self._bits = bytearray((self._bit_count + 7) // 8)
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+    def _positions(self, key: bytes) -> Iterable[int]:
+        # Keys are already uniformly distributed digests, so double hashing
+        # over two 64-bit halves gives independent-enough probe positions.
+        first = int.from_bytes(key[:8], "little")
+        second = int.from_bytes(key[8:16], "little") | 1
+        for probe in range(self._hash_count):
+            yield (first + probe * second) % self._bit_count
+
+    def add(self, key: bytes) -> bool:
+        """Insert `key`; return True when it was (possibly) present already."""
+        present = True
+        for position in self._positions(key):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self._bits[byte] & mask:
+                present = False
+                self._bits[byte] |= mask
+        return present
+
+
+@dataclass(frozen=True)
+class DedupPlan:
+    """Exact occurrence counts for every key seen more than once."""
+
+    repeated: dict[bytes, int]
+
+    @classmethod
+    def build(
+        cls,
+        keys: Callable[[], Iterable[bytes]],
+        expected_items: int,
+        false_positive_rate: float = 0.01,
+    ) -> "DedupPlan":
+        """
+        Count repeated keys in two passes with memory bounded by duplicates.
+
+        The first pass runs keys through a Bloom filter and keeps only keys it
+        reports as already seen; those candidates include rare false
+        positives. The second pass counts candidate occurrences exactly, which
+        drops false positives (count 1) and yields precise fan-out counts.
+        `keys` is called once per pass and must yield the same sequence.
+        """
+        bloom = BloomFilter(expected_items, false_positive_rate)
+        candidates = {key for key in keys() if bloom.add(key)}
+        del bloom
+
+        counts = dict.fromkeys(candidates, 0)
+        for key in keys():
+            if key in counts:
+                counts[key] += 1
+        return cls(repeated={key: count for key, count in counts.items() if count > 1})
+
+
+@dataclass
+class _Pending(Generic[ResultT]):
+    remaining: int
+    result: ResultT | None = None
+
+
+@dataclass
+class ResultFanOut(Generic[ResultT]):
+    """
+    Execution-time bookkeeping that serves repeated requests from one result.
+
+    Only repeated keys are tracked, and each entry is evicted as soon as its
+    last duplicate position has been served, so memory follows the number of
+    repeated keys in progress rather than the input size.
+    """
+
+    plan: DedupPlan
+    model: str | None = None
+    deduplicated: int = 0
+    _pending: dict[bytes, _Pending[ResultT]] = field(default_factory=dict)
+
+    def key_for(self, request: PromptRequest | None) -> bytes | None:
+        """Return the key of a repeated request, None when it is unique or invalid."""
+        if request is None:
+            return None
+        key = dedup_key(request, self.model)
+        return key if key in self.plan.repeated else None
+
+    def first_occurrence(self, key: bytes) -> bool:
+        """
+        Register one position of `key` at dispatch time.
+
+        Returns True for the position that must be executed and False for the
+        positions that will be served by `take` once its result is stored.
+        """
+        if key in self._pending:
+            return False
+        self._pending[key] = _Pending(remaining=self.plan.repeated[key] - 1)
+        return True
+
+    def has_result(self, key: bytes) -> bool:
+        """Return True once the executed position of `key` has been stored."""
+        pending = self._pending.get(key)
+        return pending is not None and pending.result is not None
+
+    def store(self, key: bytes, result: ResultT) -> None:
+        """Record the result of the executed position of `key`."""
+        self._pending[key].result = result
+
+    def take(self, key: bytes) -> ResultT:
+        """
+        Return the stored result for one duplicate position of `key`.
+
+        Positions are consumed in input order, so the executed position has
+        always been stored before any of its duplicates is taken.
+        """
+        pending = self._pending[key]
+        if pending.result is None:
+            raise RuntimeError("Duplicate position served before its first occurrence.")
+        pending.remaining -= 1
+        if pending.remaining == 0:
+            del self._pending[key]
+        self.deduplicated += 1
+        return pending.result
@@ -0,0 +1,89 @@
+"""Client-side early stop for responses: stop sequences and length caps."""
+
+from collections.abc import Sequence
+
+from ai_prompt_runner.core.models import PromptRequest, TruncationMetadata
+
+
+class EarlyStop:
+    """
+    Cut a response at the first stop sequence or at a character cap.
+
+    Text is fed chunk by chunk as it streams in. Only the shortest tail that
+    could still grow into a stop sequence is held back, so output is delayed
+    by at most one partial match. Once `truncation` is set the response is
+    complete and the caller should stop reading the upstream.
+    """
+
+    def __init__(
+        self,
+        stop: Sequence[str] | None = None,
+        max_chars: int | None = None,
+    ) -> None:
+        self._stops = tuple(sequence for sequence in stop or () if sequence)
+        self._max_chars = max_chars
+        self._longest_stop = max((len(sequence) for sequence in self._stops), default=0)
+        self._pending = ""
+        self._emitted = 0
+        self.truncation: TruncationMetadata | None = None
+
+    @classmethod
+    def for_request(cls, request: PromptRequest) -> "EarlyStop":
+        return cls(stop=request.stop, max_chars=request.max_response_chars)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._stops) or self._max_chars is not None
+
+    def _held_back(self, text: str) -> int:
+        """Length of the longest suffix of `text` that starts a stop sequence."""
+        for size in range(min(len(text), self._longest_stop - 1), 0, -1):
+            tail = text[-size:]
+            if any(sequence.startswith(tail) for sequence in self._stops):
+                return size
+        return 0
+
+    def _cap(self, text: str) -> str:
+        if self._max_chars is None:
+            return text
+        room = self._max_chars - self._emitted
+        if len(text) > room:
+            text = text[:room]
+            if self.truncation is None:
+                self.truncation = TruncationMetadata(reason="max_response_chars")
+        self._emitted += len(text)
+        return text
+
+    def feed(self, chunk: str) -> str:
+        """Return the part of `chunk` that can be emitted now."""
+        if self.truncation is not None:
+            return ""
+        text = self._pending + chunk
+        self._pending = ""
+        if self._stops:
+            hits = [(text.find(sequence), sequence) for sequence in self._stops]
+            hits = [(index, sequence) for index, sequence in hits if index >= 0]
+            if hits:
+                index, sequence = min(hits)
+                kept = self._cap(text[:index])
+                if self.truncation is None:
+                    self.truncation = TruncationMetadata(
+                        reason="stop_sequence",
+                        stop_sequence=sequence,
+                    )
+                return kept
+            held = self._held_back(text)
+            if held:
+                text, self._pending = text[:-held], text[-held:]
+        return self._cap(text)
+
+    def flush(self) -> str:
+        """Release text held back for a partial match once the stream ended."""
+        pending, self._pending = self._pending, ""
+        if self.truncation is not None:
+            return ""
+        return self._cap(pending)
+
+    def apply(self, text: str) -> str:
+        """Apply the limits to a complete (non-streamed) response."""
+        return self.feed(text) + self.flush()
@@ -10,9 +10,13 @@ from typing import Literal
 from ai_prompt_runner.core.errors import (
     AuthenticationError,
     AuthorizationError,
+    DeadlineExceededError,
+    InputValidationError,
     ProviderError,
     PromptRunnerError,
     RateLimitError,
+    RunCancelledError,
+    StreamStallError,
 )
 
 ErrorCode = Literal[
@@ -22,8 +26,12 @@ ErrorCode = Literal[
     "invalid_request",
     "network_error",
     "provider_error",
+    "cancelled",
 ]
 
+# Finer-grained causes reported alongside the `timeout` code.
+TimeoutSubtype = Literal["deadline", "stream_first_chunk", "stream_idle"]
+
 _HTTP_STATUS_PATTERN = re.compile(r"HTTP (\d{3})")
 
 
@@ -35,15 +43,20 @@ class RuntimeErrorPayload:
     message: str
     provider: str | None
     timestamp_utc: str
+    subtype: TimeoutSubtype | None = None
 
     def to_dict(self) -> dict[str, str | None]:
         """Return JSON-serializable payload representation."""
-        return {
+        payload = {
             "code": self.code,
             "message": self.message,
             "provider": self.provider,
             "timestamp_utc": self.timestamp_utc,
         }
+        # Only emitted when known, so existing payloads keep their shape.
+        if self.subtype is not None:
+            payload["subtype"] = self.subtype
+        return payload
 
 
 def _iter_exception_chain(exc: BaseException) -> list[BaseException]:
@@ -68,6 +81,16 @@ def _is_timeout_related(exc: BaseException) -> bool:
     return False
 
 
+def _timeout_subtype(exc: BaseException) -> TimeoutSubtype | None:
+    """Return the specific timeout cause found in the exception chain, if any."""
+    for item in _iter_exception_chain(exc):
+        if isinstance(item, DeadlineExceededError):
+            return "deadline"
+        if isinstance(item, StreamStallError):
+            return "stream_first_chunk" if item.phase == "first_chunk" else "stream_idle"
+    return None
+
+
 def _is_network_related(exc: BaseException) -> bool:
     """True when the exception chain indicates network transport failures."""
     network_class_names = {
@@ -101,16 +124,20 @@ def _provider_error_is_invalid_request(exc: ProviderError) -> bool:
 
 def map_runtime_error_code(exc: BaseException) -> ErrorCode:
     """Map runtime exceptions to a stable error taxonomy code."""
+    if isinstance(exc, RunCancelledError):
+        return "cancelled"
     if isinstance(exc, RateLimitError):
         return "rate_limit"
     if isinstance(exc, (AuthenticationError, AuthorizationError)):
         return "auth_error"
-    if _is_timeout_related(exc):
+    if _timeout_subtype(exc) is not None or _is_timeout_related(exc):
         return "timeout"
     if _is_network_related(exc):
         return "network_error"
     if exc.__class__.__name__ == "ConfigurationError":
         return "invalid_request"
+    if isinstance(exc, InputValidationError):
+        return "invalid_request"
     if isinstance(exc, ProviderError) and _provider_error_is_invalid_request(exc):
         return "invalid_request"
     if isinstance(exc, PromptRunnerError):
@@ -123,10 +150,12 @@ def normalize_runtime_error(
     provider: str | None = None,
 ) -> RuntimeErrorPayload:
     """Build normalized runtime error payload from a raised exception."""
+    code = map_runtime_error_code(exc)
     return RuntimeErrorPayload(
-        code=map_runtime_error_code(exc),
+        code=code,
         message=str(exc),
         provider=provider,
         timestamp_utc=datetime.now(timezone.utc).isoformat(),
+        subtype=_timeout_subtype(exc) if code == "timeout" else None,
     )
 
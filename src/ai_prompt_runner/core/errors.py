@@ -20,4 +20,33 @@ class RateLimitError(ProviderError):
 
 
 class UpstreamServerError(ProviderError):
-    """Raised when provider returns HTTP 5xx."""
\ No newline at end of file
+    """Raised when provider returns HTTP 5xx."""
+
+
+class InputValidationError(PromptRunnerError):
+    """Raised when a user-provided input record is malformed."""
+
+
+class ContextWindowExceededError(InputValidationError):
+    """Raised before dispatch when a request does not fit the model's context window."""
+
+
+class DeadlineExceededError(PromptRunnerError):
+    """Raised when a run does not finish within its overall deadline."""
+
+
+class RunCancelledError(PromptRunnerError):
+    """Raised when a run is stopped through its cancellation token."""
+
+
+class StreamStallError(ProviderError):
+    """Raised when a stream sends no first chunk, or no next chunk, in time."""
+
+    def __init__(self, message: str, phase: str) -> None:
+        super().__init__(message)
+        # "first_chunk" before any stream event arrived, "idle" afterwards.
+        self.phase = phase
+
+
+class StreamReplayDivergedError(ProviderError):
+    """Raised when a replayed stream does not reproduce the output already emitted."""
@@ -0,0 +1,367 @@
+"""Open-loop load generation: arrival schedules, latency histograms and the load test driver."""
+
+import math
+import random
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from ai_prompt_runner.core.error_taxonomy import map_runtime_error_code
+from ai_prompt_runner.core.models import PromptRequest
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.services.provider_factory import ConfigurationError
+
+# `constant` spaces arrivals evenly, `ramp` raises the rate linearly over the
+# run and `poisson` draws exponential gaps (independent arrivals, like real
+# user traffic).
+ARRIVAL_SCHEDULES = ("constant", "ramp", "poisson")
+
+REPORT_PERCENTILES = (50.0, 90.0, 95.0, 99.0, 99.9)
+
+
+def arrival_offsets(
+    schedule: str,
+    rps: float,
+    duration_seconds: float,
+    ramp_start_rps: float = 0.0,
+    seed: int | None = None,
+) -> Iterator[float]:
+    """
+    Yield request start offsets in seconds from the start of the run.
+
+    Offsets depend only on the schedule, never on how fast requests
+    complete (open loop). `ramp` moves the rate linearly from
+    `ramp_start_rps` to `rps` over `duration_seconds`; `poisson` uses a
+    `random.Random(seed)`.
+    """
+    if schedule not in ARRIVAL_SCHEDULES:
+        raise ValueError(f"Unknown arrival schedule '{schedule}'. Supported: {', '.join(ARRIVAL_SCHEDULES)}.")
+    if rps <= 0 or duration_seconds <= 0:
+        raise ValueError("rps and duration_seconds must be greater than 0.")
+    if ramp_start_rps < 0:
+        raise ValueError("ramp_start_rps must be greater than or equal to 0.")
+
+    if schedule == "poisson":
+        rng = random.Random(seed)
+        offset = rng.expovariate(rps)
+        while offset < duration_seconds:
+            yield offset
+            offset += rng.expovariate(rps)
+        return
+
+    count = 0
+    while True:
+        if schedule == "constant":
+            offset = count / rps
+        else:
+            # Arrivals so far at time t: N(t) = r0 * t + slope * t^2 / 2.
+            slope = (rps - ramp_start_rps) / duration_seconds
+            if slope == 0:
+                offset = count / rps
+            else:
+                discriminant = ramp_start_rps**2 + 2 * slope * count
+                if discriminant < 0:
+                    return
+                offset = (math.sqrt(discriminant) - ramp_start_rps) / slope
+        if offset >= duration_seconds:
+            return
+        yield offset
+        count += 1
+
+
+class LatencyHistogram:
+    """
+    Thread-safe latency histogram with the HDR (high dynamic range) layout.
+
+    Values are recorded in microseconds into log-linear buckets: 2048
+    linear sub-buckets per power of two, so every recorded value is kept
+    to 3 significant digits (0.1% relative error) from 1 us to hours, in a
+    fixed amount of memory regardless of the number of samples.
+    """
+
+    _SUB_BUCKET_HALF_MAGNITUDE = 10
+    _SUB_BUCKET_HALF = 1 << _SUB_BUCKET_HALF_MAGNITUDE
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: dict[int, int] = {}
+        self.count = 0
+        self._sum_us = 0
+        self._min_us: int | None = None
+        self._max_us = 0
+
+    def _index(self, value_us: int) -> int:
+        bucket = max(value_us.bit_length() - self._SUB_BUCKET_HALF_MAGNITUDE - 1, 0)
+        sub_bucket = value_us >> bucket
+        return ((bucket + 1) << self._SUB_BUCKET_HALF_MAGNITUDE) + sub_bucket - self._SUB_BUCKET_HALF
+
+    def _highest_equivalent(self, index: int) -> int:
+        bucket = (index >> self._SUB_BUCKET_HALF_MAGNITUDE) - 1
+        sub_bucket = (index & (self._SUB_BUCKET_HALF - 1)) + self._SUB_BUCKET_HALF
+        if bucket < 0:
+            bucket, sub_bucket = 0, sub_bucket - self._SUB_BUCKET_HALF
+        return ((sub_bucket + 1) << bucket) - 1
+
+    def record(self, seconds: float) -> None:
+        value_us = max(int(seconds * 1_000_000), 0)
+        index = self._index(value_us)
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self.count += 1
+            self._sum_us += value_us
+            self._max_us = max(self._max_us, value_us)
+            self._min_us = value_us if self._min_us is None else min(self._min_us, value_us)
+
+    def percentile_ms(self, percentile: float) -> float | None:
+        """Value at `percentile` (0-100) in ms, or None when empty."""
+        with self._lock:
+            if not self.count:
+                return None
+            target = max(math.ceil(percentile / 100 * self.count), 1)
+            seen = 0
+            for index in sorted(self._counts):
+                seen += self._counts[index]
+                if seen >= target:
+                    return min(self._highest_equivalent(index), self._max_us) / 1000
+            return self._max_us / 1000
+
+    def summary(self) -> dict | None:
+        """Min, mean, report percentiles and max in ms, or None when empty."""
+        if not self.count:
+            return None
+        summary = {"count": self.count, "min": self._min_us / 1000, "mean": round(self._sum_us / self.count / 1000, 3)}
+        for percentile in REPORT_PERCENTILES:
+            summary[f"p{percentile:g}".replace(".", "_")] = self.percentile_ms(percentile)
+        summary["max"] = self._max_us / 1000
+        return summary
+
+
+@dataclass(frozen=True)
+class LoadTestSettings:
+    """Arrival schedule and limits of one load test."""
+
+    schedule: str
+    rps: float
+    duration_seconds: float
+    concurrency: int
+    ramp_start_rps: float = 0.0
+    seed: int | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "arrival": self.schedule,
+            "target_rps": self.rps,
+            "ramp_start_rps": self.ramp_start_rps if self.schedule == "ramp" else None,
+            "duration_seconds": self.duration_seconds,
+            "concurrency": self.concurrency,
+            "seed": self.seed,
+        }
+
+
+@dataclass(frozen=True)
+class LoadTestProgress:
+    """Live counters handed to the progress callback."""
+
+    elapsed_seconds: float
+    scheduled: int
+    completed: int
+    in_flight: int
+    succeeded: int
+    failed: int
+    p50_ms: float | None
+    p99_ms: float | None
+
+    @property
+    def achieved_rps(self) -> float:
+        return self.completed / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+
+@dataclass
+class LoadTestReport:
+    """
+    Final results of a load test.
+
+    Latency and time to first token are measured from each request's
+    scheduled start, so time spent waiting for a free slot under the
+    concurrency ceiling counts against the system instead of silently
+    lowering the offered load (no coordinated omission). `dispatch_lag`
+    isolates that wait.
+    """
+
+    settings: LoadTestSettings
+    stream: bool
+    scheduled: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    error_codes: dict[str, int] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+    max_in_flight: int = 0
+    interrupted: bool = False
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    first_token: LatencyHistogram = field(default_factory=LatencyHistogram)
+    dispatch_lag: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    @property
+    def completed(self) -> int:
+        return self.succeeded + self.failed
+
+    def to_dict(self) -> dict:
+        elapsed = self.elapsed_seconds
+        return {
+            "schedule": {**self.settings.to_dict(), "stream": self.stream},
+            "requests": {
+                "scheduled": self.scheduled,
+                "completed": self.completed,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "interrupted": self.interrupted,
+            },
+            "error_codes": dict(sorted(self.error_codes.items())),
+            "throughput": {
+                "elapsed_seconds": round(elapsed, 3),
+                "achieved_rps": round(self.completed / elapsed, 3) if elapsed else 0.0,
+                "success_rps": round(self.succeeded / elapsed, 3) if elapsed else 0.0,
+                "max_in_flight": self.max_in_flight,
+            },
+            "latency_ms": self.latency.summary(),
+            "ttft_ms": self.first_token.summary() if self.stream else None,
+            "dispatch_lag_ms": self.dispatch_lag.summary(),
+        }
+
+
+def run_load_test(
+    runner_factory: Callable[[int], PromptRunner],
+    requests: Sequence[PromptRequest],
+    settings: LoadTestSettings,
+    on_progress: Callable[[LoadTestProgress], None] | None = None,
+    progress_interval_seconds: float = 1.0,
+    clock: Callable[[], float] = time.monotonic,
+) -> LoadTestReport:
+    """
+    Offer `requests` (cycled in order) at the schedule of `settings` and measure the results.
+
+    Requests start at their scheduled offsets whether or not earlier ones
+    have finished; at most `settings.concurrency` run at once and the rest
+    wait for a slot. Each worker thread builds its own runner with
+    `runner_factory(worker_index)`, so providers never share per-call state;
+    a factory failure raises `ConfigurationError`. Every request failure,
+    expected or not, is counted under its runtime error category. After the
+    last arrival the run waits for in-flight requests. Ctrl-C stops
+    scheduling, drops waiting requests and reports what completed.
+    """
+    if not requests:
+        raise ValueError("At least one request is required.")
+    if settings.concurrency <= 0:
+        raise ValueError("concurrency must be greater than 0.")
+    offsets = arrival_offsets(
+        settings.schedule, settings.rps, settings.duration_seconds, settings.ramp_start_rps, settings.seed
+    )
+    stream = any(request.stream for request in requests)
+    report = LoadTestReport(settings=settings, stream=stream)
+    lock = threading.Lock()
+    in_flight = 0
+    local = threading.local()
+    worker_indexes = iter(range(settings.concurrency))
+    setup_errors: list[Exception] = []
+
+    def init_worker() -> None:
+        with lock:
+            index = next(worker_indexes)
+        try:
+            local.runner = runner_factory(index)
+        except Exception as exc:  # noqa: BLE001 - reported by the scheduling loop
+            # Raising here would break the pool with a logged traceback and
+            # only surface on a later submit; the loop reports it instead.
+            with lock:
+                setup_errors.append(exc)
+
+    def execute(request: PromptRequest, scheduled_at: float) -> None:
+        nonlocal in_flight
+        runner = getattr(local, "runner", None)
+        if runner is None:
+            return
+        started = clock()
+        with lock:
+            in_flight += 1
+            report.max_in_flight = max(report.max_in_flight, in_flight)
+        first_chunk: list[float] = []
+
+        def on_chunk(_chunk: str) -> None:
+            if not first_chunk:
+                first_chunk.append(clock())
+
+        # Counted as an unexpected failure unless the run says otherwise.
+        code: str | None = "provider_error"
+        try:
+            report.dispatch_lag.record(started - scheduled_at)
+            runner.run(request, on_stream_chunk=on_chunk)
+            code = None
+        except Exception as exc:  # noqa: BLE001 - every failure is counted, by category
+            code = map_runtime_error_code(exc)
+        finally:
+            finished = clock()
+            report.latency.record(finished - scheduled_at)
+            if first_chunk:
+                report.first_token.record(first_chunk[0] - scheduled_at)
+            with lock:
+                in_flight -= 1
+                if code is None:
+                    report.succeeded += 1
+                else:
+                    report.failed += 1
+                    report.error_codes[code] = report.error_codes.get(code, 0) + 1
+
+    done = threading.Event()
+    start = clock()
+
+    def progress_loop() -> None:
+        while not done.wait(progress_interval_seconds):
+            p50_ms, p99_ms = report.latency.percentile_ms(50), report.latency.percentile_ms(99)
+            with lock:
+                progress = LoadTestProgress(
+                    elapsed_seconds=clock() - start,
+                    scheduled=report.scheduled,
+                    completed=report.completed,
+                    in_flight=in_flight,
+                    succeeded=report.succeeded,
+                    failed=report.failed,
+                    p50_ms=p50_ms,
+                    p99_ms=p99_ms,
+                )
+            on_progress(progress)
+
+    reporter = None
+    if on_progress is not None:
+        reporter = threading.Thread(target=progress_loop, name="loadtest-progress", daemon=True)
+        reporter.start()
+    executor = ThreadPoolExecutor(
+        max_workers=settings.concurrency, thread_name_prefix="loadtest", initializer=init_worker
+    )
+    try:
+        for position, offset in enumerate(offsets):
+            if setup_errors:
+                break
+            scheduled_at = start + offset
+            delay = scheduled_at - clock()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(execute, requests[position % len(requests)], scheduled_at)
+            with lock:
+                report.scheduled += 1
+    except KeyboardInterrupt:
+        report.interrupted = True
+        executor.shutdown(wait=True, cancel_futures=True)
+        with lock:
+            # Waiting requests that were dropped never ran.
+            report.scheduled = report.completed
+    finally:
+        executor.shutdown(wait=True, cancel_futures=bool(setup_errors))
+        report.elapsed_seconds = clock() - start
+        done.set()
+        if reporter is not None:
+            reporter.join()
+    if setup_errors:
+        raise ConfigurationError(f"Load test worker setup failed: {setup_errors[0]}") from setup_errors[0]
+    return report
@@ -16,6 +16,10 @@ class GenerationConfig:
     temperature: float | None = None
     max_tokens: int | None = None
     top_p: float | None = None
+    # Native stop sequences, forwarded where the provider API supports them.
+    stop: tuple[str, ...] | None = None
+    # Number of completions to sample for the same prompt.
+    n: int | None = None
 
     def is_empty(self) -> bool:
         """Return True when no explicit runtime control is set."""
@@ -23,16 +27,26 @@ class GenerationConfig:
             self.temperature is None
             and self.max_tokens is None
             and self.top_p is None
+            and not self.stop
+            and self.n is None
         )
 
 
 @dataclass(frozen=True)
 class UsageMetadata:
-    """Normalized token usage metadata returned by providers when available."""
+    """
+    Normalized token usage metadata returned by providers when available.
+
+    `prompt_tokens` counts every input token, cached or not.
+    `cache_read_tokens` is the part served from a provider prefix cache.
+    `cache_write_tokens` is the part written into it by this call.
+    """
 
     prompt_tokens: int | None = None
     completion_tokens: int | None = None
     total_tokens: int | None = None
+    cache_read_tokens: int | None = None
+    cache_write_tokens: int | None = None
 
     def to_dict(self) -> dict:
         """Serialize only known token counters to keep payload additive."""
@@ -43,6 +57,61 @@ class UsageMetadata:
             payload["completion_tokens"] = self.completion_tokens
         if self.total_tokens is not None:
             payload["total_tokens"] = self.total_tokens
+        if self.cache_read_tokens is not None:
+            payload["cache_read_tokens"] = self.cache_read_tokens
+        if self.cache_write_tokens is not None:
+            payload["cache_write_tokens"] = self.cache_write_tokens
+        return payload
+
+    @classmethod
+    def total(cls, usages: "list[UsageMetadata]") -> "UsageMetadata":
+        """Add up counters across calls; a counter no call reported stays None."""
+
+        def _sum(name: str) -> int | None:
+            values = [getattr(usage, name) for usage in usages if getattr(usage, name) is not None]
+            return sum(values) if values else None
+
+        return cls(
+            prompt_tokens=_sum("prompt_tokens"),
+            completion_tokens=_sum("completion_tokens"),
+            total_tokens=_sum("total_tokens"),
+            cache_read_tokens=_sum("cache_read_tokens"),
+            cache_write_tokens=_sum("cache_write_tokens"),
+        )
+
+
+@dataclass(frozen=True)
+class LatencyMetadata:
+    """
+    Latency breakdown of one call, in ms.
+
+    `first_chunk_ms` is measured by the runner for streamed responses: the
+    time from starting the call to the first chunk of text. The other fields
+    are reported by the inference engine: `load_ms` is the time spent loading
+    the model into memory (non-zero on a cold start), `prompt_eval_ms` the
+    prompt processing time, `eval_ms` the generation time and `total_ms` the
+    engine's end-to-end time.
+    """
+
+    first_chunk_ms: int | None = None
+    load_ms: int | None = None
+    prompt_eval_ms: int | None = None
+    eval_ms: int | None = None
+    total_ms: int | None = None
+
+    def to_dict(self) -> dict:
+        """Serialize only the timings that were measured or reported."""
+        payload: dict[str, int] = {}
+        if self.first_chunk_ms is not None:
+            payload["first_chunk_ms"] = self.first_chunk_ms
+        if self.load_ms is not None:
+            payload["load_ms"] = self.load_ms
+        if self.prompt_eval_ms is not None:
+            payload["prompt_eval_ms"] = self.prompt_eval_ms
+        if self.eval_ms is not None:
+            payload["eval_ms"] = self.eval_ms
+        if self.total_ms is not None:
+            payload["total_ms"] = self.total_ms
         return payload
 
 
@@ -114,6 +183,15 @@ class PromptRequest:
     max_tokens: int | None = None
     top_p: float | None = None
     stream: bool = False
+    # Opt-in recovery for deterministic streams (temperature 0): how many
+    # times a stream that failed after emitting output may be re-issued.
+    stream_replays: int = 0
+    # Client-side early stop: the response ends before the first stop
+    # sequence or after `max_response_chars` characters, whichever is first.
+    stop: tuple[str, ...] | None = None
+    max_response_chars: int | None = None
+    # Completions sampled for the prompt; more than one adds `responses`.
+    samples: int | None = None
 
     def generation_config(self) -> GenerationConfig | None:
         """Return provider runtime controls, or None when unset."""
@@ -121,12 +199,83 @@ class PromptRequest:
             temperature=self.temperature,
             max_tokens=self.max_tokens,
             top_p=self.top_p,
+            stop=self.stop,
+            n=self.samples,
         )
         if config.is_empty():
             return None
         return config
 
 
+@dataclass(frozen=True)
+class TruncationMetadata:
+    """Why the runner ended a response early on the client side."""
+
+    # "stop_sequence" or "max_response_chars".
+    reason: str
+    stop_sequence: str | None = None
+
+    def to_dict(self) -> dict:
+        payload: dict[str, str] = {"reason": self.reason}
+        if self.stop_sequence is not None:
+            payload["stop_sequence"] = self.stop_sequence
+        return payload
+
+
+@dataclass(frozen=True)
+class PromptTrimMetadata:
+    """How much of the prompt the `trim` context policy removed before dispatch."""
+
+    # Estimated tokens removed from the middle of the user prompt.
+    removed_tokens: int
+    context_window: int
+
+    def to_dict(self) -> dict:
+        return {"removed_tokens": self.removed_tokens, "context_window": self.context_window}
+
+
+@dataclass(frozen=True)
+class SimilarityCacheMetadata:
+    """Marks a response served from the near-duplicate cache instead of the provider."""
+
+    # Estimated Jaccard similarity between the normalized prompts.
+    similarity: float
+    # Provenance hash of the prompt the stored response was generated for.
+    matched_prompt_hash: str
+
+    def to_dict(self) -> dict:
+        return {"similarity": self.similarity, "matched_prompt_hash": self.matched_prompt_hash}
+
+
+@dataclass(frozen=True)
+class ResponseSample:
+    """
+    One completion of a multi-sample request.
+
+    `finish_reason` is the provider's own value (for example "stop",
+    "length", "end_turn" or "MAX_TOKENS"). `usage` is set when the sample
+    was generated by its own call; native multi-sample APIs only report
+    usage for the whole call.
+    """
+
+    text: str
+    finish_reason: str | None = None
+    usage: UsageMetadata | None = None
+    truncation: TruncationMetadata | None = None
+
+    def to_dict(self, index: int) -> dict:
+        payload: dict[str, object] = {"index": index, "response": self.text}
+        if self.finish_reason is not None:
+            payload["finish_reason"] = self.finish_reason
+        if self.usage is not None:
+            usage = self.usage.to_dict()
+            if usage:
+                payload["usage"] = usage
+        if self.truncation is not None:
+            payload["truncation"] = self.truncation.to_dict()
+        return payload
+
+
 @dataclass(frozen=True)
 class PromptResponse:
     """Normalized output payload from a provider."""
@@ -138,6 +287,12 @@ class PromptResponse:
     execution_ms: int | None = None
     usage: UsageMetadata | None = None
     execution_context: ExecutionContextMetadata | None = None
+    truncation: TruncationMetadata | None = None
+    latency: LatencyMetadata | None = None
+    prompt_trim: PromptTrimMetadata | None = None
+    similarity_cache: SimilarityCacheMetadata | None = None
+    # All completions of a multi-sample request; `response` is the first.
+    samples: tuple[ResponseSample, ...] | None = None
     timestamp_utc: str = field(
         default_factory=lambda: datetime.now(timezone.utc).isoformat()
     )
@@ -158,9 +313,46 @@ class PromptResponse:
                 metadata["usage"] = usage
         if self.execution_context is not None:
             metadata["execution_context"] = self.execution_context.to_dict()
+        if self.truncation is not None:
+            metadata["truncation"] = self.truncation.to_dict()
+        if self.latency is not None:
+            latency = self.latency.to_dict()
+            if latency:
+                metadata["latency"] = latency
+        if self.prompt_trim is not None:
+            metadata["prompt_trim"] = self.prompt_trim.to_dict()
+        if self.similarity_cache is not None:
+            metadata["similarity_cache"] = self.similarity_cache.to_dict()
 
-        return {
+        payload = {
             "prompt": self.prompt,
             "response": self.response,
             "metadata": metadata,
         }
+        if self.samples is not None:
+            payload["responses"] = [
+                sample.to_dict(index) for index, sample in enumerate(self.samples)
+            ]
+        return payload
+
+
+@dataclass(frozen=True)
+class StreamChunkEvent:
+    """One response fragment, delivered as soon as the provider produces it."""
+
+    text: str
+    # 0-based position of this chunk within the response.
+    index: int
+    type: str = field(default="chunk", init=False)
+
+
+@dataclass(frozen=True)
+class StreamCompletedEvent:
+    """Terminal stream event carrying the full normalized payload."""
+
+    payload: dict
+    usage: UsageMetadata | None = None
+    type: str = field(default="completed", init=False)
+
+
+StreamEvent = StreamChunkEvent | StreamCompletedEvent
@@ -0,0 +1,180 @@
+"""Multi-process batch execution for CPU-bound response post-processing."""
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from time import perf_counter
+
+from ai_prompt_runner.core.batch import (
+    BatchItem,
+    BatchSummary,
+    EncodedBatchItemResult,
+    execute_batch_item,
+)
+from ai_prompt_runner.core.cache_schedule import run_cache_scheduled
+from ai_prompt_runner.core.dedup import ResultFanOut
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.core.similarity_cache import SimilarityCache
+from ai_prompt_runner.core.token_budget import TokenBudget
+from ai_prompt_runner.services.base import BaseProvider
+from ai_prompt_runner.services.call_control import new_abortable_session
+
+# Per-process state, populated once by the pool initializer. Each worker owns
+# its provider instance (and therefore its own HTTP connections).
+_WORKER_RUNNER: PromptRunner | None = None
+_WORKER_PROVIDER_NAME: str | None = None
+
+
+def pooled_provider(create: Callable[..., BaseProvider], **options) -> BaseProvider:
+    """
+    Build a provider on a new connection pool owned by the calling process.
+
+    Wrap it in `functools.partial` (for example over `create_provider`) to
+    get a picklable `provider_factory`: the pool initializer calls it once
+    per worker, so each process keeps its connections alive across items
+    instead of opening a new connection per request.
+    """
+    return create(session=new_abortable_session(), **options)
+
+
+def _init_worker(
+    provider_factory: Callable[[], BaseProvider],
+    provider_name: str,
+    deadline_seconds: float | None = None,
+    token_budget_factory: Callable[[], TokenBudget] | None = None,
+    similarity_cache_factory: Callable[[], SimilarityCache] | None = None,
+) -> None:
+    """Build the worker-local runner once per process."""
+    global _WORKER_RUNNER, _WORKER_PROVIDER_NAME
+    _WORKER_RUNNER = PromptRunner(
+        provider=provider_factory(),
+        deadline_seconds=deadline_seconds,
+        token_budget=token_budget_factory() if token_budget_factory is not None else None,
+        similarity_cache=similarity_cache_factory() if similarity_cache_factory is not None else None,
+    )
+    _WORKER_PROVIDER_NAME = provider_name
+
+
+def _execute_in_worker(item: BatchItem) -> EncodedBatchItemResult:
+    """
+    Run one item in a worker process.
+
+    Decoding, validation, payload building and JSON serialization all happen
+    here, so the parent only forwards ready-to-write lines.
+    """
+    if _WORKER_RUNNER is None or _WORKER_PROVIDER_NAME is None:
+        raise RuntimeError("Batch worker process was not initialized.")
+    return execute_batch_item(_WORKER_RUNNER, item, _WORKER_PROVIDER_NAME).encode()
+
+
+def iter_ordered_results(
+    executor: ProcessPoolExecutor,
+    items: Iterable[BatchItem],
+    max_in_flight: int,
+    fan_out: ResultFanOut[EncodedBatchItemResult] | None = None,
+) -> Iterator[EncodedBatchItemResult]:
+    """
+    Submit items with a bounded window and yield results in submission order.
+
+    The window keeps memory flat for arbitrarily long inputs and gives input
+    readers natural backpressure; head-of-line waiting is the price of stable
+    output order. Duplicate positions (with `fan_out`) occupy a window slot
+    without being submitted and are resolved from their first occurrence,
+    which is always yielded earlier.
+    """
+    if max_in_flight <= 0:
+        raise ValueError("max_in_flight must be greater than 0.")
+
+    window: deque[tuple[int, bytes | None, Future | None]] = deque()
+
+    def _resolve() -> EncodedBatchItemResult:
+        index, key, future = window.popleft()
+        if future is None:
+            return fan_out.take(key).with_index(index)
+        result = future.result()
+        if key is not None:
+            fan_out.store(key, result)
+        return result
+
+    for item in items:
+        key = fan_out.key_for(item.request) if fan_out is not None else None
+        if key is not None and not fan_out.first_occurrence(key):
+            window.append((item.index, key, None))
+        else:
+            window.append((item.index, key, executor.submit(_execute_in_worker, item)))
+        if len(window) >= max_in_flight:
+            yield _resolve()
+    while window:
+        yield _resolve()
+
+
+def run_batch_parallel(
+    provider_factory: Callable[[], BaseProvider],
+    items: Iterable[BatchItem],
+    provider: str,
+    on_result: Callable[[EncodedBatchItemResult], None],
+    processes: int,
+    max_in_flight: int | None = None,
+    shard: str | None = None,
+    fan_out: ResultFanOut[EncodedBatchItemResult] | None = None,
+    deadline_seconds: float | None = None,
+    cache_schedule: bool = False,
+    min_prefix_chars: int = 0,
+    cache_schedule_window: int | None = None,
+    token_budget_factory: Callable[[], TokenBudget] | None = None,
+    similarity_cache_factory: Callable[[], SimilarityCache] | None = None,
+) -> BatchSummary:
+    """
+    Execute batch items across `processes` worker processes.
+
+    `provider_factory` must be picklable (for example a `functools.partial`
+    over `create_provider`) so each worker can build its own provider.
+    Results reach `on_result` in input order, like `run_batch`, including
+    the fan-out of repeated requests. `deadline_seconds` bounds each item.
+    With `cache_schedule`, items run grouped by shared prompt prefix (see
+    `cache_schedule.plan_cache_groups`), one warm-up per group first,
+    planned `cache_schedule_window` items at a time.
+    `token_budget_factory` (picklable, like `provider_factory`) builds each
+    worker's token budget, so rate limits apply per process.
+    `similarity_cache_factory` opens each worker's connection to a shared
+    similarity cache file.
+    """
+    if processes <= 0:
+        raise ValueError("processes must be greater than 0.")
+
+    summary = BatchSummary(shard=shard)
+    start = perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(
+            provider_factory,
+            provider,
+            deadline_seconds,
+            token_budget_factory,
+            similarity_cache_factory,
+        ),
+    ) as executor:
+        if cache_schedule:
+            return run_cache_scheduled(
+                items,
+                submit=lambda item: executor.submit(_execute_in_worker, item),
+                on_result=on_result,
+                max_in_flight=max_in_flight or processes,
+                min_prefix_chars=min_prefix_chars,
+                shard=shard,
+                fan_out=fan_out,
+                window=cache_schedule_window,
+            )
+        for result in iter_ordered_results(
+            executor,
+            items,
+            max_in_flight=max_in_flight or processes * 4,
+            fan_out=fan_out,
+        ):
+            summary.record(result)
+            on_result(result)
+    if fan_out is not None:
+        summary.deduplicated = fan_out.deduplicated
+    summary.execution_ms = int((perf_counter() - start) * 1000)
+    return summary
@@ -1,46 +1,198 @@
 """Application use case orchestration."""
 
-from collections.abc import Callable
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import replace
 from hashlib import sha256
 from importlib.metadata import PackageNotFoundError, version
 from time import perf_counter
 
-from ai_prompt_runner.core.errors import ProviderError
+from ai_prompt_runner.core.cancellation import CancellationToken, RunControl
+from ai_prompt_runner.core.early_stop import EarlyStop
+from ai_prompt_runner.core.error_taxonomy import map_runtime_error_code
+from ai_prompt_runner.core.errors import InputValidationError, PromptRunnerError, ProviderError
 from ai_prompt_runner.core.models import (
     ExecutionContextMetadata,
     ExecutionRuntimeConfig,
     GenerationConfig,
+    LatencyMetadata,
     PromptRequest,
     PromptResponse,
+    PromptTrimMetadata,
+    ResponseSample,
+    SimilarityCacheMetadata,
+    StreamChunkEvent,
+    StreamCompletedEvent,
+    StreamEvent,
+    TruncationMetadata,
     UsageMetadata,
 )
+from ai_prompt_runner.core.similarity_cache import SimilarityCache, similarity_scope
+from ai_prompt_runner.core.stream_replay import StreamReplay
+from ai_prompt_runner.core.token_budget import TokenBudget
 from ai_prompt_runner.services.base import BaseProvider
 
 from ai_prompt_runner.core.validators import validate_response_payload
 
 
+def effective_prompt_text(request: PromptRequest) -> str:
+    """
+    Build deterministic prompt text used to compute provenance hash.
+
+    This mirrors runtime prompt composition semantics:
+    - with system prompt: SYSTEM + USER canonical representation
+    - without system prompt: raw user prompt
+    """
+    if request.system_prompt is None:
+        return request.prompt_text
+    return f"SYSTEM:\n{request.system_prompt}\n\nUSER:\n{request.prompt_text}"
+
+
+def prompt_hash(request: PromptRequest) -> str:
+    """Return SHA256 digest for the effective prompt sent to providers."""
+    digest = sha256(effective_prompt_text(request).encode("utf-8"))
+    return f"sha256:{digest.hexdigest()}"
+
+
 class PromptRunner:
     """Runs prompts through a provider and returns normalized payload."""
 
-    def __init__(self, provider: BaseProvider) -> None:
+    def __init__(
+        self,
+        provider: BaseProvider,
+        deadline_seconds: float | None = None,
+        token_budget: TokenBudget | None = None,
+        similarity_cache: SimilarityCache | None = None,
+    ) -> None:
         self.provider = provider
+        # Default overall deadline applied to every run without an explicit control.
+        self.deadline_seconds = deadline_seconds
+        # Pre-flight context-window check and token pacing; None sends as is.
+        self.token_budget = token_budget
+        # Opt-in near-duplicate response cache consulted before dispatch.
+        self.similarity_cache = similarity_cache
 
-    def _effective_prompt_for_provenance(self, request: PromptRequest) -> str:
+    def _resolve_control(
+        self,
+        control: RunControl | None,
+        cancel_token: CancellationToken | None,
+    ) -> RunControl | None:
+        """Return the control for one run; the deadline clock starts here."""
+        if control is not None:
+            return control
+        if self.deadline_seconds is None and cancel_token is None:
+            return None
+        return RunControl(deadline_seconds=self.deadline_seconds, token=cancel_token)
+
+    def _apply_token_budget(
+        self,
+        request: PromptRequest,
+        control: RunControl | None,
+    ) -> tuple[PromptRequest, PromptTrimMetadata | None]:
         """
-        Build deterministic prompt text used to compute provenance hash.
+        Check the request against the context window and wait for rate capacity.
 
-        This mirrors runtime prompt composition semantics:
-        - with system prompt: SYSTEM + USER canonical representation
-        - without system prompt: raw user prompt
+        Raises `ContextWindowExceededError` before anything is sent when the
+        `reject` policy applies; under `trim` the shortened request is
+        returned with a record of what was removed.
         """
-        if request.system_prompt is None:
-            return request.prompt_text
-        return f"SYSTEM:\n{request.system_prompt}\n\nUSER:\n{request.prompt_text}"
+        if self.token_budget is None:
+            return request, None
+        request, estimate = self.token_budget.apply(request)
+        self.token_budget.throttle(request, estimate, control)
+        if not estimate.trimmed_tokens:
+            return request, None
+        return request, PromptTrimMetadata(
+            removed_tokens=estimate.trimmed_tokens,
+            context_window=estimate.context_window,
+        )
+
+    def _similarity_scope(self, request: PromptRequest) -> bytes | None:
+        """Return the similarity cache scope, or None when the cache does not apply."""
+        if self.similarity_cache is None or (request.samples is not None and request.samples > 1):
+            return None
+        model = getattr(getattr(self.provider, "config", None), "model", None)
+        return similarity_scope(request, model if isinstance(model, str) else None)
+
+    def _cached_payload(self, request: PromptRequest) -> dict | None:
+        """
+        Serve a stored response for a near-duplicate prompt without calling the provider.
+
+        The payload records the match in `metadata.similarity_cache`; it
+        carries no usage because no tokens were spent.
+        """
+        scope = self._similarity_scope(request)
+        if scope is None:
+            return None
+        start = perf_counter()
+        hit = self.similarity_cache.lookup(scope, request.prompt_text)
+        if hit is None:
+            return None
+        # Nothing was resolved upstream in this run.
+        execution_context = replace(self._build_execution_context(request), model_resolved=None)
+        response = PromptResponse(
+            prompt=request.prompt_text,
+            response=hit.response,
+            provider=request.provider,
+            model=hit.model or execution_context.model_requested,
+            execution_ms=int((perf_counter() - start) * 1000),
+            execution_context=execution_context,
+            similarity_cache=SimilarityCacheMetadata(
+                similarity=hit.similarity,
+                matched_prompt_hash=hit.prompt_hash,
+            ),
+        )
+        payload = response.to_dict()
+        validate_response_payload(payload)
+        return payload
+
+    def _remember(self, request: PromptRequest, payload: dict) -> None:
+        """Store a generated response in the similarity cache under the prompt as submitted."""
+        scope = self._similarity_scope(request)
+        if scope is None:
+            return
+        self.similarity_cache.store(
+            scope,
+            request.prompt_text,
+            response=payload["response"],
+            model=payload["metadata"].get("model"),
+            prompt_hash=prompt_hash(request),
+        )
+
+    @contextmanager
+    def _controlled(self, control: RunControl | None) -> Iterator[None]:
+        """
+        Expose `control` to the provider for one run.
+
+        Any failure raised after the run was cancelled or ran out of time is
+        reported as the cancellation/deadline error instead of the transport
+        error the abort caused.
+        """
+        if control is None:
+            yield
+            return
+        control.check()
+        previous = getattr(self.provider, "run_control", None)
+        self.provider.run_control = control
+        try:
+            yield
+        except Exception as exc:
+            if control.stopped:
+                try:
+                    control.check()
+                except PromptRunnerError as stop_error:
+                    raise stop_error from exc
+            raise
+        finally:
+            self.provider.run_control = previous
+
+    def _effective_prompt_for_provenance(self, request: PromptRequest) -> str:
+        """Build deterministic prompt text used to compute provenance hash."""
+        return effective_prompt_text(request)
 
     def _prompt_hash(self, request: PromptRequest) -> str:
         """Return SHA256 digest for the effective prompt sent to providers."""
-        digest = sha256(self._effective_prompt_for_provenance(request).encode("utf-8"))
-        return f"sha256:{digest.hexdigest()}"
+        return prompt_hash(request)
 
     def _runner_version(self) -> str:
         """Resolve installed runner package version for provenance metadata."""
@@ -67,6 +219,34 @@ class PromptRunner:
             raise ProviderError("Provider resolved model metadata must be a string.")
         return model_resolved
 
+    def _resolve_truncation(
+        self,
+        request: PromptRequest,
+        early_stop: EarlyStop,
+    ) -> TruncationMetadata | None:
+        """
+        Resolve truncation from the client-side cut or the provider stop signal.
+
+        Stop sequences are forwarded natively, so the upstream usually ends
+        generation before `EarlyStop` ever sees the sequence. A provider-named
+        match only counts when it is one of the requested stop sequences.
+        """
+        if early_stop.truncation is not None:
+            return early_stop.truncation
+
+        stop_getter = getattr(self.provider, "get_last_stop_sequence", None)
+        if not callable(stop_getter) or not request.stop:
+            return None
+
+        stop_sequence = stop_getter()
+        if stop_sequence is None:
+            return None
+        if not isinstance(stop_sequence, str):
+            raise ProviderError("Provider stop sequence metadata must be a string.")
+        if stop_sequence not in request.stop:
+            return None
+        return TruncationMetadata(reason="stop_sequence", stop_sequence=stop_sequence)
+
     def _build_execution_context(
         self,
         request: PromptRequest,
@@ -139,51 +319,234 @@ class PromptRunner:
             generation_config=generation_config,
         )
 
-    def _generate_response_text(
+    def _call_generate_samples(self, request: PromptRequest) -> list[ResponseSample] | None:
+        """
+        Ask the provider for `request.samples` completions in one operation.
+
+        Returns None when the provider has no multi-sample support, so
+        callers fall back to one `generate` call per sample.
+        """
+        samples_fn = getattr(self.provider, "generate_samples", None)
+        if not callable(samples_fn):
+            return None
+        try:
+            samples = samples_fn(
+                prompt=request.prompt_text,
+                system_prompt=request.system_prompt,
+                generation_config=self._resolve_generation_config(request),
+            )
+        except NotImplementedError:
+            return None
+        if not isinstance(samples, list) or not samples:
+            raise ProviderError("Provider samples must be a non-empty list.")
+        for sample in samples:
+            if not isinstance(sample, ResponseSample) or not isinstance(sample.text, str):
+                raise ProviderError("Provider samples must be ResponseSample objects with text.")
+        return samples
+
+    def _generate_samples(
         self,
         request: PromptRequest,
-        on_stream_chunk: Callable[[str], None] | None,
-    ) -> str:
-        """Generate response text with optional streaming fallback behavior."""
-        if not request.stream:
-            return self._call_generate(request)
+    ) -> tuple[list[ResponseSample], UsageMetadata | None]:
+        """
+        Generate, cut and account a multi-sample request.
+
+        Early stop applies to each sample on its own. Native multi-sample
+        APIs report their stop signal and usage for the whole call, so the
+        provider-named stop sequence only counts for the first sample. The
+        per-sample fallback sums usage when every call reported it.
+        """
+        native = self._call_generate_samples(request)
+        if native is not None:
+            samples = []
+            for index, sample in enumerate(native):
+                early_stop = EarlyStop.for_request(request)
+                text = early_stop.apply(sample.text) if early_stop.enabled else sample.text
+                truncation = (
+                    self._resolve_truncation(request, early_stop)
+                    if index == 0
+                    else early_stop.truncation
+                )
+                samples.append(replace(sample, text=text, truncation=truncation))
+            return samples, self._resolve_provider_usage()
 
+        samples = []
+        for _ in range(request.samples):
+            early_stop = EarlyStop.for_request(request)
+            text = self._generate_response_text(request, None, early_stop=early_stop)
+            samples.append(
+                ResponseSample(
+                    text=text,
+                    usage=self._resolve_provider_usage(),
+                    truncation=self._resolve_truncation(request, early_stop),
+                )
+            )
+        usages = [sample.usage for sample in samples]
+        if any(usage is None for usage in usages):
+            return samples, None
+        return samples, UsageMetadata.total(usages)
+
+    def _check_samples(self, request: PromptRequest) -> bool:
+        """Return True for multi-sample requests, rejecting streamed ones."""
+        if request.samples is None or request.samples <= 1:
+            return False
+        if request.stream:
+            raise InputValidationError("samples greater than 1 cannot be combined with streaming.")
+        return True
+
+    def _open_stream(self, request: PromptRequest) -> Iterator[str] | None:
+        """
+        Start provider streaming for the request.
+
+        Returns None when the provider cannot stream, so callers fall back to
+        non-stream execution.
+        """
         generation_config = self._resolve_generation_config(request)
 
         # Keep stream support optional: if a provider does not implement
         # streaming, fallback to non-stream execution.
         stream_fn = getattr(self.provider, "generate_stream", None)
         if not callable(stream_fn):
-            return self._call_generate(request)
+            return None
 
         try:
             if request.system_prompt is None:
                 if generation_config is None:
-                    stream_iter = stream_fn(prompt=request.prompt_text)
-                else:
-                    stream_iter = stream_fn(
-                        prompt=request.prompt_text,
-                        generation_config=generation_config,
-                    )
-            else:
-                if generation_config is None:
-                    stream_iter = stream_fn(
-                        prompt=request.prompt_text,
-                        system_prompt=request.system_prompt,
-                    )
-                else:
-                    stream_iter = stream_fn(
-                        prompt=request.prompt_text,
-                        system_prompt=request.system_prompt,
-                        generation_config=generation_config,
-                    )
+                    return stream_fn(prompt=request.prompt_text)
+                return stream_fn(
+                    prompt=request.prompt_text,
+                    generation_config=generation_config,
+                )
+            if generation_config is None:
+                return stream_fn(
+                    prompt=request.prompt_text,
+                    system_prompt=request.system_prompt,
+                )
+            return stream_fn(
+                prompt=request.prompt_text,
+                system_prompt=request.system_prompt,
+                generation_config=generation_config,
+            )
         except NotImplementedError:
-            return self._call_generate(request)
+            return None
 
-        chunks: list[str] = []
+    def _iter_stream_chunks(
+        self,
+        stream_iter: Iterator[str],
+        control: RunControl | None = None,
+    ) -> Iterator[str]:
+        """Validate provider chunks while passing them through unbuffered."""
         for chunk in stream_iter:
             if not isinstance(chunk, str):
                 raise ProviderError("Provider stream chunks must be strings.")
+            if control is not None:
+                control.check()
+            yield chunk
+        # An aborted connection can end a stream without a transport error;
+        # never report such a truncated response as complete.
+        if control is not None:
+            control.check()
+
+    def _is_replayable(self, exc: PromptRunnerError, control: RunControl | None) -> bool:
+        """True for transport failures worth replaying, never once the run must stop."""
+        if control is not None and control.stopped:
+            return False
+        return map_runtime_error_code(exc) in ("network_error", "timeout")
+
+    def _iter_response_stream(
+        self,
+        request: PromptRequest,
+        stream_iter: Iterator[str],
+        control: RunControl | None = None,
+    ) -> Iterator[str]:
+        """
+        Yield validated stream chunks, replaying the request on mid-stream failure.
+
+        Providers already retry failures before the first chunk. With
+        `request.stream_replays`, a transport failure after output was emitted
+        re-issues the request and `StreamReplay` suppresses the reproduced
+        prefix, so callers only ever see each character once.
+        """
+        if request.stream_replays and request.temperature != 0:
+            raise InputValidationError(
+                "stream_replays requires temperature 0 (deterministic decoding)."
+            )
+        emitted: list[str] = []
+        replays_left = request.stream_replays
+        replay: StreamReplay | None = None
+        while True:
+            try:
+                for chunk in self._iter_stream_chunks(stream_iter, control):
+                    if replay is not None:
+                        chunk = replay.feed(chunk)
+                        if not chunk:
+                            continue
+                    emitted.append(chunk)
+                    yield chunk
+                if replay is not None:
+                    replay.finish()
+                return
+            except PromptRunnerError as exc:
+                if not emitted or replays_left <= 0 or not self._is_replayable(exc, control):
+                    raise
+            finally:
+                close = getattr(stream_iter, "close", None)
+                if callable(close):
+                    close()
+            replays_left -= 1
+            replay = StreamReplay("".join(emitted))
+            stream_iter = self._open_stream(request)
+
+    def _iter_until_stop(self, chunks: Iterator[str], early_stop: EarlyStop) -> Iterator[str]:
+        """
+        Apply client-side early stop to a chunk stream.
+
+        Closing `chunks` as soon as the stop condition is met closes the
+        provider stream, which drops the upstream connection instead of
+        paying for (and waiting on) the rest of the generation.
+        """
+        try:
+            for chunk in chunks:
+                text = early_stop.feed(chunk)
+                if text:
+                    yield text
+                if early_stop.truncation is not None:
+                    return
+            tail = early_stop.flush()
+            if tail:
+                yield tail
+        finally:
+            chunks.close()
+
+    def _iter_stream_text(
+        self,
+        request: PromptRequest,
+        stream_iter: Iterator[str],
+        control: RunControl | None,
+        early_stop: EarlyStop,
+    ) -> Iterator[str]:
+        """Compose replay recovery and early stop over one provider stream."""
+        chunks = self._iter_response_stream(request, stream_iter, control)
+        if early_stop.enabled:
+            chunks = self._iter_until_stop(chunks, early_stop)
+        return chunks
+
+    def _generate_response_text(
+        self,
+        request: PromptRequest,
+        on_stream_chunk: Callable[[str], None] | None,
+        control: RunControl | None = None,
+        early_stop: EarlyStop | None = None,
+    ) -> str:
+        """Generate response text with optional streaming fallback behavior."""
+        early_stop = early_stop or EarlyStop()
+        stream_iter = self._open_stream(request) if request.stream else None
+        if stream_iter is None:
+            text = self._call_generate(request)
+            return early_stop.apply(text) if early_stop.enabled else text
+
+        chunks: list[str] = []
+        for chunk in self._iter_stream_text(request, stream_iter, control, early_stop):
             chunks.append(chunk)
             if on_stream_chunk is not None:
                 on_stream_chunk(chunk)
@@ -207,20 +570,44 @@ class PromptRunner:
             raise ProviderError("Provider usage metadata must be a UsageMetadata object.")
         return usage
 
-    def run(
+    def _resolve_provider_latency(self) -> LatencyMetadata | None:
+        """Resolve the optional engine timing breakdown from provider after a run."""
+        latency_getter = getattr(self.provider, "get_last_latency", None)
+        if not callable(latency_getter):
+            return None
+
+        latency = latency_getter()
+        if latency is None:
+            return None
+        if not isinstance(latency, LatencyMetadata):
+            raise ProviderError("Provider latency metadata must be a LatencyMetadata object.")
+        return latency
+
+    def _build_payload(
         self,
         request: PromptRequest,
-        on_stream_chunk: Callable[[str], None] | None = None,
-    ) -> dict:
-        """Execute prompt request and return JSON-serializable payload."""
-        start = perf_counter()
-        answer_text = self._generate_response_text(
-            request=request,
-            on_stream_chunk=on_stream_chunk,
-        )
-        execution_ms = int((perf_counter() - start) * 1000)
-        usage = self._resolve_provider_usage()
+        answer_text: str,
+        execution_ms: int,
+        truncation: TruncationMetadata | None = None,
+        samples: tuple[list[ResponseSample], UsageMetadata | None] | None = None,
+        first_chunk_ms: int | None = None,
+        prompt_trim: PromptTrimMetadata | None = None,
+    ) -> tuple[dict, UsageMetadata | None]:
+        """
+        Assemble and validate the normalized payload after generation.
+
+        `samples` is the result of `_generate_samples`; the first sample
+        becomes `response` and its usage replaces the provider's last usage.
+        `first_chunk_ms` (streamed responses) joins the provider's latency.
+        """
+        if samples is None:
+            usage = self._resolve_provider_usage()
+        else:
+            usage = samples[1]
         execution_context = self._build_execution_context(request)
+        latency = self._resolve_provider_latency()
+        if first_chunk_ms is not None:
+            latency = replace(latency or LatencyMetadata(), first_chunk_ms=first_chunk_ms)
 
         response = PromptResponse(
             prompt=request.prompt_text,
@@ -230,7 +617,164 @@ class PromptRunner:
             execution_ms=execution_ms,
             usage=usage,
             execution_context=execution_context,
+            truncation=truncation,
+            latency=latency,
+            prompt_trim=prompt_trim,
+            samples=tuple(samples[0]) if samples is not None else None,
         )
         payload = response.to_dict()
         validate_response_payload(payload)
+        return payload, usage
+
+    def run(
+        self,
+        request: PromptRequest,
+        on_stream_chunk: Callable[[str], None] | None = None,
+        control: RunControl | None = None,
+        cancel_token: CancellationToken | None = None,
+    ) -> dict:
+        """
+        Execute prompt request and return JSON-serializable payload.
+
+        `control` (or `cancel_token` plus the runner's default deadline) bounds
+        the whole run, including retries and the complete stream. Stop
+        sequences and `max_response_chars` end the response early and are
+        reported in `metadata.truncation`; a stop the provider enforced itself
+        is reported only when its API names the matched sequence. With
+        `request.samples` above 1 every completion is listed in `responses`.
+        The runner's `token_budget` is applied before dispatch; a prompt it
+        trimmed is reported in `metadata.prompt_trim`. With a
+        `similarity_cache`, a near-duplicate prompt is answered from the cache
+        (streamed as one chunk) and fresh single responses are stored in it.
+        """
+        control = self._resolve_control(control, cancel_token)
+        cached = self._cached_payload(request)
+        if cached is not None:
+            if on_stream_chunk is not None and cached["response"]:
+                on_stream_chunk(cached["response"])
+            return cached
+        submitted = request
+        request, prompt_trim = self._apply_token_budget(request, control)
+        if self._check_samples(request):
+            start = perf_counter()
+            with self._controlled(control):
+                samples = self._generate_samples(request)
+            execution_ms = int((perf_counter() - start) * 1000)
+            first = samples[0][0]
+            payload, _ = self._build_payload(
+                request,
+                first.text,
+                execution_ms,
+                truncation=first.truncation,
+                samples=samples,
+                prompt_trim=prompt_trim,
+            )
+            return payload
+
+        early_stop = EarlyStop.for_request(request)
+        first_chunk_at: list[float] = []
+
+        def _on_chunk(chunk: str) -> None:
+            if not first_chunk_at:
+                first_chunk_at.append(perf_counter())
+            if on_stream_chunk is not None:
+                on_stream_chunk(chunk)
+
+        start = perf_counter()
+        with self._controlled(control):
+            answer_text = self._generate_response_text(
+                request=request,
+                on_stream_chunk=_on_chunk,
+                control=control,
+                early_stop=early_stop,
+            )
+        execution_ms = int((perf_counter() - start) * 1000)
+        payload, _ = self._build_payload(
+            request,
+            answer_text,
+            execution_ms,
+            truncation=self._resolve_truncation(request, early_stop),
+            first_chunk_ms=int((first_chunk_at[0] - start) * 1000) if first_chunk_at else None,
+            prompt_trim=prompt_trim,
+        )
+        self._remember(submitted, payload)
         return payload
+
+    def iter_run(
+        self,
+        request: PromptRequest,
+        control: RunControl | None = None,
+        cancel_token: CancellationToken | None = None,
+    ) -> Iterator[StreamEvent]:
+        """
+        Execute prompt request as a pull-based event stream.
+
+        Yields one `StreamChunkEvent` per provider chunk as soon as it arrives,
+        then a single `StreamCompletedEvent` with the same payload `run` would
+        return. Non-stream requests, and providers without streaming support,
+        yield their full response as one chunk. Closing the iterator early
+        closes the provider stream. Deadline, cancellation and the similarity
+        cache apply as in `run`.
+        """
+        control = self._resolve_control(control, cancel_token)
+        cached = self._cached_payload(request)
+        if cached is not None:
+            if cached["response"]:
+                yield StreamChunkEvent(text=cached["response"], index=0)
+            yield StreamCompletedEvent(payload=cached, usage=None)
+            return
+        submitted = request
+        request, prompt_trim = self._apply_token_budget(request, control)
+        if self._check_samples(request):
+            start = perf_counter()
+            with self._controlled(control):
+                samples = self._generate_samples(request)
+            execution_ms = int((perf_counter() - start) * 1000)
+            first = samples[0][0]
+            if first.text:
+                yield StreamChunkEvent(text=first.text, index=0)
+            payload, usage = self._build_payload(
+                request,
+                first.text,
+                execution_ms,
+                truncation=first.truncation,
+                samples=samples,
+                prompt_trim=prompt_trim,
+            )
+            yield StreamCompletedEvent(payload=payload, usage=usage)
+            return
+
+        early_stop = EarlyStop.for_request(request)
+        start = perf_counter()
+        first_chunk_ms: int | None = None
+        chunks: list[str] = []
+        with self._controlled(control):
+            stream_iter = self._open_stream(request) if request.stream else None
+            if stream_iter is None:
+                text = self._call_generate(request)
+                if early_stop.enabled:
+                    text = early_stop.apply(text)
+                if text:
+                    chunks.append(text)
+                    yield StreamChunkEvent(text=text, index=0)
+            else:
+                stream_chunks = self._iter_stream_text(request, stream_iter, control, early_stop)
+                try:
+                    for chunk in stream_chunks:
+                        if first_chunk_ms is None:
+                            first_chunk_ms = int((perf_counter() - start) * 1000)
+                        yield StreamChunkEvent(text=chunk, index=len(chunks))
+                        chunks.append(chunk)
+                finally:
+                    stream_chunks.close()
+        execution_ms = int((perf_counter() - start) * 1000)
+        payload, usage = self._build_payload(
+            request,
+            "".join(chunks),
+            execution_ms,
+            truncation=self._resolve_truncation(request, early_stop),
+            first_chunk_ms=first_chunk_ms,
+            prompt_trim=prompt_trim,
+        )
+        self._remember(submitted, payload)
+        yield StreamCompletedEvent(payload=payload, usage=usage)
@@ -0,0 +1,215 @@
+"""Merge per-shard batch outputs back into one ordered result set."""
+
+import heapq
+import json
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from ai_prompt_runner.core.errors import InputValidationError
+
+
+@dataclass
+class MergeReport:
+    """Counters describing one merge run."""
+
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    duplicates: int = 0
+    deduplicated: int = 0
+    error_codes: dict[str, int] = field(default_factory=dict)
+    execution_ms: int = 0
+    shards: list[str | None] = field(default_factory=list)
+    prompt_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+    def record(self, line: dict) -> None:
+        """Account for one merged output line."""
+        self.total += 1
+        if line.get("status") == "ok":
+            self.succeeded += 1
+            return
+        self.failed += 1
+        error = line.get("error")
+        code = error.get("code") if isinstance(error, dict) else None
+        if isinstance(code, str):
+            self.error_codes[code] = self.error_codes.get(code, 0) + 1
+
+    def to_dict(self) -> dict:
+        """Serialize merge counters in the batch summary shape."""
+        return {
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "execution_ms": self.execution_ms,
+            "shard": None,
+            "error_codes": dict(sorted(self.error_codes.items())),
+            "deduplicated": self.deduplicated,
+            "dedup_ratio": round(self.deduplicated / self.total, 4) if self.total else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "cache_hit_ratio": (
+                round(self.cache_read_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0
+            ),
+            "merged_shards": self.shards,
+            "duplicates": self.duplicates,
+        }
+
+
+def iter_result_lines(path: Path) -> Iterator[dict]:
+    """
+    Yield result lines from one shard output, enforcing ascending `index`.
+
+    Shard outputs are always written in input order, so an unsorted file means
+    it was produced by something else and cannot be merged in streaming mode.
+    """
+    previous: int | None = None
+    with path.open("r", encoding="utf-8") as fh:
+        for line_number, raw in enumerate(fh, start=1):
+            if not raw.strip():
+                continue
+            try:
+                line = json.loads(raw)
+            except ValueError as exc:
+                raise InputValidationError(
+                    f"{path}:{line_number} is not valid JSON."
+                ) from exc
+            index = line.get("index") if isinstance(line, dict) else None
+            if isinstance(index, bool) or not isinstance(index, int):
+                raise InputValidationError(f"{path}:{line_number} has no integer 'index'.")
+            if previous is not None and index < previous:
+                raise InputValidationError(f"{path} is not sorted by 'index'.")
+            previous = index
+            yield line
+
+
+def merge_result_streams(
+    streams: Iterable[Iterable[dict]],
+    on_line: Callable[[dict], None],
+    report: MergeReport | None = None,
+) -> MergeReport:
+    """
+    K-way merge sorted result streams by `index` with duplicate detection.
+
+    When the same index appears more than once (overlapping shards or a
+    re-run shard), the first successful line wins; otherwise the first line.
+    Memory use is bounded by the number of streams.
+    """
+    report = report or MergeReport()
+    merged = heapq.merge(*streams, key=lambda line: line["index"])
+
+    pending: dict | None = None
+    for line in merged:
+        if pending is not None and line["index"] == pending["index"]:
+            report.duplicates += 1
+            if pending.get("status") != "ok" and line.get("status") == "ok":
+                pending = line
+            continue
+        if pending is not None:
+            report.record(pending)
+            on_line(pending)
+        pending = line
+    if pending is not None:
+        report.record(pending)
+        on_line(pending)
+    return report
+
+
+def _load_json_object(target: Path, label: str) -> dict:
+    try:
+        data = json.loads(target.read_text(encoding="utf-8"))
+    except OSError as exc:
+        raise InputValidationError(f"{label} could not be read: {exc}") from exc
+    except ValueError as exc:
+        raise InputValidationError(f"{label} is not valid JSON: {target}") from exc
+    if not isinstance(data, dict):
+        raise InputValidationError(f"{label} must be a JSON object: {target}")
+    return data
+
+
+def load_summary(path: Path) -> dict:
+    """Load a batch summary from `summary.json` or a run-log directory."""
+    target = path / "summary.json" if path.is_dir() else path
+    return _load_json_object(target, "Summary")
+
+
+@dataclass(frozen=True)
+class ShardRunLog:
+    """Artifacts of one shard run: its summary plus request and error logs."""
+
+    source: str
+    summary: dict
+    request: dict | None = None
+    error: dict | None = None
+
+
+def load_shard_run_log(path: Path) -> ShardRunLog:
+    """
+    Load one shard's artifacts from a run-log directory or a `summary.json`.
+
+    A bare summary file carries no request or error log. A directory of a
+    shard that aborted before finishing holds `error.json` but no summary;
+    it is accepted with an empty summary so its error reaches the merge log.
+    """
+    if not path.is_dir():
+        return ShardRunLog(source=str(path), summary=load_summary(path))
+    request_path = path / "request.json"
+    error_path = path / "error.json"
+    error = _load_json_object(error_path, "Error log") if error_path.is_file() else None
+    summary_path = path / "summary.json"
+    if error is not None and not summary_path.exists():
+        summary = {}
+    else:
+        summary = load_summary(path)
+    return ShardRunLog(
+        source=str(path),
+        summary=summary,
+        request=_load_json_object(request_path, "Request log") if request_path.is_file() else None,
+        error=error,
+    )
+
+
+def merge_run_logs(run_logs: Iterable[ShardRunLog]) -> tuple[list[dict], list[dict]]:
+    """
+    Combine per-shard request and error logs for the merged run-log directory.
+
+    Returns (shard_requests, shard_errors); each entry names its source so
+    it can be traced back to the shard run that produced it.
+    """
+    requests: list[dict] = []
+    errors: list[dict] = []
+    for run_log in run_logs:
+        shard = run_log.summary.get("shard")
+        shard = shard if isinstance(shard, str) else None
+        if run_log.request is not None:
+            requests.append({"source": run_log.source, "shard": shard, "request": run_log.request})
+        if run_log.error is not None:
+            errors.append({"source": run_log.source, "shard": shard, **run_log.error})
+    return requests, errors
+
+
+def apply_summaries(report: MergeReport, summaries: Iterable[dict]) -> MergeReport:
+    """
+    Fold per-shard summaries into the merge report.
+
+    Shards run in parallel, so the merged wall-clock duration is the slowest
+    shard rather than the sum; deduplicated positions and token counters
+    add up.
+    """
+    for summary in summaries:
+        execution_ms = summary.get("execution_ms")
+        if isinstance(execution_ms, int):
+            report.execution_ms = max(report.execution_ms, execution_ms)
+        deduplicated = summary.get("deduplicated")
+        if isinstance(deduplicated, int):
+            report.deduplicated += deduplicated
+        for counter in ("prompt_tokens", "cache_read_tokens", "cache_write_tokens"):
+            value = summary.get(counter)
+            if isinstance(value, int):
+                setattr(report, counter, getattr(report, counter) + value)
+        shard = summary.get("shard")
+        report.shards.append(shard if isinstance(shard, str) else None)
+    return report
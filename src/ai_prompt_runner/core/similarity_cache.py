@@ -0,0 +1,369 @@
+"""On-disk near-duplicate response cache using MinHash signatures and an LSH index."""
+
+import json
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+import unicodedata
+import zlib
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+from hashlib import blake2b
+from pathlib import Path
+
+from ai_prompt_runner.core.errors import PromptRunnerError
+from ai_prompt_runner.core.models import PromptRequest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when the extra is missing
+    np = None
+
+# Universal hashing modulo a Mersenne prime, truncated to 32 bits, as in the
+# classic MinHash construction. Both signature paths reproduce numpy's
+# unsigned 64-bit wrap-around so they return identical signatures.
+_MERSENNE_PRIME = (1 << 61) - 1
+_MASK_64 = (1 << 64) - 1
+_MAX_HASH = (1 << 32) - 1
+# Shingles hashed per vectorized block; bounds the temporary matrix size.
+_NUMPY_BLOCK = 4096
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_THRESHOLD = 0.9
+SHINGLE_CHARS = 5
+
+# Volatile spans that make otherwise identical prompts differ. Plain numbers
+# are kept: they usually change the meaning of a prompt.
+_VOLATILE_PATTERNS = (
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"), "<uuid>"),
+    (
+        re.compile(
+            r"\b\d{4}-\d{2}-\d{2}(?:[t ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:z|[+-]\d{2}:?\d{2})?)?\b"
+        ),
+        "<timestamp>",
+    ),
+    (re.compile(r"\b\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?\b"), "<time>"),
+)
+_WHITESPACE = re.compile(r"\s+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    scope BLOB NOT NULL,
+    signature BLOB NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    response TEXT NOT NULL,
+    model TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    bucket INTEGER NOT NULL,
+    entry_id INTEGER NOT NULL,
+    PRIMARY KEY (bucket, entry_id)
+) WITHOUT ROWID;
+"""
+
+
+class SimilarityCacheError(PromptRunnerError):
+    """Raised when the similarity cache database cannot be used."""
+
+
+def normalize_prompt(text: str) -> str:
+    """
+    Canonicalize prompt text before shingling.
+
+    Applies NFKC and case folding, replaces UUIDs, timestamps and clock
+    times with placeholders, and collapses runs of whitespace.
+    """
+    normalized = unicodedata.normalize("NFKC", text).casefold()
+    for pattern, placeholder in _VOLATILE_PATTERNS:
+        normalized = pattern.sub(placeholder, normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_CHARS) -> list[int]:
+    """Return the distinct 32-bit hashes of the character shingles of normalized `text`."""
+    normalized = normalize_prompt(text)
+    if len(normalized) <= size:
+        shingles = {normalized}
+    else:
+        shingles = {normalized[i : i + size] for i in range(len(normalized) - size + 1)}
+    return [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+
+
+def similarity_scope(request: PromptRequest, model: str | None) -> bytes:
+    """
+    Return the exact-match part of a cache key.
+
+    Near-duplicate matching only applies to the user prompt; the provider,
+    model, system prompt and generation config must be identical.
+    """
+    identity = json.dumps(
+        [
+            request.provider,
+            model,
+            request.system_prompt,
+            request.temperature,
+            request.max_tokens,
+            request.top_p,
+            request.stop,
+            request.max_response_chars,
+        ],
+        separators=(",", ":"),
+    )
+    return blake2b(identity.encode("utf-8"), digest_size=16).digest()
+
+
+@lru_cache(maxsize=16)
+def lsh_layout(threshold: float, num_perm: int) -> tuple[int, int]:
+    """
+    Return `(bands, rows)` minimizing false positives plus false negatives.
+
+    Two signatures become candidates when all `rows` values of any band
+    agree, which happens with probability `1 - (1 - s**rows) ** bands` at
+    Jaccard similarity `s`; the layout puts the steep part of that curve at
+    `threshold`.
+    """
+    steps = 200
+
+    def _area(start: float, end: float, fn: Callable[[float], float]) -> float:
+        width = (end - start) / steps
+        return sum(fn(start + (i + 0.5) * width) for i in range(steps)) * width
+
+    best: tuple[float, int, int] | None = None
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = _area(0.0, threshold, lambda s: 1 - (1 - s**rows) ** bands)
+            false_negative = _area(threshold, 1.0, lambda s: (1 - s**rows) ** bands)
+            error = false_positive + false_negative
+            if best is None or error < best[0]:
+                best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    """
+    MinHash signatures over character shingles.
+
+    Uses NumPy to hash every shingle under all permutations at once when it
+    is installed (`ai-prompt-runner[similarity]`) and an equivalent
+    pure-Python loop otherwise.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1) -> None:
+        if num_perm <= 0:
+            raise ValueError("num_perm must be greater than 0.")
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._a = [rng.randrange(1, _MERSENNE_PRIME) for _ in range(num_perm)]
+        self._b = [rng.randrange(0, _MERSENNE_PRIME) for _ in range(num_perm)]
+        if np is not None:
+            self._a_array = np.array(self._a, dtype=np.uint64)
+            self._b_array = np.array(self._b, dtype=np.uint64)
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        hashes = shingle_hashes(text)
+        if np is not None:
+            return self._numpy_signature(hashes)
+        return tuple(
+            min((((a * value + b) & _MASK_64) % _MERSENNE_PRIME) & _MAX_HASH for value in hashes)
+            for a, b in zip(self._a, self._b)
+        )
+
+    def _numpy_signature(self, hashes: list[int]) -> tuple[int, ...]:
+        values = np.array(hashes, dtype=np.uint64)
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(values), _NUMPY_BLOCK):
+            permuted = values[start : start + _NUMPY_BLOCK, None] * self._a_array
+            permuted += self._b_array
+            permuted %= np.uint64(_MERSENNE_PRIME)
+            permuted &= np.uint64(_MAX_HASH)
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return tuple(signature.tolist())
+
+
+def estimated_similarity(left: Sequence[int], right: Sequence[int]) -> float:
+    """Estimate Jaccard similarity as the fraction of agreeing signature slots."""
+    return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+@dataclass(frozen=True)
+class SimilarityHit:
+    """A stored response whose prompt is similar enough to the looked-up one."""
+
+    response: str
+    model: str | None
+    similarity: float
+    prompt_hash: str
+
+
+class SimilarityCache:
+    """
+    Near-duplicate response cache stored in one SQLite file.
+
+    Each entry keeps its MinHash signature; the `buckets` table is the LSH
+    index, one row per band, keyed by a hash of the scope, band number and
+    band values. A lookup probes one primary-key range per band and only
+    compares the signatures of the few entries found there, so its cost does
+    not grow with the number of entries. The band layout is chosen for the
+    threshold the file was created with and stored in it; later thresholds
+    only filter candidates, so lowering one much further loses recall.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be greater than 0 and at most 1.")
+        self.path = Path(path)
+        self.threshold = threshold
+        self._clock = clock
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(
+                self.path, timeout=60.0, isolation_level=None, check_same_thread=False
+            )
+            self._conn.executescript(_SCHEMA)
+            settings = self._load_settings(threshold, num_perm)
+        except sqlite3.Error as exc:
+            raise SimilarityCacheError(f"Cannot open similarity cache '{self.path}': {exc}") from exc
+        self.num_perm = settings["num_perm"]
+        self.bands = settings["bands"]
+        self.rows = settings["rows"]
+        self._hasher = MinHasher(self.num_perm, seed=settings["seed"])
+        self._signature_format = f"<{self.num_perm}I"
+
+    def _load_settings(self, threshold: float, num_perm: int) -> dict[str, int]:
+        """Read the index layout, or write one tuned for `threshold` on first use."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            stored = dict(self._conn.execute("SELECT name, value FROM settings"))
+            if not stored:
+                bands, rows = lsh_layout(threshold, num_perm)
+                stored = {"num_perm": num_perm, "bands": bands, "rows": rows, "seed": 1}
+                self._conn.executemany(
+                    "INSERT INTO settings (name, value) VALUES (?, ?)",
+                    [(name, str(value)) for name, value in stored.items()],
+                )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return {name: int(value) for name, value in stored.items()}
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "SimilarityCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def signature(self, prompt: str) -> tuple[int, ...]:
+        """Return the MinHash signature this cache computes for `prompt`."""
+        return self._hasher.signature(prompt)
+
+    def _bucket_keys(self, scope: bytes, signature: Sequence[int]) -> list[int]:
+        keys = []
+        for band in range(self.bands):
+            values = signature[band * self.rows : (band + 1) * self.rows]
+            digest = blake2b(
+                scope + struct.pack(f"<H{len(values)}I", band, *values), digest_size=8
+            ).digest()
+            keys.append(int.from_bytes(digest, "little", signed=True))
+        return keys
+
+    def _candidates(self, keys: Sequence[int], scope: bytes) -> list[tuple]:
+        """Fetch the entries sharing at least one band bucket, within `scope`."""
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            try:
+                return self._conn.execute(
+                    "SELECT signature, prompt_hash, response, model FROM entries "
+                    f"WHERE id IN (SELECT entry_id FROM buckets WHERE bucket IN ({placeholders})) "
+                    "AND scope = ?",
+                    (*keys, scope),
+                ).fetchall()
+            except sqlite3.Error as exc:
+                raise SimilarityCacheError(f"Similarity cache lookup failed: {exc}") from exc
+
+    def lookup(self, scope: bytes, prompt: str) -> SimilarityHit | None:
+        """Return the most similar stored response at or above the threshold."""
+        signature = self._hasher.signature(prompt)
+        best: SimilarityHit | None = None
+        for stored, prompt_hash, response, model in self._candidates(
+            self._bucket_keys(scope, signature), scope
+        ):
+            similarity = estimated_similarity(signature, struct.unpack(self._signature_format, stored))
+            if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                best = SimilarityHit(
+                    response=response,
+                    model=model,
+                    similarity=round(similarity, 4),
+                    prompt_hash=prompt_hash,
+                )
+        return best
+
+    def store(
+        self,
+        scope: bytes,
+        prompt: str,
+        response: str,
+        model: str | None,
+        prompt_hash: str,
+    ) -> None:
+        """Add one response under the signature of `prompt`."""
+        self.store_signatures(
+            [(scope, self._hasher.signature(prompt), response, model, prompt_hash)]
+        )
+
+    def store_signatures(
+        self,
+        entries: Iterable[tuple[bytes, Sequence[int], str, str | None, str]],
+    ) -> None:
+        """Bulk-insert precomputed `(scope, signature, response, model, prompt_hash)` rows."""
+        now = self._clock()
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    for scope, signature, response, model, prompt_hash in entries:
+                        entry_id = self._conn.execute(
+                            "INSERT INTO entries (scope, signature, prompt_hash, response, model, created_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            (
+                                scope,
+                                struct.pack(self._signature_format, *signature),
+                                prompt_hash,
+                                response,
+                                model,
+                                now,
+                            ),
+                        ).lastrowid
+                        self._conn.executemany(
+                            "INSERT OR IGNORE INTO buckets (bucket, entry_id) VALUES (?, ?)",
+                            [(key, entry_id) for key in self._bucket_keys(scope, signature)],
+                        )
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as exc:
+                raise SimilarityCacheError(f"Similarity cache write failed: {exc}") from exc
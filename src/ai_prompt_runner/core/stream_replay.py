@@ -0,0 +1,42 @@
+"""Prefix suppression for replayed deterministic streams."""
+
+from ai_prompt_runner.core.errors import StreamReplayDivergedError
+
+
+class StreamReplay:
+    """
+    Filter a replayed stream down to the text that was not emitted yet.
+
+    With deterministic decoding, re-issuing a request reproduces the output
+    already delivered before the failure. Chunks of the new stream are
+    compared against that prefix and swallowed while they match; only text
+    past the prefix is returned. Any mismatch means the upstream is not
+    deterministic after all, and continuing would corrupt the output.
+    """
+
+    def __init__(self, emitted: str) -> None:
+        self._emitted = emitted
+        self._matched = 0
+
+    def feed(self, chunk: str) -> str:
+        """Return the part of `chunk` beyond the emitted prefix ("" while inside it)."""
+        if self._matched >= len(self._emitted):
+            return chunk
+        expected = self._emitted[self._matched : self._matched + len(chunk)]
+        overlap = chunk[: len(expected)]
+        if overlap != expected:
+            offset = next(i for i, (a, b) in enumerate(zip(overlap, expected)) if a != b)
+            raise StreamReplayDivergedError(
+                "Replayed stream diverged from the output already emitted "
+                f"at character {self._matched + offset}."
+            )
+        self._matched += len(overlap)
+        return chunk[len(overlap) :]
+
+    def finish(self) -> None:
+        """Fail when the replayed stream ended inside the emitted prefix."""
+        if self._matched < len(self._emitted):
+            raise StreamReplayDivergedError(
+                "Replayed stream ended after "
+                f"{self._matched} of {len(self._emitted)} already emitted character(s)."
+            )
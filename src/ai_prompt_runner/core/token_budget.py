@@ -0,0 +1,266 @@
+"""Pre-flight token estimation, context-window enforcement and token rate limiting."""
+
+import math
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
+from ai_prompt_runner.core.cancellation import RunControl
+from ai_prompt_runner.core.errors import ContextWindowExceededError
+from ai_prompt_runner.core.models import PromptRequest
+
+# Average UTF-8 bytes per token of each tokenizer family on mixed prose and
+# code. Counting bytes rather than characters keeps the estimate sensible for
+# non-Latin scripts, which need more bytes and more tokens per character.
+# `generic` is deliberately low so unknown tokenizers are over-estimated.
+BYTES_PER_TOKEN = {
+    "openai": 4.0,
+    "anthropic": 3.5,
+    "google": 4.0,
+    "llama": 3.8,
+    "generic": 3.2,
+}
+
+# Over budget: fail before dispatch, shorten the prompt, or send it anyway.
+CONTEXT_POLICIES = ("reject", "trim", "off")
+
+# Role and framing tokens chat APIs add around each message.
+_MESSAGE_OVERHEAD_TOKENS = 4
+TRIM_MARKER = "\n[...]\n"
+
+
+@lru_cache(maxsize=32)
+def _tiktoken_encoding(model: str):
+    """Return the tiktoken encoding for an OpenAI model, or None when unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:  # noqa: BLE001 - unknown model or encoding download failure
+        return None
+
+
+def count_tokens(text: str, family: str = "generic", model: str | None = None) -> tuple[int, str]:
+    """
+    Count the tokens of `text` and return `(tokens, method)`.
+
+    OpenAI models are counted exactly with `tiktoken` when it is installed
+    (`ai-prompt-runner[tokenizer]`); everything else uses the byte heuristic
+    of the tokenizer family. `method` is "tiktoken" or "heuristic".
+    """
+    if family == "openai" and model:
+        encoding = _tiktoken_encoding(model)
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=())), "tiktoken"
+    bytes_per_token = BYTES_PER_TOKEN.get(family, BYTES_PER_TOKEN["generic"])
+    return math.ceil(len(text.encode("utf-8")) / bytes_per_token), "heuristic"
+
+
+def trim_middle(text: str, keep_chars: int) -> str:
+    """Keep the first and last `keep_chars` characters (split evenly) around a marker."""
+    if keep_chars >= len(text):
+        return text
+    head = keep_chars - keep_chars // 2
+    tail = keep_chars // 2
+    return text[:head] + TRIM_MARKER + (text[-tail:] if tail else "")
+
+
+@dataclass(frozen=True)
+class TokenEstimate:
+    """Pre-flight token estimate of one request against its context window."""
+
+    prompt_tokens: int
+    # Completion budget reserved by `max_tokens`; None leaves it to the provider.
+    completion_tokens: int | None
+    context_window: int | None
+    method: str
+    # Estimated prompt tokens removed by the `trim` policy.
+    trimmed_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + (self.completion_tokens or 0)
+
+    @property
+    def fits(self) -> bool | None:
+        """True when the request fits the window; None when the window is unknown."""
+        if self.context_window is None:
+            return None
+        return self.total_tokens <= self.context_window
+
+    def to_dict(self) -> dict:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "context_window": self.context_window,
+            "fits": self.fits,
+            "method": self.method,
+            "trimmed_tokens": self.trimmed_tokens,
+        }
+
+
+class TokenRateLimiter:
+    """
+    Thread-safe tokens-per-minute budget shared by concurrent runs.
+
+    A token bucket holding one minute of tokens. Each run reserves its
+    estimated tokens before dispatch and waits while the bucket is in debt,
+    so bursts are admitted up to the budget and sustained load is paced to
+    it. A single request larger than the budget is charged the full budget.
+    """
+
+    def __init__(
+        self,
+        tokens_per_minute: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if tokens_per_minute <= 0:
+            raise ValueError("tokens_per_minute must be greater than 0.")
+        self.tokens_per_minute = tokens_per_minute
+        self._rate = tokens_per_minute / 60.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._available = float(tokens_per_minute)
+        self._updated_at = clock()
+
+    def _reserve(self, tokens: int) -> float:
+        """Charge `tokens` and return the seconds until the bucket is out of debt."""
+        with self._lock:
+            now = self._clock()
+            self._available = min(
+                self.tokens_per_minute,
+                self._available + (now - self._updated_at) * self._rate,
+            )
+            self._updated_at = now
+            self._available -= tokens
+            return max(-self._available / self._rate, 0.0)
+
+    def _refund(self, tokens: int) -> None:
+        with self._lock:
+            self._available = min(self.tokens_per_minute, self._available + tokens)
+
+    def acquire(self, tokens: int, control: RunControl | None = None) -> float:
+        """
+        Reserve `tokens`, waiting as long as needed, and return the seconds waited.
+
+        The wait honours `control`: cancellation or an expired deadline
+        raises and returns the reservation to the bucket.
+        """
+        tokens = min(max(tokens, 0), self.tokens_per_minute)
+        wait = self._reserve(tokens)
+        waited = 0.0
+        try:
+            while waited < wait:
+                if control is not None:
+                    control.check()
+                step = min(wait - waited, 0.1)
+                self._sleep(step)
+                waited += step
+            if control is not None:
+                control.check()
+        except BaseException:
+            self._refund(tokens)
+            raise
+        return waited
+
+
+class TokenBudget:
+    """
+    Estimate, check and pace requests before they are sent.
+
+    `context_window` comes from the provider's model table or an explicit
+    override; without one only the rate limiter applies. Policies:
+    `reject` raises `ContextWindowExceededError`, `trim` removes the middle
+    of the user prompt (the system prompt is kept) until the request fits,
+    and `off` sends the request unchanged.
+    """
+
+    def __init__(
+        self,
+        family: str = "generic",
+        model: str | None = None,
+        context_window: int | None = None,
+        policy: str = "reject",
+        rate_limiter: TokenRateLimiter | None = None,
+    ) -> None:
+        if policy not in CONTEXT_POLICIES:
+            raise ValueError(f"Unknown context policy '{policy}'. Supported: {', '.join(CONTEXT_POLICIES)}.")
+        if context_window is not None and context_window <= 0:
+            raise ValueError("context_window must be greater than 0.")
+        self.family = family
+        self.model = model
+        self.context_window = context_window
+        self.policy = policy
+        self.rate_limiter = rate_limiter
+
+    def _prompt_tokens(self, request: PromptRequest) -> tuple[int, str]:
+        tokens, method = count_tokens(request.prompt_text, self.family, self.model)
+        tokens += _MESSAGE_OVERHEAD_TOKENS
+        if request.system_prompt is not None:
+            tokens += count_tokens(request.system_prompt, self.family, self.model)[0]
+            tokens += _MESSAGE_OVERHEAD_TOKENS
+        return tokens, method
+
+    def estimate(self, request: PromptRequest) -> TokenEstimate:
+        """Estimate `request` without applying the policy."""
+        prompt_tokens, method = self._prompt_tokens(request)
+        return TokenEstimate(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=request.max_tokens,
+            context_window=self.context_window,
+            method=method,
+        )
+
+    def _exceeded(self, estimate: TokenEstimate) -> ContextWindowExceededError:
+        model = f" of '{self.model}'" if self.model else ""
+        reserved = f" + {estimate.completion_tokens} max_tokens" if estimate.completion_tokens else ""
+        return ContextWindowExceededError(
+            f"Estimated {estimate.prompt_tokens} prompt tokens{reserved} exceed the "
+            f"{estimate.context_window}-token context window{model} ({estimate.method} estimate)."
+        )
+
+    def _trim(self, request: PromptRequest, estimate: TokenEstimate) -> tuple[PromptRequest, TokenEstimate]:
+        """Return the longest middle-trimmed prompt that fits, or raise."""
+        text = request.prompt_text
+        low, high = 0, len(text)
+        best: PromptRequest | None = None
+        best_estimate: TokenEstimate | None = None
+        while low <= high:
+            keep = (low + high) // 2
+            candidate = replace(request, prompt_text=trim_middle(text, keep))
+            candidate_estimate = self.estimate(candidate)
+            if candidate_estimate.fits:
+                best, best_estimate = candidate, candidate_estimate
+                low = keep + 1
+            else:
+                high = keep - 1
+        if best is None:
+            raise self._exceeded(estimate)
+        return best, replace(
+            best_estimate,
+            trimmed_tokens=max(estimate.prompt_tokens - best_estimate.prompt_tokens, 0),
+        )
+
+    def apply(self, request: PromptRequest) -> tuple[PromptRequest, TokenEstimate]:
+        """Return the request to send (trimmed under `trim`) and its estimate."""
+        estimate = self.estimate(request)
+        if self.policy == "off" or estimate.fits is not False:
+            return request, estimate
+        if self.policy == "trim":
+            return self._trim(request, estimate)
+        raise self._exceeded(estimate)
+
+    def throttle(self, request: PromptRequest, estimate: TokenEstimate, control: RunControl | None = None) -> float:
+        """Wait for rate limiter capacity for the estimated tokens of every sample."""
+        if self.rate_limiter is None:
+            return 0.0
+        samples = request.samples or 1
+        tokens = estimate.prompt_tokens + (estimate.completion_tokens or 0) * samples
+        return self.rate_limiter.acquire(tokens, control)
@@ -51,24 +51,32 @@ def validate_response_payload(payload: dict) -> None:
     # Optional normalized provider usage metadata.
     usage = payload["metadata"].get("usage")
     if usage is not None:
-        if not isinstance(usage, dict):
-            raise ValidationError("'metadata.usage' must be an object.")
-
-        allowed_usage_keys = {"prompt_tokens", "completion_tokens", "total_tokens"}
-        unknown_usage_keys = set(usage.keys()) - allowed_usage_keys
-        if unknown_usage_keys:
-            raise ValidationError(f"Unsupported usage keys: {sorted(unknown_usage_keys)}")
-
-        for usage_key in allowed_usage_keys:
-            usage_value = usage.get(usage_key)
-            if usage_value is None:
-                continue
-            if not isinstance(usage_value, int):
-                raise ValidationError(f"'metadata.usage.{usage_key}' must be an integer.")
-            if usage_value < 0:
-                raise ValidationError(
-                    f"'metadata.usage.{usage_key}' must be greater than or equal to 0."
-                )
+        _validate_usage(usage, "metadata.usage")
+
+    # Optional latency breakdown (time to first chunk, engine timings).
+    latency = payload["metadata"].get("latency")
+    if latency is not None:
+        _validate_latency(latency, "metadata.latency")
+
+    # Optional record of the prompt shortened by the `trim` context policy.
+    prompt_trim = payload["metadata"].get("prompt_trim")
+    if prompt_trim is not None:
+        _validate_prompt_trim(prompt_trim)
+
+    # Optional marker of a response served from the near-duplicate cache.
+    similarity_cache = payload["metadata"].get("similarity_cache")
+    if similarity_cache is not None:
+        _validate_similarity_cache(similarity_cache)
+
+    # Optional client-side early stop marker.
+    truncation = payload["metadata"].get("truncation")
+    if truncation is not None:
+        _validate_truncation(truncation, "metadata.truncation")
+
+    # Optional completions of a multi-sample request.
+    responses = payload.get("responses")
+    if responses is not None:
+        _validate_responses(responses)
 
     # Optional additive execution provenance context.
     execution_context = payload["metadata"].get("execution_context")
@@ -163,3 +171,122 @@ def validate_response_payload(payload: dict) -> None:
             raise ValidationError(
                 "'metadata.execution_context.runtime.max_retries' must be an integer or null."
             )
+
+
+_USAGE_KEYS = {
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "cache_read_tokens",
+    "cache_write_tokens",
+}
+
+
+def _validate_usage(usage: object, path: str) -> None:
+    """Validate one normalized usage object found at `path`."""
+    if not isinstance(usage, dict):
+        raise ValidationError(f"'{path}' must be an object.")
+
+    unknown_usage_keys = set(usage.keys()) - _USAGE_KEYS
+    if unknown_usage_keys:
+        raise ValidationError(f"Unsupported usage keys: {sorted(unknown_usage_keys)}")
+
+    for usage_key in _USAGE_KEYS:
+        usage_value = usage.get(usage_key)
+        if usage_value is None:
+            continue
+        if not isinstance(usage_value, int):
+            raise ValidationError(f"'{path}.{usage_key}' must be an integer.")
+        if usage_value < 0:
+            raise ValidationError(f"'{path}.{usage_key}' must be greater than or equal to 0.")
+
+
+_LATENCY_KEYS = {"first_chunk_ms", "load_ms", "prompt_eval_ms", "eval_ms", "total_ms"}
+
+
+def _validate_latency(latency: object, path: str) -> None:
+    """Validate one latency breakdown found at `path`."""
+    if not isinstance(latency, dict):
+        raise ValidationError(f"'{path}' must be an object.")
+
+    unknown_latency_keys = set(latency.keys()) - _LATENCY_KEYS
+    if unknown_latency_keys:
+        raise ValidationError(f"Unsupported latency keys: {sorted(unknown_latency_keys)}")
+
+    for latency_key in _LATENCY_KEYS:
+        latency_value = latency.get(latency_key)
+        if latency_value is None:
+            continue
+        if not isinstance(latency_value, int):
+            raise ValidationError(f"'{path}.{latency_key}' must be an integer.")
+        if latency_value < 0:
+            raise ValidationError(f"'{path}.{latency_key}' must be greater than or equal to 0.")
+
+
+def _validate_prompt_trim(prompt_trim: object) -> None:
+    """Validate `metadata.prompt_trim`."""
+    if not isinstance(prompt_trim, dict):
+        raise ValidationError("'metadata.prompt_trim' must be an object.")
+    if set(prompt_trim.keys()) != {"removed_tokens", "context_window"}:
+        raise ValidationError("'metadata.prompt_trim' must contain exactly 'removed_tokens' and 'context_window'.")
+    for key in ("removed_tokens", "context_window"):
+        value = prompt_trim[key]
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise ValidationError(f"'metadata.prompt_trim.{key}' must be a non-negative integer.")
+
+
+def _validate_similarity_cache(similarity_cache: object) -> None:
+    """Validate `metadata.similarity_cache`."""
+    if not isinstance(similarity_cache, dict):
+        raise ValidationError("'metadata.similarity_cache' must be an object.")
+    if set(similarity_cache.keys()) != {"similarity", "matched_prompt_hash"}:
+        raise ValidationError(
+            "'metadata.similarity_cache' must contain exactly 'similarity' and 'matched_prompt_hash'."
+        )
+    similarity = similarity_cache["similarity"]
+    if not isinstance(similarity, (int, float)) or isinstance(similarity, bool) or not 0 <= similarity <= 1:
+        raise ValidationError("'metadata.similarity_cache.similarity' must be a number between 0 and 1.")
+    if not isinstance(similarity_cache["matched_prompt_hash"], str):
+        raise ValidationError("'metadata.similarity_cache.matched_prompt_hash' must be a string.")
+
+
+def _validate_truncation(truncation: object, path: str) -> None:
+    """Validate one early stop marker found at `path`."""
+    if not isinstance(truncation, dict):
+        raise ValidationError(f"'{path}' must be an object.")
+    if truncation.get("reason") not in {"stop_sequence", "max_response_chars"}:
+        raise ValidationError(
+            f"'{path}.reason' must be 'stop_sequence' or 'max_response_chars'."
+        )
+    unknown_truncation_keys = set(truncation.keys()) - {"reason", "stop_sequence"}
+    if unknown_truncation_keys:
+        raise ValidationError(f"Unsupported truncation keys: {sorted(unknown_truncation_keys)}")
+    stop_sequence = truncation.get("stop_sequence")
+    if stop_sequence is not None and not isinstance(stop_sequence, str):
+        raise ValidationError(f"'{path}.stop_sequence' must be a string.")
+
+
+def _validate_responses(responses: object) -> None:
+    """Validate the `responses` array of a multi-sample payload."""
+    if not isinstance(responses, list) or not responses:
+        raise ValidationError("'responses' must be a non-empty array.")
+
+    allowed_sample_keys = {"index", "response", "finish_reason", "usage", "truncation"}
+    for position, sample in enumerate(responses):
+        path = f"responses[{position}]"
+        if not isinstance(sample, dict):
+            raise ValidationError(f"'{path}' must be an object.")
+        unknown_sample_keys = set(sample.keys()) - allowed_sample_keys
+        if unknown_sample_keys:
+            raise ValidationError(f"Unsupported response sample keys: {sorted(unknown_sample_keys)}")
+        if sample.get("index") != position or isinstance(sample.get("index"), bool):
+            raise ValidationError(f"'{path}.index' must equal its position ({position}).")
+        if not isinstance(sample.get("response"), str):
+            raise ValidationError(f"'{path}.response' must be a string.")
+        finish_reason = sample.get("finish_reason")
+        if finish_reason is not None and not isinstance(finish_reason, str):
+            raise ValidationError(f"'{path}.finish_reason' must be a string.")
+        if sample.get("usage") is not None:
+            _validate_usage(sample["usage"], f"{path}.usage")
+        if sample.get("truncation") is not None:
+            _validate_truncation(sample["truncation"], f"{path}.truncation")
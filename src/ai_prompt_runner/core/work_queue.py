@@ -0,0 +1,366 @@
+"""SQLite-backed work queue for dynamic load balancing across batch workers."""
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from ai_prompt_runner.core.batch import (
+    BatchItem,
+    BatchItemResult,
+    BatchRequestDefaults,
+    BatchSummary,
+    execute_batch_item,
+    request_from_record,
+)
+from ai_prompt_runner.core.cancellation import CancellationToken
+from ai_prompt_runner.core.error_taxonomy import normalize_runtime_error
+from ai_prompt_runner.core.errors import InputValidationError, PromptRunnerError
+from ai_prompt_runner.core.runner import PromptRunner
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    idx INTEGER PRIMARY KEY,
+    record TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS items_state ON items (state, idx);
+"""
+_ENQUEUE_BATCH_SIZE = 1000
+
+
+class WorkQueueError(PromptRunnerError):
+    """Raised when the work queue database cannot be used."""
+
+
+@dataclass(frozen=True)
+class ClaimedItem:
+    """One leased queue entry."""
+
+    index: int
+    record: str
+    attempts: int
+
+
+class WorkQueue:
+    """
+    File-backed queue of batch records with lease-based claiming.
+
+    Every state change runs inside an immediate (write-locked) transaction, so
+    any number of processes on any host sharing the database file can claim
+    work without handing out the same item twice. The rollback journal is used
+    instead of WAL because WAL requires shared memory and does not work on
+    network filesystems.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if lease_seconds <= 0:
+            raise ValueError("lease_seconds must be greater than 0.")
+        if max_attempts <= 0:
+            raise ValueError("max_attempts must be greater than 0.")
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._clock = clock
+        try:
+            self._conn = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+            self._conn.executescript(_SCHEMA)
+        except sqlite3.Error as exc:
+            raise WorkQueueError(f"Work queue could not be opened: {exc}") from exc
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _transaction(self):
+        """Return a context manager holding the database write lock."""
+        return _ImmediateTransaction(self._conn)
+
+    def enqueue(self, records: Iterable[tuple[int, str]]) -> int:
+        """
+        Insert `(index, raw_record)` pairs; already-known indexes are ignored.
+
+        Re-enqueueing the same input is therefore idempotent.
+        """
+        inserted = 0
+        pending: list[tuple[int, str]] = []
+
+        def _flush() -> int:
+            with self._transaction():
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO items (idx, record) VALUES (?, ?)",
+                    pending,
+                )
+                return self._conn.total_changes - before
+
+        for entry in records:
+            pending.append(entry)
+            if len(pending) >= _ENQUEUE_BATCH_SIZE:
+                inserted += _flush()
+                pending = []
+        if pending:
+            inserted += _flush()
+        return inserted
+
+    def _expire_leases(self, now: float) -> None:
+        """Re-queue expired leases; give up on items that exhausted their attempts."""
+        exhausted = self._conn.execute(
+            "SELECT idx, attempts FROM items "
+            "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, self.max_attempts),
+        ).fetchall()
+        for index, attempts in exhausted:
+            error = normalize_runtime_error(
+                PromptRunnerError(f"Work item lease expired after {attempts} attempt(s).")
+            )
+            result = BatchItemResult(index=index, error=error)
+            self._conn.execute(
+                "UPDATE items SET state = 'done', lease_owner = NULL, "
+                "lease_expires = NULL, result = ? WHERE idx = ?",
+                (json.dumps(result.to_dict(), ensure_ascii=False), index),
+            )
+        self._conn.execute(
+            "UPDATE items SET state = 'pending', lease_owner = NULL, lease_expires = NULL "
+            "WHERE state = 'leased' AND lease_expires < ?",
+            (now,),
+        )
+
+    def claim(self, worker_id: str) -> ClaimedItem | None:
+        """Atomically lease the lowest pending index, or return None."""
+        with self._transaction():
+            now = self._clock()
+            self._expire_leases(now)
+            row = self._conn.execute(
+                "SELECT idx, record, attempts FROM items "
+                "WHERE state = 'pending' ORDER BY idx LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            index, record, attempts = row
+            self._conn.execute(
+                "UPDATE items SET state = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE idx = ?",
+                (worker_id, now + self.lease_seconds, index),
+            )
+        return ClaimedItem(index=index, record=record, attempts=attempts + 1)
+
+    def renew(self, index: int, worker_id: str) -> bool:
+        """Extend a lease still held by `worker_id`; False when it was lost."""
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE items SET lease_expires = ? "
+                "WHERE idx = ? AND state = 'leased' AND lease_owner = ?",
+                (self._clock() + self.lease_seconds, index, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, result: BatchItemResult, worker_id: str) -> bool:
+        """
+        Store the result for a leased item.
+
+        Returns False when the lease was lost (expired and re-claimed), in
+        which case the result is discarded to keep one result per index.
+        """
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE items SET state = 'done', lease_owner = NULL, lease_expires = NULL, "
+                "result = ? WHERE idx = ? AND state = 'leased' AND lease_owner = ?",
+                (json.dumps(result.to_dict(), ensure_ascii=False), result.index, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def counts(self) -> dict[str, int]:
+        """Return item counts by state."""
+        counts = {"pending": 0, "leased": 0, "done": 0}
+        try:
+            for state, count in self._conn.execute(
+                "SELECT state, COUNT(*) FROM items GROUP BY state"
+            ):
+                counts[state] = count
+        except sqlite3.Error as exc:
+            raise WorkQueueError(f"Work queue could not be read: {exc}") from exc
+        return counts
+
+    def iter_results(self) -> Iterator[dict]:
+        """Yield stored result lines ordered by input index."""
+        try:
+            rows = self._conn.execute(
+                "SELECT result FROM items WHERE state = 'done' ORDER BY idx"
+            )
+            for (raw,) in rows:
+                yield json.loads(raw)
+        except sqlite3.Error as exc:
+            raise WorkQueueError(f"Work queue could not be read: {exc}") from exc
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+class _ImmediateTransaction:
+    """`BEGIN IMMEDIATE` ... `COMMIT`/`ROLLBACK` around one queue operation."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def __enter__(self) -> None:
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as exc:
+            raise WorkQueueError(f"Work queue is not writable: {exc}") from exc
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            try:
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as commit_exc:
+                # A failed COMMIT (e.g. SQLITE_BUSY) leaves the transaction open.
+                self._rollback()
+                raise WorkQueueError(f"Work queue update failed: {commit_exc}") from commit_exc
+            return
+        self._rollback()
+        if isinstance(exc, sqlite3.Error):
+            raise WorkQueueError(f"Work queue update failed: {exc}") from exc
+
+    def _rollback(self) -> None:
+        # Best effort: the error that made us roll back is the one to report.
+        try:
+            self._conn.execute("ROLLBACK")
+        except sqlite3.Error:
+            pass
+
+
+class LeaseHeartbeat:
+    """
+    Background thread renewing one lease while its item executes.
+
+    The heartbeat uses its own connection because SQLite connections must not
+    be shared across threads. When the lease is lost (it expired and another
+    worker re-claimed the item) `cancel_token` is cancelled, so the in-flight
+    run stops instead of producing a result that would be discarded. A failed
+    renewal (database busy) is retried on the next beat. When the heartbeat
+    cannot open its connection at all, the lease cannot be kept: the token
+    is cancelled and the error is kept in `error` for the caller to raise.
+    """
+
+    def __init__(self, queue: WorkQueue, index: int, worker_id: str, interval: float) -> None:
+        self._queue = queue
+        self._index = index
+        self._worker_id = worker_id
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+        self.cancel_token = CancellationToken()
+        self.error: WorkQueueError | None = None
+
+    def _run(self) -> None:
+        try:
+            conn_queue = WorkQueue(
+                self._queue.path,
+                lease_seconds=self._queue.lease_seconds,
+                max_attempts=self._queue.max_attempts,
+                clock=self._queue._clock,
+            )
+        except WorkQueueError as exc:
+            self.error = WorkQueueError(f"Lease heartbeat could not open the work queue: {exc}")
+            self.cancel_token.cancel()
+            return
+        try:
+            while not self._stop.wait(self._interval):
+                try:
+                    renewed = conn_queue.renew(self._index, self._worker_id)
+                except WorkQueueError:
+                    continue
+                if not renewed:
+                    self.cancel_token.cancel()
+                    return
+        finally:
+            conn_queue.close()
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _item_from_claim(claimed: ClaimedItem, defaults: BatchRequestDefaults) -> BatchItem:
+    """Decode a leased raw record; invalid records become error items."""
+    line = claimed.index + 1
+    try:
+        try:
+            record = json.loads(claimed.record)
+        except ValueError as exc:
+            raise InputValidationError(f"Input line {line} is not valid JSON.") from exc
+        if not isinstance(record, dict):
+            raise InputValidationError(f"Input line {line} must be a JSON object.")
+        return BatchItem(
+            index=claimed.index,
+            request=request_from_record(record, claimed.index, defaults),
+        )
+    except InputValidationError as exc:
+        return BatchItem(index=claimed.index, error=exc)
+
+
+def run_worker(
+    queue: WorkQueue,
+    runner: PromptRunner,
+    defaults: BatchRequestDefaults,
+    worker_id: str,
+    poll_interval: float = 1.0,
+    on_result: Callable[[BatchItemResult], None] | None = None,
+) -> BatchSummary:
+    """
+    Drain the queue until no pending or leased items remain.
+
+    While other workers still hold leases the worker keeps polling, so it can
+    pick up their items if those leases expire.
+    """
+    summary = BatchSummary()
+    start = time.perf_counter()
+    heartbeat_interval = max(queue.lease_seconds / 3, 0.01)
+    while True:
+        claimed = queue.claim(worker_id)
+        if claimed is None:
+            if queue.counts()["leased"] == 0:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        item = _item_from_claim(claimed, defaults)
+
+        with LeaseHeartbeat(queue, claimed.index, worker_id, heartbeat_interval) as heartbeat:
+            result = execute_batch_item(
+                runner,
+                item,
+                defaults.provider,
+                cancel_token=heartbeat.cancel_token,
+            )
+        if heartbeat.error is not None:
+            # The lease was not renewed: leave the item to expire and be re-queued.
+            raise heartbeat.error
+
+        if queue.complete(result, worker_id):
+            summary.record(result)
+            if on_result is not None:
+                on_result(result)
+    summary.execution_ms = int((time.perf_counter() - start) * 1000)
+    return summary
@@ -1,20 +1,15 @@
 """Anthropic Messages API provider implementation using requests."""
 
-import json
 from collections.abc import Iterator
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import requests
 
-from ai_prompt_runner.core.errors import (
-    AuthenticationError,
-    AuthorizationError,
-    ProviderError,
-    RateLimitError,
-    UpstreamServerError,
-)
-from ai_prompt_runner.core.models import GenerationConfig, UsageMetadata
-from ai_prompt_runner.services.base import BaseProvider
+from ai_prompt_runner.core.errors import ProviderError
+from ai_prompt_runner.core.models import GenerationConfig, ResponseSample, UsageMetadata
+from ai_prompt_runner.services import call_control
+from ai_prompt_runner.services.http_base import TransportProvider
+from ai_prompt_runner.services.transport import Transport
 
 
 @dataclass
@@ -26,10 +21,21 @@ class AnthropicProviderConfig:
     model: str
     timeout_seconds: int = 30
     max_retries: int = 0
+    # Bounds connection setup separately; defaults to timeout_seconds.
+    connect_timeout_seconds: float | None = None
+    # Stream stall limits: time to the first event and between events.
+    first_chunk_timeout_seconds: float | None = None
+    stream_idle_timeout_seconds: float | None = None
+    # Optional pooled session; one-off connections are used when unset.
+    session: requests.Session | None = field(default=None, repr=False, compare=False)
+    # HTTP engine override; the default is `requests` over `session`.
+    transport: Transport | None = field(default=None, repr=False, compare=False)
     max_tokens: int = 1024
+    # Mark the system prompt as a cacheable prefix (`cache_control`).
+    prompt_cache: bool = False
 
 
-class AnthropicProvider(BaseProvider):
+class AnthropicProvider(TransportProvider):
     """Provider for Anthropic's Messages API contract."""
     provider_protocol = "anthropic-messages"
 
@@ -37,25 +43,57 @@ class AnthropicProvider(BaseProvider):
         self.config = config
         self._last_usage: UsageMetadata | None = None
         self._last_model_resolved: str | None = None
+        self._last_stop_sequence: str | None = None
 
-    def _raise_for_mapped_status(self, response: requests.Response) -> None:
-        """Map provider HTTP status codes to domain-specific exceptions."""
-        status_code = response.status_code
+    def _system_field(self, system_prompt: str) -> str | list[dict]:
+        """
+        Return the `system` request field.
 
-        explicit_status_errors = {
-            401: AuthenticationError("Provider authentication failed (HTTP 401)."),
-            403: AuthorizationError("Provider authorization failed (HTTP 403)."),
-            429: RateLimitError("Provider rate limit exceeded (HTTP 429)."),
+        With prompt caching enabled the system prompt becomes one text block
+        with an ephemeral `cache_control` breakpoint. Later requests that
+        send the same system prompt then read it from the provider cache.
+        """
+        if not self.config.prompt_cache:
+            return system_prompt
+        return [
+            {
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+
+    def _request_headers(self) -> dict[str, str]:
+        return {
+            "x-api-key": self.config.api_key,
+            "anthropic-version": "2023-06-01",
+            "Content-Type": "application/json",
         }
 
-        mapped_error = explicit_status_errors.get(status_code)
-        if mapped_error is not None:
-            raise mapped_error
-
-        if 500 <= status_code <= 599:
-            raise UpstreamServerError(f"Provider server error (HTTP {status_code}).")
-        if status_code >= 400:
-            raise ProviderError(f"Provider returned HTTP {status_code}.")
+    def _request_payload(
+        self,
+        prompt: str,
+        system_prompt: str | None,
+        generation_config: GenerationConfig | None,
+    ) -> dict:
+        """Build the Messages API request body shared by all call styles."""
+        payload = {
+            "model": self.config.model,
+            "max_tokens": self.config.max_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if system_prompt is not None:
+            payload["system"] = self._system_field(system_prompt)
+        if generation_config is not None:
+            if generation_config.max_tokens is not None:
+                payload["max_tokens"] = generation_config.max_tokens
+            if generation_config.temperature is not None:
+                payload["temperature"] = generation_config.temperature
+            if generation_config.top_p is not None:
+                payload["top_p"] = generation_config.top_p
+            if generation_config.stop:
+                payload["stop_sequences"] = list(generation_config.stop)
+        return payload
 
     def _extract_text(self, body: dict) -> str:
         """
@@ -135,6 +173,11 @@ class AnthropicProvider(BaseProvider):
 
         Anthropic commonly returns:
         {"usage": {"input_tokens": X, "output_tokens": Y}}
+
+        With prompt caching, `input_tokens` excludes the cached prefix, which
+        is reported as `cache_read_input_tokens` (hit) or
+        `cache_creation_input_tokens` (write). Both are added back so
+        `prompt_tokens` counts the full input as for other providers.
         """
         if not isinstance(payload, dict):
             return None
@@ -154,7 +197,13 @@ class AnthropicProvider(BaseProvider):
             completion_tokens_raw if isinstance(completion_tokens_raw, int) else None
         )
         total_tokens = total_tokens_raw if isinstance(total_tokens_raw, int) else None
+        cache_read_raw = usage_obj.get("cache_read_input_tokens")
+        cache_write_raw = usage_obj.get("cache_creation_input_tokens")
+        cache_read_tokens = cache_read_raw if isinstance(cache_read_raw, int) else None
+        cache_write_tokens = cache_write_raw if isinstance(cache_write_raw, int) else None
 
+        if prompt_tokens is not None:
+            prompt_tokens += (cache_read_tokens or 0) + (cache_write_tokens or 0)
         if total_tokens is None and prompt_tokens is not None and completion_tokens is not None:
             total_tokens = prompt_tokens + completion_tokens
 
@@ -162,6 +211,8 @@ class AnthropicProvider(BaseProvider):
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
             total_tokens=total_tokens,
+            cache_read_tokens=cache_read_tokens,
+            cache_write_tokens=cache_write_tokens,
         )
 
     def _extract_model_resolved(self, payload: dict) -> str | None:
@@ -181,6 +232,26 @@ class AnthropicProvider(BaseProvider):
 
         return None
 
+    def _extract_stop_sequence(self, payload: dict) -> str | None:
+        """
+        Extract the matched stop sequence when Anthropic reports one.
+
+        Messages carry it at the top level; stream `message_delta` events
+        nest it under `delta`:
+        {"stop_reason": "stop_sequence", "stop_sequence": "..."}
+        """
+        if not isinstance(payload, dict):
+            return None
+
+        for source in (payload, payload.get("delta")):
+            if not isinstance(source, dict):
+                continue
+            stop_sequence = source.get("stop_sequence")
+            if source.get("stop_reason") == "stop_sequence" and isinstance(stop_sequence, str):
+                return stop_sequence
+
+        return None
+
     def _merge_usage(self, usage_update: UsageMetadata) -> None:
         """
         Merge partial Anthropic stream usage updates into one normalized object.
@@ -213,6 +284,16 @@ class AnthropicProvider(BaseProvider):
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
             total_tokens=total_tokens,
+            cache_read_tokens=(
+                usage_update.cache_read_tokens
+                if usage_update.cache_read_tokens is not None
+                else existing.cache_read_tokens
+            ),
+            cache_write_tokens=(
+                usage_update.cache_write_tokens
+                if usage_update.cache_write_tokens is not None
+                else existing.cache_write_tokens
+            ),
         )
 
     def get_last_usage(self) -> UsageMetadata | None:
@@ -223,6 +304,10 @@ class AnthropicProvider(BaseProvider):
         """Expose resolved model metadata captured during the last provider call."""
         return self._last_model_resolved
 
+    def get_last_stop_sequence(self) -> str | None:
+        """Expose the stop sequence that ended the last provider call, if any."""
+        return self._last_stop_sequence
+
     def generate(
         self,
         prompt: str,
@@ -230,56 +315,55 @@ class AnthropicProvider(BaseProvider):
         generation_config: GenerationConfig | None = None,
     ) -> str:
         """Send one prompt to Anthropic and return generated text."""
-        headers = {
-            "x-api-key": self.config.api_key,
-            "anthropic-version": "2023-06-01",
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "model": self.config.model,
-            "max_tokens": self.config.max_tokens,
-            "messages": [{"role": "user", "content": prompt}],
-        }
-        if system_prompt is not None:
-            payload["system"] = system_prompt
-        if generation_config is not None:
-            if generation_config.max_tokens is not None:
-                payload["max_tokens"] = generation_config.max_tokens
-            if generation_config.temperature is not None:
-                payload["temperature"] = generation_config.temperature
-            if generation_config.top_p is not None:
-                payload["top_p"] = generation_config.top_p
+        headers = self._request_headers()
+        payload = self._request_payload(prompt, system_prompt, generation_config)
 
         self._last_usage = None
         self._last_model_resolved = None
+        self._last_stop_sequence = None
 
-        # Retry only transient transport failures.
-        for attempt in range(self.config.max_retries + 1):
-            try:
-                response = requests.post(
-                    self.config.endpoint,
-                    headers=headers,
-                    json=payload,
-                    timeout=self.config.timeout_seconds,
-                )
-            except requests.RequestException as exc:
-                if attempt == self.config.max_retries:
-                    raise ProviderError(f"Provider request failed: {exc}") from exc
-                continue
-
-            self._raise_for_mapped_status(response)
+        body = self._send_json(self.config.endpoint, headers, payload)
+        self._last_usage = self._extract_usage(body)
+        self._last_model_resolved = self._extract_model_resolved(body)
+        self._last_stop_sequence = self._extract_stop_sequence(body)
+        return self._extract_text(body)
 
-            try:
-                body = response.json()
-            except ValueError as exc:
-                raise ProviderError("Provider returned invalid JSON.") from exc
+    def generate_samples(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> list[ResponseSample]:
+        """
+        Sample `generation_config.n` messages through concurrent calls.
 
-            self._last_usage = self._extract_usage(body)
-            self._last_model_resolved = self._extract_model_resolved(body)
-            return self._extract_text(body)
+        The Messages API has no sample count, so the same request is sent
+        once per sample. Usage is reported per sample and summed for the call.
+        """
+        headers = self._request_headers()
+        payload = self._request_payload(prompt, system_prompt, generation_config)
+        count = generation_config.n if generation_config is not None and generation_config.n else 1
 
-        # Defensive fallback: loop always returns or raises.
-        raise ProviderError("Provider request failed unexpectedly.")
+        self._last_usage = None
+        self._last_model_resolved = None
+        self._last_stop_sequence = None
+
+        bodies = call_control.fan_out(count, lambda: self._send_json(self.config.endpoint, headers, payload))
+        samples = []
+        for body in bodies:
+            stop_reason = body.get("stop_reason")
+            samples.append(
+                ResponseSample(
+                    text=self._extract_text(body),
+                    finish_reason=stop_reason if isinstance(stop_reason, str) else None,
+                    usage=self._extract_usage(body),
+                )
+            )
+        usages = [sample.usage for sample in samples if sample.usage is not None]
+        self._last_usage = UsageMetadata.total(usages) if usages else None
+        self._last_model_resolved = self._extract_model_resolved(bodies[0])
+        self._last_stop_sequence = self._extract_stop_sequence(bodies[0])
+        return samples
 
     def generate_stream(
         self,
@@ -294,86 +378,32 @@ class AnthropicProvider(BaseProvider):
         - retries are attempted only while no chunk has been emitted
         - once chunks are emitted, retrying would duplicate visible output
         """
-        headers = {
-            "x-api-key": self.config.api_key,
-            "anthropic-version": "2023-06-01",
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "model": self.config.model,
-            "max_tokens": self.config.max_tokens,
-            "messages": [{"role": "user", "content": prompt}],
-            "stream": True,
-        }
-        if system_prompt is not None:
-            payload["system"] = system_prompt
-        if generation_config is not None:
-            if generation_config.max_tokens is not None:
-                payload["max_tokens"] = generation_config.max_tokens
-            if generation_config.temperature is not None:
-                payload["temperature"] = generation_config.temperature
-            if generation_config.top_p is not None:
-                payload["top_p"] = generation_config.top_p
+        headers = self._request_headers()
+        payload = self._request_payload(prompt, system_prompt, generation_config)
+        payload["stream"] = True
 
         self._last_usage = None
         self._last_model_resolved = None
+        self._last_stop_sequence = None
 
-        for attempt in range(self.config.max_retries + 1):
-            emitted_any_chunk = False
-            try:
-                response = requests.post(
-                    self.config.endpoint,
-                    headers=headers,
-                    json=payload,
-                    timeout=self.config.timeout_seconds,
-                    stream=True,
-                )
-                self._raise_for_mapped_status(response)
-
-                for line in response.iter_lines(decode_unicode=True):
-                    if line is None:
-                        continue
-                    normalized_line = line.strip()
-                    if not normalized_line:
-                        continue
-                    if not normalized_line.startswith("data:"):
-                        continue
-
-                    data_value = normalized_line[len("data:") :].strip()
-                    if data_value == "[DONE]":
-                        return
-
-                    try:
-                        event = json.loads(data_value)
-                    except json.JSONDecodeError as exc:
-                        raise ProviderError(
-                            "Provider returned invalid streaming event JSON."
-                        ) from exc
-
-                    # Anthropic usage may appear in different stream event shapes.
-                    event_usage = self._extract_usage(event)
-                    if event_usage is None and isinstance(event, dict):
-                        message = event.get("message")
-                        if isinstance(message, dict):
-                            event_usage = self._extract_usage(message)
-                    if event_usage is not None:
-                        self._merge_usage(event_usage)
-
-                    event_model = self._extract_model_resolved(event)
-                    if event_model is not None:
-                        self._last_model_resolved = event_model
-
-                    delta_text = self._extract_stream_delta(event)
-                    if delta_text is None:
-                        continue
-
-                    emitted_any_chunk = True
-                    yield delta_text
-                return
-            except requests.RequestException as exc:
-                if emitted_any_chunk or attempt == self.config.max_retries:
-                    raise ProviderError(f"Provider request failed: {exc}") from exc
-                continue
+        def on_event(event: object) -> str | None:
+            # Anthropic usage may appear in different stream event shapes.
+            event_usage = self._extract_usage(event)
+            if event_usage is None and isinstance(event, dict):
+                message = event.get("message")
+                if isinstance(message, dict):
+                    event_usage = self._extract_usage(message)
+            if event_usage is not None:
+                self._merge_usage(event_usage)
+
+            event_model = self._extract_model_resolved(event)
+            if event_model is not None:
+                self._last_model_resolved = event_model
+
+            event_stop = self._extract_stop_sequence(event)
+            if event_stop is not None:
+                self._last_stop_sequence = event_stop
+
+            return self._extract_stream_delta(event)
 
-        # Defensive fallback: loop always returns or raises.
-        raise ProviderError("Provider request failed unexpectedly.")
+        yield from self._stream_events(self.config.endpoint, headers, payload, on_event)
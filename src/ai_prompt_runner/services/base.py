@@ -3,7 +3,13 @@
 from abc import ABC, abstractmethod
 from collections.abc import Iterator
 
-from ai_prompt_runner.core.models import GenerationConfig, UsageMetadata
+from ai_prompt_runner.core.cancellation import RunControl
+from ai_prompt_runner.core.models import (
+    GenerationConfig,
+    LatencyMetadata,
+    ResponseSample,
+    UsageMetadata,
+)
 
 
 class BaseProvider(ABC):
@@ -16,6 +22,11 @@ class BaseProvider(ABC):
     fails.
     """
 
+    # Deadline/cancellation of the call in progress, set by PromptRunner for
+    # the duration of one run. Network providers honour it between and during
+    # requests; others may ignore it.
+    run_control: RunControl | None = None
+
     @abstractmethod
     def generate(
         self,
@@ -46,6 +57,22 @@ class BaseProvider(ABC):
         """
         raise NotImplementedError("Streaming is not supported by this provider.")
 
+    def generate_samples(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> list[ResponseSample]:
+        """
+        Return `generation_config.n` completions for one prompt.
+
+        Providers override this when they can sample several completions in
+        one upstream call, or fan out concurrently. The default raises
+        `NotImplementedError` so callers fall back to one `generate` call per
+        sample. `get_last_usage` afterwards reports the whole request.
+        """
+        raise NotImplementedError("Multi-sample generation is not supported by this provider.")
+
     def get_last_usage(self) -> UsageMetadata | None:
         """
         Return normalized usage metadata captured during the last provider call.
@@ -56,6 +83,15 @@ class BaseProvider(ABC):
         """
         return None
 
+    def get_last_latency(self) -> LatencyMetadata | None:
+        """
+        Return the engine-reported timing breakdown of the last provider call.
+
+        Providers override this when the upstream reports server-side timings
+        (model load, prompt evaluation, generation). The default returns None.
+        """
+        return None
+
     def get_last_model_resolved(self) -> str | None:
         """
         Return provider-reported resolved model metadata from the last call.
@@ -64,3 +100,14 @@ class BaseProvider(ABC):
         resolution (for example alias -> concrete model version).
         """
         return None
+
+    def get_last_stop_sequence(self) -> str | None:
+        """
+        Return the stop sequence the upstream reported ending the last call.
+
+        Providers override this when the API names the matched sequence, so
+        natively enforced stops still surface in `metadata.truncation`. APIs
+        that only signal a generic "stop" cannot distinguish a stop sequence
+        from a natural end and keep the default None.
+        """
+        return None
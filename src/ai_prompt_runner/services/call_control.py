@@ -0,0 +1,431 @@
+"""HTTP plumbing for run deadlines, cancellation, stall detection and split timeouts."""
+
+import socket
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TypeVar
+from urllib.parse import unquote
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+from urllib3.poolmanager import SSL_KEYWORDS
+
+from ai_prompt_runner.core.cancellation import RunControl
+from ai_prompt_runner.core.errors import StreamStallError
+
+T = TypeVar("T")
+
+# Scope of the request currently being sent on this thread. Set only for the
+# duration of one `session.post` call so it never leaks across generator yields.
+_active_scope: ContextVar["AbortScope | None"] = ContextVar(
+    "ai_prompt_runner_abort_scope",
+    default=None,
+)
+
+
+def _shutdown_connection(conn) -> None:
+    """Shut the socket down so a read blocked in another thread returns at once."""
+    # Transports without socket access attach an object with its own abort.
+    abort = getattr(conn, "abort", None)
+    if callable(abort):
+        abort()
+        return
+    # `conn.sock` is cleared as soon as a response that closes the connection
+    # starts, while its body is still read from the same socket.
+    sock = getattr(conn, "abort_socket", None) or getattr(conn, "sock", None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class AbortScope:
+    """Connections used by one network exchange, abortable from any thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._connections: list = []
+        self._session: requests.Session | None = None
+        self.aborted = False
+        self.watchdog: StallWatchdog | None = None
+
+    def attach(self, conn) -> None:
+        with self._lock:
+            if not self.aborted:
+                self._connections.append(conn)
+                return
+        _shutdown_connection(conn)
+
+    def abort(self) -> None:
+        """Interrupt every attached connection; urllib3 then discards them."""
+        with self._lock:
+            self.aborted = True
+            connections = list(self._connections)
+        for conn in connections:
+            _shutdown_connection(conn)
+
+    def temporary_session(self) -> requests.Session:
+        """Return an abortable one-off session, closed when the scope ends."""
+        if self._session is None:
+            self._session = new_abortable_session()
+        return self._session
+
+    def close(self) -> None:
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        if self._session is not None:
+            self._session.close()
+
+
+# Re-check interval while an idle-only watchdog waits for the first event.
+_WATCHDOG_POLL_SECONDS = 0.1
+
+
+class StallWatchdog:
+    """
+    Abort a stream whose first chunk, or next chunk, does not arrive in time.
+
+    Socket read timeouts cannot tell "slow first token" from "stalled mid
+    stream", and a single value makes every stall cost the full timeout. One
+    daemon thread per guarded attempt tracks both limits; `feed` is a plain
+    attribute write so the per-chunk cost stays negligible. Only content
+    counts: keep-alive comments and bookkeeping events must not feed it, or
+    a server that sends them would never be seen as stalled.
+    """
+
+    def __init__(
+        self,
+        abort: Callable[[], None],
+        first_chunk_timeout_seconds: float | None,
+        idle_timeout_seconds: float | None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._abort = abort
+        self._first = first_chunk_timeout_seconds
+        self._idle = idle_timeout_seconds
+        self._clock = clock
+        self._last = clock()
+        self._received = False
+        self._stop = threading.Event()
+        self.stalled_phase: str | None = None
+
+    def start(self) -> None:
+        threading.Thread(target=self._watch, name="stream-stall-watchdog", daemon=True).start()
+
+    def feed(self) -> None:
+        """Record that one content chunk arrived."""
+        self._last = self._clock()
+        self._received = True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _watch(self) -> None:
+        while not self._stop.is_set():
+            received = self._received
+            limit = self._idle if received else self._first
+            if limit is None:
+                if received:
+                    return
+                self._stop.wait(_WATCHDOG_POLL_SECONDS)
+                continue
+            left = self._last + limit - self._clock()
+            if left <= 0:
+                self.stalled_phase = "idle" if received else "first_chunk"
+                self._abort()
+                return
+            self._stop.wait(left)
+
+    def raise_if_stalled(self) -> None:
+        """Raise `StreamStallError` when this watchdog aborted the stream."""
+        if self.stalled_phase == "first_chunk":
+            raise StreamStallError(
+                f"Stream stalled: no first chunk within {self._first:g} second(s).",
+                phase="first_chunk",
+            )
+        if self.stalled_phase == "idle":
+            raise StreamStallError(
+                f"Stream stalled: no chunk for {self._idle:g} second(s).",
+                phase="idle",
+            )
+
+
+class _AbortableHTTPConnection(HTTPConnection):
+    abort_socket = None
+
+    def connect(self) -> None:
+        super().connect()
+        self.abort_socket = self.sock
+
+
+class _AbortableHTTPSConnection(HTTPSConnection):
+    abort_socket = None
+
+    def connect(self) -> None:
+        super().connect()
+        self.abort_socket = self.sock
+
+
+class _AbortableHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _AbortableHTTPConnection
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        scope = _active_scope.get()
+        if scope is not None:
+            scope.attach(conn)
+        return conn
+
+
+class _AbortableHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _AbortableHTTPSConnection
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        scope = _active_scope.get()
+        if scope is not None:
+            scope.attach(conn)
+        return conn
+
+
+class _UnixHTTPConnection(_AbortableHTTPConnection):
+    """HTTP over a Unix domain socket; `host` is the percent-encoded socket path."""
+
+    def __init__(self, host: str, *args, **kwargs) -> None:
+        self.socket_path = unquote(host)
+        super().__init__("localhost", *args, **kwargs)
+
+    def _new_conn(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as exc:
+            sock.close()
+            raise NewConnectionError(
+                self, f"Failed to connect to Unix socket {self.socket_path}: {exc}"
+            ) from exc
+        return sock
+
+
+class _UnixHTTPConnectionPool(_AbortableHTTPConnectionPool):
+    scheme = "http+unix"
+    ConnectionCls = _UnixHTTPConnection
+
+    def __init__(self, host: str, port: int | None = None, **kwargs) -> None:
+        # The pool manager only strips TLS settings for plain `http`.
+        for keyword in SSL_KEYWORDS:
+            kwargs.pop(keyword, None)
+        super().__init__(host, port, **kwargs)
+
+
+class AbortableHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose in-use connections can be shut down from another thread.
+
+    Without an active abort scope it behaves exactly like `HTTPAdapter`.
+    """
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = abortable_pool_classes()
+
+
+def new_abortable_session(pool_maxsize: int = 10) -> requests.Session:
+    """Create a session whose requests honour cancellation tokens."""
+    session = requests.Session()
+    adapter = AbortableHTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@contextmanager
+def abort_scope(
+    control: RunControl | None,
+    first_chunk_timeout_seconds: float | None = None,
+    idle_timeout_seconds: float | None = None,
+) -> Iterator[AbortScope | None]:
+    """
+    Bind one network exchange (request plus body or stream) to `control`.
+
+    Cancellation or deadline expiry inside the block shuts the connection
+    down, which makes the blocked read fail immediately and releases it.
+    Stream stall limits arm a `StallWatchdog` that aborts the same way;
+    stream lines must then be read through `iter_stream_lines` and every
+    content chunk reported with `mark_chunk`.
+    """
+    watch = first_chunk_timeout_seconds is not None or idle_timeout_seconds is not None
+    if control is None and not watch:
+        yield None
+        return
+    scope = AbortScope()
+    if watch:
+        scope.watchdog = StallWatchdog(
+            scope.abort,
+            first_chunk_timeout_seconds,
+            idle_timeout_seconds,
+        )
+        scope.watchdog.start()
+    try:
+        if control is None:
+            yield scope
+        else:
+            with control.abort_on_stop(scope.abort):
+                yield scope
+    finally:
+        scope.close()
+
+
+def iter_stream_lines(scope: AbortScope | None, response: requests.Response) -> Iterator:
+    """
+    Yield decoded stream lines, surfacing stalls detected by the scope.
+
+    The response is closed when iteration ends for any reason, including a
+    consumer closing the stream early, so the upstream connection is dropped
+    instead of being drained. A stream the watchdog aborted fails with
+    `StreamStallError`, whether the abort surfaced as a transport error or as
+    a silently truncated body. Lines do not feed the watchdog: adapters call
+    `mark_chunk` when a line actually carries output.
+    """
+    yield from _guarded_stream(scope, response, response.iter_lines(decode_unicode=True))
+
+
+def iter_stream_text(scope: AbortScope | None, response) -> Iterator[str]:
+    """Yield decoded body text as it arrives; otherwise like `iter_stream_lines`."""
+    yield from _guarded_stream(scope, response, response.iter_text())
+
+
+def _guarded_stream(scope: AbortScope | None, response, items: Iterator) -> Iterator:
+    watchdog = scope.watchdog if scope is not None else None
+    try:
+        yield from items
+    except Exception as exc:
+        if watchdog is not None:
+            try:
+                watchdog.raise_if_stalled()
+            except StreamStallError as stall_error:
+                raise stall_error from exc
+        raise
+    finally:
+        close = getattr(response, "close", None)
+        if callable(close):
+            close()
+    if watchdog is not None:
+        watchdog.raise_if_stalled()
+
+
+def mark_chunk(scope: AbortScope | None) -> None:
+    """Report one content chunk to the scope's stall watchdog, if any."""
+    if scope is not None and scope.watchdog is not None:
+        scope.watchdog.feed()
+
+
+@contextmanager
+def bound_scope(scope: AbortScope | None) -> Iterator[None]:
+    """
+    Attach connections checked out in this block to `scope`.
+
+    Only connection pools built from this module's abortable classes see
+    the binding; the block should cover just the request being sent.
+    """
+    if scope is None:
+        yield
+        return
+    token = _active_scope.set(scope)
+    try:
+        yield
+    finally:
+        _active_scope.reset(token)
+
+
+def abortable_pool_classes() -> dict[str, type[HTTPConnectionPool]]:
+    """urllib3 pool classes whose in-use connections an `AbortScope` can shut down."""
+    return {
+        "http": _AbortableHTTPConnectionPool,
+        "https": _AbortableHTTPSConnectionPool,
+        "http+unix": _UnixHTTPConnectionPool,
+    }
+
+
+def post(
+    session: requests.Session | None,
+    scope: AbortScope | None,
+    url: str,
+    **kwargs,
+) -> requests.Response:
+    """POST through `session` (or a one-off connection) inside an abort scope."""
+    if scope is None:
+        if session is not None:
+            return session.post(url, **kwargs)
+        return requests.post(url, **kwargs)
+    if session is None:
+        session = scope.temporary_session()
+    with bound_scope(scope):
+        return session.post(url, **kwargs)
+
+
+def request(
+    session: requests.Session | None,
+    scope: AbortScope | None,
+    method: str,
+    url: str,
+    **kwargs,
+) -> requests.Response:
+    """Send `method` through `session` (or a one-off connection) inside an abort scope."""
+    if scope is None:
+        if session is not None:
+            return session.request(method, url, **kwargs)
+        return requests.request(method, url, **kwargs)
+    if session is None:
+        session = scope.temporary_session()
+    with bound_scope(scope):
+        return session.request(method, url, **kwargs)
+
+
+def request_timeout(
+    timeout_seconds: float,
+    connect_timeout_seconds: float | None,
+    control: RunControl | None,
+) -> float | tuple[float, float]:
+    """
+    Return the `requests` timeout for one attempt.
+
+    `timeout_seconds` bounds each socket read; `connect_timeout_seconds`
+    (when set) bounds connection setup separately. An active deadline clamps
+    both to the time left for the whole run.
+    """
+    if control is None:
+        if connect_timeout_seconds is None:
+            return timeout_seconds
+        return connect_timeout_seconds, timeout_seconds
+    connect = connect_timeout_seconds if connect_timeout_seconds is not None else timeout_seconds
+    return control.request_timeout(connect, timeout_seconds)
+
+
+def stop_requested(control: RunControl | None) -> bool:
+    """True when retries must stop because the run was cancelled or timed out."""
+    return control is not None and control.stopped
+
+
+def fan_out(count: int, call: Callable[[], T]) -> list[T]:
+    """
+    Run `call` `count` times concurrently and return the results in call order.
+
+    Used for multi-sample requests to APIs without a native sample count.
+    Every call finishes (or is aborted through the run control) before the
+    first failure, in call order, is raised.
+    """
+    with ThreadPoolExecutor(max_workers=count, thread_name_prefix="sample-fan-out") as pool:
+        futures = [pool.submit(call) for _ in range(count)]
+    return [future.result() for future in futures]
@@ -0,0 +1,360 @@
+"""Record/replay transports: capture raw HTTP exchanges and serve them back offline."""
+
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from hashlib import sha256
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from ai_prompt_runner.core.errors import ProviderError
+from ai_prompt_runner.services.call_control import AbortScope
+from ai_prompt_runner.services.transport import (
+    Transport,
+    TransportError,
+    TransportResponse,
+    iter_byte_lines,
+    iter_byte_text,
+)
+
+# `instant` serves recorded bodies at memory speed; `recorded` reproduces the
+# original time to headers and the gaps between stream chunks.
+REPLAY_TIMINGS = ("instant", "recorded")
+CASSETTE_VERSION = 1
+REDACTED = "***redacted***"
+
+# Header and query parameter names whose values are credentials.
+_SECRET_NAME_PARTS = ("auth", "key", "token", "secret", "cookie", "password", "signature")
+
+
+class CassetteMissError(ProviderError):
+    """Raised in replay mode when no exchange was recorded for a request."""
+
+
+def _is_secret_name(name: str) -> bool:
+    lowered = name.lower()
+    return any(part in lowered for part in _SECRET_NAME_PARTS)
+
+
+def _redact(text: str, secret_values: Iterable[str]) -> str:
+    for secret in secret_values:
+        text = text.replace(secret, REDACTED)
+    return text
+
+
+def _scrub_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = [
+        (name, REDACTED if _is_secret_name(name) else value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query, safe="*")))
+
+
+def _stored_body(body: object) -> object:
+    """JSON form of a request body: JSON payloads as is, raw bytes as text or base64."""
+    if not isinstance(body, bytes):
+        return body
+    try:
+        return {"text": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode("ascii")}
+
+
+def exchange_key(
+    url: str,
+    body: object,
+    stream: bool,
+    secret_values: Iterable[str] = (),
+    method: str = "POST",
+) -> str:
+    """
+    Return the replay key of one request.
+
+    The key covers the URL path (not the host or query, so cassettes
+    recorded against a hosted API replay against any endpoint), the call
+    style, the method when it is not POST, and the request body as
+    canonical JSON with sorted keys (raw bodies as text or base64). Secret
+    values are redacted first, so recordings made with one API key replay
+    with another.
+    """
+    keyed = {"path": urlsplit(url).path, "stream": stream, "body": _stored_body(body)}
+    if method != "POST":
+        keyed["method"] = method
+    canonical = json.dumps(
+        keyed,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return sha256(_redact(canonical, secret_values).encode("utf-8")).hexdigest()
+
+
+def _encode_chunk(at_ms: float, chunk: bytes) -> dict:
+    try:
+        return {"at_ms": round(at_ms, 3), "text": chunk.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"at_ms": round(at_ms, 3), "base64": base64.b64encode(chunk).decode("ascii")}
+
+
+def _decode_chunk(entry: dict) -> tuple[float, bytes]:
+    if "text" in entry:
+        return float(entry["at_ms"]), entry["text"].encode("utf-8")
+    return float(entry["at_ms"]), base64.b64decode(entry["base64"])
+
+
+class _ReplayAbort:
+    """Wakes a replay waiting on recorded timing when its abort scope fires."""
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+
+    def abort(self) -> None:
+        self.event.set()
+
+
+class _CassetteResponse:
+    """A recorded response, optionally paced like the original exchange."""
+
+    def __init__(
+        self,
+        status_code: int,
+        chunks: list[tuple[float, bytes]],
+        started: float,
+        pace: bool,
+        abort: _ReplayAbort,
+    ) -> None:
+        self.status_code = status_code
+        self._chunks = chunks
+        self._started = started
+        self._pace = pace
+        self._abort = abort
+
+    def _wait_until(self, at_ms: float) -> None:
+        if not self._pace:
+            return
+        delay = self._started + at_ms / 1000 - time.monotonic()
+        if delay > 0 and self._abort.event.wait(delay):
+            raise TransportError("Replay aborted.")
+
+    @property
+    def text(self) -> str:
+        return b"".join(chunk for _, chunk in self._chunks).decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(b"".join(chunk for _, chunk in self._chunks))
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        for at_ms, chunk in self._chunks:
+            self._wait_until(at_ms)
+            yield chunk
+
+    def iter_lines(self, decode_unicode: bool = False) -> Iterator:
+        yield from iter_byte_lines(self.iter_bytes(), decode_unicode)
+
+    def iter_text(self) -> Iterator[str]:
+        yield from iter_byte_text(self.iter_bytes())
+
+    def close(self) -> None:
+        self._abort.abort()
+
+
+class ReplayTransport(Transport):
+    """
+    Serve recorded exchanges from a cassette directory without any network I/O.
+
+    Requests are matched by `exchange_key`; a request that was never
+    recorded raises `CassetteMissError`. With `timing="recorded"` the time
+    to headers and every gap between body chunks are reproduced (a non-stream
+    call returns after the recorded total), otherwise bodies are served at
+    memory speed. Cassettes are parsed once and kept in memory.
+    """
+
+    name = "replay"
+
+    def __init__(
+        self,
+        directory: str | Path,
+        timing: str = "instant",
+        secret_values: Iterable[str] = (),
+    ) -> None:
+        if timing not in REPLAY_TIMINGS:
+            raise ValueError(f"Unknown replay timing '{timing}'. Supported: {', '.join(REPLAY_TIMINGS)}.")
+        self.directory = Path(directory)
+        if not self.directory.is_dir():
+            raise ValueError(f"Replay directory '{self.directory}' does not exist.")
+        self.timing = timing
+        self._secret_values = tuple(value for value in secret_values if value)
+        self._lock = threading.Lock()
+        self._loaded: dict[str, tuple[int, float, list[tuple[float, bytes]]]] = {}
+
+    def _load(self, key: str, url: str, method: str = "POST") -> tuple[int, float, list[tuple[float, bytes]]]:
+        with self._lock:
+            cached = self._loaded.get(key)
+        if cached is not None:
+            return cached
+        path = self.directory / f"{key}.json"
+        try:
+            cassette = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise CassetteMissError(
+                f"No recorded exchange for {method} {urlsplit(url).path} in '{self.directory}' (key {key[:12]})."
+            ) from None
+        except (OSError, ValueError) as exc:
+            raise ProviderError(f"Cannot read cassette '{path}': {exc}") from exc
+        response = cassette["response"]
+        loaded = (
+            int(response["status"]),
+            float(response["headers_ms"]),
+            [_decode_chunk(entry) for entry in response["chunks"]],
+        )
+        with self._lock:
+            self._loaded[key] = loaded
+        return loaded
+
+    def _replay(self, url, payload, scope: AbortScope | None, stream: bool, method: str = "POST") -> _CassetteResponse:
+        started = time.monotonic()
+        status_code, headers_ms, chunks = self._load(
+            exchange_key(url, payload, stream, self._secret_values, method), url, method
+        )
+        abort = _ReplayAbort()
+        if scope is not None:
+            scope.attach(abort)
+        response = _CassetteResponse(status_code, chunks, started, self.timing == "recorded", abort)
+        response._wait_until(headers_ms if stream else max([headers_ms, *(at for at, _ in chunks)]))
+        return response
+
+    def send(self, url, *, headers, json, timeout, scope=None) -> TransportResponse:
+        return self._replay(url, json, scope, stream=False)
+
+    def stream(self, url, *, headers, json, timeout, scope=None) -> TransportResponse:
+        return self._replay(url, json, scope, stream=True)
+
+    def request(self, method, url, *, headers, body, timeout, stream=False, scope=None) -> TransportResponse:
+        return self._replay(url, body, scope, stream=stream, method=method)
+
+
+def _write_atomically(path: Path, text: str) -> None:
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class _RecordingResponse:
+    """Pass a live response through while capturing its raw chunks and their timing."""
+
+    def __init__(self, response: TransportResponse, started: float, on_done: Callable) -> None:
+        self._response = response
+        self._started = started
+        self._on_done = on_done
+        self.status_code = response.status_code
+        self.headers_ms = (time.monotonic() - started) * 1000
+        self.chunks: list[dict] = []
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        for chunk in self._response.iter_bytes():
+            if chunk:
+                self.chunks.append(_encode_chunk((time.monotonic() - self._started) * 1000, chunk))
+            yield chunk
+
+    def iter_lines(self, decode_unicode: bool = False) -> Iterator:
+        yield from iter_byte_lines(self.iter_bytes(), decode_unicode)
+
+    def iter_text(self) -> Iterator[str]:
+        yield from iter_byte_text(self.iter_bytes())
+
+    def close(self) -> None:
+        self._response.close()
+        on_done, self._on_done = self._on_done, None
+        if on_done is not None:
+            on_done(self)
+
+
+class RecordingTransport(Transport):
+    """
+    Send requests through `inner` and save every exchange as a cassette.
+
+    One JSON file per request key (see `exchange_key`) holds the scrubbed
+    request and the raw response body with the time each chunk arrived,
+    relative to the start of the request. Header and query values whose
+    names look like credentials, and every value in `secret_values`, are
+    replaced with a redaction marker. Stream exchanges are saved when the
+    provider closes the response, so a stream it stopped reading early is
+    saved as far as it was read. Re-recording a request overwrites it.
+    """
+
+    name = "record"
+
+    def __init__(self, inner: Transport, directory: str | Path, secret_values: Iterable[str] = ()) -> None:
+        self.inner = inner
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._secret_values = tuple(value for value in secret_values if value)
+
+    def _save(self, url, headers, payload, stream: bool, recorded: _RecordingResponse, method: str) -> None:
+        cassette = {
+            "version": CASSETTE_VERSION,
+            "request": {
+                "method": method,
+                "url": _scrub_url(url),
+                "stream": stream,
+                "headers": {
+                    name: REDACTED if _is_secret_name(name) else value for name, value in headers.items()
+                },
+                "body": _stored_body(payload),
+            },
+            "response": {
+                "status": recorded.status_code,
+                "headers_ms": round(recorded.headers_ms, 3),
+                "chunks": recorded.chunks,
+            },
+        }
+        text = _redact(json.dumps(cassette, indent=2, ensure_ascii=False), self._secret_values)
+        key = exchange_key(url, payload, stream, self._secret_values, method)
+        _write_atomically(self.directory / f"{key}.json", text + "\n")
+
+    def _record(
+        self, url, headers, payload, timeout, scope, stream: bool, method: str = "POST", raw: bool = False
+    ) -> TransportResponse:
+        started = time.monotonic()
+        if raw:
+            response = self.inner.request(
+                method, url, headers=headers, body=payload, timeout=timeout, stream=stream, scope=scope
+            )
+        else:
+            send = self.inner.stream if stream else self.inner.send
+            response = send(url, headers=headers, json=payload, timeout=timeout, scope=scope)
+
+        def on_done(recorded: _RecordingResponse) -> None:
+            self._save(url, headers, payload, stream, recorded, method)
+
+        recorded = _RecordingResponse(response, started, on_done)
+        if stream:
+            return recorded
+        # Non-stream bodies are already read: capture them now and hand the
+        # provider a replay of exactly what was saved.
+        body = response.text.encode("utf-8")
+        recorded.chunks.append(_encode_chunk(recorded.headers_ms, body))
+        recorded.close()
+        return _CassetteResponse(response.status_code, [(0.0, body)], started, False, _ReplayAbort())
+
+    def send(self, url, *, headers, json, timeout, scope=None) -> TransportResponse:
+        return self._record(url, headers, json, timeout, scope, stream=False)
+
+    def stream(self, url, *, headers, json, timeout, scope=None) -> TransportResponse:
+        return self._record(url, headers, json, timeout, scope, stream=True)
+
+    def request(self, method, url, *, headers, body, timeout, stream=False, scope=None) -> TransportResponse:
+        return self._record(url, headers, body, timeout, scope, stream=stream, method=method, raw=True)
+
+    def close(self) -> None:
+        self.inner.close()
@@ -1,20 +1,71 @@
 """Google Gemini generateContent provider implementation using requests."""
 
-import json
-from collections.abc import Iterator
-from dataclasses import dataclass
+import threading
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field, replace
+from hashlib import sha256
 
 import requests
 
-from ai_prompt_runner.core.errors import (
-    AuthenticationError,
-    AuthorizationError,
-    ProviderError,
-    RateLimitError,
-    UpstreamServerError,
-)
-from ai_prompt_runner.core.models import GenerationConfig, UsageMetadata
-from ai_prompt_runner.services.base import BaseProvider
+from ai_prompt_runner.core.errors import ProviderError
+from ai_prompt_runner.core.models import GenerationConfig, ResponseSample, UsageMetadata
+from ai_prompt_runner.services.http_base import TransportProvider
+from ai_prompt_runner.services.transport import Transport, TransportError
+
+# generateContent rejects more than five `stopSequences`; any extra sequences
+# are enforced client-side by the runner only. Gemini reports a matched stop
+# as a plain `finishReason: "STOP"`, so native stops are not surfaced in
+# truncation metadata.
+_MAX_NATIVE_STOP_SEQUENCES = 5
+
+
+# Entries this close to expiry are recreated rather than reused, so a request
+# never references a cachedContent that expires while it is in flight.
+_CACHE_REFRESH_MARGIN_SECONDS = 10.0
+
+
+class CachedContentRegistry:
+    """
+    `cachedContents` resources created for system prompts, keyed by content.
+
+    Providers share one process-wide registry unless their config supplies
+    one, so pooled and parallel instances reuse a single cache entry instead
+    of each creating their own.
+    A system prompt the API refused to cache (for example because it is below
+    the minimum cacheable size) is remembered as `None` for one TTL so it is
+    sent inline without re-trying the creation on every request.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[str | None, float]] = {}
+        self._creation_locks: dict[str, threading.Lock] = {}
+
+    def creation_lock(self, key: str) -> threading.Lock:
+        """Serialize creation per prompt so concurrent misses create one entry."""
+        with self._lock:
+            return self._creation_locks.setdefault(key, threading.Lock())
+
+    def lookup(self, key: str) -> tuple[bool, str | None]:
+        """Return (found, name); name is None for prompts known to be uncacheable."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            name, expires_at = entry
+            if expires_at - self._clock() <= _CACHE_REFRESH_MARGIN_SECONDS:
+                del self._entries[key]
+                return False, None
+            return True, name
+
+    def store(self, key: str, name: str | None, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (name, self._clock() + ttl_seconds)
+
+
+_SHARED_CACHED_CONTENTS = CachedContentRegistry()
 
 
 @dataclass
@@ -26,9 +77,27 @@ class GoogleProviderConfig:
     model: str
     timeout_seconds: int = 30
     max_retries: int = 0
-
-
-class GoogleProvider(BaseProvider):
+    # Bounds connection setup separately; defaults to timeout_seconds.
+    connect_timeout_seconds: float | None = None
+    # Stream stall limits: time to the first event and between events.
+    first_chunk_timeout_seconds: float | None = None
+    stream_idle_timeout_seconds: float | None = None
+    # Optional pooled session; one-off connections are used when unset.
+    session: requests.Session | None = field(default=None, repr=False, compare=False)
+    # HTTP engine override; the default is `requests` over `session`.
+    transport: Transport | None = field(default=None, repr=False, compare=False)
+    # Move the system prompt into a `cachedContents` resource reused across calls.
+    prompt_cache: bool = False
+    prompt_cache_ttl_seconds: int = 300
+    # Registry of created cache entries; None uses the process-wide one.
+    cached_contents: CachedContentRegistry | None = field(
+        default=None,
+        repr=False,
+        compare=False,
+    )
+
+
+class GoogleProvider(TransportProvider):
     """Provider for Gemini generateContent protocol."""
     provider_protocol = "google-gemini"
 
@@ -58,24 +127,160 @@ class GoogleProvider(BaseProvider):
         base = self.config.endpoint.rstrip("/")
         return f"{base}/{self.config.model}:streamGenerateContent?alt=sse"
 
-    def _raise_for_mapped_status(self, response: requests.Response) -> None:
-        """Map provider HTTP status codes to domain-specific exceptions."""
-        status_code = response.status_code
+    def _cached_contents_endpoint(self) -> str:
+        """
+        Build the cachedContents URL next to the models endpoint.
 
-        explicit_status_errors = {
-            401: AuthenticationError("Provider authentication failed (HTTP 401)."),
-            403: AuthorizationError("Provider authorization failed (HTTP 403)."),
-            429: RateLimitError("Provider rate limit exceeded (HTTP 429)."),
+        Example:
+        https://generativelanguage.googleapis.com/v1beta/models
+        -> https://generativelanguage.googleapis.com/v1beta/cachedContents
+        """
+        base = self.config.endpoint.rstrip("/")
+        return f"{base.rsplit('/', 1)[0]}/cachedContents"
+
+    def _create_cached_content(
+        self,
+        system_prompt: str,
+        headers: dict[str, str],
+    ) -> tuple[str | None, int | None, bool]:
+        """
+        Create a cachedContent holding `system_prompt`.
+
+        Returns (name, cache_write_tokens, remember). A transport failure
+        falls back to an inline system prompt for this call only
+        (remember=False). A client error means the prompt cannot be cached,
+        so the result is remembered. Auth, rate-limit and server errors
+        propagate like any other request failure.
+        """
+        body = {
+            "model": f"models/{self.config.model}",
+            "systemInstruction": {"parts": [{"text": system_prompt}]},
+            "ttl": f"{self.config.prompt_cache_ttl_seconds}s",
         }
+        try:
+            response = self._send_once(self._cached_contents_endpoint(), headers, body)
+        except TransportError:
+            return None, None, False
+
+        if 400 <= response.status_code < 500 and response.status_code not in (401, 403, 429):
+            return None, None, True
+        self._raise_for_mapped_status(response)
+
+        try:
+            created = response.json()
+        except ValueError:
+            return None, None, False
+        name = created.get("name") if isinstance(created, dict) else None
+        if not isinstance(name, str) or not name:
+            return None, None, False
+        usage = self._extract_usage(created)
+        return name, usage.total_tokens if usage is not None else None, True
+
+    def _cached_content(
+        self,
+        system_prompt: str,
+        headers: dict[str, str],
+    ) -> tuple[str | None, int | None]:
+        """
+        Return (cachedContent name, cache_write_tokens) for `system_prompt`.
 
-        mapped_error = explicit_status_errors.get(status_code)
-        if mapped_error is not None:
-            raise mapped_error
+        The name is None when the prompt must be sent inline. Write tokens
+        are reported only by the call that created the entry.
+        """
+        registry = self.config.cached_contents or _SHARED_CACHED_CONTENTS
+        # Cache entries belong to one project (API key) and model.
+        identity = "\0".join(
+            (self.config.endpoint, self.config.api_key, self.config.model, system_prompt)
+        )
+        key = sha256(identity.encode("utf-8")).hexdigest()
+        found, name = registry.lookup(key)
+        if found:
+            return name, None
+        with registry.creation_lock(key):
+            found, name = registry.lookup(key)
+            if found:
+                return name, None
+            name, write_tokens, remember = self._create_cached_content(system_prompt, headers)
+            if remember:
+                registry.store(key, name, self.config.prompt_cache_ttl_seconds)
+            return name, write_tokens
+
+    def _apply_system_prompt(
+        self,
+        payload: dict,
+        system_prompt: str | None,
+        headers: dict[str, str],
+    ) -> int | None:
+        """
+        Attach the system prompt inline or by cachedContent reference.
 
-        if 500 <= status_code <= 599:
-            raise UpstreamServerError(f"Provider server error (HTTP {status_code}).")
-        if status_code >= 400:
-            raise ProviderError(f"Provider returned HTTP {status_code}.")
+        Returns cache write tokens when this call created the cache entry.
+        """
+        if system_prompt is None:
+            return None
+        if self.config.prompt_cache:
+            name, write_tokens = self._cached_content(system_prompt, headers)
+            if name is not None:
+                payload["cachedContent"] = name
+                return write_tokens
+        payload["systemInstruction"] = {
+            "parts": [{"text": system_prompt}],
+        }
+        return None
+
+    @staticmethod
+    def _with_cache_write(
+        usage: UsageMetadata | None,
+        cache_write_tokens: int | None,
+    ) -> UsageMetadata | None:
+        """Attach the tokens written while creating the cache entry to call usage."""
+        if cache_write_tokens is None:
+            return usage
+        return replace(usage or UsageMetadata(), cache_write_tokens=cache_write_tokens)
+
+    def _request_headers(self) -> dict[str, str]:
+        return {
+            "x-goog-api-key": self.config.api_key,
+            "Content-Type": "application/json",
+        }
+
+    def _request_payload(
+        self,
+        prompt: str,
+        generation_config: GenerationConfig | None,
+    ) -> dict:
+        """
+        Build the generateContent request body shared by all call styles.
+
+        The system prompt is attached separately by `_apply_system_prompt`
+        because it may be sent by cachedContent reference.
+        """
+        payload = {
+            "contents": [
+                {
+                    "parts": [
+                        {"text": prompt},
+                    ]
+                }
+            ]
+        }
+        if generation_config is not None:
+            generation_payload: dict[str, float | int | list[str]] = {}
+            if generation_config.temperature is not None:
+                generation_payload["temperature"] = generation_config.temperature
+            if generation_config.max_tokens is not None:
+                generation_payload["maxOutputTokens"] = generation_config.max_tokens
+            if generation_config.top_p is not None:
+                generation_payload["topP"] = generation_config.top_p
+            if generation_config.stop:
+                generation_payload["stopSequences"] = list(
+                    generation_config.stop[:_MAX_NATIVE_STOP_SEQUENCES]
+                )
+            if generation_config.n is not None and generation_config.n > 1:
+                generation_payload["candidateCount"] = generation_config.n
+            if generation_payload:
+                payload["generationConfig"] = generation_payload
+        return payload
 
     def _extract_text(self, body: dict) -> str:
         """
@@ -88,15 +293,19 @@ class GoogleProvider(BaseProvider):
             ]
         }
         """
+        return self._candidate_text(self._extract_candidates(body)[0])
+
+    def _extract_candidates(self, body: dict) -> list:
         candidates = body.get("candidates")
         if not isinstance(candidates, list) or not candidates:
             raise ProviderError("Provider response must contain a non-empty 'candidates' list.")
+        return candidates
 
-        first_candidate = candidates[0]
-        if not isinstance(first_candidate, dict):
+    def _candidate_text(self, candidate: object) -> str:
+        if not isinstance(candidate, dict):
             raise ProviderError("Provider response candidate must be an object.")
 
-        content = first_candidate.get("content")
+        content = candidate.get("content")
         if not isinstance(content, dict):
             raise ProviderError("Provider response candidate must contain a 'content' object.")
 
@@ -114,6 +323,32 @@ class GoogleProvider(BaseProvider):
 
         return text
 
+    def _extract_samples(self, body: dict) -> list[ResponseSample]:
+        """
+        Extract every candidate of a `candidateCount > 1` response.
+
+        Usage is only reported for the whole call, so samples carry none.
+        """
+        candidates = self._extract_candidates(body)
+        ordered = sorted(
+            candidates,
+            key=lambda candidate: (
+                candidate.get("index", 0)
+                if isinstance(candidate, dict) and isinstance(candidate.get("index"), int)
+                else 0
+            ),
+        )
+        samples = []
+        for candidate in ordered:
+            finish_reason = candidate.get("finishReason") if isinstance(candidate, dict) else None
+            samples.append(
+                ResponseSample(
+                    text=self._candidate_text(candidate),
+                    finish_reason=finish_reason if isinstance(finish_reason, str) else None,
+                )
+            )
+        return samples
+
     def _extract_stream_delta(self, event: dict) -> str | None:
         """
         Extract stream text from one Gemini SSE event payload.
@@ -174,9 +409,10 @@ class GoogleProvider(BaseProvider):
         Normalize Gemini `usageMetadata` to project-wide usage metadata.
 
         Expected keys (when present):
-        - promptTokenCount
+        - promptTokenCount (includes cached tokens)
         - candidatesTokenCount
         - totalTokenCount
+        - cachedContentTokenCount
         """
         if not isinstance(payload, dict):
             return None
@@ -188,6 +424,7 @@ class GoogleProvider(BaseProvider):
         prompt_tokens_raw = usage_obj.get("promptTokenCount")
         completion_tokens_raw = usage_obj.get("candidatesTokenCount")
         total_tokens_raw = usage_obj.get("totalTokenCount")
+        cached_tokens_raw = usage_obj.get("cachedContentTokenCount")
 
         return UsageMetadata(
             prompt_tokens=prompt_tokens_raw if isinstance(prompt_tokens_raw, int) else None,
@@ -195,6 +432,9 @@ class GoogleProvider(BaseProvider):
                 completion_tokens_raw if isinstance(completion_tokens_raw, int) else None
             ),
             total_tokens=total_tokens_raw if isinstance(total_tokens_raw, int) else None,
+            cache_read_tokens=(
+                cached_tokens_raw if isinstance(cached_tokens_raw, int) else None
+            ),
         )
 
     def _extract_model_resolved(self, payload: dict) -> str | None:
@@ -224,64 +464,36 @@ class GoogleProvider(BaseProvider):
         generation_config: GenerationConfig | None = None,
     ) -> str:
         """Send one prompt to Gemini and return generated text."""
-        headers = {
-            "x-goog-api-key": self.config.api_key,
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {"text": prompt},
-                    ]
-                }
-            ]
-        }
-        if system_prompt is not None:
-            payload["systemInstruction"] = {
-                "parts": [{"text": system_prompt}],
-            }
-        if generation_config is not None:
-            generation_payload: dict[str, float | int] = {}
-            if generation_config.temperature is not None:
-                generation_payload["temperature"] = generation_config.temperature
-            if generation_config.max_tokens is not None:
-                generation_payload["maxOutputTokens"] = generation_config.max_tokens
-            if generation_config.top_p is not None:
-                generation_payload["topP"] = generation_config.top_p
-            if generation_payload:
-                payload["generationConfig"] = generation_payload
+        headers = self._request_headers()
+        payload = self._request_payload(prompt, generation_config)
 
         self._last_usage = None
         self._last_model_resolved = None
+        cache_write_tokens = self._apply_system_prompt(payload, system_prompt, headers)
 
-        # Retry only transient transport failures.
-        for attempt in range(self.config.max_retries + 1):
-            try:
-                response = requests.post(
-                    self._normalized_endpoint(),
-                    headers=headers,
-                    json=payload,
-                    timeout=self.config.timeout_seconds,
-                )
-            except requests.RequestException as exc:
-                if attempt == self.config.max_retries:
-                    raise ProviderError(f"Provider request failed: {exc}") from exc
-                continue
+        body = self._send_json(self._normalized_endpoint(), headers, payload)
+        self._last_usage = self._with_cache_write(self._extract_usage(body), cache_write_tokens)
+        self._last_model_resolved = self._extract_model_resolved(body)
+        return self._extract_text(body)
 
-            self._raise_for_mapped_status(response)
-
-            try:
-                body = response.json()
-            except ValueError as exc:
-                raise ProviderError("Provider returned invalid JSON.") from exc
+    def generate_samples(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> list[ResponseSample]:
+        """Sample `generation_config.n` candidates in one call (`candidateCount`)."""
+        headers = self._request_headers()
+        payload = self._request_payload(prompt, generation_config)
 
-            self._last_usage = self._extract_usage(body)
-            self._last_model_resolved = self._extract_model_resolved(body)
-            return self._extract_text(body)
+        self._last_usage = None
+        self._last_model_resolved = None
+        cache_write_tokens = self._apply_system_prompt(payload, system_prompt, headers)
 
-        # Defensive fallback: loop always returns or raises.
-        raise ProviderError("Provider request failed unexpectedly.")
+        body = self._send_json(self._normalized_endpoint(), headers, payload)
+        self._last_usage = self._with_cache_write(self._extract_usage(body), cache_write_tokens)
+        self._last_model_resolved = self._extract_model_resolved(body)
+        return self._extract_samples(body)
 
     def generate_stream(
         self,
@@ -296,89 +508,23 @@ class GoogleProvider(BaseProvider):
         - retries are attempted only while no chunk has been emitted
         - once chunks are emitted, retrying would duplicate visible output
         """
-        headers = {
-            "x-goog-api-key": self.config.api_key,
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {"text": prompt},
-                    ]
-                }
-            ]
-        }
-        if system_prompt is not None:
-            payload["systemInstruction"] = {
-                "parts": [{"text": system_prompt}],
-            }
-        if generation_config is not None:
-            generation_payload: dict[str, float | int] = {}
-            if generation_config.temperature is not None:
-                generation_payload["temperature"] = generation_config.temperature
-            if generation_config.max_tokens is not None:
-                generation_payload["maxOutputTokens"] = generation_config.max_tokens
-            if generation_config.top_p is not None:
-                generation_payload["topP"] = generation_config.top_p
-            if generation_payload:
-                payload["generationConfig"] = generation_payload
+        headers = self._request_headers()
+        payload = self._request_payload(prompt, generation_config)
 
         self._last_usage = None
         self._last_model_resolved = None
+        cache_write_tokens = self._apply_system_prompt(payload, system_prompt, headers)
 
-        for attempt in range(self.config.max_retries + 1):
-            emitted_any_chunk = False
-            try:
-                response = requests.post(
-                    self._normalized_stream_endpoint(),
-                    headers=headers,
-                    json=payload,
-                    timeout=self.config.timeout_seconds,
-                    stream=True,
-                )
-                self._raise_for_mapped_status(response)
-
-                for line in response.iter_lines(decode_unicode=True):
-                    if line is None:
-                        continue
-                    normalized_line = line.strip()
-                    if not normalized_line:
-                        continue
-                    if not normalized_line.startswith("data:"):
-                        continue
-
-                    data_value = normalized_line[len("data:") :].strip()
-                    if data_value == "[DONE]":
-                        return
-
-                    try:
-                        event = json.loads(data_value)
-                    except json.JSONDecodeError as exc:
-                        raise ProviderError(
-                            "Provider returned invalid streaming event JSON."
-                        ) from exc
-
-                    # Usage metadata may appear in stream events without text chunks.
-                    event_usage = self._extract_usage(event)
-                    if event_usage is not None:
-                        self._last_usage = event_usage
-
-                    event_model = self._extract_model_resolved(event)
-                    if event_model is not None:
-                        self._last_model_resolved = event_model
-
-                    delta_text = self._extract_stream_delta(event)
-                    if delta_text is None:
-                        continue
-
-                    emitted_any_chunk = True
-                    yield delta_text
-                return
-            except requests.RequestException as exc:
-                if emitted_any_chunk or attempt == self.config.max_retries:
-                    raise ProviderError(f"Provider request failed: {exc}") from exc
-                continue
+        def on_event(event: object) -> str | None:
+            # Usage metadata may appear in stream events without text chunks.
+            event_usage = self._extract_usage(event)
+            if event_usage is not None:
+                self._last_usage = self._with_cache_write(event_usage, cache_write_tokens)
+
+            event_model = self._extract_model_resolved(event)
+            if event_model is not None:
+                self._last_model_resolved = event_model
+
+            return self._extract_stream_delta(event)
 
-        # Defensive fallback: loop always returns or raises.
-        raise ProviderError("Provider request failed unexpectedly.")
+        yield from self._stream_events(self._normalized_stream_endpoint(), headers, payload, on_event)
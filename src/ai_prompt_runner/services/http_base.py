@@ -0,0 +1,177 @@
+"""Shared request/retry logic for providers that talk HTTP through a transport."""
+
+import json
+from collections.abc import Callable, Iterator
+from typing import Literal
+
+from ai_prompt_runner.core.errors import ProviderError, StreamStallError
+from ai_prompt_runner.services import call_control, transport
+from ai_prompt_runner.services.base import BaseProvider
+from ai_prompt_runner.services.call_control import abort_scope
+from ai_prompt_runner.services.transport import (
+    RequestsTransport,
+    Transport,
+    TransportError,
+    TransportResponse,
+)
+
+
+class TransportProvider(BaseProvider):
+    """
+    Base class for network providers.
+
+    Owns the transport selection, per-attempt timeouts, HTTP status mapping
+    and the retry loops; adapters only build URLs and payloads and parse
+    bodies or stream events. `config` must expose `timeout_seconds`,
+    `connect_timeout_seconds`, `max_retries`, `session` and `transport`;
+    streaming adapters also expose the stall limits.
+    """
+
+    def _transport(self) -> Transport:
+        """Return the configured transport, or `requests` over `config.session`."""
+        configured = self.config.transport
+        if configured is not None:
+            return configured
+        return RequestsTransport(self.config.session)
+
+    def _request_timeout(self) -> float | tuple[float, float]:
+        """Per-attempt (connect, read) timeout, clamped to the run deadline."""
+        return call_control.request_timeout(
+            self.config.timeout_seconds,
+            self.config.connect_timeout_seconds,
+            self.run_control,
+        )
+
+    def _raise_for_mapped_status(self, response: TransportResponse) -> None:
+        """Map provider HTTP status codes to domain-specific exceptions."""
+        transport.raise_for_mapped_status(response)
+
+    def _send_once(self, url: str, headers: dict[str, str], payload: dict) -> TransportResponse:
+        """Send one attempt, without retries or status mapping."""
+        with abort_scope(self.run_control) as scope:
+            return self._transport().send(
+                url,
+                scope=scope,
+                headers=headers,
+                json=payload,
+                timeout=self._request_timeout(),
+            )
+
+    def _send_json(self, url: str, headers: dict[str, str], payload: dict) -> dict:
+        """POST one non-stream request and return its decoded JSON body."""
+        # Retry only transient transport errors. Deterministic HTTP responses are handled directly.
+        for attempt in range(self.config.max_retries + 1):
+            try:
+                response = self._send_once(url, headers, payload)
+            except TransportError as exc:
+                if (
+                    attempt == self.config.max_retries
+                    or call_control.stop_requested(self.run_control)
+                ):
+                    raise ProviderError(f"Provider request failed: {exc}") from exc
+                continue
+
+            self._raise_for_mapped_status(response)
+
+            try:
+                return response.json()
+            except ValueError as exc:
+                raise ProviderError("Provider returned invalid JSON.") from exc
+
+        # Defensive fallback: the loop above always returns or raises.
+        raise ProviderError("Provider request failed unexpectedly.")
+
+    def _stream_events(
+        self,
+        url: str,
+        headers: dict[str, str],
+        payload: dict,
+        on_event: Callable[[object], str | None],
+        framing: Literal["sse", "ndjson", "text"] = "sse",
+    ) -> Iterator[str]:
+        """
+        POST a streaming request and yield the text deltas of its events.
+
+        `framing` selects how events are delimited: SSE `data:` lines ending
+        with `[DONE]`, newline-delimited JSON objects until end of body, or
+        `text`, where every chunk of the raw body is an event of its own.
+        `on_event` receives each decoded event (the text itself for `text`)
+        and returns its text delta (or None for bookkeeping events). Retries are attempted only while no
+        chunk has been emitted; once chunks are emitted, retrying would
+        duplicate visible output.
+        """
+        for attempt in range(self.config.max_retries + 1):
+            emitted_any_chunk = False
+            try:
+                with abort_scope(
+                    self.run_control,
+                    first_chunk_timeout_seconds=self.config.first_chunk_timeout_seconds,
+                    idle_timeout_seconds=self.config.stream_idle_timeout_seconds,
+                ) as scope:
+                    response = self._transport().stream(
+                        url,
+                        scope=scope,
+                        headers=headers,
+                        json=payload,
+                        timeout=self._request_timeout(),
+                    )
+                    try:
+                        self._raise_for_mapped_status(response)
+                    except ProviderError:
+                        # Release the connection (and any stream slot) unread.
+                        response.close()
+                        raise
+
+                    if framing == "text":
+                        for text in call_control.iter_stream_text(scope, response):
+                            delta_text = on_event(text)
+                            if not delta_text:
+                                continue
+                            call_control.mark_chunk(scope)
+                            emitted_any_chunk = True
+                            yield delta_text
+                        return
+
+                    for line in call_control.iter_stream_lines(scope, response):
+                        if line is None:
+                            continue
+                        normalized_line = line.strip()
+                        if not normalized_line:
+                            continue
+                        if framing == "ndjson":
+                            data_value = normalized_line
+                        elif not normalized_line.startswith("data:"):
+                            continue
+                        else:
+                            data_value = normalized_line[len("data:") :].strip()
+                            if data_value == "[DONE]":
+                                return
+
+                        try:
+                            event = json.loads(data_value)
+                        except json.JSONDecodeError as exc:
+                            raise ProviderError(
+                                "Provider returned invalid streaming event JSON."
+                            ) from exc
+
+                        delta_text = on_event(event)
+                        if delta_text is None:
+                            continue
+
+                        call_control.mark_chunk(scope)
+                        emitted_any_chunk = True
+                        yield delta_text
+                    return
+            except (TransportError, StreamStallError) as exc:
+                # A stall before the first chunk retries like any transport
+                # failure; after output was emitted it cannot be replayed.
+                if (
+                    emitted_any_chunk
+                    or attempt == self.config.max_retries
+                    or call_control.stop_requested(self.run_control)
+                ):
+                    raise ProviderError(f"Provider request failed: {exc}") from exc
+                continue
+
+        # Defensive fallback: loop always returns or raises.
+        raise ProviderError("Provider request failed unexpectedly.")
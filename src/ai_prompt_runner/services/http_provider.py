@@ -1,19 +1,23 @@
 """HTTP provider implementation using requests."""
 
-from dataclasses import dataclass
+from collections.abc import Iterator
+from dataclasses import dataclass, field
 
 import requests
 
-from ai_prompt_runner.core.models import GenerationConfig
-from ai_prompt_runner.services.base import BaseProvider
+from ai_prompt_runner.core.models import GenerationConfig, ResponseSample
+from ai_prompt_runner.services import call_control
+from ai_prompt_runner.services.http_base import TransportProvider
+from ai_prompt_runner.services.transport import Transport
+
+from ai_prompt_runner.core.errors import ProviderError
+
+# Wire formats a streaming gateway may answer `"stream": true` with:
+# - ndjson: one JSON object per line, text delta in `response`
+# - sse: `data:` events with the same objects, optionally ending in `[DONE]`
+# - text: raw (chunked) response text, forwarded as it arrives
+HTTP_STREAM_MODES = ("ndjson", "sse", "text")
 
-from ai_prompt_runner.core.errors import (
-    AuthenticationError,
-    AuthorizationError,
-    ProviderError,
-    RateLimitError,
-    UpstreamServerError,
-)
 
 @dataclass
 class HTTPProviderConfig:
@@ -24,14 +28,28 @@ class HTTPProviderConfig:
     timeout_seconds: int = 30
     model: str = "default"
     max_retries: int = 0
-
-
-class HTTPProvider(BaseProvider):
+    # Bounds connection setup separately; defaults to timeout_seconds.
+    connect_timeout_seconds: float | None = None
+    # Streaming wire format (see HTTP_STREAM_MODES); None disables streaming.
+    stream_mode: str | None = None
+    # Stream stall limits: time to the first event and between events.
+    first_chunk_timeout_seconds: float | None = None
+    stream_idle_timeout_seconds: float | None = None
+    # Optional pooled session; one-off connections are used when unset.
+    session: requests.Session | None = field(default=None, repr=False, compare=False)
+    # HTTP engine override; the default is `requests` over `session`.
+    transport: Transport | None = field(default=None, repr=False, compare=False)
+
+
+class HTTPProvider(TransportProvider):
     """Simple JSON-over-HTTP provider.
 
     Expected API contract:
     Request JSON: {"model": "...", "prompt": "..."}
     Response JSON: {"response": "..."}
+
+    With `stream_mode` set, streaming requests add `"stream": true` and read
+    the body in that format (see `HTTP_STREAM_MODES`).
     """
     provider_protocol = "http-json"
 
@@ -52,63 +70,93 @@ class HTTPProvider(BaseProvider):
         if system_prompt is None:
             return prompt
         return f"SYSTEM:\n{system_prompt}\n\nUSER:\n{prompt}"
-        
-    def _raise_for_mapped_status(self, response: requests.Response) -> None:
-        """Raise domain-specific exceptions for known HTTP error statuses."""
-        status_code = response.status_code
-
-        if status_code == 401:
-            raise AuthenticationError("Provider authentication failed (HTTP 401).")
-        if status_code == 403:
-            raise AuthorizationError("Provider authorization failed (HTTP 403).")
-        if status_code == 429:
-            raise RateLimitError("Provider rate limit exceeded (HTTP 429).")
-        if 500 <= status_code <= 599:
-            raise UpstreamServerError(f"Provider server error (HTTP {status_code}).")
-        if status_code >= 400:
-            raise ProviderError(f"Provider returned HTTP {status_code}.")
-        
 
-    def generate(
-        self,
-        prompt: str,
-        system_prompt: str | None = None,
-        generation_config: GenerationConfig | None = None,
-    ) -> str:
-        """Send the prompt to the provider and return the response string."""
-        headers = {
+    def _request_headers(self) -> dict[str, str]:
+        return {
             "Authorization": f"Bearer {self.config.api_key}",
             "Content-Type": "application/json",
         }
-        payload = {
+
+    def _request_payload(self, prompt: str, system_prompt: str | None) -> dict:
+        return {
             "model": self.config.model,
             "prompt": self._effective_prompt(prompt, system_prompt),
         }
 
-        # Implement simple retry logic for transient network errors.
-        for attempt in range(self.config.max_retries + 1):
-            try:
-                response = requests.post(
-                    self.config.endpoint,
-                    headers=headers,
-                    json=payload,
-                    timeout=self.config.timeout_seconds,
-                )
-            except requests.RequestException as exc:
-                if attempt == self.config.max_retries:
-                    raise ProviderError(f"Provider request failed: {exc}") from exc
-                continue
-
-            # Check for HTTP errors and raise appropriate exceptions.
-            self._raise_for_mapped_status(response)
-
-            try:
-                body = response.json()
-                break
-            except ValueError as exc:
-                raise ProviderError("Provider returned invalid JSON.") from exc
+    def _extract_stream_delta(self, event: object) -> str | None:
+        """Extract the `response` delta of one NDJSON/SSE stream object."""
+        if not isinstance(event, dict):
+            raise ProviderError("Provider streaming event must be an object.")
+
+        error = event.get("error")
+        if error is not None:
+            if isinstance(error, str) and error.strip():
+                raise ProviderError(f"Provider stream error: {error}")
+            raise ProviderError("Provider stream returned an error event.")
 
+        delta = event.get("response")
+        if delta is None:
+            return None
+        if not isinstance(delta, str):
+            raise ProviderError("Provider streaming event field 'response' must be a string.")
+        return delta
+
+    def generate(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> str:
+        """Send the prompt to the provider and return the response string."""
+        headers = self._request_headers()
+        payload = self._request_payload(prompt, system_prompt)
+
+        body = self._send_json(self.config.endpoint, headers, payload)
         result = body.get("response")
         if not isinstance(result, str):
             raise ProviderError("Provider response must contain a string field 'response'.")
         return result
+
+    def generate_samples(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> list[ResponseSample]:
+        """Sample `generation_config.n` responses through concurrent `generate` calls."""
+        count = generation_config.n if generation_config is not None and generation_config.n else 1
+        texts = call_control.fan_out(
+            count,
+            lambda: self.generate(prompt, system_prompt, generation_config),
+        )
+        return [ResponseSample(text=text) for text in texts]
+
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> Iterator[str]:
+        """
+        Stream response text in the configured `stream_mode`.
+
+        Without a stream mode this raises `NotImplementedError` so the runner
+        falls back to `generate`. Retries are attempted only while no chunk
+        has been emitted.
+        """
+        stream_mode = self.config.stream_mode
+        if stream_mode is None:
+            raise NotImplementedError("Streaming is not supported without an HTTP stream mode.")
+        if stream_mode not in HTTP_STREAM_MODES:
+            raise ProviderError(f"Unsupported HTTP stream mode '{stream_mode}'.")
+
+        payload = self._request_payload(prompt, system_prompt)
+        payload["stream"] = True
+        on_event = (lambda text: text) if stream_mode == "text" else self._extract_stream_delta
+        return self._stream_events(
+            self.config.endpoint,
+            self._request_headers(),
+            payload,
+            on_event,
+            framing=stream_mode,
+        )
@@ -1,18 +1,211 @@
 """Mock provider implementation for contract validation and local tests."""
 
-from collections.abc import Iterator
+import math
+import random
+import threading
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass, fields, replace
 
-from ai_prompt_runner.core.errors import ProviderError
-from ai_prompt_runner.core.models import GenerationConfig
+from ai_prompt_runner.core.errors import ProviderError, RateLimitError, UpstreamServerError
+from ai_prompt_runner.core.models import GenerationConfig, UsageMetadata
 from ai_prompt_runner.services.base import BaseProvider
 
+DISTRIBUTION_KINDS = ("fixed", "uniform", "normal", "lognormal")
+
+# Characters per simulated token, used to size chunks and responses.
+MOCK_CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """
+    A non-negative random quantity of a mock profile.
+
+    `a` and `b` depend on `kind`: `fixed` always returns `a`; `uniform`
+    draws from [a, b]; `normal` has mean `a` and standard deviation `b`;
+    `lognormal` has median `a` and shape `b` (the sigma of the underlying
+    normal), which gives the long right tail of real first-chunk latencies.
+    """
+
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    def __post_init__(self) -> None:
+        if self.kind not in DISTRIBUTION_KINDS:
+            raise ValueError(f"Unknown distribution '{self.kind}'. Supported: {', '.join(DISTRIBUTION_KINDS)}.")
+        if self.a < 0 or self.b < 0:
+            raise ValueError("Distribution parameters must be greater than or equal to 0.")
+        if self.kind == "uniform" and self.b < self.a:
+            raise ValueError("uniform distributions need low <= high.")
+
+    @classmethod
+    def parse(cls, value: object) -> "Distribution":
+        """Parse `12.5`, `"fixed:12.5"`, `"uniform:1,4"`, `"normal:200,60"` or `"lognormal:300,0.4"`."""
+        if isinstance(value, bool):
+            raise ValueError(f"Invalid distribution {value!r}.")
+        if isinstance(value, (int, float)):
+            return cls("fixed", float(value))
+        if not isinstance(value, str):
+            raise ValueError(f"Invalid distribution {value!r}.")
+        kind, _, params = value.strip().partition(":")
+        if not params:
+            kind, params = "fixed", kind
+        try:
+            numbers = [float(part) for part in params.split(",")]
+        except ValueError:
+            raise ValueError(f"Invalid distribution '{value}'.") from None
+        expected = 1 if kind == "fixed" else 2
+        if len(numbers) != expected:
+            raise ValueError(f"Distribution '{kind}' takes {expected} parameter(s), got '{value}'.")
+        return cls(kind, *numbers)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.a
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "normal":
+            return max(rng.gauss(self.a, self.b), 0.0)
+        if self.a == 0:
+            return 0.0
+        return rng.lognormvariate(math.log(self.a), self.b)
+
+
+@dataclass(frozen=True)
+class MockProfile:
+    """
+    Latency, throughput and failure behaviour of a `MockProvider`.
+
+    `first_chunk_ms` is drawn once per call; `tokens_per_second` then paces
+    the output (None emits it without delay). Each stream chunk carries
+    `chunk_tokens` tokens of about `MOCK_CHARS_PER_TOKEN` characters.
+    `response_tokens` sets the response length by repeating the echo text
+    (None keeps the echo as is). Failures are drawn before the first chunk
+    and raised as the error classes of real providers.
+    """
+
+    first_chunk_ms: Distribution = Distribution()
+    tokens_per_second: float | None = None
+    chunk_tokens: Distribution = Distribution("fixed", 1)
+    response_tokens: Distribution | None = None
+    usage: bool = True
+    rate_limit_probability: float = 0.0
+    server_error_probability: float = 0.0
+
+    def __post_init__(self) -> None:
+        if self.tokens_per_second is not None and self.tokens_per_second <= 0:
+            raise ValueError("tokens_per_second must be greater than 0.")
+        for name in ("rate_limit_probability", "server_error_probability"):
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be between 0 and 1.")
+        if self.rate_limit_probability + self.server_error_probability > 1:
+            raise ValueError("Failure probabilities must add up to at most 1.")
+
+    @classmethod
+    def from_dict(cls, values: Mapping[str, object]) -> "MockProfile":
+        """
+        Build a profile from config values (a TOML table).
+
+        An optional `base` names a built-in profile to start from; the other
+        keys are the profile fields, with distributions written as strings
+        understood by `Distribution.parse`.
+        """
+        values = dict(values)
+        base = values.pop("base", None)
+        profile = resolve_mock_profile(str(base)) if base is not None else cls()
+        known = {field.name for field in fields(cls)}
+        unknown = sorted(set(values) - known)
+        if unknown:
+            raise ValueError(f"Unknown mock profile keys: {unknown}.")
+        changes: dict[str, object] = {}
+        for name, value in values.items():
+            if name in ("first_chunk_ms", "chunk_tokens", "response_tokens"):
+                changes[name] = Distribution.parse(value)
+            elif name == "usage":
+                if not isinstance(value, bool):
+                    raise ValueError("Mock profile key 'usage' must be a boolean.")
+                changes[name] = value
+            else:
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise ValueError(f"Mock profile key '{name}' must be a number.")
+                changes[name] = float(value)
+        return replace(profile, **changes)
+
+
+# Built-in profiles. `instant` keeps the historical behaviour (no delay, one
+# character per chunk); the others approximate hosted chat models.
+MOCK_PROFILES: dict[str, MockProfile] = {
+    "instant": MockProfile(chunk_tokens=Distribution("fixed", 0.25), usage=False),
+    "fast": MockProfile(
+        first_chunk_ms=Distribution("lognormal", 250, 0.35),
+        tokens_per_second=120,
+        chunk_tokens=Distribution("uniform", 1, 4),
+        response_tokens=Distribution("normal", 200, 60),
+    ),
+    "slow": MockProfile(
+        first_chunk_ms=Distribution("lognormal", 900, 0.5),
+        tokens_per_second=30,
+        chunk_tokens=Distribution("uniform", 1, 3),
+        response_tokens=Distribution("normal", 400, 120),
+    ),
+    "flaky": MockProfile(
+        first_chunk_ms=Distribution("lognormal", 400, 0.6),
+        tokens_per_second=60,
+        chunk_tokens=Distribution("uniform", 1, 4),
+        response_tokens=Distribution("normal", 200, 60),
+        rate_limit_probability=0.05,
+        server_error_probability=0.02,
+    ),
+}
+
+
+def resolve_mock_profile(value: str | Mapping[str, object] | MockProfile) -> MockProfile:
+    """Return a profile from a built-in name, a config table or a ready profile; raise ValueError otherwise."""
+    if isinstance(value, MockProfile):
+        return value
+    if isinstance(value, Mapping):
+        return MockProfile.from_dict(value)
+    profile = MOCK_PROFILES.get(value) if isinstance(value, str) else None
+    if profile is None:
+        raise ValueError(f"Unknown mock profile {value!r}. Supported: {', '.join(MOCK_PROFILES)}.")
+    return profile
+
+
+@dataclass(frozen=True)
+class _Plan:
+    """Everything random about one call, drawn up front under the RNG lock."""
+
+    failure: str | None
+    first_chunk_seconds: float
+    text: str
+    chunk_sizes: tuple[int, ...]
+
 
 class MockProvider(BaseProvider):
-    """Deterministic provider implementation without network access."""
+    """
+    Deterministic provider implementation without network access.
+
+    Without a profile, responses are returned at once and streamed one
+    character at a time. With a `MockProfile` the provider simulates
+    first-chunk latency, output throughput, chunking, response length and
+    transient failures; `seed` makes every draw reproducible for a given
+    call order. Waits honour the run's deadline and cancellation.
+    """
+
     provider_protocol = "mock"
 
-    def __init__(self, failure_message: str | None = None) -> None:
+    def __init__(
+        self,
+        failure_message: str | None = None,
+        profile: MockProfile | None = None,
+        seed: int | None = None,
+    ) -> None:
         self.failure_message = failure_message
+        self.profile = profile
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._last_usage: UsageMetadata | None = None
 
     def _effective_prompt(self, prompt: str, system_prompt: str | None) -> str:
         """Compose a deterministic effective prompt for mock-only assertions."""
@@ -20,6 +213,67 @@ class MockProvider(BaseProvider):
             return prompt
         return f"SYSTEM:\n{system_prompt}\n\nUSER:\n{prompt}"
 
+    def _plan(self, effective_prompt: str) -> _Plan:
+        profile = self.profile
+        text = f"Echo: {effective_prompt}"
+        with self._rng_lock:
+            draw = self._rng.random()
+            if draw < profile.rate_limit_probability:
+                failure = "rate_limit"
+            elif draw < profile.rate_limit_probability + profile.server_error_probability:
+                failure = "server_error"
+            else:
+                failure = None
+            first_chunk_seconds = profile.first_chunk_ms.sample(self._rng) / 1000
+            if profile.response_tokens is not None:
+                length = max(round(profile.response_tokens.sample(self._rng)), 1) * MOCK_CHARS_PER_TOKEN
+                text = " ".join([text] * (length // len(text) + 1))[:length]
+            chunk_sizes = []
+            remaining = len(text)
+            while remaining > 0:
+                size = max(round(profile.chunk_tokens.sample(self._rng) * MOCK_CHARS_PER_TOKEN), 1)
+                chunk_sizes.append(min(size, remaining))
+                remaining -= size
+        return _Plan(failure, first_chunk_seconds, text, tuple(chunk_sizes))
+
+    def _wait(self, seconds: float) -> None:
+        """Sleep for `seconds`, stopping early when the run is cancelled or times out."""
+        if seconds <= 0:
+            return
+        control = self.run_control
+        if control is None:
+            threading.Event().wait(seconds)
+            return
+        woken = threading.Event()
+        with control.abort_on_stop(woken.set):
+            woken.wait(seconds)
+        control.check()
+
+    def _begin(self, plan: _Plan, prompt_text: str) -> None:
+        """Apply the first-chunk delay and raise the drawn failure, if any."""
+        self._last_usage = None
+        self._wait(plan.first_chunk_seconds)
+        if plan.failure == "rate_limit":
+            raise RateLimitError("Mock provider rate limit exceeded (HTTP 429).")
+        if plan.failure == "server_error":
+            raise UpstreamServerError("Mock provider server error (HTTP 503).")
+        if self.profile.usage:
+            prompt_tokens = math.ceil(len(prompt_text) / MOCK_CHARS_PER_TOKEN)
+            completion_tokens = math.ceil(len(plan.text) / MOCK_CHARS_PER_TOKEN)
+            self._last_usage = UsageMetadata(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            )
+
+    def _chunk_seconds(self, chars: int) -> float:
+        if self.profile.tokens_per_second is None:
+            return 0.0
+        return chars / MOCK_CHARS_PER_TOKEN / self.profile.tokens_per_second
+
+    def get_last_usage(self) -> UsageMetadata | None:
+        return self._last_usage
+
     def generate(
         self,
         prompt: str,
@@ -29,7 +283,13 @@ class MockProvider(BaseProvider):
         """Return deterministic text or raise a provider-domain error."""
         if self.failure_message is not None:
             raise ProviderError(self.failure_message)
-        return f"Echo: {self._effective_prompt(prompt, system_prompt)}"
+        effective_prompt = self._effective_prompt(prompt, system_prompt)
+        if self.profile is None:
+            return f"Echo: {effective_prompt}"
+        plan = self._plan(effective_prompt)
+        self._begin(plan, effective_prompt)
+        self._wait(self._chunk_seconds(len(plan.text)))
+        return plan.text
 
     def generate_stream(
         self,
@@ -40,10 +300,23 @@ class MockProvider(BaseProvider):
         """
         Yield deterministic chunks for stream-path tests without network I/O.
 
-        The stream shape is intentionally simple and stable: one character
-        at a time, which makes reconstruction assertions deterministic.
+        Without a profile the stream shape is intentionally simple and
+        stable: one character at a time, which makes reconstruction
+        assertions deterministic. With a profile, each chunk follows the
+        time its tokens take at the profile's throughput.
         """
         if self.failure_message is not None:
             raise ProviderError(self.failure_message)
-        for char in f"Echo: {self._effective_prompt(prompt, system_prompt)}":
-            yield char
+        effective_prompt = self._effective_prompt(prompt, system_prompt)
+        if self.profile is None:
+            for char in f"Echo: {effective_prompt}":
+                yield char
+            return
+        plan = self._plan(effective_prompt)
+        self._begin(plan, effective_prompt)
+        start = 0
+        for index, size in enumerate(plan.chunk_sizes):
+            if index:
+                self._wait(self._chunk_seconds(size))
+            yield plan.text[start : start + size]
+            start += size
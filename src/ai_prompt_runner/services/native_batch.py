@@ -0,0 +1,837 @@
+"""Provider-native asynchronous batch APIs: submit, poll and collect."""
+
+import json
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from hashlib import sha256
+from pathlib import Path
+from time import perf_counter
+from typing import Literal
+from urllib.parse import urlsplit
+
+from ai_prompt_runner.core.batch import (
+    BatchItem,
+    BatchItemResult,
+    BatchRequestDefaults,
+    BatchSummary,
+    execute_batch_item,
+)
+from ai_prompt_runner.core.errors import (
+    AuthenticationError,
+    AuthorizationError,
+    InputValidationError,
+    PromptRunnerError,
+    ProviderError,
+    RateLimitError,
+    UpstreamServerError,
+)
+from ai_prompt_runner.core.models import GenerationConfig, ResponseSample, UsageMetadata
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.services.base import BaseProvider
+from ai_prompt_runner.services.provider_factory import ConfigurationError
+from ai_prompt_runner.services.transport import TransportError, TransportResponse, iter_byte_lines
+
+# Provider-neutral batch lifecycle. Everything except `in_progress` is final.
+NativeBatchState = Literal["in_progress", "completed", "failed", "expired", "cancelled"]
+
+_CUSTOM_ID_PREFIX = "item-"
+
+
+def custom_id_for(index: int) -> str:
+    """Return the per-request id sent to the provider for input position `index`."""
+    return f"{_CUSTOM_ID_PREFIX}{index}"
+
+
+def index_for_custom_id(custom_id: object) -> int | None:
+    """Return the input position encoded in a custom id, or None if it is foreign."""
+    if not isinstance(custom_id, str) or not custom_id.startswith(_CUSTOM_ID_PREFIX):
+        return None
+    value = custom_id[len(_CUSTOM_ID_PREFIX) :]
+    return int(value) if value.isdigit() else None
+
+
+def file_sha256(path: str | Path) -> str:
+    """Digest of an input file, used to detect edits between submit and collect."""
+    digest = sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return f"sha256:{digest.hexdigest()}"
+
+
+def error_for_status(status_code: object, message: str | None = None) -> ProviderError:
+    """Map the HTTP status of one batched request to the provider exception types."""
+    detail = f" {message}" if message else ""
+    if status_code == 401:
+        return AuthenticationError(f"Provider authentication failed (HTTP 401).{detail}")
+    if status_code == 403:
+        return AuthorizationError(f"Provider authorization failed (HTTP 403).{detail}")
+    if status_code == 429:
+        return RateLimitError(f"Provider rate limit exceeded (HTTP 429).{detail}")
+    if isinstance(status_code, int) and 500 <= status_code <= 599:
+        return UpstreamServerError(f"Provider server error (HTTP {status_code}).{detail}")
+    if isinstance(status_code, int):
+        return ProviderError(f"Provider returned HTTP {status_code}.{detail}")
+    return ProviderError(f"Provider batch request failed.{detail}")
+
+
+def _error_message(body: object) -> str | None:
+    """Extract `error.message` from a provider error body when present."""
+    if not isinstance(body, dict):
+        return None
+    error = body.get("error")
+    if isinstance(error, dict):
+        nested = error.get("error")
+        if isinstance(nested, dict):
+            error = nested
+        message = error.get("message")
+        if isinstance(message, str) and message.strip():
+            return message
+    return None
+
+
+def encode_multipart(fields: dict[str, str], files: dict[str, tuple[str, bytes, str]]) -> tuple[bytes, str]:
+    """
+    Encode a `multipart/form-data` body; return (body, Content-Type).
+
+    The boundary is derived from the content, so the same upload always
+    produces the same bytes (and the same record/replay cassette key).
+    """
+    digest = sha256()
+    for value in [*fields.values(), *(content for _, content, _ in files.values())]:
+        digest.update(value if isinstance(value, bytes) else value.encode("utf-8"))
+    boundary = f"ai-prompt-runner-{digest.hexdigest()[:32]}"
+    parts: list[bytes] = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        )
+    for name, (filename, content, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode("utf-8")
+            + content
+            + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def _int_counts(counts: object) -> dict[str, int]:
+    """Keep integer counters (Gemini encodes int64 values as strings)."""
+    if not isinstance(counts, dict):
+        return {}
+    normalized: dict[str, int] = {}
+    for key, value in counts.items():
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, int):
+            normalized[key] = value
+        elif isinstance(value, str) and value.isdigit():
+            normalized[key] = int(value)
+    return normalized
+
+
+@dataclass(frozen=True)
+class NativeBatchStatus:
+    """Provider batch status normalized to `NativeBatchState`."""
+
+    batch_id: str
+    state: NativeBatchState
+    provider_status: str
+    request_counts: dict[str, int] = field(default_factory=dict)
+    # Full provider status body; adapters read result locations from it.
+    raw: dict = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def done(self) -> bool:
+        return self.state != "in_progress"
+
+    def to_dict(self) -> dict:
+        return {
+            "batch_id": self.batch_id,
+            "state": self.state,
+            "provider_status": self.provider_status,
+            "request_counts": self.request_counts,
+        }
+
+
+@dataclass(frozen=True)
+class NativeBatchResult:
+    """Outcome of one request inside a provider batch: a response body or an error."""
+
+    custom_id: str | None
+    body: dict | None = None
+    error: PromptRunnerError | None = None
+
+
+@dataclass(frozen=True)
+class NativeBatchJob:
+    """
+    Local record of a submitted batch, written by `batch-submit`.
+
+    Collection rebuilds every request from the same input file and defaults,
+    so output lines carry the same prompts and provenance a synchronous run
+    would report.
+    """
+
+    provider: str
+    batch_id: str
+    api_endpoint: str
+    api_model: str
+    input_jsonl: str
+    input_sha256: str
+    defaults: BatchRequestDefaults
+    submitted: int
+    submitted_at_utc: str
+
+    def to_dict(self) -> dict:
+        payload = asdict(self)
+        stop = self.defaults.stop
+        payload["defaults"]["stop"] = list(stop) if stop is not None else None
+        return payload
+
+    @classmethod
+    def from_dict(cls, payload: object) -> "NativeBatchJob":
+        if not isinstance(payload, dict) or not isinstance(payload.get("defaults"), dict):
+            raise InputValidationError("Batch job file must contain a JSON object with 'defaults'.")
+        try:
+            defaults = dict(payload["defaults"])
+            if defaults.get("stop") is not None:
+                defaults["stop"] = tuple(defaults["stop"])
+            return cls(**{**payload, "defaults": BatchRequestDefaults(**defaults)})
+        except TypeError as exc:
+            raise InputValidationError(f"Batch job file is invalid: {exc}") from exc
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path) -> "NativeBatchJob":
+        try:
+            payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        except OSError as exc:
+            raise InputValidationError(f"Batch job file could not be read: {exc}") from exc
+        except ValueError as exc:
+            raise InputValidationError(f"Batch job file is not valid JSON: {exc}") from exc
+        return cls.from_dict(payload)
+
+
+class NativeBatchAdapter(ABC):
+    """
+    Translate runner requests to one provider's batch API and back.
+
+    Request bodies come from the provider's own `_request_payload`, so a
+    batched request is exactly what a synchronous call would have sent.
+    """
+
+    def __init__(self, provider: BaseProvider) -> None:
+        self.provider = provider
+        self.config = provider.config
+
+    def _headers(self, content_type: str | None = None) -> dict[str, str]:
+        headers = {key: value for key, value in self.provider._request_headers().items() if key != "Content-Type"}
+        if content_type is not None:
+            headers["Content-Type"] = content_type
+        return headers
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None = None,
+        content_type: str | None = None,
+        stream: bool = False,
+    ) -> TransportResponse:
+        """
+        Send one batch management request through the provider's transport.
+
+        `--transport`, Unix socket endpoints and record/replay apply exactly
+        as for synchronous calls. Failures map to provider errors.
+        """
+        try:
+            response = self.provider._transport().request(
+                method,
+                url,
+                headers=self._headers(content_type),
+                body=body,
+                timeout=self.provider._request_timeout(),
+                stream=stream,
+            )
+        except TransportError as exc:
+            raise ProviderError(f"Provider batch request failed: {exc}") from exc
+        if response.status_code >= 400:
+            try:
+                message = _error_message(response.json())
+            except ValueError:
+                message = None
+            finally:
+                response.close()
+            raise error_for_status(response.status_code, message)
+        return response
+
+    def _send_json(
+        self, method: str, url: str, payload: dict | None = None, upload: tuple[bytes, str] | None = None
+    ) -> dict:
+        """Send a JSON payload (or a pre-encoded `(body, content_type)` upload) and return the JSON object reply."""
+        if upload is not None:
+            body, content_type = upload
+        elif payload is not None:
+            body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json"
+        else:
+            body, content_type = None, None
+        response = self._send(method, url, body, content_type)
+        try:
+            body = response.json()
+        except ValueError as exc:
+            raise ProviderError("Provider returned invalid JSON.") from exc
+        finally:
+            response.close()
+        if not isinstance(body, dict):
+            raise ProviderError("Provider batch response must be a JSON object.")
+        return body
+
+    def _iter_jsonl(self, url: str) -> Iterator[dict]:
+        """Stream a JSONL result file record by record without holding it in memory."""
+        response = self._send("GET", url, stream=True)
+        try:
+            for line_number, line in enumerate(iter_byte_lines(response.iter_bytes()), start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    raise ProviderError(f"Provider returned invalid batch result JSONL (line {line_number}).") from exc
+                if not isinstance(record, dict):
+                    raise ProviderError(f"Provider batch result line {line_number} must be a JSON object.")
+                yield record
+        except TransportError as exc:
+            raise ProviderError(f"Provider batch request failed: {exc}") from exc
+        finally:
+            response.close()
+
+    @abstractmethod
+    def submit(self, items: list[BatchItem]) -> str:
+        """Upload valid batch items and return the provider batch id."""
+
+    @abstractmethod
+    def status(self, batch_id: str) -> NativeBatchStatus:
+        """Fetch the current batch status."""
+
+    @abstractmethod
+    def iter_results(
+        self,
+        status: NativeBatchStatus,
+        custom_ids: list[str],
+    ) -> Iterator[NativeBatchResult]:
+        """
+        Yield per-request outcomes of a finished batch.
+
+        `custom_ids` lists submitted requests in submission order, for APIs
+        that return results by position.
+        """
+
+
+class OpenAIBatchAdapter(NativeBatchAdapter):
+    """OpenAI Batch API: JSONL file upload, `/batches`, output and error files."""
+
+    _STATES: dict[str, NativeBatchState] = {
+        "validating": "in_progress",
+        "in_progress": "in_progress",
+        "finalizing": "in_progress",
+        "cancelling": "in_progress",
+        "completed": "completed",
+        "failed": "failed",
+        "expired": "expired",
+        "cancelled": "cancelled",
+    }
+
+    def _chat_url(self) -> str:
+        return self.provider._normalized_endpoint()
+
+    def _base_url(self) -> str:
+        return self._chat_url()[: -len("/chat/completions")]
+
+    def submit(self, items: list[BatchItem]) -> str:
+        route = urlsplit(self._chat_url()).path
+        lines = []
+        for item in items:
+            request = item.request
+            body = self.provider._request_payload(
+                request.prompt_text,
+                request.system_prompt,
+                request.generation_config(),
+            )
+            lines.append(
+                json.dumps(
+                    {
+                        "custom_id": custom_id_for(item.index),
+                        "method": "POST",
+                        "url": route,
+                        "body": body,
+                    },
+                    ensure_ascii=False,
+                )
+            )
+        upload = self._send_json(
+            "POST",
+            f"{self._base_url()}/files",
+            upload=encode_multipart(
+                {"purpose": "batch"},
+                {"file": ("batch.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl")},
+            ),
+        )
+        file_id = upload.get("id")
+        if not isinstance(file_id, str):
+            raise ProviderError("Provider file upload response must contain string 'id'.")
+
+        batch = self._send_json(
+            "POST",
+            f"{self._base_url()}/batches",
+            {"input_file_id": file_id, "endpoint": route, "completion_window": "24h"},
+        )
+        batch_id = batch.get("id")
+        if not isinstance(batch_id, str):
+            raise ProviderError("Provider batch response must contain string 'id'.")
+        return batch_id
+
+    def status(self, batch_id: str) -> NativeBatchStatus:
+        body = self._send_json("GET", f"{self._base_url()}/batches/{batch_id}")
+        provider_status = body.get("status")
+        if provider_status not in self._STATES:
+            raise ProviderError(f"Provider returned unknown batch status {provider_status!r}.")
+        return NativeBatchStatus(
+            batch_id=batch_id,
+            state=self._STATES[provider_status],
+            provider_status=provider_status,
+            request_counts=_int_counts(body.get("request_counts")),
+            raw=body,
+        )
+
+    def iter_results(
+        self,
+        status: NativeBatchStatus,
+        custom_ids: list[str],
+    ) -> Iterator[NativeBatchResult]:
+        for key in ("output_file_id", "error_file_id"):
+            file_id = status.raw.get(key)
+            if not isinstance(file_id, str):
+                continue
+            for record in self._iter_jsonl(f"{self._base_url()}/files/{file_id}/content"):
+                yield self._result(record)
+
+    @staticmethod
+    def _result(record: dict) -> NativeBatchResult:
+        custom_id = record.get("custom_id")
+        response = record.get("response")
+        if isinstance(response, dict):
+            status_code = response.get("status_code")
+            body = response.get("body")
+            if status_code == 200 and isinstance(body, dict):
+                return NativeBatchResult(custom_id=custom_id, body=body)
+            return NativeBatchResult(
+                custom_id=custom_id,
+                error=error_for_status(status_code, _error_message(body)),
+            )
+        return NativeBatchResult(
+            custom_id=custom_id,
+            error=error_for_status(None, _error_message(record)),
+        )
+
+
+class AnthropicBatchAdapter(NativeBatchAdapter):
+    """Anthropic Message Batches API: `/messages/batches` and its results stream."""
+
+    # Anthropic error types mapped to the HTTP statuses the same error carries
+    # on a synchronous call.
+    _ERROR_STATUS = {
+        "invalid_request_error": 400,
+        "authentication_error": 401,
+        "permission_error": 403,
+        "not_found_error": 404,
+        "request_too_large": 413,
+        "rate_limit_error": 429,
+        "api_error": 500,
+        "overloaded_error": 529,
+    }
+
+    def _batches_url(self) -> str:
+        return f"{self.config.endpoint.rstrip('/')}/batches"
+
+    def submit(self, items: list[BatchItem]) -> str:
+        requests_payload = [
+            {
+                "custom_id": custom_id_for(item.index),
+                "params": self.provider._request_payload(
+                    item.request.prompt_text,
+                    item.request.system_prompt,
+                    item.request.generation_config(),
+                ),
+            }
+            for item in items
+        ]
+        body = self._send_json("POST", self._batches_url(), {"requests": requests_payload})
+        batch_id = body.get("id")
+        if not isinstance(batch_id, str):
+            raise ProviderError("Provider batch response must contain string 'id'.")
+        return batch_id
+
+    def status(self, batch_id: str) -> NativeBatchStatus:
+        body = self._send_json("GET", f"{self._batches_url()}/{batch_id}")
+        provider_status = body.get("processing_status")
+        if provider_status not in ("in_progress", "canceling", "ended"):
+            raise ProviderError(f"Provider returned unknown batch status {provider_status!r}.")
+        return NativeBatchStatus(
+            batch_id=batch_id,
+            state="completed" if provider_status == "ended" else "in_progress",
+            provider_status=provider_status,
+            request_counts=_int_counts(body.get("request_counts")),
+            raw=body,
+        )
+
+    def iter_results(
+        self,
+        status: NativeBatchStatus,
+        custom_ids: list[str],
+    ) -> Iterator[NativeBatchResult]:
+        results_url = status.raw.get("results_url")
+        if not isinstance(results_url, str):
+            return
+        for record in self._iter_jsonl(results_url):
+            yield self._result(record)
+
+    def _result(self, record: dict) -> NativeBatchResult:
+        custom_id = record.get("custom_id")
+        result = record.get("result")
+        if not isinstance(result, dict):
+            return NativeBatchResult(
+                custom_id=custom_id,
+                error=ProviderError("Provider batch result must contain object 'result'."),
+            )
+        result_type = result.get("type")
+        if result_type == "succeeded" and isinstance(result.get("message"), dict):
+            return NativeBatchResult(custom_id=custom_id, body=result["message"])
+        if result_type == "errored":
+            error = result.get("error")
+            if isinstance(error, dict) and isinstance(error.get("error"), dict):
+                error = error["error"]
+            error_type = error.get("type") if isinstance(error, dict) else None
+            return NativeBatchResult(
+                custom_id=custom_id,
+                error=error_for_status(
+                    self._ERROR_STATUS.get(error_type),
+                    _error_message({"error": error}),
+                ),
+            )
+        return NativeBatchResult(
+            custom_id=custom_id,
+            error=ProviderError(f"Provider batch request was not completed ({result_type})."),
+        )
+
+
+class GoogleBatchAdapter(NativeBatchAdapter):
+    """Gemini Batch Mode with inline requests (`:batchGenerateContent`)."""
+
+    # google.rpc.Code values mapped to their HTTP equivalents.
+    _RPC_STATUS = {3: 400, 4: 504, 5: 404, 7: 403, 8: 429, 9: 400, 13: 500, 14: 503, 16: 401}
+
+    _STATES: dict[str, NativeBatchState] = {
+        "PENDING": "in_progress",
+        "RUNNING": "in_progress",
+        "SUCCEEDED": "completed",
+        "FAILED": "failed",
+        "CANCELLED": "cancelled",
+        "EXPIRED": "expired",
+    }
+
+    def _api_root(self) -> str:
+        return self.config.endpoint.rstrip("/").rsplit("/", 1)[0]
+
+    def _request_body(self, item: BatchItem) -> dict:
+        request = item.request
+        body = self.provider._request_payload(request.prompt_text, request.generation_config())
+        if request.system_prompt is not None:
+            # Always inline: a cachedContents entry could expire before the
+            # batch is processed.
+            body["systemInstruction"] = {"parts": [{"text": request.system_prompt}]}
+        return body
+
+    def submit(self, items: list[BatchItem]) -> str:
+        payload = {
+            "batch": {
+                "displayName": "ai-prompt-runner",
+                "inputConfig": {
+                    "requests": {
+                        "requests": [
+                            {
+                                "request": self._request_body(item),
+                                "metadata": {"key": custom_id_for(item.index)},
+                            }
+                            for item in items
+                        ]
+                    }
+                },
+            }
+        }
+        base = self.config.endpoint.rstrip("/")
+        body = self._send_json("POST", f"{base}/{self.config.model}:batchGenerateContent", payload)
+        name = body.get("name")
+        if not isinstance(name, str):
+            raise ProviderError("Provider batch response must contain string 'name'.")
+        return name
+
+    def status(self, batch_id: str) -> NativeBatchStatus:
+        body = self._send_json("GET", f"{self._api_root()}/{batch_id}")
+        metadata = body.get("metadata") if isinstance(body.get("metadata"), dict) else body
+        provider_status = metadata.get("state")
+        # Both BATCH_STATE_* and JOB_STATE_* spellings are in use.
+        state = (
+            self._STATES.get(provider_status.rsplit("_STATE_", 1)[-1])
+            if isinstance(provider_status, str)
+            else None
+        )
+        if state is None:
+            raise ProviderError(f"Provider returned unknown batch status {provider_status!r}.")
+        return NativeBatchStatus(
+            batch_id=batch_id,
+            state=state,
+            provider_status=provider_status,
+            request_counts=_int_counts(metadata.get("batchStats")),
+            raw=body,
+        )
+
+    def iter_results(
+        self,
+        status: NativeBatchStatus,
+        custom_ids: list[str],
+    ) -> Iterator[NativeBatchResult]:
+        output = status.raw.get("response")
+        if not isinstance(output, dict):
+            metadata = status.raw.get("metadata")
+            output = metadata.get("output") if isinstance(metadata, dict) else None
+        inlined = output.get("inlinedResponses") if isinstance(output, dict) else None
+        if isinstance(inlined, dict):
+            inlined = inlined.get("inlinedResponses")
+        if not isinstance(inlined, list):
+            return
+
+        for position, entry in enumerate(inlined):
+            if not isinstance(entry, dict):
+                continue
+            metadata = entry.get("metadata")
+            custom_id = metadata.get("key") if isinstance(metadata, dict) else None
+            if custom_id is None and position < len(custom_ids):
+                # Inline responses keep submission order.
+                custom_id = custom_ids[position]
+            error = entry.get("error")
+            if isinstance(error, dict):
+                yield NativeBatchResult(
+                    custom_id=custom_id,
+                    error=error_for_status(
+                        self._RPC_STATUS.get(error.get("code")),
+                        _error_message({"error": error}),
+                    ),
+                )
+            elif isinstance(entry.get("response"), dict):
+                yield NativeBatchResult(custom_id=custom_id, body=entry["response"])
+
+
+_ADAPTERS: dict[str, type[NativeBatchAdapter]] = {
+    "openai-compatible": OpenAIBatchAdapter,
+    "anthropic-messages": AnthropicBatchAdapter,
+    "google-gemini": GoogleBatchAdapter,
+}
+
+
+def native_batch_adapter(provider: BaseProvider) -> NativeBatchAdapter:
+    """Return the batch adapter for a provider's protocol."""
+    protocol = getattr(provider, "provider_protocol", None)
+    adapter_cls = _ADAPTERS.get(protocol)
+    if adapter_cls is None:
+        raise ConfigurationError(
+            f"Provider protocol '{protocol}' has no native batch API "
+            "(supported: openai_compatible, anthropic, google)."
+        )
+    return adapter_cls(provider)
+
+
+def submit_native_batch(adapter: NativeBatchAdapter, items: Iterable[BatchItem]) -> tuple[str, int]:
+    """
+    Submit every valid item and return (batch id, submitted count).
+
+    Invalid records are not uploaded; collection reports them at their
+    position from the input file.
+    """
+    valid = [item for item in items if item.request is not None]
+    if not valid:
+        raise InputValidationError("Input contains no valid records to submit.")
+    return adapter.submit(valid), len(valid)
+
+
+def wait_for_batch(
+    adapter: NativeBatchAdapter,
+    batch_id: str,
+    poll_interval: float = 5.0,
+    max_poll_interval: float = 60.0,
+    timeout: float | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> NativeBatchStatus:
+    """
+    Poll until the batch is final, doubling the interval up to `max_poll_interval`.
+
+    Returns the last status seen, which is still `in_progress` when
+    `timeout` elapsed first.
+    """
+    deadline = clock() + timeout if timeout is not None else None
+    interval = poll_interval
+    while True:
+        status = adapter.status(batch_id)
+        if status.done:
+            return status
+        if deadline is not None:
+            remaining = deadline - clock()
+            if remaining <= 0:
+                return status
+            sleep(min(interval, remaining))
+        else:
+            sleep(interval)
+        interval = min(interval * 2, max_poll_interval)
+
+
+class _CollectedResultProvider(BaseProvider):
+    """
+    Serve already collected batch results to `PromptRunner`.
+
+    Payloads, usage, provenance and truncation are then built by exactly the
+    code path a synchronous run uses; the wrapped provider parses bodies.
+    """
+
+    def __init__(self, provider: BaseProvider) -> None:
+        self._provider = provider
+        self.config = provider.config
+        self.provider_protocol = provider.provider_protocol
+        self._result: NativeBatchResult | None = None
+        self._last_usage: UsageMetadata | None = None
+        self._last_model_resolved: str | None = None
+        self._last_stop_sequence: str | None = None
+
+    def load(self, result: NativeBatchResult) -> None:
+        self._result = result
+
+    def _load_body(self) -> dict:
+        self._last_usage = None
+        self._last_model_resolved = None
+        self._last_stop_sequence = None
+        result = self._result
+        if result.error is not None:
+            raise result.error
+
+        body = result.body
+        self._last_usage = self._provider._extract_usage(body)
+        self._last_model_resolved = self._provider._extract_model_resolved(body)
+        stop_extractor = getattr(self._provider, "_extract_stop_sequence", None)
+        if stop_extractor is not None:
+            self._last_stop_sequence = stop_extractor(body)
+        return body
+
+    def generate(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> str:
+        return self._provider._extract_text(self._load_body())
+
+    def generate_samples(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> list[ResponseSample]:
+        extract_samples = getattr(self._provider, "_extract_samples", None)
+        if extract_samples is None:
+            raise NotImplementedError("Multi-sample results are not supported by this provider.")
+        return extract_samples(self._load_body())
+
+    def get_last_usage(self) -> UsageMetadata | None:
+        return self._last_usage
+
+    def get_last_model_resolved(self) -> str | None:
+        return self._last_model_resolved
+
+    def get_last_stop_sequence(self) -> str | None:
+        return self._last_stop_sequence
+
+
+def collect_native_batch(
+    adapter: NativeBatchAdapter,
+    status: NativeBatchStatus,
+    items: Iterable[BatchItem],
+    provider: str,
+    on_result: Callable[[BatchItemResult], None],
+) -> BatchSummary:
+    """
+    Convert a finished batch into ordered batch results.
+
+    `items` must be the input the batch was submitted from. Each position is
+    reported like a synchronous `run_batch` line; submitted requests without
+    a provider result (expired or cancelled batches) fail as provider errors.
+    `execution_ms` covers local conversion only.
+    """
+    items = list(items)
+    custom_ids = [custom_id_for(item.index) for item in items if item.request is not None]
+    results: dict[int, NativeBatchResult] = {}
+    for result in adapter.iter_results(status, custom_ids):
+        index = index_for_custom_id(result.custom_id)
+        if index is not None:
+            results.setdefault(index, result)
+
+    served = _CollectedResultProvider(adapter.provider)
+    runner = PromptRunner(provider=served)
+    summary = BatchSummary()
+    start = perf_counter()
+    for item in items:
+        if item.request is not None:
+            served.load(
+                results.get(item.index)
+                or NativeBatchResult(
+                    custom_id=custom_id_for(item.index),
+                    error=ProviderError(
+                        f"Native batch ended ({status.state}) without a result for this request."
+                    ),
+                )
+            )
+        result = execute_batch_item(runner, item, provider)
+        summary.record(result)
+        on_result(result)
+    summary.execution_ms = int((perf_counter() - start) * 1000)
+    return summary
+
+
+def new_job(
+    provider_name: str,
+    provider: BaseProvider,
+    batch_id: str,
+    input_jsonl: str,
+    input_sha256: str,
+    defaults: BatchRequestDefaults,
+    submitted: int,
+) -> NativeBatchJob:
+    """Build the job record for a batch that was just submitted."""
+    return NativeBatchJob(
+        provider=provider_name,
+        batch_id=batch_id,
+        api_endpoint=provider.config.endpoint,
+        api_model=provider.config.model,
+        input_jsonl=input_jsonl,
+        input_sha256=input_sha256,
+        defaults=defaults,
+        submitted=submitted,
+        submitted_at_utc=datetime.now(timezone.utc).isoformat(),
+    )
@@ -0,0 +1,295 @@
+"""Native Ollama chat provider implementation using requests."""
+
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+import requests
+
+from ai_prompt_runner.core.errors import ProviderError
+from ai_prompt_runner.core.models import GenerationConfig, LatencyMetadata, UsageMetadata
+from ai_prompt_runner.services.http_base import TransportProvider
+from ai_prompt_runner.services.transport import Transport
+
+# Ollama accepts a number of seconds or a Go duration string ("30m", "1h30m").
+# Negative values keep the model loaded indefinitely, zero unloads it at once.
+_KEEP_ALIVE_NUMBER = re.compile(r"-?\d+(\.\d+)?")
+_KEEP_ALIVE_DURATION = re.compile(r"-?(\d+(\.\d+)?(ns|us|µs|ms|s|m|h))+")
+
+
+def normalize_keep_alive(value: str) -> str:
+    """Strip and validate a keep-alive value, raising ValueError when malformed."""
+    normalized = value.strip()
+    if not (_KEEP_ALIVE_NUMBER.fullmatch(normalized) or _KEEP_ALIVE_DURATION.fullmatch(normalized)):
+        raise ValueError(
+            "keep_alive must be a number of seconds or a duration such as '30m', '1h' or '-1'."
+        )
+    return normalized
+
+
+def _keep_alive_payload(value: str) -> str | int | float:
+    """Send bare numbers as seconds; Ollama rejects unit-less duration strings."""
+    if _KEEP_ALIVE_NUMBER.fullmatch(value):
+        number = float(value)
+        return int(number) if number.is_integer() else number
+    return value
+
+
+def _duration_ms(value: object) -> int | None:
+    """Convert an Ollama nanosecond duration to whole milliseconds."""
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        return None
+    return value // 1_000_000
+
+
+@dataclass
+class OllamaProviderConfig:
+    """Configuration for the native Ollama `/api/chat` endpoint."""
+
+    endpoint: str
+    api_key: str
+    model: str
+    timeout_seconds: int = 30
+    max_retries: int = 0
+    # Bounds connection setup separately; defaults to timeout_seconds.
+    connect_timeout_seconds: float | None = None
+    # Stream stall limits: time to the first event and between events.
+    first_chunk_timeout_seconds: float | None = None
+    stream_idle_timeout_seconds: float | None = None
+    # How long the server keeps the model loaded after this call; None uses
+    # the server default (5 minutes).
+    keep_alive: str | None = None
+    # Optional pooled session; one-off connections are used when unset.
+    session: requests.Session | None = field(default=None, repr=False, compare=False)
+    # HTTP engine override; the default is `requests` over `session`.
+    transport: Transport | None = field(default=None, repr=False, compare=False)
+
+
+class OllamaProvider(TransportProvider):
+    """
+    Provider for Ollama's native chat API.
+
+    Request shape sent:
+    {
+        "model": "...",
+        "messages": [{"role": "user", "content": "..."}],
+        "stream": false,
+        "options": {"temperature": ..., "num_predict": ...},
+        "keep_alive": "30m"
+    }
+
+    Streaming responses are newline-delimited JSON objects carrying
+    `message.content` deltas; the final object has `"done": true` plus token
+    counts and engine timings (nanoseconds), mapped to usage and
+    `metadata.latency`.
+    """
+    provider_protocol = "ollama"
+
+    def __init__(self, config: OllamaProviderConfig) -> None:
+        self.config = config
+        self._last_usage: UsageMetadata | None = None
+        self._last_latency: LatencyMetadata | None = None
+        self._last_model_resolved: str | None = None
+
+    def _normalized_endpoint(self) -> str:
+        """
+        Normalize endpoint to the chat route.
+
+        Accepts the server root (http://localhost:11434), the API base
+        (.../api) or the full route (.../api/chat). The OpenAI-compatible
+        base (.../v1 or .../v1/chat/completions, the endpoint used by
+        earlier releases) is mapped back to the server root.
+        """
+        base = self.config.endpoint.rstrip("/")
+        for suffix in ("/v1/chat/completions", "/v1"):
+            if base.endswith(suffix):
+                base = base[: -len(suffix)]
+                break
+        if base.endswith("/api/chat"):
+            return base
+        if base.endswith("/api"):
+            return f"{base}/chat"
+        return f"{base}/api/chat"
+
+    def _request_headers(self) -> dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        # Plain Ollama needs no key; one is sent for authenticating proxies.
+        if self.config.api_key:
+            headers["Authorization"] = f"Bearer {self.config.api_key}"
+        return headers
+
+    def _request_payload(
+        self,
+        prompt: str,
+        system_prompt: str | None,
+        generation_config: GenerationConfig | None,
+        stream: bool,
+    ) -> dict:
+        """Build the /api/chat request body shared by all call styles."""
+        messages: list[dict[str, str]] = []
+        if system_prompt is not None:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        payload: dict = {
+            "model": self.config.model,
+            "messages": messages,
+            "stream": stream,
+        }
+        if generation_config is not None:
+            options: dict[str, float | int | list[str]] = {}
+            if generation_config.temperature is not None:
+                options["temperature"] = generation_config.temperature
+            if generation_config.max_tokens is not None:
+                options["num_predict"] = generation_config.max_tokens
+            if generation_config.top_p is not None:
+                options["top_p"] = generation_config.top_p
+            if generation_config.stop:
+                options["stop"] = list(generation_config.stop)
+            if options:
+                payload["options"] = options
+        if self.config.keep_alive is not None:
+            payload["keep_alive"] = _keep_alive_payload(self.config.keep_alive)
+        return payload
+
+    def _raise_for_error(self, body: object) -> None:
+        """Surface the `{"error": "..."}` objects Ollama returns in band."""
+        if not isinstance(body, dict):
+            raise ProviderError("Provider response must be an object.")
+        error = body.get("error")
+        if error is None:
+            return
+        if isinstance(error, str) and error.strip():
+            raise ProviderError(f"Provider error: {error}")
+        raise ProviderError("Provider returned an error object.")
+
+    def _extract_text(self, body: dict) -> str:
+        """
+        Extract text from a non-stream /api/chat response.
+
+        Expected shape:
+        {"message": {"role": "assistant", "content": "..."}, "done": true}
+        """
+        message = body.get("message")
+        if not isinstance(message, dict):
+            raise ProviderError("Provider response must contain a 'message' object.")
+
+        content = message.get("content")
+        if not isinstance(content, str):
+            raise ProviderError("Provider response message must contain string 'content'.")
+
+        return content
+
+    def _extract_usage(self, body: dict) -> UsageMetadata | None:
+        """
+        Normalize Ollama token counts to project-wide usage metadata.
+
+        `prompt_eval_count` is omitted when the whole prompt was served from
+        the server's context cache.
+        """
+        prompt_tokens = body.get("prompt_eval_count")
+        completion_tokens = body.get("eval_count")
+        prompt_tokens = prompt_tokens if isinstance(prompt_tokens, int) else None
+        completion_tokens = completion_tokens if isinstance(completion_tokens, int) else None
+        if prompt_tokens is None and completion_tokens is None:
+            return None
+
+        return UsageMetadata(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=(
+                prompt_tokens + completion_tokens
+                if prompt_tokens is not None and completion_tokens is not None
+                else None
+            ),
+        )
+
+    def _extract_latency(self, body: dict) -> LatencyMetadata | None:
+        """Map the engine's nanosecond durations to `metadata.latency`."""
+        latency = LatencyMetadata(
+            load_ms=_duration_ms(body.get("load_duration")),
+            prompt_eval_ms=_duration_ms(body.get("prompt_eval_duration")),
+            eval_ms=_duration_ms(body.get("eval_duration")),
+            total_ms=_duration_ms(body.get("total_duration")),
+        )
+        return latency if latency.to_dict() else None
+
+    def _record_final(self, body: dict) -> None:
+        """Capture usage, timings and model from a `done` response object."""
+        self._last_usage = self._extract_usage(body)
+        self._last_latency = self._extract_latency(body)
+        model = body.get("model")
+        self._last_model_resolved = model if isinstance(model, str) else None
+
+    def _reset_last_call(self) -> None:
+        self._last_usage = None
+        self._last_latency = None
+        self._last_model_resolved = None
+
+    def get_last_usage(self) -> UsageMetadata | None:
+        """Expose normalized usage captured during the last provider call."""
+        return self._last_usage
+
+    def get_last_latency(self) -> LatencyMetadata | None:
+        """Expose engine timings captured during the last provider call."""
+        return self._last_latency
+
+    def get_last_model_resolved(self) -> str | None:
+        """Expose resolved model metadata captured during the last provider call."""
+        return self._last_model_resolved
+
+    def generate(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> str:
+        """Send one prompt to Ollama and return generated text."""
+        self._reset_last_call()
+        payload = self._request_payload(prompt, system_prompt, generation_config, stream=False)
+
+        body = self._send_json(self._normalized_endpoint(), self._request_headers(), payload)
+        self._raise_for_error(body)
+        self._record_final(body)
+        return self._extract_text(body)
+
+    def generate_stream(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> Iterator[str]:
+        """
+        Stream generated text chunks from Ollama's NDJSON response.
+
+        Notes:
+        - retries are attempted only while no chunk has been emitted
+        - once chunks are emitted, retrying would duplicate visible output
+        """
+        self._reset_last_call()
+        payload = self._request_payload(prompt, system_prompt, generation_config, stream=True)
+
+        def on_event(event: object) -> str | None:
+            self._raise_for_error(event)
+            if event.get("done") is True:
+                self._record_final(event)
+
+            message = event.get("message")
+            if message is None:
+                return None
+            if not isinstance(message, dict):
+                raise ProviderError("Provider streaming event 'message' must be an object.")
+            content = message.get("content")
+            if content is None or content == "":
+                return None
+            if not isinstance(content, str):
+                raise ProviderError("Provider streaming message content must be a string.")
+            return content
+
+        yield from self._stream_events(
+            self._normalized_endpoint(),
+            self._request_headers(),
+            payload,
+            on_event,
+            framing="ndjson",
+        )
@@ -1,20 +1,18 @@
 """OpenAI-compatible provider porvider implementation using requests."""
 
-import json
 from collections.abc import Iterator
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import requests
 
-from ai_prompt_runner.core.errors import (
-    AuthenticationError,
-    AuthorizationError,
-    ProviderError,
-    RateLimitError,
-    UpstreamServerError,
-)
-from ai_prompt_runner.core.models import GenerationConfig, UsageMetadata
-from ai_prompt_runner.services.base import BaseProvider
+from ai_prompt_runner.core.errors import ProviderError
+from ai_prompt_runner.core.models import GenerationConfig, ResponseSample, UsageMetadata
+from ai_prompt_runner.services.http_base import TransportProvider
+from ai_prompt_runner.services.transport import Transport
+
+# Chat Completions rejects more than four `stop` entries; any extra sequences
+# are enforced client-side by the runner only.
+_MAX_NATIVE_STOP_SEQUENCES = 4
 
 
 @dataclass
@@ -26,9 +24,18 @@ class OpenAICompatibleProviderConfig:
     model: str
     timeout_seconds: int = 30
     max_retries: int = 0
-
-
-class OpenAICompatibleProvider(BaseProvider):
+    # Bounds connection setup separately; defaults to timeout_seconds.
+    connect_timeout_seconds: float | None = None
+    # Stream stall limits: time to the first event and between events.
+    first_chunk_timeout_seconds: float | None = None
+    stream_idle_timeout_seconds: float | None = None
+    # Optional pooled session; one-off connections are used when unset.
+    session: requests.Session | None = field(default=None, repr=False, compare=False)
+    # HTTP engine override; the default is `requests` over `session`.
+    transport: Transport | None = field(default=None, repr=False, compare=False)
+
+
+class OpenAICompatibleProvider(TransportProvider):
     """
     Provider for APIs that expose an OpenAI-compatible chat-completions contract.
 
@@ -49,6 +56,7 @@ class OpenAICompatibleProvider(BaseProvider):
         self.config = config
         self._last_usage: UsageMetadata | None = None
         self._last_model_resolved: str | None = None
+        self._last_stop_sequence: str | None = None
 
     def _normalized_endpoint(self) -> str:
         """
@@ -65,26 +73,40 @@ class OpenAICompatibleProvider(BaseProvider):
             return base
         return f"{base}/chat/completions"
 
-    def _raise_for_mapped_status(self, response: requests.Response) -> None:
-        """Map provider HTTP status codes to domain-specific exceptions."""
-        status_code = response.status_code
-
-        # Explicit mappings for statuses we want to classify precisely.
-        explicit_status_errors = {
-            401: AuthenticationError("Provider authentication failed (HTTP 401)."),
-            403: AuthorizationError("Provider authorization failed (HTTP 403)."),
-            429: RateLimitError("Provider rate limit exceeded (HTTP 429)."),
+    def _request_headers(self) -> dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.config.api_key}",
+            "Content-Type": "application/json",
         }
 
-        mapped_error = explicit_status_errors.get(status_code)
-        if mapped_error is not None:
-            raise mapped_error
+    def _request_payload(
+        self,
+        prompt: str,
+        system_prompt: str | None,
+        generation_config: GenerationConfig | None,
+    ) -> dict:
+        """Build the chat-completions request body shared by all call styles."""
+        messages: list[dict[str, str]] = []
+        if system_prompt is not None:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
 
-        # Fallback classification keeps behavior deterministic for unknown error statuses.
-        if 500 <= status_code <= 599:
-            raise UpstreamServerError(f"Provider server error (HTTP {status_code}).")
-        if status_code >= 400:
-            raise ProviderError(f"Provider returned HTTP {status_code}.")
+        payload = {
+            "model": self.config.model,
+            "messages": messages,
+        }
+        if generation_config is not None:
+            if generation_config.temperature is not None:
+                payload["temperature"] = generation_config.temperature
+            if generation_config.max_tokens is not None:
+                payload["max_tokens"] = generation_config.max_tokens
+            if generation_config.top_p is not None:
+                payload["top_p"] = generation_config.top_p
+            if generation_config.stop:
+                payload["stop"] = list(generation_config.stop[:_MAX_NATIVE_STOP_SEQUENCES])
+            if generation_config.n is not None and generation_config.n > 1:
+                payload["n"] = generation_config.n
+        return payload
 
     def _extract_text(self, body: dict) -> str:
         """
@@ -93,15 +115,19 @@ class OpenAICompatibleProvider(BaseProvider):
         We validate each layer explicitly to fail fast with clear domain errors
         if an upstream service returns an unexpected shape.
         """
+        return self._choice_text(self._extract_choices(body)[0])
+
+    def _extract_choices(self, body: dict) -> list:
         choices = body.get("choices")
         if not isinstance(choices, list) or not choices:
             raise ProviderError("Provider response must contain a non-empty 'choices' list.")
+        return choices
 
-        first = choices[0]
-        if not isinstance(first, dict):
+    def _choice_text(self, choice: object) -> str:
+        if not isinstance(choice, dict):
             raise ProviderError("Provider response choice must be an object.")
 
-        message = first.get("message")
+        message = choice.get("message")
         if not isinstance(message, dict):
             raise ProviderError("Provider response choice must contain a 'message' object.")
 
@@ -111,6 +137,32 @@ class OpenAICompatibleProvider(BaseProvider):
 
         return content
 
+    def _extract_samples(self, body: dict) -> list[ResponseSample]:
+        """
+        Extract every choice of an `n > 1` response, ordered by choice index.
+
+        Usage is only reported for the whole call, so samples carry none.
+        """
+        choices = self._extract_choices(body)
+        ordered = sorted(
+            choices,
+            key=lambda choice: (
+                choice.get("index", 0)
+                if isinstance(choice, dict) and isinstance(choice.get("index"), int)
+                else 0
+            ),
+        )
+        samples = []
+        for choice in ordered:
+            finish_reason = choice.get("finish_reason") if isinstance(choice, dict) else None
+            samples.append(
+                ResponseSample(
+                    text=self._choice_text(choice),
+                    finish_reason=finish_reason if isinstance(finish_reason, str) else None,
+                )
+            )
+        return samples
+
     def _extract_stream_delta(self, event: dict) -> str | None:
         """
         Extract a stream text delta from one SSE `data:` event payload.
@@ -149,7 +201,13 @@ class OpenAICompatibleProvider(BaseProvider):
         return content
 
     def _extract_usage(self, payload: dict) -> UsageMetadata | None:
-        """Normalize OpenAI-compatible usage payload when present."""
+        """
+        Normalize OpenAI-compatible usage payload when present.
+
+        Automatic prefix caching reports cache hits as
+        `usage.prompt_tokens_details.cached_tokens` (already part of
+        `prompt_tokens`); cache writes are not reported.
+        """
         if not isinstance(payload, dict):
             return None
         usage_obj = payload.get("usage")
@@ -159,11 +217,14 @@ class OpenAICompatibleProvider(BaseProvider):
         prompt_tokens = usage_obj.get("prompt_tokens")
         completion_tokens = usage_obj.get("completion_tokens")
         total_tokens = usage_obj.get("total_tokens")
+        details = usage_obj.get("prompt_tokens_details")
+        cached_tokens = details.get("cached_tokens") if isinstance(details, dict) else None
 
         return UsageMetadata(
             prompt_tokens=prompt_tokens if isinstance(prompt_tokens, int) else None,
             completion_tokens=completion_tokens if isinstance(completion_tokens, int) else None,
             total_tokens=total_tokens if isinstance(total_tokens, int) else None,
+            cache_read_tokens=cached_tokens if isinstance(cached_tokens, int) else None,
         )
 
     def _extract_model_resolved(self, payload: dict) -> str | None:
@@ -175,6 +236,29 @@ class OpenAICompatibleProvider(BaseProvider):
             return model_value
         return None
 
+    def _extract_stop_sequence(self, payload: dict) -> str | None:
+        """
+        Extract the matched stop sequence when the server names it.
+
+        `finish_reason: "stop"` alone also covers a natural end, so only the
+        server extensions that name the match are trusted: vLLM `stop_reason`
+        and SGLang `matched_stop`.
+        """
+        if not isinstance(payload, dict):
+            return None
+        choices = payload.get("choices")
+        if not isinstance(choices, list) or not choices:
+            return None
+        first = choices[0]
+        if not isinstance(first, dict) or first.get("finish_reason") != "stop":
+            return None
+
+        for key in ("stop_reason", "matched_stop"):
+            stop_sequence = first.get(key)
+            if isinstance(stop_sequence, str):
+                return stop_sequence
+        return None
+
     def get_last_usage(self) -> UsageMetadata | None:
         """Expose normalized usage captured during the last provider call."""
         return self._last_usage
@@ -183,6 +267,10 @@ class OpenAICompatibleProvider(BaseProvider):
         """Expose resolved model metadata captured during the last provider call."""
         return self._last_model_resolved
 
+    def get_last_stop_sequence(self) -> str | None:
+        """Expose the stop sequence that ended the last provider call, if any."""
+        return self._last_stop_sequence
+
     def generate(
         self,
         prompt: str,
@@ -194,57 +282,38 @@ class OpenAICompatibleProvider(BaseProvider):
 
         Contract: one prompt in, one response string out.
         """
-        headers = {
-            "Authorization": f"Bearer {self.config.api_key}",
-            "Content-Type": "application/json",
-        }
-        messages: list[dict[str, str]] = []
-        if system_prompt is not None:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-
-        payload = {
-            "model": self.config.model,
-            "messages": messages,
-        }
-        if generation_config is not None:
-            if generation_config.temperature is not None:
-                payload["temperature"] = generation_config.temperature
-            if generation_config.max_tokens is not None:
-                payload["max_tokens"] = generation_config.max_tokens
-            if generation_config.top_p is not None:
-                payload["top_p"] = generation_config.top_p
+        headers = self._request_headers()
+        payload = self._request_payload(prompt, system_prompt, generation_config)
 
         self._last_usage = None
         self._last_model_resolved = None
+        self._last_stop_sequence = None
 
-        # Retry only transient transport errors. Deterministic HTTP responses are handled directly.
-        for attempt in range(self.config.max_retries + 1):
-            try:
-                response = requests.post(
-                    self._normalized_endpoint(),
-                    headers=headers,
-                    json=payload,
-                    timeout=self.config.timeout_seconds,
-                )
-            except requests.RequestException as exc:
-                if attempt == self.config.max_retries:
-                    raise ProviderError(f"Provider request failed: {exc}") from exc
-                continue
-
-            self._raise_for_mapped_status(response)
+        body = self._send_json(self._normalized_endpoint(), headers, payload)
+        self._last_usage = self._extract_usage(body)
+        self._last_model_resolved = self._extract_model_resolved(body)
+        self._last_stop_sequence = self._extract_stop_sequence(body)
+        return self._extract_text(body)
 
-            try:
-                body = response.json()
-            except ValueError as exc:
-                raise ProviderError("Provider returned invalid JSON.") from exc
+    def generate_samples(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> list[ResponseSample]:
+        """Sample `generation_config.n` choices in one chat-completions call (`n`)."""
+        headers = self._request_headers()
+        payload = self._request_payload(prompt, system_prompt, generation_config)
 
-            self._last_usage = self._extract_usage(body)
-            self._last_model_resolved = self._extract_model_resolved(body)
-            return self._extract_text(body)
+        self._last_usage = None
+        self._last_model_resolved = None
+        self._last_stop_sequence = None
 
-        # Defensive fallback: the loop above always returns or raises.
-        raise ProviderError("Provider request failed unexpectedly.")
+        body = self._send_json(self._normalized_endpoint(), headers, payload)
+        self._last_usage = self._extract_usage(body)
+        self._last_model_resolved = self._extract_model_resolved(body)
+        self._last_stop_sequence = self._extract_stop_sequence(body)
+        return self._extract_samples(body)
 
     def generate_stream(
         self,
@@ -259,85 +328,30 @@ class OpenAICompatibleProvider(BaseProvider):
         - retries are attempted only when no chunk has been emitted yet
         - once chunks are emitted, retrying would duplicate visible output
         """
-        headers = {
-            "Authorization": f"Bearer {self.config.api_key}",
-            "Content-Type": "application/json",
-        }
-        messages: list[dict[str, str]] = []
-        if system_prompt is not None:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": prompt})
-
-        payload = {
-            "model": self.config.model,
-            "messages": messages,
-            "stream": True,
-            # Ask OpenAI-compatible APIs to include final usage counters in stream events.
-            "stream_options": {"include_usage": True},
-        }
-        if generation_config is not None:
-            if generation_config.temperature is not None:
-                payload["temperature"] = generation_config.temperature
-            if generation_config.max_tokens is not None:
-                payload["max_tokens"] = generation_config.max_tokens
-            if generation_config.top_p is not None:
-                payload["top_p"] = generation_config.top_p
+        headers = self._request_headers()
+        payload = self._request_payload(prompt, system_prompt, generation_config)
+        payload["stream"] = True
+        # Ask OpenAI-compatible APIs to include final usage counters in stream events.
+        payload["stream_options"] = {"include_usage": True}
 
         self._last_usage = None
         self._last_model_resolved = None
+        self._last_stop_sequence = None
 
-        for attempt in range(self.config.max_retries + 1):
-            emitted_any_chunk = False
-            try:
-                response = requests.post(
-                    self._normalized_endpoint(),
-                    headers=headers,
-                    json=payload,
-                    timeout=self.config.timeout_seconds,
-                    stream=True,
-                )
-                self._raise_for_mapped_status(response)
-
-                for line in response.iter_lines(decode_unicode=True):
-                    if line is None:
-                        continue
-                    normalized_line = line.strip()
-                    if not normalized_line:
-                        continue
-                    if not normalized_line.startswith("data:"):
-                        continue
-
-                    data_value = normalized_line[len("data:") :].strip()
-                    if data_value == "[DONE]":
-                        return
-
-                    try:
-                        event = json.loads(data_value)
-                    except json.JSONDecodeError as exc:
-                        raise ProviderError(
-                            "Provider returned invalid streaming event JSON."
-                        ) from exc
-
-                    # Usage often arrives on a final event without content delta.
-                    event_usage = self._extract_usage(event)
-                    if event_usage is not None:
-                        self._last_usage = event_usage
-
-                    event_model = self._extract_model_resolved(event)
-                    if event_model is not None:
-                        self._last_model_resolved = event_model
-
-                    delta_text = self._extract_stream_delta(event)
-                    if delta_text is None:
-                        continue
-
-                    emitted_any_chunk = True
-                    yield delta_text
-                return
-            except requests.RequestException as exc:
-                if emitted_any_chunk or attempt == self.config.max_retries:
-                    raise ProviderError(f"Provider request failed: {exc}") from exc
-                continue
-
-        # Defensive fallback: loop always returns or raises.
-        raise ProviderError("Provider request failed unexpectedly.")
+        def on_event(event: object) -> str | None:
+            # Usage often arrives on a final event without content delta.
+            event_usage = self._extract_usage(event)
+            if event_usage is not None:
+                self._last_usage = event_usage
+
+            event_model = self._extract_model_resolved(event)
+            if event_model is not None:
+                self._last_model_resolved = event_model
+
+            event_stop = self._extract_stop_sequence(event)
+            if event_stop is not None:
+                self._last_stop_sequence = event_stop
+
+            return self._extract_stream_delta(event)
+
+        yield from self._stream_events(self._normalized_endpoint(), headers, payload, on_event)
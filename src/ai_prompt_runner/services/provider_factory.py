@@ -1,15 +1,37 @@
 """Provider factory for runtime provider creation."""
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from collections.abc import Mapping
 from typing import Callable, Literal
 
+import requests
+
 from ai_prompt_runner.core.errors import PromptRunnerError
+from ai_prompt_runner.core.token_budget import CONTEXT_POLICIES, TokenBudget, TokenRateLimiter
 from ai_prompt_runner.services.anthropic_provider import AnthropicProvider, AnthropicProviderConfig
 from ai_prompt_runner.services.base import BaseProvider
+from ai_prompt_runner.services.cassette import RecordingTransport, ReplayTransport
 from ai_prompt_runner.services.google_provider import GoogleProvider, GoogleProviderConfig
-from ai_prompt_runner.services.http_provider import HTTPProvider, HTTPProviderConfig
+from ai_prompt_runner.services.http_provider import (
+    HTTP_STREAM_MODES,
+    HTTPProvider,
+    HTTPProviderConfig,
+)
+from ai_prompt_runner.services.ollama_provider import (
+    OllamaProvider,
+    OllamaProviderConfig,
+    normalize_keep_alive,
+)
+from ai_prompt_runner.services.mock_provider import MockProfile, MockProvider, resolve_mock_profile
 from ai_prompt_runner.services.openai_compatible_provider import OpenAICompatibleProvider, OpenAICompatibleProviderConfig
+from ai_prompt_runner.services.transport import (
+    UNIX_SOCKET_TRANSPORTS,
+    RequestsTransport,
+    Transport,
+    create_transport,
+    unix_socket_url,
+)
 
 class ConfigurationError(PromptRunnerError):
     """Raised when provider runtime configuration is invalid."""
@@ -43,6 +65,30 @@ class ProviderRuntimeConfig:
     model: str
     timeout_seconds: int
     max_retries: int
+    # Separate bound for connection setup; None reuses `timeout_seconds`.
+    connect_timeout_seconds: float | None = None
+    # Stream stall limits (streaming providers only); None disables each.
+    first_chunk_timeout_seconds: float | None = None
+    stream_idle_timeout_seconds: float | None = None
+    # Opt-in provider-side caching of the system prompt prefix
+    # (Anthropic `cache_control`, Gemini `cachedContents`).
+    prompt_cache: bool = False
+    # Ollama model residency after each call (seconds or duration string);
+    # None keeps the server default.
+    keep_alive: str | None = None
+    # Wire format of `http` provider streams (see HTTP_STREAM_MODES); None
+    # keeps that provider non-streaming.
+    http_stream_mode: str | None = None
+    # Shared HTTP session for pooled callers (library client); None keeps
+    # one-off connections for single CLI runs.
+    session: requests.Session | None = field(default=None, repr=False, compare=False)
+    # Alternative HTTP engine (urllib3, httpx); None sends through `requests`
+    # over `session`.
+    transport: Transport | None = field(default=None, repr=False, compare=False)
+    # Simulated latency and failures of the `mock` provider; None answers at once.
+    mock_profile: MockProfile | None = None
+    # Seed of the `mock` provider's random draws; None seeds from the OS.
+    mock_seed: int | None = None
 
 
 @dataclass(frozen=True)
@@ -59,6 +105,13 @@ class ProviderSpec:
     default_model: str
     # Provider capability contract used by safety validation layers.
     capabilities: ProviderCapabilities
+    # Local servers accept unauthenticated requests; a key is then optional.
+    api_key_required: bool = True
+    # Tokenizer family used for pre-flight token estimates (see BYTES_PER_TOKEN).
+    token_family: str = "generic"
+    # Context windows (prompt + completion tokens) by model-name prefix; the
+    # longest matching prefix wins. Unlisted models are not checked.
+    context_windows: tuple[tuple[str, int], ...] = ()
 
 
 def _build_http_provider(config: ProviderRuntimeConfig) -> BaseProvider:
@@ -70,6 +123,12 @@ def _build_http_provider(config: ProviderRuntimeConfig) -> BaseProvider:
             model=config.model,
             timeout_seconds=config.timeout_seconds,
             max_retries=config.max_retries,
+            connect_timeout_seconds=config.connect_timeout_seconds,
+            stream_mode=config.http_stream_mode,
+            first_chunk_timeout_seconds=config.first_chunk_timeout_seconds,
+            stream_idle_timeout_seconds=config.stream_idle_timeout_seconds,
+            session=config.session,
+            transport=config.transport,
         )
     )
 
@@ -82,6 +141,11 @@ def _build_openai_compatible_provider(config: ProviderRuntimeConfig) -> BaseProv
             model=config.model,
             timeout_seconds=config.timeout_seconds,
             max_retries=config.max_retries,
+            connect_timeout_seconds=config.connect_timeout_seconds,
+            first_chunk_timeout_seconds=config.first_chunk_timeout_seconds,
+            stream_idle_timeout_seconds=config.stream_idle_timeout_seconds,
+            session=config.session,
+            transport=config.transport,
         )
     )
 
@@ -94,6 +158,12 @@ def _build_anthropic_provider(config: ProviderRuntimeConfig) -> BaseProvider:
             model=config.model,
             timeout_seconds=config.timeout_seconds,
             max_retries=config.max_retries,
+            connect_timeout_seconds=config.connect_timeout_seconds,
+            first_chunk_timeout_seconds=config.first_chunk_timeout_seconds,
+            stream_idle_timeout_seconds=config.stream_idle_timeout_seconds,
+            prompt_cache=config.prompt_cache,
+            session=config.session,
+            transport=config.transport,
         )
     )
 
@@ -107,11 +177,61 @@ def _build_google_provider(config: ProviderRuntimeConfig) -> BaseProvider:
             model=config.model,
             timeout_seconds=config.timeout_seconds,
             max_retries=config.max_retries,
+            connect_timeout_seconds=config.connect_timeout_seconds,
+            first_chunk_timeout_seconds=config.first_chunk_timeout_seconds,
+            stream_idle_timeout_seconds=config.stream_idle_timeout_seconds,
+            prompt_cache=config.prompt_cache,
+            session=config.session,
+            transport=config.transport,
+        )
+    )
+
+
+def _build_ollama_provider(config: ProviderRuntimeConfig) -> BaseProvider:
+    """Build a native Ollama chat provider from normalized runtime configuration."""
+    return OllamaProvider(
+        OllamaProviderConfig(
+            endpoint=config.endpoint,
+            api_key=config.api_key,
+            model=config.model,
+            timeout_seconds=config.timeout_seconds,
+            max_retries=config.max_retries,
+            connect_timeout_seconds=config.connect_timeout_seconds,
+            first_chunk_timeout_seconds=config.first_chunk_timeout_seconds,
+            stream_idle_timeout_seconds=config.stream_idle_timeout_seconds,
+            keep_alive=config.keep_alive,
+            session=config.session,
+            transport=config.transport,
         )
     )
 
 
+def _build_mock_provider(config: ProviderRuntimeConfig) -> BaseProvider:
+    """Build the no-network mock provider with its simulated latency profile."""
+    return MockProvider(profile=config.mock_profile, seed=config.mock_seed)
+
+
 # Central provider registry with protocol-level provider classes and brand aliases.
+_OPENAI_CONTEXT_WINDOWS = (
+    ("gpt-3.5-turbo", 16_385),
+    ("gpt-4", 8_192),
+    ("gpt-4-32k", 32_768),
+    ("gpt-4-turbo", 128_000),
+    ("gpt-4o", 128_000),
+    ("gpt-4.1", 1_047_576),
+    ("gpt-5", 400_000),
+    ("o1", 200_000),
+    ("o3", 200_000),
+    ("o4-mini", 200_000),
+)
+_ANTHROPIC_CONTEXT_WINDOWS = (("claude-", 200_000),)
+_GOOGLE_CONTEXT_WINDOWS = (
+    ("gemini-", 1_048_576),
+    ("gemini-1.5-pro", 2_097_152),
+)
+_XAI_CONTEXT_WINDOWS = (("grok-3", 131_072),)
+
+
 PROVIDER_REGISTRY: dict[str, ProviderSpec] = {
     "http": ProviderSpec(
         provider_id="http",
@@ -119,7 +239,8 @@ PROVIDER_REGISTRY: dict[str, ProviderSpec] = {
         default_endpoint="",
         default_model="default",
         capabilities=ProviderCapabilities(
-            stream="unsupported",
+            # Streams only with an http_stream_mode (see effective_capabilities).
+            stream="unknown",
             system="supported",
             usage="unsupported",
             temperature="unsupported",
@@ -140,6 +261,8 @@ PROVIDER_REGISTRY: dict[str, ProviderSpec] = {
             top_p="unknown",
             max_tokens="unknown",
         ),
+        token_family="openai",
+        context_windows=_OPENAI_CONTEXT_WINDOWS,
     ),
     "openai": ProviderSpec(
         provider_id="openai",
@@ -154,6 +277,8 @@ PROVIDER_REGISTRY: dict[str, ProviderSpec] = {
             top_p="supported",
             max_tokens="supported",
         ),
+        token_family="openai",
+        context_windows=_OPENAI_CONTEXT_WINDOWS,
     ),
     "openrouter": ProviderSpec(
         provider_id="openrouter",
@@ -182,6 +307,7 @@ PROVIDER_REGISTRY: dict[str, ProviderSpec] = {
             top_p="unknown",
             max_tokens="unknown",
         ),
+        token_family="llama",
     ),
     "together": ProviderSpec(
         provider_id="together",
@@ -210,6 +336,7 @@ PROVIDER_REGISTRY: dict[str, ProviderSpec] = {
             top_p="unknown",
             max_tokens="unknown",
         ),
+        token_family="llama",
     ),
     "perplexity": ProviderSpec(
         provider_id="perplexity",
@@ -224,6 +351,7 @@ PROVIDER_REGISTRY: dict[str, ProviderSpec] = {
             top_p="unknown",
             max_tokens="unknown",
         ),
+        token_family="llama",
     ),
     "inception": ProviderSpec(
         provider_id="inception",
@@ -252,6 +380,7 @@ PROVIDER_REGISTRY: dict[str, ProviderSpec] = {
             top_p="unknown",
             max_tokens="unknown",
         ),
+        context_windows=_XAI_CONTEXT_WINDOWS,
     ),
     "xai": ProviderSpec(
         provider_id="xai",
@@ -266,6 +395,7 @@ PROVIDER_REGISTRY: dict[str, ProviderSpec] = {
             top_p="unknown",
             max_tokens="unknown",
         ),
+        context_windows=_XAI_CONTEXT_WINDOWS,
     ),
     "lmstudio": ProviderSpec(
         provider_id="lmstudio",
@@ -283,17 +413,19 @@ PROVIDER_REGISTRY: dict[str, ProviderSpec] = {
     ),
     "ollama": ProviderSpec(
         provider_id="ollama",
-        builder=_build_openai_compatible_provider,
-        default_endpoint="http://localhost:11434/v1",
+        builder=_build_ollama_provider,
+        default_endpoint="http://localhost:11434",
         default_model="llama3.2",
         capabilities=ProviderCapabilities(
             stream="supported",
             system="supported",
-            usage="unknown",
-            temperature="unknown",
-            top_p="unknown",
-            max_tokens="unknown",
+            usage="supported",
+            temperature="supported",
+            top_p="supported",
+            max_tokens="supported",
         ),
+        api_key_required=False,
+        token_family="llama",
     ),
     "anthropic": ProviderSpec(
         provider_id="anthropic",
@@ -308,6 +440,8 @@ PROVIDER_REGISTRY: dict[str, ProviderSpec] = {
             top_p="supported",
             max_tokens="supported",
         ),
+        token_family="anthropic",
+        context_windows=_ANTHROPIC_CONTEXT_WINDOWS,
     ),
     "google": ProviderSpec(
         provider_id="google",
@@ -322,10 +456,82 @@ PROVIDER_REGISTRY: dict[str, ProviderSpec] = {
             top_p="supported",
             max_tokens="supported",
         ),
+        token_family="google",
+        context_windows=_GOOGLE_CONTEXT_WINDOWS,
+    ),
+    "mock": ProviderSpec(
+        provider_id="mock",
+        builder=_build_mock_provider,
+        # Never contacted; present so endpoint resolution needs no special case.
+        default_endpoint="mock://local",
+        default_model="mock",
+        capabilities=ProviderCapabilities(
+            stream="supported",
+            system="supported",
+            usage="supported",
+            temperature="unsupported",
+            top_p="unsupported",
+            max_tokens="unsupported",
+        ),
+        api_key_required=False,
     ),
 }
 
 
+def effective_capabilities(
+    provider_spec: ProviderSpec,
+    http_stream_mode: str | None = None,
+) -> ProviderCapabilities:
+    """Return the spec's capabilities adjusted for runtime options that unlock features."""
+    if provider_spec.builder is _build_http_provider and http_stream_mode is not None:
+        return replace(provider_spec.capabilities, stream="supported")
+    return provider_spec.capabilities
+
+
+def context_window_for(provider_spec: ProviderSpec, model: str | None) -> int | None:
+    """Return the context window of `model` from the spec's table, or None when unlisted."""
+    if not model:
+        return None
+    matches = [(len(prefix), window) for prefix, window in provider_spec.context_windows if model.startswith(prefix)]
+    if not matches:
+        return None
+    return max(matches)[1]
+
+
+def build_token_budget(
+    provider_spec: ProviderSpec,
+    model: str | None,
+    context_window: int | None = None,
+    context_policy: str = "reject",
+    tokens_per_minute: int | TokenRateLimiter | None = None,
+) -> TokenBudget:
+    """
+    Build the pre-flight token budget for one provider and model.
+
+    `context_window` overrides the spec's table (for self-hosted or unlisted
+    models). `tokens_per_minute` takes a budget or a limiter shared with
+    other runs.
+    """
+    if context_policy not in CONTEXT_POLICIES:
+        raise ConfigurationError(
+            f"Unknown context_policy '{context_policy}'. Supported: {', '.join(CONTEXT_POLICIES)}."
+        )
+    if context_window is not None and context_window <= 0:
+        raise ConfigurationError("context_window must be greater than 0.")
+    rate_limiter = tokens_per_minute
+    if isinstance(tokens_per_minute, int):
+        if tokens_per_minute <= 0:
+            raise ConfigurationError("tokens_per_minute must be greater than 0.")
+        rate_limiter = TokenRateLimiter(tokens_per_minute)
+    return TokenBudget(
+        family=provider_spec.token_family,
+        model=model,
+        context_window=context_window or context_window_for(provider_spec, model),
+        policy=context_policy,
+        rate_limiter=rate_limiter,
+    )
+
+
 def get_provider_spec(provider_name: str) -> ProviderSpec:
     """Return provider spec from registry or raise a configuration error."""
     provider_spec = PROVIDER_REGISTRY.get(provider_name)
@@ -340,6 +546,14 @@ def _resolve_runtime_config(
     api_model: str | None,
     timeout_seconds: int | None,
     max_retries: int | None,
+    connect_timeout_seconds: float | None = None,
+    first_chunk_timeout_seconds: float | None = None,
+    stream_idle_timeout_seconds: float | None = None,
+    prompt_cache: bool = False,
+    keep_alive: str | None = None,
+    http_stream_mode: str | None = None,
+    mock_profile: str | Mapping[str, object] | MockProfile | None = None,
+    mock_seed: int | None = None,
 ) -> ProviderRuntimeConfig:
     """
     Resolve runtime config with deterministic precedence:
@@ -354,7 +568,7 @@ def _resolve_runtime_config(
         or ""
     ).strip()
 
-    # API key remains required for all current network providers.
+    # API key is required for every hosted provider.
     key = (api_key or os.getenv("AI_API_KEY", "")).strip()
 
     # Model can come from CLI, env, or provider-specific default in registry.
@@ -375,10 +589,36 @@ def _resolve_runtime_config(
     if resolved_max_retries < 0:
         raise ConfigurationError("max_retries must be greater than or equal to 0.")
 
+    if connect_timeout_seconds is not None and connect_timeout_seconds <= 0:
+        raise ConfigurationError("connect_timeout_seconds must be greater than 0.")
+    if first_chunk_timeout_seconds is not None and first_chunk_timeout_seconds <= 0:
+        raise ConfigurationError("first_chunk_timeout_seconds must be greater than 0.")
+    if stream_idle_timeout_seconds is not None and stream_idle_timeout_seconds <= 0:
+        raise ConfigurationError("stream_idle_timeout_seconds must be greater than 0.")
+    if keep_alive is not None:
+        try:
+            keep_alive = normalize_keep_alive(keep_alive)
+        except ValueError as exc:
+            raise ConfigurationError(str(exc)) from exc
+    if http_stream_mode is not None and http_stream_mode not in HTTP_STREAM_MODES:
+        raise ConfigurationError(
+            f"Unknown http_stream_mode '{http_stream_mode}'. Supported: {', '.join(HTTP_STREAM_MODES)}."
+        )
+    if mock_profile is not None:
+        try:
+            mock_profile = resolve_mock_profile(mock_profile)
+        except ValueError as exc:
+            raise ConfigurationError(str(exc)) from exc
+
     # Fail fast on missing required runtime credentials/config.
     if not endpoint:
         raise ConfigurationError("AI_API_ENDPOINT is required.")
-    if not key:
+    # Unix domain socket endpoints are carried in their canonical http+unix form.
+    try:
+        endpoint = unix_socket_url(endpoint) or endpoint
+    except ValueError as exc:
+        raise ConfigurationError(str(exc)) from exc
+    if not key and provider_spec.api_key_required:
         raise ConfigurationError("AI_API_KEY is required.")
 
     return ProviderRuntimeConfig(
@@ -387,7 +627,114 @@ def _resolve_runtime_config(
         model=model,
         timeout_seconds=resolved_timeout,
         max_retries=resolved_max_retries,
+        connect_timeout_seconds=connect_timeout_seconds,
+        first_chunk_timeout_seconds=first_chunk_timeout_seconds,
+        stream_idle_timeout_seconds=stream_idle_timeout_seconds,
+        prompt_cache=prompt_cache,
+        keep_alive=keep_alive,
+        http_stream_mode=http_stream_mode,
+        mock_profile=mock_profile,
+        mock_seed=mock_seed,
+    )
+
+
+def resolve_provider_config(
+    provider_name: str,
+    api_endpoint: str | None = None,
+    api_key: str | None = None,
+    api_model: str | None = None,
+    timeout_seconds: int | None = None,
+    max_retries: int | None = None,
+    connect_timeout_seconds: float | None = None,
+    first_chunk_timeout_seconds: float | None = None,
+    stream_idle_timeout_seconds: float | None = None,
+    prompt_cache: bool = False,
+    keep_alive: str | None = None,
+    http_stream_mode: str | None = None,
+    mock_profile: str | Mapping[str, object] | MockProfile | None = None,
+    mock_seed: int | None = None,
+) -> tuple[ProviderSpec, ProviderRuntimeConfig]:
+    """
+    Resolve a provider spec and its runtime configuration without building it.
+
+    Long-lived callers resolve once and reuse the result through
+    `build_provider`, avoiding repeated environment lookups.
+    """
+    provider_spec = get_provider_spec(provider_name)
+    runtime_config = _resolve_runtime_config(
+        provider_spec=provider_spec,
+        api_endpoint=api_endpoint,
+        api_key=api_key,
+        api_model=api_model,
+        timeout_seconds=timeout_seconds,
+        max_retries=max_retries,
+        connect_timeout_seconds=connect_timeout_seconds,
+        first_chunk_timeout_seconds=first_chunk_timeout_seconds,
+        stream_idle_timeout_seconds=stream_idle_timeout_seconds,
+        prompt_cache=prompt_cache,
+        keep_alive=keep_alive,
+        http_stream_mode=http_stream_mode,
+        mock_profile=mock_profile,
+        mock_seed=mock_seed,
     )
+    return provider_spec, runtime_config
+
+
+def resolve_transport(name: str, pool_maxsize: int = 10, endpoint: str | None = None) -> Transport:
+    """
+    Build a transport by name, reporting bad names and missing extras as configuration errors.
+
+    For a Unix domain socket `endpoint` the `requests` default resolves to
+    the urllib3 engine, and transports that cannot reach sockets are rejected.
+    """
+    if endpoint is not None and unix_socket_url(endpoint) is not None:
+        if name not in UNIX_SOCKET_TRANSPORTS:
+            raise ConfigurationError(
+                f"Transport '{name}' cannot reach Unix socket endpoints. "
+                f"Supported: {', '.join(UNIX_SOCKET_TRANSPORTS)}."
+            )
+        name = "urllib3"
+    try:
+        return create_transport(name, pool_maxsize=pool_maxsize)
+    except (ValueError, ImportError) as exc:
+        raise ConfigurationError(str(exc)) from exc
+
+
+def wrap_cassette_transport(
+    transport: Transport | None,
+    config: "ProviderRuntimeConfig",
+    record_dir: str | None = None,
+    replay_dir: str | None = None,
+    replay_timing: str = "instant",
+) -> Transport | None:
+    """
+    Wrap `transport` to record exchanges into `record_dir` or serve them from `replay_dir`.
+
+    Recording sends through `transport` (or `requests` over the configured
+    session when it is None); replay never touches the network. The API key
+    of `config` is scrubbed from cassettes and from replay keys. Returns
+    `transport` unchanged when neither directory is set.
+    """
+    if record_dir is not None and replay_dir is not None:
+        raise ConfigurationError("record_dir and replay_dir cannot be used together.")
+    secrets = (config.api_key,)
+    try:
+        if replay_dir is not None:
+            return ReplayTransport(replay_dir, timing=replay_timing, secret_values=secrets)
+        if record_dir is not None:
+            inner = transport if transport is not None else RequestsTransport(config.session)
+            return RecordingTransport(inner, record_dir, secret_values=secrets)
+    except (ValueError, OSError) as exc:
+        raise ConfigurationError(str(exc)) from exc
+    return transport
+
+
+def build_provider(
+    provider_spec: ProviderSpec,
+    runtime_config: ProviderRuntimeConfig,
+) -> BaseProvider:
+    """Build a provider instance from an already resolved configuration."""
+    return provider_spec.builder(runtime_config)
 
 
 def create_provider(
@@ -397,6 +744,19 @@ def create_provider(
     api_model: str | None = None,
     timeout_seconds: int | None = None,
     max_retries: int | None = None,
+    connect_timeout_seconds: float | None = None,
+    first_chunk_timeout_seconds: float | None = None,
+    stream_idle_timeout_seconds: float | None = None,
+    session: requests.Session | None = None,
+    prompt_cache: bool = False,
+    transport: str | Transport | None = None,
+    keep_alive: str | None = None,
+    http_stream_mode: str | None = None,
+    record_dir: str | None = None,
+    replay_dir: str | None = None,
+    replay_timing: str = "instant",
+    mock_profile: str | Mapping[str, object] | MockProfile | None = None,
+    mock_seed: int | None = None,
 ) -> BaseProvider:
     """
     Create a provider from a registry entry.
@@ -405,6 +765,19 @@ def create_provider(
     - lookup provider by key
     - resolve normalized config once
     - delegate provider construction to the spec builder
+
+    `session` attaches a caller-owned connection pool; without it the
+    provider opens one-off connections. `prompt_cache` enables system prompt
+    prefix caching on providers that support it. `keep_alive` sets how long
+    an Ollama server keeps the model loaded after each call;
+    `http_stream_mode` lets the `http` provider stream. `transport`
+    selects the HTTP engine by name (see `TRANSPORTS`) or takes a ready
+    instance; `requests` (the default) keeps using `session`, except for Unix
+    socket endpoints, which always get a urllib3 transport. `record_dir`
+    saves every HTTP exchange as a cassette and `replay_dir` serves saved
+    cassettes instead of calling the provider (see `wrap_cassette_transport`).
+    `mock_profile` (a built-in name, a config table or a `MockProfile`) and
+    `mock_seed` set the simulated latency and failures of the `mock` provider.
     """
     provider_spec = get_provider_spec(provider_name)
 
@@ -415,6 +788,26 @@ def create_provider(
         api_model=api_model,
         timeout_seconds=timeout_seconds,
         max_retries=max_retries,
+        connect_timeout_seconds=connect_timeout_seconds,
+        first_chunk_timeout_seconds=first_chunk_timeout_seconds,
+        stream_idle_timeout_seconds=stream_idle_timeout_seconds,
+        prompt_cache=prompt_cache,
+        keep_alive=keep_alive,
+        http_stream_mode=http_stream_mode,
+        mock_profile=mock_profile,
+        mock_seed=mock_seed,
     )
+    if session is not None:
+        runtime_config = replace(runtime_config, session=session)
+    if transport is None:
+        transport = "requests"
+    if isinstance(transport, str):
+        if transport == "requests" and unix_socket_url(runtime_config.endpoint) is None:
+            transport = None
+        else:
+            transport = resolve_transport(transport, endpoint=runtime_config.endpoint)
+    transport = wrap_cassette_transport(transport, runtime_config, record_dir, replay_dir, replay_timing)
+    if transport is not None:
+        runtime_config = replace(runtime_config, transport=transport)
 
     return provider_spec.builder(runtime_config)
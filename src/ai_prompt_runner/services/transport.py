@@ -0,0 +1,723 @@
+"""HTTP transports: the engine every network provider sends its requests through."""
+
+import asyncio
+import codecs
+import concurrent.futures
+import json
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Iterator
+from typing import Protocol
+from urllib.parse import quote, unquote
+
+import requests
+import urllib3
+
+from ai_prompt_runner.core.errors import (
+    AuthenticationError,
+    AuthorizationError,
+    ProviderError,
+    RateLimitError,
+    UpstreamServerError,
+)
+from ai_prompt_runner.services import call_control
+from ai_prompt_runner.services.call_control import AbortScope
+
+Timeout = float | tuple[float, float]
+
+UNIX_SOCKET_SCHEME = "http+unix"
+# Transports able to reach `http+unix://` endpoints.
+UNIX_SOCKET_TRANSPORTS = ("requests", "urllib3")
+
+
+class TransportError(Exception):
+    """A request failed before a complete HTTP response was received."""
+
+
+class TransportResponse(Protocol):
+    """Subset of `requests.Response` the providers rely on."""
+
+    status_code: int
+
+    def json(self): ...
+
+    def iter_lines(self, decode_unicode: bool = False) -> Iterator: ...
+
+    def iter_text(self) -> Iterator[str]: ...
+
+    def iter_bytes(self) -> Iterator[bytes]: ...
+
+    def close(self) -> None: ...
+
+
+class Transport(ABC):
+    """
+    Send provider requests over one HTTP engine.
+
+    `send` returns a response whose body has been read; `stream` returns as
+    soon as the status line and headers arrive and the body is consumed
+    through `iter_lines`, `iter_text` or the raw `iter_bytes`. Transport failures raise `TransportError`; HTTP
+    error statuses are returned like any other response. Connections used
+    inside `scope` must be abortable from another thread.
+    """
+
+    name: str
+
+    @abstractmethod
+    def send(
+        self,
+        url: str,
+        *,
+        headers: dict[str, str],
+        json: object,
+        timeout: Timeout,
+        scope: AbortScope | None = None,
+    ) -> TransportResponse:
+        """POST `json` and return the fully read response."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream(
+        self,
+        url: str,
+        *,
+        headers: dict[str, str],
+        json: object,
+        timeout: Timeout,
+        scope: AbortScope | None = None,
+    ) -> TransportResponse:
+        """POST `json` and return a response whose body is read lazily."""
+        raise NotImplementedError
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: dict[str, str],
+        body: bytes | None,
+        timeout: Timeout,
+        stream: bool = False,
+        scope: AbortScope | None = None,
+    ) -> TransportResponse:
+        """
+        Send any method with a raw `body` (batch uploads, polls and downloads).
+
+        `headers` carry the body's Content-Type. Status handling and the body
+        contract are those of `send` (or `stream` with `stream=True`).
+        """
+        raise NotImplementedError(f"The {self.name} transport does not support generic requests.")
+
+    def close(self) -> None:
+        """Release pooled connections."""
+
+
+def raise_for_mapped_status(response: TransportResponse) -> None:
+    """Map provider HTTP status codes to domain-specific exceptions."""
+    status_code = response.status_code
+
+    # Explicit mappings for statuses we want to classify precisely.
+    explicit_status_errors = {
+        401: AuthenticationError("Provider authentication failed (HTTP 401)."),
+        403: AuthorizationError("Provider authorization failed (HTTP 403)."),
+        429: RateLimitError("Provider rate limit exceeded (HTTP 429)."),
+    }
+
+    mapped_error = explicit_status_errors.get(status_code)
+    if mapped_error is not None:
+        raise mapped_error
+
+    # Fallback classification keeps behavior deterministic for unknown error statuses.
+    if 500 <= status_code <= 599:
+        raise UpstreamServerError(f"Provider server error (HTTP {status_code}).")
+    if status_code >= 400:
+        raise ProviderError(f"Provider returned HTTP {status_code}.")
+
+
+def unix_socket_url(endpoint: str) -> str | None:
+    """
+    Return the canonical `http+unix://` form of a Unix socket endpoint.
+
+    `unix:///path/to.sock` addresses the server root and
+    `unix:///path/to.sock:/v1` adds an HTTP base path. `http+unix://` URLs
+    carry the percent-encoded socket path as their host
+    (`http+unix://%2Fpath%2Fto.sock/v1`) and are returned unchanged.
+    Returns None for other schemes; raises ValueError for a Unix endpoint
+    without an absolute socket path.
+    """
+    if endpoint.startswith(f"{UNIX_SOCKET_SCHEME}://"):
+        host = endpoint[len(f"{UNIX_SOCKET_SCHEME}://") :].split("/", 1)[0]
+        if not unquote(host).startswith("/"):
+            raise ValueError(
+                "http+unix endpoints must encode an absolute socket path as the host "
+                "(http+unix://%2Fpath%2Fto.sock/...)."
+            )
+        return endpoint
+    if not endpoint.startswith("unix://"):
+        return None
+    socket_path, _, http_path = endpoint[len("unix://") :].partition(":")
+    if not socket_path.startswith("/") or (http_path and not http_path.startswith("/")):
+        raise ValueError("unix endpoints must look like unix:///path/to.sock or unix:///path/to.sock:/base/path.")
+    return f"{UNIX_SOCKET_SCHEME}://{quote(socket_path, safe='')}{http_path}"
+
+
+def _split_timeout(timeout: Timeout) -> tuple[float, float]:
+    if isinstance(timeout, tuple):
+        return timeout
+    return timeout, timeout
+
+
+def iter_byte_lines(chunks: Iterable[bytes], decode_unicode: bool = False) -> Iterator:
+    """Split a chunked body into lines, like `requests.Response.iter_lines`."""
+    pending = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            line = line.removesuffix(b"\r")
+            yield line.decode("utf-8") if decode_unicode else line
+    if pending:
+        pending = pending.removesuffix(b"\r")
+        yield pending.decode("utf-8") if decode_unicode else pending
+
+
+def iter_byte_text(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Decode a chunked UTF-8 body as it arrives, holding back split characters."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class _RequestsResponse:
+    """`requests.Response` whose mid-body failures surface as `TransportError`."""
+
+    def __init__(self, response: requests.Response) -> None:
+        self._response = response
+        self.status_code = response.status_code
+
+    @property
+    def text(self) -> str:
+        return getattr(self._response, "text", "")
+
+    def json(self):
+        return self._response.json()
+
+    def iter_lines(self, decode_unicode: bool = False) -> Iterator:
+        try:
+            yield from self._response.iter_lines(decode_unicode=decode_unicode)
+        except requests.RequestException as exc:
+            raise TransportError(str(exc)) from exc
+
+    def iter_text(self) -> Iterator[str]:
+        yield from iter_byte_text(self.iter_bytes())
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        try:
+            # chunk_size=None yields each chunk of a chunked body as it arrives.
+            yield from self._response.iter_content(chunk_size=None)
+        except requests.RequestException as exc:
+            raise TransportError(str(exc)) from exc
+
+    def close(self) -> None:
+        close = getattr(self._response, "close", None)
+        if callable(close):
+            close()
+
+
+class RequestsTransport(Transport):
+    """
+    Default transport built on `requests`.
+
+    Requests go through `session` when one is given (pooled callers) and
+    through one-off connections otherwise, exactly as before transports
+    existed.
+    """
+
+    name = "requests"
+
+    def __init__(self, session: requests.Session | None = None) -> None:
+        self.session = session
+
+    def _post(self, url: str, scope: AbortScope | None, **kwargs) -> _RequestsResponse:
+        try:
+            response = call_control.post(self.session, scope, url, **kwargs)
+        except requests.RequestException as exc:
+            raise TransportError(str(exc)) from exc
+        return _RequestsResponse(response)
+
+    def request(self, method, url, *, headers, body, timeout, stream=False, scope=None) -> TransportResponse:
+        try:
+            response = call_control.request(
+                self.session, scope, method, url, headers=headers, data=body, timeout=timeout, stream=stream
+            )
+        except requests.RequestException as exc:
+            raise TransportError(str(exc)) from exc
+        return _RequestsResponse(response)
+
+    def send(self, url, *, headers, json, timeout, scope=None) -> TransportResponse:
+        return self._post(url, scope, headers=headers, json=json, timeout=timeout)
+
+    def stream(self, url, *, headers, json, timeout, scope=None) -> TransportResponse:
+        return self._post(url, scope, headers=headers, json=json, timeout=timeout, stream=True)
+
+    def close(self) -> None:
+        if self.session is not None:
+            self.session.close()
+
+
+class _Urllib3Response:
+    def __init__(self, response: urllib3.BaseHTTPResponse) -> None:
+        self._response = response
+        self.status_code = response.status
+
+    @property
+    def text(self) -> str:
+        return self._response.data.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self._response.data)
+
+    def _iter_chunks(self) -> Iterator[bytes]:
+        # `read1` returns whatever has arrived instead of waiting for a full
+        # buffer, so stream events are seen as soon as they are sent.
+        while chunk := self._response.read1(8192):
+            yield chunk
+
+    def iter_lines(self, decode_unicode: bool = False) -> Iterator:
+        try:
+            yield from iter_byte_lines(self._iter_chunks(), decode_unicode)
+        except (urllib3.exceptions.HTTPError, OSError) as exc:
+            raise TransportError(str(exc)) from exc
+
+    def iter_text(self) -> Iterator[str]:
+        yield from iter_byte_text(self.iter_bytes())
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        try:
+            yield from self._iter_chunks()
+        except (urllib3.exceptions.HTTPError, OSError) as exc:
+            raise TransportError(str(exc)) from exc
+
+    def close(self) -> None:
+        # Dropping the connection (instead of draining it) ends an unfinished
+        # stream upstream; the pool discards closed connections on reuse.
+        self._response.close()
+        self._response.release_conn()
+
+
+class Urllib3Transport(Transport):
+    """
+    Transport using a urllib3 `PoolManager` directly.
+
+    Skips the `requests` session layer (hooks, cookies, adapters) for lower
+    per-request overhead; redirects are followed, retries are left to the
+    providers. Also the engine for Unix domain socket endpoints.
+    """
+
+    name = "urllib3"
+
+    def __init__(self, pool_maxsize: int = 10) -> None:
+        self._pool = urllib3.PoolManager(maxsize=pool_maxsize, block=False)
+        self._pool.pool_classes_by_scheme = call_control.abortable_pool_classes()
+        # `http+unix://` URLs reach a Unix domain socket (see `unix_socket_url`).
+        self._pool.key_fn_by_scheme[UNIX_SOCKET_SCHEME] = self._pool.key_fn_by_scheme["http"]
+
+    def _post(self, url, headers, payload, timeout, scope, stream: bool) -> _Urllib3Response:
+        body = json.dumps(payload).encode("utf-8")
+        request_headers = {"Content-Type": "application/json", **headers}
+        return self.request("POST", url, headers=request_headers, body=body, timeout=timeout, stream=stream, scope=scope)
+
+    def request(self, method, url, *, headers, body, timeout, stream=False, scope=None) -> _Urllib3Response:
+        connect, read = _split_timeout(timeout)
+        try:
+            with call_control.bound_scope(scope):
+                response = self._pool.request(
+                    method,
+                    url,
+                    body=body,
+                    headers=headers,
+                    timeout=urllib3.Timeout(connect=connect, read=read),
+                    retries=urllib3.Retry(total=None, connect=0, read=0, status=0, other=0, redirect=5),
+                    preload_content=not stream,
+                )
+        except (urllib3.exceptions.HTTPError, OSError) as exc:
+            raise TransportError(str(exc)) from exc
+        return _Urllib3Response(response)
+
+    def send(self, url, *, headers, json, timeout, scope=None) -> TransportResponse:
+        return self._post(url, headers, json, timeout, scope, stream=False)
+
+    def stream(self, url, *, headers, json, timeout, scope=None) -> TransportResponse:
+        return self._post(url, headers, json, timeout, scope, stream=True)
+
+    def close(self) -> None:
+        self._pool.clear()
+
+
+def _import_httpx(transport_name: str, extra: str):
+    try:
+        import httpx
+    except ImportError as exc:
+        raise ImportError(
+            f"The {transport_name} transport requires the 'httpx' package "
+            f"(pip install 'ai-prompt-runner[{extra}]')."
+        ) from exc
+    return httpx
+
+
+class _HttpxResponse:
+    def __init__(self, response, httpx) -> None:
+        self._response = response
+        self._httpx = httpx
+        self.status_code = response.status_code
+
+    @property
+    def text(self) -> str:
+        return self._response.text
+
+    def json(self):
+        return json.loads(self._response.content)
+
+    def iter_lines(self, decode_unicode: bool = False) -> Iterator:
+        httpx = self._httpx
+        try:
+            yield from iter_byte_lines(self._response.iter_bytes(), decode_unicode)
+        except (httpx.TransportError, httpx.StreamError) as exc:
+            raise TransportError(str(exc)) from exc
+
+    def iter_text(self) -> Iterator[str]:
+        yield from iter_byte_text(self.iter_bytes())
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        httpx = self._httpx
+        try:
+            yield from self._response.iter_bytes()
+        except (httpx.TransportError, httpx.StreamError) as exc:
+            raise TransportError(str(exc)) from exc
+
+    def close(self) -> None:
+        self._response.close()
+
+
+class _HttpxAbort:
+    """Close an in-flight httpx response when its abort scope fires."""
+
+    def __init__(self) -> None:
+        self.response = None
+
+    def abort(self) -> None:
+        if self.response is not None:
+            self.response.close()
+
+
+class HttpxTransport(Transport):
+    """
+    Transport using an `httpx.Client` (optional `httpx` dependency).
+
+    httpx does not expose its sockets, so an abort closes the response and
+    a blocked read ends at the next chunk or read timeout rather than
+    immediately.
+    """
+
+    name = "httpx"
+
+    def __init__(self, pool_maxsize: int = 10) -> None:
+        httpx = _import_httpx(self.name, "httpx")
+        self._httpx = httpx
+        self._client = httpx.Client(
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+        )
+
+    def _post(self, url, headers, payload, timeout, scope, stream: bool) -> _HttpxResponse:
+        return self._send_request("POST", url, headers, timeout, scope, stream, json=payload)
+
+    def request(self, method, url, *, headers, body, timeout, stream=False, scope=None) -> _HttpxResponse:
+        return self._send_request(method, url, headers, timeout, scope, stream, content=body)
+
+    def _send_request(self, method, url, headers, timeout, scope, stream: bool, **body) -> _HttpxResponse:
+        httpx = self._httpx
+        connect, read = _split_timeout(timeout)
+        request = self._client.build_request(
+            method,
+            url,
+            headers=headers,
+            timeout=httpx.Timeout(read, connect=connect),
+            **body,
+        )
+        abort = _HttpxAbort()
+        if scope is not None:
+            scope.attach(abort)
+        try:
+            response = self._client.send(request, stream=stream)
+        except httpx.TransportError as exc:
+            raise TransportError(str(exc)) from exc
+        abort.response = response
+        if scope is not None and scope.aborted:
+            response.close()
+        return _HttpxResponse(response, httpx)
+
+    def send(self, url, *, headers, json, timeout, scope=None) -> TransportResponse:
+        return self._post(url, headers, json, timeout, scope, stream=False)
+
+    def stream(self, url, *, headers, json, timeout, scope=None) -> TransportResponse:
+        return self._post(url, headers, json, timeout, scope, stream=True)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class _Http2Call:
+    """
+    One request driven on the HTTP/2 event loop from a caller thread.
+
+    `abort` (called by the scope from another thread) cancels whatever the
+    call is currently waiting for: the response headers or the next chunk.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, httpx) -> None:
+        self.loop = loop
+        self._httpx = httpx
+        self._lock = threading.Lock()
+        self._future: concurrent.futures.Future | None = None
+        self._aborted = False
+
+    def run(self, coro):
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        with self._lock:
+            self._future = future
+            aborted = self._aborted
+        if aborted:
+            future.cancel()
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError as exc:
+            raise TransportError("HTTP/2 request aborted.") from exc
+        except (self._httpx.TransportError, self._httpx.StreamError) as exc:
+            raise TransportError(str(exc)) from exc
+
+    def abort(self) -> None:
+        with self._lock:
+            self._aborted = True
+            future = self._future
+        if future is not None:
+            future.cancel()
+
+
+async def _next_chunk(chunks) -> bytes | None:
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+async def _close_chunks(chunks) -> None:
+    await chunks.aclose()
+
+
+class _Http2Response:
+    def __init__(self, response, call: _Http2Call, on_close: Callable[[], None] | None) -> None:
+        self._response = response
+        self._call = call
+        self._on_close = on_close
+        self.status_code = response.status_code
+
+    @property
+    def text(self) -> str:
+        return self._response.text
+
+    def json(self):
+        return json.loads(self._response.content)
+
+    def _iter_chunks(self) -> Iterator[bytes]:
+        chunks = self._response.aiter_bytes()
+        try:
+            while (chunk := self._call.run(_next_chunk(chunks))) is not None:
+                yield chunk
+        finally:
+            # Finalize the async generator on the loop rather than at exit.
+            asyncio.run_coroutine_threadsafe(_close_chunks(chunks), self._call.loop)
+
+    def iter_lines(self, decode_unicode: bool = False) -> Iterator:
+        yield from iter_byte_lines(self._iter_chunks(), decode_unicode)
+
+    def iter_text(self) -> Iterator[str]:
+        yield from iter_byte_text(self._iter_chunks())
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        yield from self._iter_chunks()
+
+    def close(self) -> None:
+        on_close, self._on_close = self._on_close, None
+        if on_close is None:
+            return
+        try:
+            # Resets an unfinished stream; the connection stays usable.
+            asyncio.run_coroutine_threadsafe(self._response.aclose(), self._call.loop).result()
+        except Exception:
+            pass
+        finally:
+            on_close()
+
+
+class _Http2Lane:
+    def __init__(self, client) -> None:
+        self.client = client
+        self.in_flight = 0
+
+
+class Http2Transport(Transport):
+    """
+    HTTP/2 transport multiplexing requests over a few connections (optional
+    `http2` extra).
+
+    Requests run on one `httpx.AsyncClient` driven by a private event-loop
+    thread; the synchronous httpx client can emit HTTP/2 stream IDs out of
+    order when many threads share a connection. ALPN selects HTTP/2 when the
+    server offers it and falls back to HTTP/1.1 otherwise; `prior_knowledge`
+    speaks cleartext HTTP/2 (h2c) with no fallback. Flow-control windows are
+    replenished by h2 as bodies are read.
+
+    `pool_maxsize` is the expected number of concurrent requests: it is
+    spread over `ceil(pool_maxsize / max_streams_per_connection)` clients
+    ("lanes"), each holding one HTTP/2 connection with at most
+    `max_streams_per_connection` requests in flight. Requests go to the
+    least busy lane; when every lane is full they wait (up to their
+    connect timeout) for a stream to finish.
+    """
+
+    name = "http2"
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        max_streams_per_connection: int = 100,
+        prior_knowledge: bool = False,
+    ) -> None:
+        if max_streams_per_connection <= 0:
+            raise ValueError("max_streams_per_connection must be greater than 0.")
+        httpx = _import_httpx(self.name, "http2")
+        try:
+            import h2  # noqa: F401 - imported only to check the extra is installed
+        except ImportError as exc:
+            raise ImportError(
+                "The http2 transport requires the 'h2' package "
+                "(pip install 'ai-prompt-runner[http2]')."
+            ) from exc
+        lanes = max(1, -(-pool_maxsize // max_streams_per_connection))
+        self._httpx = httpx
+        self.max_streams_per_connection = max_streams_per_connection
+        self._streams = threading.Semaphore(lanes * max_streams_per_connection)
+        self._lanes_lock = threading.Lock()
+        # Each lane keeps its streams on one connection; the connection limit
+        # only matters after an HTTP/1.1 fallback, where it matches the
+        # lane's share of concurrent requests.
+        self._lanes = [
+            _Http2Lane(
+                httpx.AsyncClient(
+                    follow_redirects=True,
+                    http1=not prior_knowledge,
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=max_streams_per_connection,
+                        max_keepalive_connections=max_streams_per_connection,
+                    ),
+                )
+            )
+            for _ in range(lanes)
+        ]
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="http2-transport", daemon=True)
+        self._thread.start()
+
+    def _checkout_lane(self, timeout: float) -> tuple["_Http2Lane", Callable[[], None]]:
+        """Reserve one stream on the least busy lane; return it with its release callback."""
+        if not self._streams.acquire(timeout=timeout):
+            raise TransportError(f"No HTTP/2 stream became available within {timeout} seconds.")
+        with self._lanes_lock:
+            lane = min(self._lanes, key=lambda candidate: candidate.in_flight)
+            lane.in_flight += 1
+
+        def release() -> None:
+            with self._lanes_lock:
+                lane.in_flight -= 1
+            self._streams.release()
+
+        return lane, release
+
+    def _post(self, url, headers, payload, timeout, scope, stream: bool) -> _Http2Response:
+        return self._send_request("POST", url, headers, timeout, scope, stream, json=payload)
+
+    def request(self, method, url, *, headers, body, timeout, stream=False, scope=None) -> _Http2Response:
+        return self._send_request(method, url, headers, timeout, scope, stream, content=body)
+
+    def _send_request(self, method, url, headers, timeout, scope, stream: bool, **body) -> _Http2Response:
+        httpx = self._httpx
+        connect, read = _split_timeout(timeout)
+        lane, release = self._checkout_lane(connect)
+        try:
+            request = lane.client.build_request(
+                method,
+                url,
+                headers=headers,
+                timeout=httpx.Timeout(read, connect=connect),
+                **body,
+            )
+            call = _Http2Call(self._loop, httpx)
+            if scope is not None:
+                scope.attach(call)
+            response = call.run(lane.client.send(request, stream=stream))
+        except BaseException:
+            release()
+            raise
+        if not stream:
+            # The body has been read; the stream slot is free again.
+            release()
+            return _Http2Response(response, call, None)
+        return _Http2Response(response, call, release)
+
+    def send(self, url, *, headers, json, timeout, scope=None) -> TransportResponse:
+        return self._post(url, headers, json, timeout, scope, stream=False)
+
+    def stream(self, url, *, headers, json, timeout, scope=None) -> TransportResponse:
+        return self._post(url, headers, json, timeout, scope, stream=True)
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        for lane in self._lanes:
+            asyncio.run_coroutine_threadsafe(lane.client.aclose(), self._loop).result()
+        asyncio.run_coroutine_threadsafe(self._loop.shutdown_asyncgens(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+TRANSPORTS: dict[str, type[Transport]] = {
+    "requests": RequestsTransport,
+    "urllib3": Urllib3Transport,
+    "httpx": HttpxTransport,
+    "http2": Http2Transport,
+}
+
+
+def create_transport(name: str, pool_maxsize: int = 10) -> Transport:
+    """
+    Build a transport by name.
+
+    Raises ValueError for unknown names and ImportError when the transport's
+    optional dependency is not installed.
+    """
+    if name == "requests":
+        return RequestsTransport(call_control.new_abortable_session(pool_maxsize=pool_maxsize))
+    transport_cls = TRANSPORTS.get(name)
+    if transport_cls is None:
+        raise ValueError(f"Unknown transport '{name}'. Supported: {', '.join(TRANSPORTS)}.")
+    return transport_cls(pool_maxsize=pool_maxsize)
@@ -26,4 +26,31 @@ def write_markdown(path: Path, payload: dict) -> None:
         f"- Provider: {payload['metadata']['provider']}\n"
         f"- Timestamp (UTC): {payload['metadata']['timestamp_utc']}\n"
     )
-    path.write_text(content, encoding="utf-8")
\ No newline at end of file
+    path.write_text(content, encoding="utf-8")
+
+
+class JsonlWriter:
+    """Append-only JSON Lines writer used for batch outputs."""
+
+    def __init__(self, path: Path) -> None:
+        ensure_parent_dir(path)
+        self.path = path
+        self._fh = path.open("w", encoding="utf-8")
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, payload: dict) -> None:
+        """Write one compact JSON object per line."""
+        self.write_line(json.dumps(payload, ensure_ascii=False))
+
+    def write_line(self, line: str) -> None:
+        """Write one already-serialized JSON line."""
+        self._fh.write(line + "\n")
+
+    def close(self) -> None:
+        """Flush and close the underlying file."""
+        self._fh.close()
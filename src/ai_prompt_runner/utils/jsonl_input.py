@@ -0,0 +1,338 @@
+"""Memory-mapped JSONL input reader for large batch prompt files."""
+
+import json
+import mmap
+import os
+import queue
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from struct import Struct
+from typing import TypeVar
+
+from ai_prompt_runner.core.errors import InputValidationError
+
+T = TypeVar("T")
+
+# Sidecar index layout:
+# - header: magic (8 bytes) + source size (u64) + source mtime_ns (u64)
+# - body: one native-endian u64 byte offset per physical line start
+_INDEX_MAGIC = b"APRIDX1" + (b"L" if sys.byteorder == "little" else b"B")
+_INDEX_HEADER = Struct("=8sQQ")
+_INDEX_FLUSH_EVERY = 65536
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    """Deterministic `i/N` slice selector (0-based shard index)."""
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if self.count <= 0:
+            raise ValueError("shard count must be greater than 0.")
+        if not 0 <= self.index < self.count:
+            raise ValueError("shard index must be in range [0, count).")
+
+    def label(self) -> str:
+        """Return the canonical `i/N` representation."""
+        return f"{self.index}/{self.count}"
+
+
+def parse_shard_spec(value: str) -> ShardSpec:
+    """Parse an `i/N` shard selector, raising ValueError on malformed input."""
+    index_text, separator, count_text = value.strip().partition("/")
+    if not separator:
+        raise ValueError("shard must use the form i/N (for example 0/4).")
+    try:
+        index = int(index_text)
+        count = int(count_text)
+    except ValueError as exc:
+        raise ValueError("shard must use integer values (for example 0/4).") from exc
+    return ShardSpec(index=index, count=count)
+
+
+@dataclass(frozen=True)
+class JsonlRecord:
+    """One physical input line and its 0-based position in the source file."""
+
+    index: int
+    raw: bytes
+
+    def decode(self) -> dict:
+        """Decode the line as a JSON object or raise InputValidationError."""
+        try:
+            data = json.loads(self.raw)
+        except ValueError as exc:
+            raise InputValidationError(
+                f"Input line {self.index + 1} is not valid JSON."
+            ) from exc
+        if not isinstance(data, dict):
+            raise InputValidationError(f"Input line {self.index + 1} must be a JSON object.")
+        return data
+
+
+def _default_index_path(source_path: Path) -> Path:
+    """Return the sidecar index location for a source file."""
+    return source_path.with_name(f"{source_path.name}.idx")
+
+
+class LineOffsetIndex:
+    """
+    Persisted, memory-mapped table of line start offsets.
+
+    The table is built once with a streaming scan and stored next to the input
+    (`<input>.idx`). Later runs and sibling shard processes reuse it as long as
+    the source size and mtime still match.
+    """
+
+    def __init__(self, index_file, mapped: mmap.mmap | None, line_count: int) -> None:
+        self._index_file = index_file
+        self._mapped = mapped
+        self._offsets = (
+            memoryview(mapped)[_INDEX_HEADER.size :].cast("Q")
+            if mapped is not None and line_count
+            else memoryview(array("Q"))
+        )
+
+    @classmethod
+    def open(
+        cls,
+        source_path: Path,
+        source: mmap.mmap | None,
+        index_path: Path | None = None,
+        persist: bool = True,
+    ) -> "LineOffsetIndex":
+        """Load a fresh sidecar index, or build it from the mapped source."""
+        stat = source_path.stat()
+        target = index_path or _default_index_path(source_path)
+        header = _INDEX_HEADER.pack(_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns)
+
+        if persist:
+            loaded = cls._load(target, header)
+            if loaded is not None:
+                return loaded
+            try:
+                cls._build(target, source, header)
+            except OSError:
+                # Read-only input directories still work: keep a private copy.
+                pass
+            else:
+                loaded = cls._load(target, header)
+                if loaded is not None:
+                    return loaded
+
+        scratch = tempfile.TemporaryFile()
+        cls._write(scratch, source, header)
+        return cls._map(scratch)
+
+    @classmethod
+    def _load(cls, target: Path, header: bytes) -> "LineOffsetIndex | None":
+        """Map an existing index when its header matches the source file."""
+        try:
+            index_file = open(target, "rb")
+        except OSError:
+            return None
+        if index_file.read(_INDEX_HEADER.size) != header:
+            index_file.close()
+            return None
+        return cls._map(index_file)
+
+    @classmethod
+    def _build(cls, target: Path, source: mmap.mmap | None, header: bytes) -> None:
+        """Write the index atomically so concurrent shard processes never see partial data."""
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", dir=target.parent)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                cls._write(fh, source, header)
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def _write(fh, source: mmap.mmap | None, header: bytes) -> None:
+        """Stream line start offsets to `fh` in bounded chunks."""
+        fh.write(header)
+        if source is None:
+            fh.flush()
+            return
+        size = len(source)
+        pending = array("Q")
+        position = 0
+        while position < size:
+            pending.append(position)
+            if len(pending) >= _INDEX_FLUSH_EVERY:
+                pending.tofile(fh)
+                pending = array("Q")
+            newline = source.find(b"\n", position)
+            if newline == -1:
+                break
+            position = newline + 1
+        pending.tofile(fh)
+        fh.flush()
+
+    @classmethod
+    def _map(cls, index_file) -> "LineOffsetIndex":
+        """Memory-map an index file positioned anywhere."""
+        size = os.fstat(index_file.fileno()).st_size
+        line_count = (size - _INDEX_HEADER.size) // 8
+        if line_count == 0:
+            return cls(index_file, None, 0)
+        mapped = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(index_file, mapped, line_count)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, line: int) -> int:
+        return self._offsets[line]
+
+    def first_line_at_or_after(self, byte_offset: int) -> int:
+        """Return the first line whose start offset is >= `byte_offset`."""
+        return bisect_left(self._offsets, byte_offset)
+
+    def close(self) -> None:
+        """Release the index mapping and file handle."""
+        self._offsets.release()
+        if self._mapped is not None:
+            self._mapped.close()
+        self._index_file.close()
+
+
+class JsonlInputReader:
+    """
+    Random-access JSONL reader backed by `mmap` and a line-offset index.
+
+    Memory use is independent of input size: lines are sliced from the mapping
+    on demand and the offset table itself is memory-mapped from disk.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        index_path: str | Path | None = None,
+        persist_index: bool = True,
+    ) -> None:
+        self.path = Path(path)
+        try:
+            self._file = open(self.path, "rb")
+        except OSError as exc:
+            raise InputValidationError(f"Input file could not be read: {exc}") from exc
+
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._mapped: mmap.mmap | None = None
+        if self._size:
+            self._mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self._mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                self._mapped.madvise(mmap.MADV_SEQUENTIAL)
+
+        self._index = LineOffsetIndex.open(
+            self.path,
+            self._mapped,
+            index_path=Path(index_path) if index_path is not None else None,
+            persist=persist_index,
+        )
+
+    def __enter__(self) -> "JsonlInputReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def line_count(self) -> int:
+        """Number of physical lines in the input (blank lines included)."""
+        return len(self._index)
+
+    def shard_line_range(self, shard: ShardSpec | None = None) -> tuple[int, int]:
+        """
+        Return the `[start, end)` line range owned by a byte-range shard.
+
+        A line belongs to the shard whose byte range contains its first byte,
+        so every process computes the same split without coordination.
+        """
+        if shard is None:
+            return 0, self.line_count
+        start_byte = self._size * shard.index // shard.count
+        end_byte = self._size * (shard.index + 1) // shard.count
+        return (
+            self._index.first_line_at_or_after(start_byte),
+            self._index.first_line_at_or_after(end_byte),
+        )
+
+    def read_line(self, line: int) -> bytes:
+        """Return one physical line without its trailing newline."""
+        start = self._index[line]
+        end = self._index[line + 1] if line + 1 < self.line_count else self._size
+        return self._mapped[start:end].rstrip(b"\r\n")
+
+    def iter_records(self, shard: ShardSpec | None = None) -> Iterator[JsonlRecord]:
+        """Yield non-blank lines for the selected shard in file order."""
+        start, end = self.shard_line_range(shard)
+        for line in range(start, end):
+            raw = self.read_line(line)
+            if not raw.strip():
+                continue
+            yield JsonlRecord(index=line, raw=raw)
+
+    def close(self) -> None:
+        """Release the input mapping, index mapping and file handles."""
+        self._index.close()
+        if self._mapped is not None:
+            self._mapped.close()
+        self._file.close()
+
+
+def iter_read_ahead(items: Iterable[T], max_pending: int) -> Iterator[T]:
+    """
+    Produce `items` on a background thread through a bounded queue.
+
+    The producer blocks once `max_pending` items are buffered, which gives the
+    consumer backpressure while overlapping input decoding with execution.
+    Producer exceptions are re-raised in the consumer.
+    """
+    if max_pending <= 0:
+        raise ValueError("max_pending must be greater than 0.")
+
+    buffer: queue.Queue = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+
+    def _put(entry: tuple) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        try:
+            for item in items:
+                if not _put(("item", item)):
+                    return
+        except BaseException as exc:  # re-raised on the consumer side
+            _put(("error", exc))
+            return
+        _put(("done", None))
+
+    producer = threading.Thread(target=_produce, name="jsonl-read-ahead", daemon=True)
+    producer.start()
+    try:
+        while True:
+            kind, value = buffer.get()
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        stop.set()
+        producer.join()
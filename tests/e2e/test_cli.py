@@ -3,8 +3,13 @@ import json
 import argparse
 import runpy
 import sys
+import threading
+import time
 import requests
 
+from email.parser import BytesParser
+from email.policy import default as default_email_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 from ai_prompt_runner import cli
@@ -14,6 +19,7 @@ from ai_prompt_runner.core.errors import (
     ProviderError,
     RateLimitError,
 )
+from ai_prompt_runner.core.models import UsageMetadata
 
 
 class FakeProvider:
@@ -126,6 +132,130 @@ def test_cli_main_forwards_timeout_and_retries_to_provider_factory(monkeypatch,
     assert captured["max_retries"] == 2
 
 
+def test_cli_deadline_aborts_run_and_logs_timeout_code(monkeypatch, tmp_path: Path, capsys) -> None:
+    """--deadline bounds the run; --connect-timeout is forwarded to the factory."""
+    captured: dict = {}
+
+    class SlowFailingProvider:
+        def generate(self, prompt: str) -> str:
+            time.sleep(0.3)
+            raise ProviderError("Provider request failed: connection aborted")
+
+    def fake_create_provider(**kwargs):
+        captured.update(kwargs)
+        return SlowFailingProvider()
+
+    monkeypatch.setattr(cli, "create_provider", fake_create_provider)
+
+    log_root = tmp_path / "logs"
+    exit_code = cli.main(
+        [
+            "--prompt",
+            "Hello Deadline",
+            "--provider",
+            "http",
+            "--connect-timeout",
+            "1.5",
+            "--deadline",
+            "0.1",
+            "--log-run-dir",
+            str(log_root),
+        ]
+    )
+
+    assert exit_code == 1
+    assert captured["connect_timeout_seconds"] == 1.5
+    assert "exceeded its deadline of 0.1 second" in capsys.readouterr().err
+    run_dir = next(log_root.glob("run-*"))
+    error_payload = json.loads((run_dir / "error.json").read_text(encoding="utf-8"))
+    assert error_payload["error"]["code"] == "timeout"
+
+
+def test_cli_rejects_non_positive_deadline(capsys) -> None:
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["--prompt", "Hello", "--deadline", "0"])
+
+    assert exc_info.value.code == 2
+    assert "value must be greater than 0." in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    ("extra_args", "message"),
+    [
+        (["--temperature", "0"], "--stream-replays requires --stream."),
+        (["--stream"], "--stream-replays requires --temperature 0"),
+    ],
+)
+def test_cli_rejects_stream_replays_without_deterministic_stream(capsys, extra_args, message) -> None:
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["--prompt", "Hello", "--stream-replays", "2", *extra_args])
+
+    assert exc_info.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+def test_cli_stream_stop_sequence_truncates_output_and_records_metadata(
+    monkeypatch,
+    tmp_path: Path,
+    capsys,
+) -> None:
+    """--stop ends the stream early and the saved payload records why."""
+    monkeypatch.setattr(cli, "create_provider", lambda **_: FakeProvider())
+    out_json = tmp_path / "response.json"
+
+    exit_code = cli.main(
+        [
+            "--prompt",
+            "Hello E2E",
+            "--stream",
+            "--stop",
+            "E2E",
+            "--max-response-chars",
+            "100",
+            "--out-json",
+            str(out_json),
+            "--out-md",
+            str(tmp_path / "response.md"),
+        ]
+    )
+
+    assert exit_code == 0
+    assert capsys.readouterr().out.startswith("Echo: Hello \n")
+    payload = json.loads(out_json.read_text(encoding="utf-8"))
+    assert payload["response"] == "Echo: Hello "
+    assert payload["metadata"]["truncation"] == {"reason": "stop_sequence", "stop_sequence": "E2E"}
+
+
+def test_cli_samples_writes_responses_array(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(cli, "create_provider", lambda **_: FakeProvider())
+    out_json = tmp_path / "response.json"
+
+    exit_code = cli.main(
+        [
+            "--prompt",
+            "Hello",
+            "--samples",
+            "2",
+            "--out-json",
+            str(out_json),
+            "--out-md",
+            str(tmp_path / "response.md"),
+        ]
+    )
+
+    assert exit_code == 0
+    payload = json.loads(out_json.read_text(encoding="utf-8"))
+    assert [sample["response"] for sample in payload["responses"]] == [payload["response"]] * 2
+
+
+def test_cli_rejects_samples_with_stream(capsys) -> None:
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["--prompt", "Hello", "--stream", "--samples", "2"])
+
+    assert exc_info.value.code == 2
+    assert "--samples greater than 1 is not supported with --stream." in capsys.readouterr().err
+
+
 def test_cli_main_forwards_system_and_runtime_controls_to_runner(
     monkeypatch,
     tmp_path: Path,
@@ -322,6 +452,14 @@ def test_http_url_returns_normalized_http_url() -> None:
     assert cli._http_url("  https://example.test/api  ") == "https://example.test/api"
 
 
+def test_http_url_accepts_unix_socket_endpoints() -> None:
+    """Accept Unix domain socket endpoints and reject ones without an absolute path."""
+    assert cli._http_url("unix:///run/llm.sock:/v1") == "unix:///run/llm.sock:/v1"
+    assert cli._http_url("http+unix://%2Frun%2Fllm.sock/v1") == "http+unix://%2Frun%2Fllm.sock/v1"
+    with pytest.raises(argparse.ArgumentTypeError, match="unix endpoints must look like"):
+        cli._http_url("unix://llm.sock")
+
+
 def test_cli_main_reads_prompt_from_file(monkeypatch, tmp_path: Path) -> None:
     """Read prompt content from --prompt-file and run the CLI successfully."""
     monkeypatch.setattr(cli, "create_provider", lambda **_: FakeProvider())
@@ -867,6 +1005,72 @@ def test_cli_rejects_invalid_toml_config_file(tmp_path: Path) -> None:
     assert exc_info.value.code == 2
 
 
+@pytest.mark.parametrize(
+    ("setting", "message"),
+    [
+        ("connect_timeout = 0", "value must be greater than 0"),
+        ("first_chunk_timeout = -1", "value must be greater than 0"),
+        ("stream_idle_timeout = \"soon\"", "value must be a number"),
+        ("deadline = 0", "value must be greater than 0"),
+        ("stop = \"END\"", "config key 'stop' must be a list of strings"),
+        ("stop = [\"\"]", "stop sequence must not be empty"),
+        ("max_response_chars = 0", "must be a positive integer"),
+        ("samples = 0", "must be a positive integer"),
+        ("prompt_cache = \"yes\"", "config key 'prompt_cache' must be a boolean"),
+        ("http_stream_mode = \"jsonl\"", "config key 'http_stream_mode' must be one of"),
+        ("transport = \"carrier-pigeon\"", "config key 'transport' must be one of"),
+        ("context_window = 0", "must be a positive integer"),
+        ("context_policy = \"ignore\"", "config key 'context_policy' must be one of"),
+        ("tokens_per_minute = 0", "must be a positive integer"),
+        ("similarity_threshold = 1.5", "value must be greater than 0 and at most 1"),
+        ("replay_timing = \"slow\"", "config key 'replay_timing' must be one of"),
+        ("mock_profile = \"glacial\"", "config key 'mock_profile'"),
+        ("mock_seed = -1", "must be greater than or equal to 0"),
+    ],
+)
+def test_cli_rejects_invalid_runtime_config_values(tmp_path: Path, capsys, setting: str, message: str) -> None:
+    """Config values go through the same validators as their flags."""
+    config_file = tmp_path / "config.toml"
+    config_file.write_text(f"[ai_prompt_runner]\n{setting}\n", encoding="utf-8")
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["--config", str(config_file), "--prompt", "Hello"])
+
+    assert exc_info.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+def test_cli_coerces_runtime_config_values(tmp_path: Path, capsys) -> None:
+    """Valid config values are normalized like their flags and shown in the effective config."""
+    config_file = tmp_path / "config.toml"
+    config_file.write_text(
+        "[ai_prompt_runner]\n"
+        'provider = "mock"\n'
+        "connect_timeout = 2\nfirst_chunk_timeout = 3\nstream_idle_timeout = 4\ndeadline = 30\n"
+        'stop = ["END"]\nmax_response_chars = 100\nsamples = 2\nkeep_alive = "5m"\n'
+        "context_window = 8192\ntokens_per_minute = 1000\nmock_seed = 7\n"
+        f'record_dir = "{(tmp_path / "cassettes").as_posix()}"\n'
+        f'log_run_dir = "{(tmp_path / "logs").as_posix()}"\n',
+        encoding="utf-8",
+    )
+
+    assert cli.main(["--config", str(config_file), "--prompt", "Hello", "--dry-run", "--print-effective-config"]) == 0
+
+    effective = capsys.readouterr().out
+    for expected in (
+        '"connect_timeout_seconds": 2.0',
+        '"first_chunk_timeout_seconds": 3.0',
+        '"deadline_seconds": 30.0',
+        '"keep_alive": "5m"',
+        '"stop": [\n        "END"\n      ]',
+        '"samples": 2',
+        '"context_window": 8192',
+        '"tokens_per_minute": 1000',
+        '"mode": "record"',
+    ):
+        assert expected in effective
+
+
 def test_cli_uses_config_file_values_for_runtime_options(monkeypatch, tmp_path: Path) -> None:
     """Use TOML config values for runtime options when CLI/env do not override them."""
 
@@ -923,6 +1127,405 @@ def test_cli_uses_config_file_values_for_runtime_options(monkeypatch, tmp_path:
     assert captured["max_retries"] == 2
 
 
+def test_cli_forwards_prompt_cache_from_flag_and_config(monkeypatch, tmp_path: Path) -> None:
+    """--prompt-cache and the prompt_cache config key reach the provider factory."""
+    captured: list[dict] = []
+
+    class FakeProvider:
+        def generate(self, prompt: str) -> str:
+            return f"Echo: {prompt}"
+
+    def fake_create_provider(**kwargs):
+        captured.append(kwargs)
+        return FakeProvider()
+
+    monkeypatch.setattr(cli, "create_provider", fake_create_provider)
+
+    config_file = tmp_path / "config.toml"
+    config_file.write_text("[ai_prompt_runner]\nprompt_cache = true\n", encoding="utf-8")
+    outputs = ["--out-json", str(tmp_path / "r.json"), "--out-md", str(tmp_path / "r.md")]
+
+    assert cli.main(["--prompt", "Hello", "--api-key", "dummy", *outputs]) == 0
+    assert cli.main(["--prompt", "Hello", "--api-key", "dummy", "--prompt-cache", *outputs]) == 0
+    assert cli.main(["--config", str(config_file), "--prompt", "Hello", "--api-key", "dummy", *outputs]) == 0
+
+    assert [kwargs["prompt_cache"] for kwargs in captured] == [False, True, True]
+
+
+def test_cli_rejects_non_boolean_prompt_cache_config(tmp_path: Path) -> None:
+    config_file = tmp_path / "config.toml"
+    config_file.write_text("[ai_prompt_runner]\nprompt_cache = \"yes\"\n", encoding="utf-8")
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["--config", str(config_file), "--prompt", "Hello"])
+
+    assert exc_info.value.code == 2
+
+
+def test_cli_forwards_keep_alive_from_flag_and_config(monkeypatch, tmp_path: Path) -> None:
+    """--keep-alive and the keep_alive config key reach the provider factory."""
+    captured: list[dict] = []
+
+    class FakeProvider:
+        def generate(self, prompt: str) -> str:
+            return f"Echo: {prompt}"
+
+    def fake_create_provider(**kwargs):
+        captured.append(kwargs)
+        return FakeProvider()
+
+    monkeypatch.setattr(cli, "create_provider", fake_create_provider)
+
+    config_file = tmp_path / "config.toml"
+    config_file.write_text("[ai_prompt_runner]\nkeep_alive = -1\n", encoding="utf-8")
+    outputs = ["--out-json", str(tmp_path / "r.json"), "--out-md", str(tmp_path / "r.md")]
+
+    assert cli.main(["--prompt", "Hello", "--provider", "ollama", *outputs]) == 0
+    assert cli.main(["--prompt", "Hello", "--provider", "ollama", "--keep-alive", "30m", *outputs]) == 0
+    assert cli.main(["--config", str(config_file), "--prompt", "Hello", "--provider", "ollama", *outputs]) == 0
+
+    assert [kwargs["keep_alive"] for kwargs in captured] == [None, "30m", "-1"]
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["--prompt", "Hello", "--provider", "ollama", "--keep-alive", "forever"])
+    assert exc_info.value.code == 2
+
+
+def test_cli_forwards_http_stream_mode_from_flag_and_config(monkeypatch, tmp_path: Path) -> None:
+    """--http-stream-mode and the http_stream_mode config key reach the provider factory."""
+    captured: list[dict] = []
+
+    class FakeProvider:
+        def generate(self, prompt: str) -> str:
+            return f"Echo: {prompt}"
+
+    def fake_create_provider(**kwargs):
+        captured.append(kwargs)
+        return FakeProvider()
+
+    monkeypatch.setattr(cli, "create_provider", fake_create_provider)
+
+    config_file = tmp_path / "config.toml"
+    config_file.write_text('[ai_prompt_runner]\nhttp_stream_mode = "sse"\n', encoding="utf-8")
+    base = ["--prompt", "Hello", "--provider", "http", "--api-key", "k", "--api-endpoint", "http://stub"]
+    outputs = ["--out-json", str(tmp_path / "r.json"), "--out-md", str(tmp_path / "r.md")]
+
+    assert cli.main([*base, *outputs]) == 0
+    assert cli.main([*base, "--http-stream-mode", "ndjson", *outputs]) == 0
+    assert cli.main(["--config", str(config_file), *base, *outputs]) == 0
+
+    assert [kwargs["http_stream_mode"] for kwargs in captured] == [None, "ndjson", "sse"]
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main([*base, "--http-stream-mode", "jsonl"])
+    assert exc_info.value.code == 2
+
+
+def test_cli_strict_capabilities_accepts_http_stream_with_stream_mode(tmp_path: Path) -> None:
+    """Streaming on `http` is unknown by default and supported once a stream mode is set."""
+    base = ["--prompt", "Hello", "--provider", "http", "--api-key", "k", "--api-endpoint", "http://stub"]
+
+    assert cli.main([*base, "--stream", "--strict-capabilities", "--dry-run"]) != 0
+    assert cli.main([*base, "--stream", "--strict-capabilities", "--dry-run", "--http-stream-mode", "text"]) == 0
+
+
+def test_cli_dry_run_reports_token_estimate_and_rejects_over_budget(monkeypatch, capsys, tmp_path: Path) -> None:
+    """--dry-run applies the same pre-flight context check as a run, without sending."""
+    monkeypatch.setattr(cli, "create_provider", lambda **_: FakeProvider())
+    base = ["--provider", "openai", "--api-key", "k", "--dry-run", "--max-tokens", "100"]
+
+    assert cli.main([*base, "--prompt", "a" * 400, "--context-window", "500"]) == 0
+    payload = json.loads(capsys.readouterr().out)
+    assert payload["token_estimate"]["prompt_tokens"] == 104
+    assert payload["token_estimate"]["total_tokens"] == 204
+    assert payload["token_estimate"]["fits"] is True
+    assert payload["effective_config"]["token_budget"]["context_window"] == 500
+    assert payload["effective_config"]["token_budget"]["token_family"] == "openai"
+
+    assert cli.main([*base, "--prompt", "a" * 4000, "--context-window", "500"]) == 1
+    assert "exceed the 500-token context window" in capsys.readouterr().err
+
+    config_file = tmp_path / "config.toml"
+    config_file.write_text(
+        '[ai_prompt_runner]\ncontext_window = 500\ncontext_policy = "trim"\ntokens_per_minute = 1000\n',
+        encoding="utf-8",
+    )
+    assert cli.main(["--config", str(config_file), *base, "--prompt", "a" * 4000]) == 0
+    payload = json.loads(capsys.readouterr().out)
+    assert payload["token_estimate"]["fits"] is True
+    assert payload["token_estimate"]["trimmed_tokens"] > 0
+    assert payload["effective_config"]["token_budget"]["tokens_per_minute"] == 1000
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main([*base, "--prompt", "hi", "--context-policy", "shrink"])
+    assert exc_info.value.code == 2
+
+
+def test_cli_run_trims_prompt_to_context_window(monkeypatch, tmp_path: Path) -> None:
+    """Under --context-policy trim the provider receives the shortened prompt."""
+    received: list[str] = []
+
+    class RecordingProvider:
+        def generate(self, prompt: str) -> str:
+            received.append(prompt)
+            return "ok"
+
+    monkeypatch.setattr(cli, "create_provider", lambda **_: RecordingProvider())
+    out_json = tmp_path / "r.json"
+
+    exit_code = cli.main(
+        [
+            "--provider", "http", "--api-key", "k", "--api-endpoint", "http://stub",
+            "--prompt", "start " + "x" * 2000 + " end",
+            "--context-window", "200", "--context-policy", "trim",
+            "--out-json", str(out_json), "--out-md", str(tmp_path / "r.md"),
+        ]
+    )
+
+    assert exit_code == 0
+    assert received[0].startswith("start") and received[0].endswith("end")
+    assert len(received[0]) < 700
+    assert json.loads(out_json.read_text())["metadata"]["prompt_trim"]["context_window"] == 200
+
+
+def test_cli_similarity_cache_answers_near_duplicate_prompts(monkeypatch, tmp_path: Path) -> None:
+    """A second run whose prompt differs only by a timestamp is served from --similarity-cache."""
+    received: list[str] = []
+
+    class RecordingProvider:
+        def generate(self, prompt: str) -> str:
+            received.append(prompt)
+            return "cached answer"
+
+    monkeypatch.setattr(cli, "create_provider", lambda **_: RecordingProvider())
+    cache_path = tmp_path / "similarity.sqlite"
+    payloads = []
+    for timestamp in ("2024-05-01T10:22:03Z", "2025-02-11T08:00:00Z"):
+        out_json = tmp_path / f"{timestamp[:4]}.json"
+        exit_code = cli.main(
+            [
+                "--provider", "http", "--api-key", "k", "--api-endpoint", "http://stub",
+                "--prompt", f"Summarize the incident report filed at {timestamp} for the checkout service.",
+                "--similarity-cache", str(cache_path), "--similarity-threshold", "0.95",
+                "--out-json", str(out_json), "--out-md", str(tmp_path / "r.md"),
+            ]
+        )
+        assert exit_code == 0
+        payloads.append(json.loads(out_json.read_text()))
+
+    assert len(received) == 1
+    assert "similarity_cache" not in payloads[0]["metadata"]
+    assert payloads[1]["response"] == "cached answer"
+    assert payloads[1]["metadata"]["similarity_cache"]["similarity"] == 1.0
+
+
+def test_cli_records_and_replays_provider_exchanges(tmp_path: Path) -> None:
+    """--record-dir captures a real exchange; --replay-dir serves it after the upstream is gone."""
+
+    class ChatHandler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802 - http.server API
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            body = json.dumps(
+                {"model": request["model"], "choices": [{"message": {"content": "recorded answer"}}]}
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cassettes = tmp_path / "cassettes"
+    common = ["--provider", "openai", "--api-model", "m1", "--prompt", "Hello", "--out-md", str(tmp_path / "r.md")]
+    try:
+        exit_code = cli.main(
+            [
+                *common, "--api-key", "sk-live-secret", "--api-endpoint", f"http://127.0.0.1:{server.server_address[1]}/v1",
+                "--record-dir", str(cassettes), "--out-json", str(tmp_path / "recorded.json"),
+            ]
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert exit_code == 0
+    assert "sk-live-secret" not in "".join(path.read_text() for path in cassettes.glob("*.json"))
+
+    exit_code = cli.main(
+        [
+            *common, "--api-key", "placeholder", "--api-endpoint", "http://127.0.0.1:9/v1",
+            "--replay-dir", str(cassettes), "--replay-timing", "recorded", "--out-json", str(tmp_path / "replayed.json"),
+        ]
+    )
+    assert exit_code == 0
+    assert json.loads((tmp_path / "replayed.json").read_text())["response"] == "recorded answer"
+
+    exit_code = cli.main([*common, "--api-key", "k", "--replay-dir", str(cassettes), "--record-dir", str(cassettes)])
+    assert exit_code != 0
+
+
+def test_cli_runs_mock_provider_with_config_profile(tmp_path: Path, capsys) -> None:
+    """A mock_profile table in the config file shapes the mock provider; --mock-seed makes it reproducible."""
+    config_file = tmp_path / "config.toml"
+    config_file.write_text(
+        "[ai_prompt_runner]\nprovider = \"mock\"\nmock_seed = 4\n\n"
+        "[ai_prompt_runner.mock_profile]\nbase = \"fast\"\nfirst_chunk_ms = 1\ntokens_per_second = 100000\n",
+        encoding="utf-8",
+    )
+    responses = []
+    for run in range(2):
+        out_json = tmp_path / f"r{run}.json"
+        exit_code = cli.main(
+            ["--config", str(config_file), "--prompt", "Hello", "--stream", "--out-json", str(out_json), "--out-md", str(tmp_path / "r.md")]
+        )
+        assert exit_code == 0
+        responses.append(json.loads(out_json.read_text()))
+
+    assert responses[0]["response"] == responses[1]["response"]
+    assert responses[0]["response"].startswith("Echo: Hello Echo: Hello")
+    assert responses[0]["metadata"]["usage"]["completion_tokens"] > 20
+
+    assert cli.main(["--config", str(config_file), "--prompt", "Hello", "--dry-run", "--print-effective-config"]) == 0
+    effective = capsys.readouterr().out
+    assert '"tokens_per_second": 100000.0' in effective
+    with pytest.raises(SystemExit):
+        cli.main(["--provider", "mock", "--prompt", "Hello", "--mock-profile", "glacial"])
+
+
+def test_cli_loadtest_reports_latency_errors_and_throughput(tmp_path: Path, capsys) -> None:
+    """loadtest offers a JSONL corpus at the target rate and prints the report to stdout."""
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text('{"prompt": "one"}\n{"prompt": "two"}\nnot json\n', encoding="utf-8")
+    config_file = tmp_path / "config.toml"
+    config_file.write_text(
+        "[ai_prompt_runner]\nprovider = \"mock\"\n\n"
+        "[ai_prompt_runner.mock_profile]\nfirst_chunk_ms = 5\ntokens_per_second = 100000\nrate_limit_probability = 0.5\n",
+        encoding="utf-8",
+    )
+
+    exit_code = cli.main(
+        [
+            "loadtest",
+            "--config", str(config_file),
+            "--input-jsonl", str(corpus),
+            "--stream",
+            "--mock-seed", "2",
+            "--rps", "40",
+            "--duration", "0.5",
+            "--arrival", "ramp",
+            "--ramp-from-rps", "20",
+            "--concurrency", "4",
+            "--progress-interval", "0.2",
+        ]
+    )
+
+    captured = capsys.readouterr()
+    assert exit_code == 0
+    report = json.loads(captured.out)
+    assert report["provider"] == "mock"
+    assert report["schedule"]["arrival"] == "ramp"
+    assert report["schedule"]["stream"] is True
+    assert report["requests"]["scheduled"] == report["requests"]["completed"] == 15
+    assert report["requests"]["failed"] == report["error_codes"].get("rate_limit", 0)
+    assert 0 < report["requests"]["failed"] < 15
+    assert report["ttft_ms"]["count"] == report["requests"]["succeeded"]
+    assert report["latency_ms"]["p50"] >= 5
+    assert report["throughput"]["max_in_flight"] <= 4
+    assert "1 invalid corpus record(s) were skipped" in captured.err
+    assert "sent=" in captured.err
+
+    with pytest.raises(SystemExit):
+        cli.main(["loadtest", "--provider", "mock", "--prompt", "hi", "--rps", "1", "--processes", "2"])
+
+
+@pytest.mark.parametrize(
+    ("options", "message"),
+    [
+        (["--similarity-cache", "cache.db"], "--similarity-cache does not apply to loadtest"),
+        (["--schedule", "cache"], "do not apply to loadtest"),
+        (["--config", "{config}"], "config key 'transport' must be one of"),
+    ],
+)
+def test_cli_loadtest_rejects_options_that_do_not_apply(
+    tmp_path: Path, capsys, options: list[str], message: str
+) -> None:
+    config_file = tmp_path / "config.toml"
+    config_file.write_text('[ai_prompt_runner]\ntransport = "carrier-pigeon"\n', encoding="utf-8")
+    options = [option.format(config=config_file) for option in options]
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["loadtest", "--provider", "mock", "--prompt", "hi", "--rps", "1", *options])
+
+    assert exc_info.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+def test_cli_loadtest_reports_unusable_providers_and_corpora(tmp_path: Path, capsys) -> None:
+    """Provider, capability and corpus problems stop the test before any request."""
+    assert cli.main(["loadtest", "--provider", "carrier-pigeon", "--prompt", "hi", "--rps", "1"]) == 1
+    assert "carrier-pigeon" in capsys.readouterr().err
+
+    strict = ["--strict-capabilities", "--temperature", "0.5"]
+    assert cli.main(["loadtest", "--provider", "mock", "--prompt", "hi", "--rps", "1", *strict]) == 1
+    assert "capability check failed" in capsys.readouterr().err
+
+    assert cli.main(["loadtest", "--provider", "openai", "--prompt", "hi", "--rps", "1", "--api-key", " "]) == 1
+    assert capsys.readouterr().err.startswith("Error:")
+
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text("not json\n", encoding="utf-8")
+    assert cli.main(["loadtest", "--provider", "mock", "--input-jsonl", str(corpus), "--rps", "1"]) == 1
+    assert "the prompt corpus has no valid records" in capsys.readouterr().err
+
+
+def test_cli_loadtest_reports_worker_setup_failures(monkeypatch, capsys) -> None:
+    """A provider that cannot be built in a worker fails the run with a configuration error."""
+
+    def failing_pooled_provider(factory, **kwargs):
+        raise cli.ConfigurationError("worker pool unavailable")
+
+    monkeypatch.setattr(cli, "pooled_provider", failing_pooled_provider)
+
+    exit_code = cli.main(["loadtest", "--provider", "mock", "--prompt", "hi", "--rps", "20", "--duration", "0.1"])
+
+    captured = capsys.readouterr()
+    assert exit_code == 1
+    assert captured.out == ""
+    assert "Error: Load test worker setup failed: worker pool unavailable" in captured.err
+
+
+def test_cli_forwards_transport_from_flag_and_config(monkeypatch, tmp_path: Path) -> None:
+    """--transport and the transport config key reach the provider factory; unknown names are rejected."""
+    captured: list[dict] = []
+
+    class FakeProvider:
+        def generate(self, prompt: str) -> str:
+            return f"Echo: {prompt}"
+
+    def fake_create_provider(**kwargs):
+        captured.append(kwargs)
+        return FakeProvider()
+
+    monkeypatch.setattr(cli, "create_provider", fake_create_provider)
+
+    config_file = tmp_path / "config.toml"
+    config_file.write_text("[ai_prompt_runner]\ntransport = \"urllib3\"\n", encoding="utf-8")
+    outputs = ["--out-json", str(tmp_path / "r.json"), "--out-md", str(tmp_path / "r.md")]
+
+    assert cli.main(["--prompt", "Hello", "--api-key", "dummy", *outputs]) == 0
+    assert cli.main(["--prompt", "Hello", "--api-key", "dummy", "--transport", "urllib3", *outputs]) == 0
+    assert cli.main(["--config", str(config_file), "--prompt", "Hello", "--api-key", "dummy", *outputs]) == 0
+    assert [kwargs["transport"] for kwargs in captured] == ["requests", "urllib3", "urllib3"]
+
+    config_file.write_text("[ai_prompt_runner]\ntransport = \"curl\"\n", encoding="utf-8")
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["--config", str(config_file), "--prompt", "Hello"])
+    assert exc_info.value.code == 2
+
+
 def test_cli_rejects_api_key_in_config_file(tmp_path: Path) -> None:
     """Reject secrets in TOML config and require --api-key/AI_API_KEY instead."""
     config_file = tmp_path / "config.toml"
@@ -1693,3 +2296,660 @@ def test_cli_log_run_dir_classifies_runtime_errors_end_to_end(
     assert len(run_dirs) == 1
     error_payload = json.loads((run_dirs[0] / "error.json").read_text(encoding="utf-8"))
     assert error_payload["error"]["code"] == expected_code
+
+
+def test_cli_batch_mode_writes_jsonl_results_and_summary(
+    monkeypatch,
+    tmp_path: Path,
+    capsys,
+) -> None:
+    """--input-jsonl runs every record and reports failures per line."""
+    monkeypatch.setattr(cli, "create_provider", lambda **_: FakeProvider())
+
+    source = tmp_path / "prompts.jsonl"
+    source.write_text(
+        '{"prompt": "one"}\n'
+        '{"prompt": "two", "system": "Be terse."}\n'
+        "\n"
+        '{"oops": true}\n',
+        encoding="utf-8",
+    )
+    out_jsonl = tmp_path / "out" / "results.jsonl"
+    log_root = tmp_path / "logs"
+
+    exit_code = cli.main(
+        [
+            "--input-jsonl",
+            str(source),
+            "--provider",
+            "http",
+            "--out-jsonl",
+            str(out_jsonl),
+            "--log-run-dir",
+            str(log_root),
+        ]
+    )
+
+    assert exit_code == 1
+    lines = [json.loads(line) for line in out_jsonl.read_text(encoding="utf-8").splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 3]
+    assert lines[0]["payload"]["response"] == "Echo: one"
+    assert lines[1]["payload"]["response"] == "Echo: SYSTEM=Be terse. | USER=two"
+    assert lines[2]["status"] == "error"
+    assert lines[2]["error"]["code"] == "invalid_request"
+
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["total"] == 3
+    assert summary["failed"] == 1
+
+    run_dir = next(log_root.iterdir())
+    assert json.loads((run_dir / "summary.json").read_text(encoding="utf-8")) == summary
+    request_log = json.loads((run_dir / "request.json").read_text(encoding="utf-8"))
+    assert request_log["batch"] == {
+        "input_jsonl": str(source),
+        "shard": None,
+        "shard_by": "bytes",
+        "dedup": False,
+        "schedule": "input",
+    }
+
+
+def test_cli_batch_mode_processes_only_selected_shard(monkeypatch, tmp_path: Path) -> None:
+    """Two byte-range shards split the input without overlap."""
+    monkeypatch.setattr(cli, "create_provider", lambda **_: FakeProvider())
+
+    source = tmp_path / "prompts.jsonl"
+    source.write_text(
+        "".join(f'{{"prompt": "p{i}"}}\n' for i in range(10)),
+        encoding="utf-8",
+    )
+
+    indexes: list[int] = []
+    for shard in ("0/2", "1/2"):
+        out_jsonl = tmp_path / f"shard-{shard.replace('/', '-')}.jsonl"
+        exit_code = cli.main(
+            [
+                "--input-jsonl",
+                str(source),
+                "--provider",
+                "http",
+                "--shard",
+                shard,
+                "--out-jsonl",
+                str(out_jsonl),
+            ]
+        )
+        assert exit_code == 0
+        shard_indexes = [
+            json.loads(line)["index"]
+            for line in out_jsonl.read_text(encoding="utf-8").splitlines()
+        ]
+        assert shard_indexes
+        indexes.extend(shard_indexes)
+
+    assert indexes == list(range(10))
+
+
+def test_cli_batch_mode_dedup_executes_repeated_prompts_once(
+    monkeypatch,
+    tmp_path: Path,
+    capsys,
+) -> None:
+    """--dedup fans one result out to every identical record."""
+    calls: list[str] = []
+
+    class CountingProvider(FakeProvider):
+        def generate(self, prompt, system_prompt=None, generation_config=None):
+            calls.append(prompt)
+            return super().generate(prompt, system_prompt, generation_config)
+
+    monkeypatch.setattr(cli, "create_provider", lambda **_: CountingProvider())
+
+    source = tmp_path / "prompts.jsonl"
+    source.write_text(
+        "".join(f'{{"prompt": "p{i % 2}"}}\n' for i in range(8)) + '{"prompt": "p0", "top_p": 0.5}\n',
+        encoding="utf-8",
+    )
+    out_jsonl = tmp_path / "results.jsonl"
+
+    exit_code = cli.main(
+        [
+            "--input-jsonl",
+            str(source),
+            "--provider",
+            "http",
+            "--out-jsonl",
+            str(out_jsonl),
+            "--dedup",
+        ]
+    )
+
+    assert exit_code == 0
+    assert calls == ["p0", "p1", "p0"]
+    lines = [json.loads(line) for line in out_jsonl.read_text(encoding="utf-8").splitlines()]
+    assert [line["index"] for line in lines] == list(range(9))
+    assert [line["payload"]["response"] for line in lines[:8]] == [
+        f"Echo: p{i % 2}" for i in range(8)
+    ]
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["deduplicated"] == 6
+    assert summary["dedup_ratio"] == round(6 / 9, 4)
+
+
+def test_cli_batch_mode_cache_schedule_groups_by_system_prompt(
+    monkeypatch,
+    tmp_path: Path,
+    capsys,
+) -> None:
+    """--schedule cache runs records sharing a system prompt together, output stays ordered."""
+    calls: list[str | None] = []
+
+    class CachingProvider(FakeProvider):
+        def generate(self, prompt, system_prompt=None, generation_config=None):
+            calls.append(system_prompt)
+            return super().generate(prompt, system_prompt, generation_config)
+
+        def get_last_usage(self):
+            return UsageMetadata(prompt_tokens=50, cache_read_tokens=40)
+
+    monkeypatch.setattr(cli, "create_provider", lambda **_: CachingProvider())
+
+    source = tmp_path / "prompts.jsonl"
+    source.write_text(
+        "".join(f'{{"prompt": "p{i}", "system": "S{i % 2}"}}\n' for i in range(6)),
+        encoding="utf-8",
+    )
+    out_jsonl = tmp_path / "results.jsonl"
+
+    exit_code = cli.main(
+        [
+            "--input-jsonl",
+            str(source),
+            "--provider",
+            "http",
+            "--out-jsonl",
+            str(out_jsonl),
+            "--schedule",
+            "cache",
+        ]
+    )
+
+    assert exit_code == 0
+    assert calls == ["S0", "S0", "S0", "S1", "S1", "S1"]
+    lines = [json.loads(line) for line in out_jsonl.read_text(encoding="utf-8").splitlines()]
+    assert [line["index"] for line in lines] == list(range(6))
+    assert lines[3]["payload"]["response"] == "Echo: SYSTEM=S1 | USER=p3"
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["cache_read_tokens"] == 240
+    assert summary["cache_hit_ratio"] == 0.8
+
+
+def test_cli_rejects_schedule_without_input_jsonl() -> None:
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["--prompt", "Hello", "--schedule", "cache"])
+    assert exc.value.code == 2
+
+
+def test_cli_rejects_dedup_without_input_jsonl() -> None:
+    """--dedup only applies to batch mode."""
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["--prompt", "Hello", "--dedup"])
+    assert exc.value.code == 2
+
+
+def test_cli_rejects_shard_without_input_jsonl() -> None:
+    """--shard only applies to batch mode."""
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["--prompt", "Hello", "--shard", "0/2"])
+    assert exc.value.code == 2
+
+
+def test_cli_rejects_stream_with_input_jsonl(tmp_path: Path) -> None:
+    """Batch mode does not render streamed chunks."""
+    source = tmp_path / "prompts.jsonl"
+    source.write_text('{"prompt": "x"}\n', encoding="utf-8")
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["--input-jsonl", str(source), "--stream"])
+    assert exc.value.code == 2
+
+
+def test_cli_rejects_missing_input_jsonl(tmp_path: Path) -> None:
+    """Batch input must exist at parse time."""
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["--input-jsonl", str(tmp_path / "missing.jsonl")])
+    assert exc.value.code == 2
+
+
+def test_cli_hash_shards_merge_back_into_input_order(
+    monkeypatch,
+    tmp_path: Path,
+    capsys,
+) -> None:
+    """Hash-sharded outputs plus `merge` reproduce one ordered result set."""
+    monkeypatch.setattr(cli, "create_provider", lambda **_: FakeProvider())
+
+    source = tmp_path / "prompts.jsonl"
+    source.write_text(
+        "".join(f'{{"prompt": "p{i}"}}\n' for i in range(12)),
+        encoding="utf-8",
+    )
+
+    shard_outputs: list[str] = []
+    shard_logs: list[str] = []
+    for shard_index in range(3):
+        out_jsonl = tmp_path / f"shard-{shard_index}.jsonl"
+        log_root = tmp_path / f"logs-{shard_index}"
+        exit_code = cli.main(
+            [
+                "--input-jsonl",
+                str(source),
+                "--provider",
+                "http",
+                "--shard",
+                f"{shard_index}/3",
+                "--shard-by",
+                "hash",
+                "--out-jsonl",
+                str(out_jsonl),
+                "--log-run-dir",
+                str(log_root),
+            ]
+        )
+        assert exit_code == 0
+        shard_outputs.append(str(out_jsonl))
+        shard_logs.append(str(next(log_root.iterdir())))
+    capsys.readouterr()
+
+    # Merging one shard twice simulates a retried shard and exercises dedup.
+    merged = tmp_path / "merged.jsonl"
+    merge_log_root = tmp_path / "merge-logs"
+    merge_args = [
+        "merge",
+        *shard_outputs,
+        shard_outputs[0],
+        "--out-jsonl",
+        str(merged),
+        "--log-run-dir",
+        str(merge_log_root),
+    ]
+    for log_dir in shard_logs:
+        merge_args.extend(["--summary", log_dir])
+
+    exit_code = cli.main(merge_args)
+
+    assert exit_code == 0
+    captured = capsys.readouterr()
+    lines = [json.loads(line) for line in merged.read_text(encoding="utf-8").splitlines()]
+    assert [line["index"] for line in lines] == list(range(12))
+    assert [line["payload"]["response"] for line in lines] == [f"Echo: p{i}" for i in range(12)]
+
+    report = json.loads(captured.out)
+    assert report["total"] == 12
+    assert report["duplicates"] > 0
+    assert report["merged_shards"] == ["0/3", "1/3", "2/3"]
+    assert "duplicate index line(s) were dropped" in captured.err
+
+    merge_log = next(merge_log_root.iterdir())
+    merge_request = json.loads((merge_log / "request.json").read_text(encoding="utf-8"))
+    assert [entry["shard"] for entry in merge_request["shard_requests"]] == ["0/3", "1/3", "2/3"]
+    assert not (merge_log / "shard_errors.json").exists()
+
+
+def test_cli_merge_reports_invalid_shard_output(tmp_path: Path, capsys) -> None:
+    """Unsorted shard output is a runtime error."""
+    bad = tmp_path / "bad.jsonl"
+    bad.write_text('{"index": 3}\n{"index": 1}\n', encoding="utf-8")
+
+    exit_code = cli.main(["merge", str(bad), "--out-jsonl", str(tmp_path / "m.jsonl")])
+
+    assert exit_code == 1
+    assert "not sorted" in capsys.readouterr().err
+
+
+def test_cli_work_queue_enqueue_worker_collect(monkeypatch, tmp_path: Path, capsys) -> None:
+    """enqueue -> worker -> collect produces one ordered result per input line."""
+    monkeypatch.setattr(cli, "create_provider", lambda **_: FakeProvider())
+
+    source = tmp_path / "prompts.jsonl"
+    source.write_text(
+        "".join(f'{{"prompt": "p{i}"}}\n' for i in range(6)),
+        encoding="utf-8",
+    )
+    queue_path = tmp_path / "queue.db"
+
+    assert cli.main(["enqueue", "--queue", str(queue_path), "--input-jsonl", str(source)]) == 0
+    assert json.loads(capsys.readouterr().out)["enqueued"] == 6
+
+    exit_code = cli.main(
+        ["worker", "--queue", str(queue_path), "--provider", "http", "--worker-id", "w1"]
+    )
+    assert exit_code == 0
+    worker_summary = json.loads(capsys.readouterr().out)
+    assert worker_summary["worker_id"] == "w1"
+    assert worker_summary["succeeded"] == 6
+
+    out_jsonl = tmp_path / "collected.jsonl"
+    assert cli.main(["collect", "--queue", str(queue_path), "--out-jsonl", str(out_jsonl)]) == 0
+    collected = json.loads(capsys.readouterr().out)
+    assert collected["done"] == 6
+    assert collected["pending"] == 0
+
+    lines = [json.loads(line) for line in out_jsonl.read_text(encoding="utf-8").splitlines()]
+    assert [line["payload"]["response"] for line in lines] == [f"Echo: p{i}" for i in range(6)]
+
+
+def test_cli_worker_rejects_prompt_input_options(tmp_path: Path) -> None:
+    """Workers only take prompts from the queue."""
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["worker", "--queue", str(tmp_path / "q.db"), "--prompt", "Hello"])
+    assert exc.value.code == 2
+
+
+def test_cli_collect_warns_when_queue_is_not_drained(tmp_path: Path, capsys) -> None:
+    """Collecting early is allowed but reported."""
+    source = tmp_path / "prompts.jsonl"
+    source.write_text('{"prompt": "p"}\n', encoding="utf-8")
+    queue_path = tmp_path / "queue.db"
+    cli.main(["enqueue", "--queue", str(queue_path), "--input-jsonl", str(source)])
+    capsys.readouterr()
+
+    exit_code = cli.main(
+        ["collect", "--queue", str(queue_path), "--out-jsonl", str(tmp_path / "out.jsonl")]
+    )
+
+    assert exit_code == 0
+    assert "queue is not drained" in capsys.readouterr().err
+
+
+def test_cli_batch_mode_with_processes_matches_sequential_output(
+    monkeypatch,
+    tmp_path: Path,
+) -> None:
+    """--processes produces the same ordered results as in-process execution."""
+    monkeypatch.setattr(cli, "create_provider", lambda **_: FakeProvider())
+
+    source = tmp_path / "prompts.jsonl"
+    source.write_text(
+        "".join(f'{{"prompt": "p{i}"}}\n' for i in range(9)),
+        encoding="utf-8",
+    )
+
+    responses = {}
+    for processes in ("1", "2"):
+        out_jsonl = tmp_path / f"out-{processes}.jsonl"
+        exit_code = cli.main(
+            [
+                "--input-jsonl",
+                str(source),
+                "--provider",
+                "http",
+                "--processes",
+                processes,
+                "--out-jsonl",
+                str(out_jsonl),
+            ]
+        )
+        assert exit_code == 0
+        responses[processes] = [
+            (line["index"], line["payload"]["response"])
+            for line in map(json.loads, out_jsonl.read_text(encoding="utf-8").splitlines())
+        ]
+
+    assert responses["2"] == responses["1"]
+
+
+class _OpenAIBatchStubHandler(BaseHTTPRequestHandler):
+    """Local OpenAI Batch API: files upload, batches, output/error file content."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args) -> None:  # noqa: A002 - stdlib signature
+        """Silence per-request logging."""
+
+    def _reply(self, body, content_type: str = "application/json") -> None:
+        raw = body.encode("utf-8") if isinstance(body, str) else json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        raw = self.rfile.read(int(self.headers["Content-Length"]))
+        state = self.server.state
+        if self.path == "/v1/files":
+            form = BytesParser(policy=default_email_policy).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + raw
+            )
+            for part in form.iter_parts():
+                if part.get_param("name", header="content-disposition") == "file":
+                    state["uploaded"] = [json.loads(line) for line in part.get_content().splitlines()]
+            self._reply({"id": "file-in"})
+            return
+
+        state["batch_request"] = json.loads(raw)
+        outputs, errors = [], []
+        # Results are written out of input order, as the real API may do.
+        for line in reversed(state["uploaded"]):
+            prompt = line["body"]["messages"][-1]["content"]
+            if "fail" in prompt:
+                errors.append(
+                    {
+                        "custom_id": line["custom_id"],
+                        "response": {"status_code": 429, "body": {"error": {"message": "slow down"}}},
+                    }
+                )
+                continue
+            body = {
+                "model": "stub-model-2024",
+                "choices": [{"message": {"content": f"Echo: {prompt}"}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 4, "completion_tokens": 2, "total_tokens": 6},
+            }
+            outputs.append({"custom_id": line["custom_id"], "response": {"status_code": 200, "body": body}})
+        state["files"] = {
+            "file-out": "\n".join(json.dumps(line) for line in outputs),
+            "file-err": "\n".join(json.dumps(line) for line in errors),
+        }
+        self._reply({"id": "batch_1", "status": "validating"})
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        state = self.server.state
+        if self.path == "/v1/batches/batch_1":
+            state["polls"] += 1
+            if state["polls"] < 3:
+                self._reply({"id": "batch_1", "status": "in_progress"})
+                return
+            self._reply(
+                {
+                    "id": "batch_1",
+                    "status": "completed",
+                    "output_file_id": "file-out",
+                    "error_file_id": "file-err",
+                    "request_counts": {"total": 3, "completed": 2, "failed": 1},
+                }
+            )
+            return
+        file_id = self.path.split("/")[3]
+        self._reply(state["files"][file_id], content_type="application/jsonl")
+
+
+def test_cli_native_batch_submit_status_collect_against_stub_server(
+    monkeypatch,
+    tmp_path: Path,
+    capsys,
+) -> None:
+    """batch-submit -> batch-status -> batch-collect --wait round trip over real HTTP, recorded and replayed."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OpenAIBatchStubHandler)
+    server.state = {"polls": 0}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    monkeypatch.setenv("AI_API_KEY", "stub-key")
+
+    source = tmp_path / "prompts.jsonl"
+    source.write_text(
+        '{"prompt": "p0"}\n{"prompt": "please fail"}\n{"nope": 1}\n{"prompt": "p3", "system": "S"}\n',
+        encoding="utf-8",
+    )
+    job_file = tmp_path / "job.json"
+    out_jsonl = tmp_path / "collected.jsonl"
+    cassettes = tmp_path / "cassettes"
+    submit_args = [
+        "batch-submit",
+        "--provider",
+        "openai_compatible",
+        "--api-endpoint",
+        endpoint,
+        "--api-model",
+        "stub-model",
+        "--input-jsonl",
+        str(source),
+        "--temperature",
+        "0",
+        "--job-file",
+        str(job_file),
+    ]
+    try:
+        exit_code = cli.main([*submit_args, "--record-dir", str(cassettes)])
+        assert exit_code == 0
+        submitted = json.loads(capsys.readouterr().out)
+        assert (submitted["batch_id"], submitted["submitted"], submitted["invalid"]) == ("batch_1", 3, 1)
+        assert server.state["batch_request"] == {
+            "input_file_id": "file-in",
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h",
+        }
+        assert server.state["uploaded"][2] == {
+            "custom_id": "item-3",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": "stub-model",
+                "messages": [{"role": "system", "content": "S"}, {"role": "user", "content": "p3"}],
+                "temperature": 0.0,
+            },
+        }
+
+        assert cli.main(["batch-status", "--job-file", str(job_file)]) == 0
+        assert json.loads(capsys.readouterr().out)["state"] == "in_progress"
+        assert cli.main(["batch-collect", "--job-file", str(job_file), "--out-jsonl", str(out_jsonl)]) == 1
+        assert "still in progress (in_progress); retry later or use --wait" in capsys.readouterr().err
+
+        exit_code = cli.main(
+            [
+                "batch-collect",
+                "--job-file",
+                str(job_file),
+                "--wait",
+                "--poll-interval",
+                "0.01",
+                "--out-jsonl",
+                str(out_jsonl),
+                "--transport",
+                "urllib3",
+                "--record-dir",
+                str(cassettes),
+            ]
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+    # One request failed upstream and one record was invalid.
+    assert exit_code == 1
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["state"] == "completed"
+    assert summary["request_counts"] == {"total": 3, "completed": 2, "failed": 1}
+    assert (summary["total"], summary["succeeded"], summary["error_codes"]) == (
+        4,
+        2,
+        {"invalid_request": 1, "rate_limit": 1},
+    )
+    assert server.state["polls"] == 3
+
+    lines = [json.loads(line) for line in out_jsonl.read_text(encoding="utf-8").splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert lines[0]["payload"]["response"] == "Echo: p0"
+    assert lines[0]["payload"]["metadata"]["usage"]["total_tokens"] == 6
+    context = lines[3]["payload"]["metadata"]["execution_context"]
+    assert context["model_resolved"] == "stub-model-2024"
+    assert context["runtime"]["system_prompt_provided"] is True
+    assert context["runtime"]["temperature"] == 0.0
+    assert lines[1]["error"]["code"] == "rate_limit"
+    assert "slow down" in lines[1]["error"]["message"]
+    assert lines[2]["error"]["code"] == "invalid_request"
+
+    # With the server gone, the whole workflow replays from the cassettes:
+    # the multipart upload has a stable body, and the last poll recorded wins.
+    assert cli.main([*submit_args, "--replay-dir", str(cassettes)]) == 0
+    assert json.loads(capsys.readouterr().out)["batch_id"] == "batch_1"
+    replayed = tmp_path / "replayed.jsonl"
+    exit_code = cli.main(
+        ["batch-collect", "--job-file", str(job_file), "--out-jsonl", str(replayed), "--replay-dir", str(cassettes)]
+    )
+    assert exit_code == 1
+    capsys.readouterr()
+    replayed_lines = [json.loads(line) for line in replayed.read_text(encoding="utf-8").splitlines()]
+    assert [(line["index"], line["status"]) for line in replayed_lines] == [
+        (line["index"], line["status"]) for line in lines
+    ]
+    assert replayed_lines[0]["payload"]["response"] == "Echo: p0"
+    assert replayed_lines[1]["error"]["message"] == lines[1]["error"]["message"]
+
+    source.write_text('{"prompt": "edited"}\n', encoding="utf-8")
+    exit_code = cli.main(["batch-collect", "--job-file", str(job_file), "--replay-dir", str(cassettes)])
+    assert exit_code == 1
+    assert "changed after batch-submit; results cannot be matched" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    ("options", "message"),
+    [
+        (["--stream"], "--stream is not supported by batch-submit."),
+        (["--dedup"], "--shard, --dedup, --schedule and --processes do not apply to batch-submit."),
+        (["--similarity-cache", "cache.db"], "--similarity-cache does not apply to batch-submit."),
+        (["--samples", "2", "--provider", "anthropic"], "--samples greater than 1 needs a native sample count"),
+    ],
+)
+def test_cli_batch_submit_rejects_options_that_do_not_apply(
+    tmp_path: Path, capsys, options: list[str], message: str
+) -> None:
+    """batch-submit refuses run options it cannot honour before contacting the provider."""
+    source = tmp_path / "prompts.jsonl"
+    source.write_text('{"prompt": "p0"}\n', encoding="utf-8")
+    base = ["batch-submit", "--provider", "openai_compatible", "--api-key", "k", "--input-jsonl", str(source)]
+
+    with pytest.raises(SystemExit) as exc:
+        cli.main([*base, *options])
+
+    assert exc.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+def test_cli_batch_submit_reports_provider_errors(tmp_path: Path, capsys) -> None:
+    """Unknown providers, providers without a batch API and upload failures exit with 1."""
+    source = tmp_path / "prompts.jsonl"
+    source.write_text('{"prompt": "p0"}\n', encoding="utf-8")
+    base = ["batch-submit", "--api-key", "k", "--input-jsonl", str(source), "--job-file", str(tmp_path / "job.json")]
+
+    assert cli.main([*base, "--provider", "carrier-pigeon"]) == 1
+    assert "carrier-pigeon" in capsys.readouterr().err
+    assert cli.main([*base, "--provider", "http", "--api-endpoint", "http://stub"]) == 1
+    assert "no native batch API" in capsys.readouterr().err
+    exit_code = cli.main([*base, "--provider", "openai_compatible", "--api-endpoint", "http://127.0.0.1:9/v1"])
+    assert exit_code == 1
+    assert "Provider batch request failed" in capsys.readouterr().err
+    assert not (tmp_path / "job.json").exists()
+
+
+def test_cli_native_batch_rejects_missing_input_and_job_file(tmp_path: Path, capsys) -> None:
+    """batch-submit needs --input-jsonl; status/collect need a readable job file."""
+    with pytest.raises(SystemExit) as exc:
+        cli.main(["batch-submit", "--provider", "openai_compatible", "--prompt", "Hello"])
+    assert exc.value.code == 2
+    assert "batch-submit requires --input-jsonl." in capsys.readouterr().err
+
+    exit_code = cli.main(["batch-status", "--job-file", str(tmp_path / "missing.json")])
+    assert exit_code == 1
+    assert "Batch job file could not be read" in capsys.readouterr().err
@@ -136,6 +136,7 @@ def test_generate_includes_runtime_controls_when_provided(monkeypatch) -> None:
             temperature=0.2,
             max_tokens=120,
             top_p=0.95,
+            stop=("END",),
         ),
     )
 
@@ -143,6 +144,64 @@ def test_generate_includes_runtime_controls_when_provided(monkeypatch) -> None:
     assert observed["payload"]["temperature"] == 0.2
     assert observed["payload"]["max_tokens"] == 120
     assert observed["payload"]["top_p"] == 0.95
+    assert observed["payload"]["stop_sequences"] == ["END"]
+
+
+def test_generate_reports_native_stop_sequence(monkeypatch) -> None:
+    """A server-side stop must be exposed so the runner can record truncation."""
+    provider = _make_provider()
+
+    def fake_post(url, headers, json, timeout):
+        return DummyResponse(
+            {
+                "content": [{"type": "text", "text": "ok"}],
+                "stop_reason": "stop_sequence",
+                "stop_sequence": "END",
+            },
+            status_code=200,
+        )
+
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.anthropic_provider.requests.post",
+        fake_post,
+    )
+
+    assert provider.generate("hello", generation_config=GenerationConfig(stop=("END",))) == "ok"
+    assert provider.get_last_stop_sequence() == "END"
+
+
+def test_generate_samples_fans_out_one_call_per_sample(monkeypatch) -> None:
+    """The Messages API has no sample count, so each sample is its own call."""
+    provider = _make_provider()
+    payloads = []
+
+    def fake_post(url, headers, json, timeout):
+        payloads.append(json)
+        return DummyResponse(
+            {
+                "content": [{"type": "text", "text": "ok"}],
+                "stop_reason": "end_turn",
+                "usage": {"input_tokens": 4, "output_tokens": 2},
+            },
+            status_code=200,
+        )
+
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.anthropic_provider.requests.post",
+        fake_post,
+    )
+
+    samples = provider.generate_samples("hello", generation_config=GenerationConfig(n=3))
+
+    assert len(payloads) == 3
+    assert all("n" not in payload for payload in payloads)
+    assert [(sample.text, sample.finish_reason) for sample in samples] == [("ok", "end_turn")] * 3
+    assert samples[0].usage.to_dict() == {"prompt_tokens": 4, "completion_tokens": 2, "total_tokens": 6}
+    assert provider.get_last_usage().to_dict() == {
+        "prompt_tokens": 12,
+        "completion_tokens": 6,
+        "total_tokens": 18,
+    }
 
 
 def test_generate_extracts_usage_metadata(monkeypatch) -> None:
@@ -170,6 +229,50 @@ def test_generate_extracts_usage_metadata(monkeypatch) -> None:
     assert provider.get_last_model_resolved() == "claude-3-7-sonnet-20260219"
 
 
+def test_generate_marks_system_prompt_cacheable_when_prompt_cache_enabled(monkeypatch) -> None:
+    """Prompt caching sends the system prompt as a block with a cache breakpoint."""
+    provider = AnthropicProvider(
+        AnthropicProviderConfig(
+            endpoint="https://api.anthropic.com/v1/messages",
+            api_key="dummy",
+            model="claude-3-7-sonnet-latest",
+            prompt_cache=True,
+        )
+    )
+    observed = {}
+
+    def fake_post(url, headers, json, timeout):
+        observed["payload"] = json
+        return DummyResponse(
+            {
+                "content": [{"type": "text", "text": "ok"}],
+                "usage": {
+                    "input_tokens": 12,
+                    "cache_read_input_tokens": 4000,
+                    "cache_creation_input_tokens": 0,
+                    "output_tokens": 8,
+                },
+            },
+            status_code=200,
+        )
+
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.anthropic_provider.requests.post",
+        fake_post,
+    )
+
+    assert provider.generate("hello", system_prompt="Long rules.") == "ok"
+    assert observed["payload"]["system"] == [
+        {"type": "text", "text": "Long rules.", "cache_control": {"type": "ephemeral"}}
+    ]
+    usage = provider.get_last_usage()
+    # Anthropic excludes cached input from input_tokens; prompt_tokens adds it back.
+    assert usage.prompt_tokens == 4012
+    assert usage.total_tokens == 4020
+    assert usage.cache_read_tokens == 4000
+    assert usage.cache_write_tokens == 0
+
+
 def test_generate_retries_then_succeeds(monkeypatch) -> None:
     """Transient transport errors should be retried up to max_retries."""
     provider = _make_provider(max_retries=2)
@@ -399,6 +502,29 @@ def test_generate_stream_yields_chunks_and_enables_stream_flag(monkeypatch) -> N
     assert observed["timeout"] == 5
 
 
+def test_generate_stream_reports_stop_sequence_from_message_delta(monkeypatch) -> None:
+    provider = _make_provider()
+
+    def fake_post(url, headers, json, timeout, stream):
+        return DummyStreamResponse(
+            [
+                'data: {"type":"content_block_delta","delta":{"type":"text_delta","text":"Echo"}}',
+                'data: {"type":"message_delta","delta":{"stop_reason":"stop_sequence",'
+                '"stop_sequence":"###"},"usage":{"output_tokens":2}}',
+                "data: [DONE]",
+            ],
+            status_code=200,
+        )
+
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.anthropic_provider.requests.post",
+        fake_post,
+    )
+
+    assert list(provider.generate_stream("hello")) == ["Echo"]
+    assert provider.get_last_stop_sequence() == "###"
+
+
 def test_generate_stream_includes_system_field_when_provided(monkeypatch) -> None:
     """Stream payload must include Anthropic `system` when system_prompt is provided."""
     provider = _make_provider()
@@ -1,8 +1,14 @@
 """Unit tests for the public Python API facade."""
 
+import asyncio
+
 import pytest
+import requests
 
-from ai_prompt_runner.api import run_prompt
+from ai_prompt_runner import api
+from ai_prompt_runner.api import PromptClient, astream_prompt, run_prompt, stream_prompt
+from ai_prompt_runner.core.errors import ContextWindowExceededError, RateLimitError
+from ai_prompt_runner.core.models import StreamChunkEvent, StreamCompletedEvent
 from ai_prompt_runner.services.provider_factory import ConfigurationError
 
 
@@ -80,3 +86,217 @@ def test_run_prompt_raises_configuration_error_when_endpoint_missing() -> None:
             api_key="dummy",
             api_endpoint="",
         )
+
+
+class DummyStreamResponse:
+    """Minimal fake streaming response yielding SSE lines."""
+
+    status_code = 200
+
+    def __init__(self, lines: list[str]) -> None:
+        self._lines = lines
+
+    def iter_lines(self, decode_unicode: bool = False):
+        yield from self._lines
+
+
+def test_prompt_client_resolves_config_once_and_reuses_session(monkeypatch) -> None:
+    """Repeated calls share one resolved config and one pooled HTTP session."""
+    resolutions = []
+    sessions = []
+    original_resolve = api.resolve_provider_config
+
+    def counting_resolve(**kwargs):
+        resolutions.append(kwargs["provider_name"])
+        return original_resolve(**kwargs)
+
+    def fake_session_post(self, url, **kwargs):
+        sessions.append(self)
+        return DummyResponse({"response": f"Echo: {kwargs['json']['prompt']}"})
+
+    monkeypatch.setattr(api, "resolve_provider_config", counting_resolve)
+    monkeypatch.setattr(requests.Session, "post", fake_session_post)
+
+    with PromptClient(
+        provider="http",
+        api_endpoint="http://example.test/api",
+        api_key="dummy",
+        api_model="m1",
+    ) as client:
+        first = client.run("one")
+        second = client.run("two", system_prompt="Be brief.")
+
+    assert first["response"] == "Echo: one"
+    assert first["metadata"]["provider"] == "http"
+    assert second["response"] == "Echo: SYSTEM:\nBe brief.\n\nUSER:\ntwo"
+    assert resolutions == ["http"]
+    assert len(sessions) == 2 and sessions[0] is sessions[1]
+
+
+def test_prompt_client_run_many_keeps_order_and_can_return_exceptions(monkeypatch) -> None:
+    """Concurrent execution preserves input order; failures can be collected."""
+
+    def fake_session_post(self, url, **kwargs):
+        prompt = kwargs["json"]["prompt"]
+        if prompt == "bad":
+            return DummyResponse({}, status_code=429)
+        return DummyResponse({"response": f"Echo: {prompt}"})
+
+    monkeypatch.setattr(requests.Session, "post", fake_session_post)
+
+    with PromptClient(
+        provider="http",
+        api_endpoint="http://example.test/api",
+        api_key="dummy",
+        max_workers=4,
+    ) as client:
+        prompts = [f"p{i}" for i in range(10)] + ["bad"]
+        results = client.run_many(prompts, return_exceptions=True)
+        with pytest.raises(RateLimitError):
+            client.run_many(["bad"])
+
+    assert [result["response"] for result in results[:10]] == [f"Echo: p{i}" for i in range(10)]
+    assert isinstance(results[10], RateLimitError)
+
+
+def test_prompt_client_stream_forwards_chunks_and_returns_payload(monkeypatch) -> None:
+    """stream() delivers chunks through the callback and returns the final payload."""
+    monkeypatch.setattr(
+        requests.Session,
+        "post",
+        lambda self, url, **kwargs: DummyStreamResponse(
+            [
+                'data: {"choices": [{"delta": {"content": "Hel"}}]}',
+                'data: {"choices": [{"delta": {"content": "lo"}}]}',
+                "data: [DONE]",
+            ]
+        ),
+    )
+    chunks: list[str] = []
+
+    with PromptClient(provider="openai", api_key="dummy") as client:
+        payload = client.stream("Hi", chunks.append)
+
+    assert chunks == ["Hel", "lo"]
+    assert payload["response"] == "Hello"
+
+
+def test_prompt_client_rejects_use_after_close_and_bad_config() -> None:
+    """Closed clients fail loudly; invalid configuration fails at construction."""
+    client = PromptClient(provider="http", api_endpoint="http://example.test/api", api_key="dummy")
+    client.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        client.run("Hello")
+    with pytest.raises(ConfigurationError, match="Unsupported provider"):
+        PromptClient(provider="unknown-provider", api_key="dummy")
+
+
+OPENAI_STREAM_LINES = [
+    'data: {"choices": [{"delta": {"content": "Hel"}}]}',
+    'data: {"choices": [{"delta": {"content": "lo"}}]}',
+    'data: {"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}}',
+    "data: [DONE]",
+]
+
+
+def test_stream_prompt_yields_chunk_events_then_completed_payload(monkeypatch) -> None:
+    """Chunks arrive as typed events; the final event carries payload and usage."""
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.openai_compatible_provider.requests.post",
+        lambda *args, **kwargs: DummyStreamResponse(OPENAI_STREAM_LINES),
+    )
+
+    events = list(stream_prompt("Hi", provider="openai", api_key="dummy"))
+
+    assert [event.text for event in events if isinstance(event, StreamChunkEvent)] == ["Hel", "lo"]
+    completed = events[-1]
+    assert isinstance(completed, StreamCompletedEvent)
+    assert completed.payload["response"] == "Hello"
+    assert completed.payload["metadata"]["execution_context"]["runtime"]["stream"] is True
+    assert completed.usage.total_tokens == 5
+
+
+def test_astream_prompt_yields_the_same_events(monkeypatch) -> None:
+    """The async variant produces the same event sequence."""
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.openai_compatible_provider.requests.post",
+        lambda *args, **kwargs: DummyStreamResponse(OPENAI_STREAM_LINES),
+    )
+
+    async def _collect() -> list:
+        return [event async for event in astream_prompt("Hi", provider="openai", api_key="dummy")]
+
+    events = asyncio.run(_collect())
+
+    assert [event.type for event in events] == ["chunk", "chunk", "completed"]
+    assert events[-1].payload["response"] == "Hello"
+
+
+def test_astream_prompt_propagates_provider_errors(monkeypatch) -> None:
+    """Errors raised in the worker thread surface in the async consumer."""
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.openai_compatible_provider.requests.post",
+        lambda *args, **kwargs: DummyResponse({}, status_code=429),
+    )
+
+    async def _consume() -> None:
+        async for _ in astream_prompt("Hi", provider="openai", api_key="dummy"):
+            pass
+
+    with pytest.raises(RateLimitError):
+        asyncio.run(_consume())
+
+
+def test_prompt_client_iter_stream_uses_pooled_session(monkeypatch) -> None:
+    """Client streaming yields the same events through the pooled session."""
+    monkeypatch.setattr(
+        requests.Session,
+        "post",
+        lambda self, url, **kwargs: DummyStreamResponse(OPENAI_STREAM_LINES),
+    )
+
+    with PromptClient(provider="openai", api_key="dummy") as client:
+        events = list(client.iter_stream("Hi"))
+
+    assert events[-1].payload["response"] == "Hello"
+
+
+def test_stream_prompt_stops_at_stop_sequence_and_records_truncation(monkeypatch) -> None:
+    """Client-side stop sequences cut the stream and surface in metadata."""
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.openai_compatible_provider.requests.post",
+        lambda *args, **kwargs: DummyStreamResponse(OPENAI_STREAM_LINES),
+    )
+
+    events = list(stream_prompt("Hi", provider="openai", api_key="dummy", stop=["ll"]))
+
+    assert [event.text for event in events if isinstance(event, StreamChunkEvent)] == ["He"]
+    payload = events[-1].payload
+    assert payload["response"] == "He"
+    assert payload["metadata"]["truncation"] == {"reason": "stop_sequence", "stop_sequence": "ll"}
+
+
+def test_run_prompt_checks_context_window_before_dispatch(monkeypatch) -> None:
+    """Over-budget prompts are rejected without a request, or trimmed on demand."""
+    sent: list[str] = []
+
+    def fake_post(*args, **kwargs):
+        sent.append(kwargs["json"]["prompt"])
+        return DummyResponse({"response": "ok"})
+
+    monkeypatch.setattr("ai_prompt_runner.services.http_provider.requests.post", fake_post)
+    monkeypatch.setattr(requests.Session, "post", lambda self, url, **kwargs: fake_post(**kwargs))
+    options = {"provider": "http", "api_endpoint": "http://example.test/api", "api_key": "dummy"}
+
+    with pytest.raises(ContextWindowExceededError):
+        run_prompt("word " * 200, context_window=100, **options)
+    assert sent == []
+
+    payload = run_prompt("word " * 200, context_window=100, context_policy="trim", **options)
+    assert payload["metadata"]["prompt_trim"]["context_window"] == 100
+    assert len(sent[0]) < 1000
+
+    with PromptClient(context_window=100, tokens_per_minute=10_000, **options) as client:
+        with pytest.raises(ContextWindowExceededError):
+            client.run("word " * 200)
+        assert client.run("short")["response"] == "ok"
@@ -0,0 +1,183 @@
+import pytest
+
+from ai_prompt_runner.core.batch import (
+    BatchItem,
+    BatchRequestDefaults,
+    filter_hash_shard,
+    iter_batch_items,
+    request_from_record,
+    run_batch,
+    shard_for_prompt_hash,
+)
+from ai_prompt_runner.core.dedup import DedupPlan, ResultFanOut, dedup_key
+from ai_prompt_runner.core.errors import InputValidationError, RateLimitError
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.services.mock_provider import MockProvider
+from ai_prompt_runner.utils.jsonl_input import JsonlRecord
+
+
+DEFAULTS = BatchRequestDefaults(provider="mock", system_prompt="Be brief.", temperature=0.2)
+
+
+def test_request_from_record_applies_defaults_and_overrides() -> None:
+    """Record values override run-level defaults field by field."""
+    request = request_from_record({"prompt": " Hi ", "max_tokens": 5}, 0, DEFAULTS)
+
+    assert request.prompt_text == "Hi"
+    assert request.provider == "mock"
+    assert request.system_prompt == "Be brief."
+    assert request.temperature == 0.2
+    assert request.max_tokens == 5
+
+    override = request_from_record({"prompt": "Hi", "system": None, "temperature": 1}, 0, DEFAULTS)
+    assert override.system_prompt is None
+    assert override.temperature == 1
+
+
+@pytest.mark.parametrize(
+    ("record", "message"),
+    [
+        ({}, "'prompt' must be a non-empty string"),
+        ({"prompt": "  "}, "'prompt' must be a non-empty string"),
+        ({"prompt": "x", "extra": 1}, "unsupported keys"),
+        ({"prompt": "x", "system": ""}, "'system' must be a non-empty string"),
+        ({"prompt": "x", "temperature": "hot"}, "'temperature' must be a number"),
+        ({"prompt": "x", "temperature": -1}, "'temperature' must be greater"),
+        ({"prompt": "x", "top_p": 0}, "'top_p' must be greater than 0"),
+        ({"prompt": "x", "max_tokens": 0}, "'max_tokens' must be a positive integer"),
+        ({"prompt": "x", "max_tokens": True}, "'max_tokens' must be a positive integer"),
+    ],
+)
+def test_request_from_record_rejects_invalid_records(record: dict, message: str) -> None:
+    """Invalid records raise InputValidationError with the 1-based line number."""
+    with pytest.raises(InputValidationError, match=f"Input line 4: {message}"):
+        request_from_record(record, 3, DEFAULTS)
+
+
+def test_iter_batch_items_turns_bad_records_into_error_items() -> None:
+    """Malformed records keep their position instead of aborting iteration."""
+    records = [
+        JsonlRecord(index=0, raw=b'{"prompt": "ok"}'),
+        JsonlRecord(index=1, raw=b"not json"),
+    ]
+
+    items = list(iter_batch_items(records, DEFAULTS))
+
+    assert items[0].request is not None
+    assert items[1].request is None
+    assert isinstance(items[1].error, InputValidationError)
+
+
+def test_run_batch_emits_results_in_order_and_counts_errors() -> None:
+    """Runner failures and input errors are summarized by taxonomy code."""
+
+    class FlakyProvider(MockProvider):
+        def generate(self, prompt, system_prompt=None, generation_config=None):
+            if prompt == "limit":
+                raise RateLimitError("slow down")
+            return super().generate(prompt, system_prompt, generation_config)
+
+    runner = PromptRunner(provider=FlakyProvider())
+    items = [
+        BatchItem(index=0, request=request_from_record({"prompt": "a"}, 0, DEFAULTS)),
+        BatchItem(index=1, request=request_from_record({"prompt": "limit"}, 1, DEFAULTS)),
+        BatchItem(index=2, error=InputValidationError("bad line")),
+    ]
+    emitted = []
+
+    summary = run_batch(runner, items, provider="mock", on_result=emitted.append, shard="0/1")
+
+    assert [result.index for result in emitted] == [0, 1, 2]
+    assert emitted[0].to_dict()["status"] == "ok"
+    assert emitted[0].to_dict()["payload"]["response"].startswith("Echo: ")
+    assert emitted[1].to_dict()["error"]["code"] == "rate_limit"
+    assert emitted[2].to_dict()["error"]["code"] == "invalid_request"
+
+    payload = summary.to_dict()
+    assert payload["total"] == 3
+    assert payload["succeeded"] == 1
+    assert payload["failed"] == 2
+    assert payload["shard"] == "0/1"
+    assert payload["error_codes"] == {"invalid_request": 1, "rate_limit": 1}
+
+
+def test_shard_for_prompt_hash_is_stable_and_in_range() -> None:
+    """Hash shards depend only on the hash value."""
+    request_hash = "sha256:" + "ab" * 32
+    assert shard_for_prompt_hash(request_hash, 7) == shard_for_prompt_hash(request_hash, 7)
+    assert all(0 <= shard_for_prompt_hash(f"sha256:{i:064x}", 5) < 5 for i in range(50))
+
+
+def test_filter_hash_shard_partitions_items_independent_of_order() -> None:
+    """Every item lands in exactly one shard, regardless of input order."""
+    items = [
+        BatchItem(index=i, request=request_from_record({"prompt": f"p{i}"}, i, DEFAULTS))
+        for i in range(40)
+    ]
+    items.append(BatchItem(index=40, error=InputValidationError("bad line")))
+
+    def _assignment(ordered: list[BatchItem]) -> dict[int, int]:
+        owners: dict[int, int] = {}
+        for shard_index in range(3):
+            for item in filter_hash_shard(ordered, shard_index, 3):
+                assert item.index not in owners
+                owners[item.index] = shard_index
+        return owners
+
+    forward = _assignment(items)
+    assert sorted(forward) == list(range(41))
+    assert _assignment(list(reversed(items))) == forward
+
+
+def test_encoded_result_matches_direct_serialization() -> None:
+    """Pre-serialized results carry the same line and error code."""
+    runner = PromptRunner(provider=MockProvider())
+    items = [
+        BatchItem(index=0, request=request_from_record({"prompt": "a"}, 0, DEFAULTS)),
+        BatchItem(index=1, error=InputValidationError("bad line")),
+    ]
+    emitted = []
+    run_batch(runner, items, provider="mock", on_result=emitted.append)
+
+    for item_result in emitted:
+        encoded = item_result.encode()
+        assert encoded.index == item_result.index
+        assert encoded.error_code == item_result.error_code
+        assert encoded.to_json() == item_result.to_json()
+        assert encoded.to_dict() == item_result.to_dict()
+
+
+def test_run_batch_with_fan_out_executes_repeated_requests_once() -> None:
+    """Duplicates reuse the first result at their own index."""
+
+    class CountingProvider(MockProvider):
+        calls = 0
+
+        def generate(self, prompt, system_prompt=None, generation_config=None):
+            CountingProvider.calls += 1
+            return super().generate(prompt, system_prompt, generation_config)
+
+    prompts = ["a", "b", "a", "c", "a", "b"]
+    items = [
+        BatchItem(index=i, request=request_from_record({"prompt": p}, i, DEFAULTS))
+        for i, p in enumerate(prompts)
+    ]
+    keys = [dedup_key(item.request, None) for item in items]
+    fan_out = ResultFanOut(plan=DedupPlan.build(lambda: iter(keys), expected_items=6))
+    emitted = []
+
+    summary = run_batch(
+        PromptRunner(provider=CountingProvider()),
+        items,
+        provider="mock",
+        on_result=emitted.append,
+        fan_out=fan_out,
+    )
+
+    assert CountingProvider.calls == 3
+    assert [result.index for result in emitted] == list(range(6))
+    assert [result.payload["response"] for result in emitted] == [
+        f"Echo: SYSTEM:\nBe brief.\n\nUSER:\n{p}" for p in prompts
+    ]
+    assert summary.to_dict()["deduplicated"] == 3
+    assert summary.to_dict()["dedup_ratio"] == 0.5
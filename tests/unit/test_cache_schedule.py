@@ -0,0 +1,209 @@
+from concurrent.futures import Future
+from functools import partial
+
+import pytest
+
+from ai_prompt_runner.core.batch import (
+    BatchItem,
+    BatchItemResult,
+    BatchRequestDefaults,
+    request_from_record,
+)
+from ai_prompt_runner.core.cache_schedule import (
+    InputOrderBuffer,
+    iter_group_completions,
+    plan_cache_groups,
+    run_batch_cache_scheduled,
+)
+from ai_prompt_runner.core.dedup import DedupPlan, ResultFanOut, dedup_key
+from ai_prompt_runner.core.errors import InputValidationError
+from ai_prompt_runner.core.models import UsageMetadata
+from ai_prompt_runner.core.parallel import run_batch_parallel
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.services.mock_provider import MockProvider
+
+
+DEFAULTS = BatchRequestDefaults(provider="mock")
+
+
+def _item(index: int, prompt: str, system: str | None = None) -> BatchItem:
+    record = {"prompt": prompt} if system is None else {"prompt": prompt, "system": system}
+    return BatchItem(index=index, request=request_from_record(record, index, DEFAULTS))
+
+
+def _indexes(groups) -> list[list[int]]:
+    return [[item.index for item in group.items] for group in groups]
+
+
+def test_plan_cache_groups_groups_by_system_prompt_in_first_seen_order() -> None:
+    items = [
+        _item(0, "b", "S2"),
+        _item(1, "z", "S1"),
+        BatchItem(index=2, error=InputValidationError("bad line")),
+        _item(3, "a", "S2"),
+        _item(4, "y", "S1"),
+        _item(5, "plain"),
+    ]
+
+    groups = plan_cache_groups(items)
+
+    # Groups run by earliest position; prompts are sorted inside each group.
+    assert _indexes(groups) == [[3, 0], [4, 1], [2], [5]]
+    assert groups[0].warmup.index == 3
+    assert [item.index for item in groups[0].followers] == [0]
+
+
+def test_plan_cache_groups_splits_on_short_common_prefix() -> None:
+    items = [
+        _item(0, "Classify ticket: printer"),
+        _item(1, "Summarize: long report"),
+        _item(2, "Classify ticket: login"),
+        _item(3, "Summarize: short note"),
+    ]
+
+    assert _indexes(plan_cache_groups(items)) == [[2, 0, 1, 3]]
+    assert _indexes(plan_cache_groups(items, min_prefix_chars=10)) == [[2, 0], [1, 3]]
+    with pytest.raises(ValueError, match="min_prefix_chars"):
+        plan_cache_groups(items, min_prefix_chars=-1)
+
+
+def test_iter_group_completions_releases_followers_after_warmup() -> None:
+    """Followers wait for their warm-up; idle capacity starts the next group."""
+    groups = plan_cache_groups(
+        [_item(0, "a", "S1"), _item(1, "b", "S1"), _item(2, "c", "S1"), _item(3, "d", "S2")]
+    )
+    events: list[tuple[str, int]] = []
+
+    def submit(item: BatchItem) -> Future:
+        events.append(("submit", item.index))
+        future: Future = Future()
+        future.set_result(BatchItemResult(index=item.index))
+        return future
+
+    for item, result in iter_group_completions(groups, submit, max_in_flight=2):
+        assert result.index == item.index
+        events.append(("done", item.index))
+
+    assert events[:2] == [("submit", 0), ("submit", 3)]
+    assert events.index(("submit", 1)) > events.index(("done", 0))
+    assert events.index(("submit", 2)) > events.index(("done", 0))
+    assert sorted(index for kind, index in events if kind == "done") == [0, 1, 2, 3]
+    with pytest.raises(ValueError, match="max_in_flight"):
+        list(iter_group_completions(groups, submit, max_in_flight=0))
+
+
+def test_input_order_buffer_releases_contiguous_prefix_only() -> None:
+    buffer = InputOrderBuffer([4, 7, 9])
+
+    buffer.put(BatchItemResult(index=7))
+    assert list(buffer.drain()) == []
+    buffer.put(BatchItemResult(index=4))
+    assert [result.index for result in buffer.drain()] == [4, 7]
+
+
+def test_run_batch_cache_scheduled_runs_grouped_and_reports_in_input_order() -> None:
+    calls: list[tuple[str | None, str]] = []
+
+    class CachingProvider(MockProvider):
+        def generate(self, prompt, system_prompt=None, generation_config=None):
+            calls.append((system_prompt, prompt))
+            return super().generate(prompt, system_prompt, generation_config)
+
+        def get_last_usage(self):
+            return UsageMetadata(prompt_tokens=100, cache_read_tokens=90, cache_write_tokens=0)
+
+    prompts = [("S1", "a"), ("S2", "b"), ("S1", "c"), ("S2", "a"), ("S1", "a")]
+    items = [_item(i, prompt, system) for i, (system, prompt) in enumerate(prompts)]
+    keys = [dedup_key(item.request, None) for item in items]
+    fan_out = ResultFanOut(plan=DedupPlan.build(lambda: iter(keys), expected_items=5))
+    emitted = []
+
+    summary = run_batch_cache_scheduled(
+        PromptRunner(provider=CachingProvider()),
+        items,
+        provider="mock",
+        on_result=emitted.append,
+        fan_out=fan_out,
+    )
+
+    assert calls == [("S1", "a"), ("S1", "c"), ("S2", "a"), ("S2", "b")]
+    assert [result.index for result in emitted] == list(range(5))
+    assert emitted[4].payload["response"] == emitted[0].payload["response"]
+    # The fanned-out duplicate did not call the provider and adds no tokens.
+    assert summary.to_dict() | {"execution_ms": 0} == {
+        "total": 5,
+        "succeeded": 5,
+        "failed": 0,
+        "execution_ms": 0,
+        "shard": None,
+        "error_codes": {},
+        "deduplicated": 1,
+        "dedup_ratio": 0.2,
+        "prompt_tokens": 400,
+        "cache_read_tokens": 360,
+        "cache_write_tokens": 0,
+        "cache_hit_ratio": 0.9,
+    }
+
+
+def test_run_batch_cache_scheduled_plans_bounded_windows() -> None:
+    calls: list[tuple[str | None, str]] = []
+    consumed: list[int] = []
+
+    class RecordingProvider(MockProvider):
+        def generate(self, prompt, system_prompt=None, generation_config=None):
+            calls.append((system_prompt, prompt))
+            return super().generate(prompt, system_prompt, generation_config)
+
+    prompts = [("S1", "a"), ("S2", "b"), ("S1", "c"), ("S2", "d"), ("S1", "a"), ("S2", "e")]
+    items = [_item(i, prompt, system) for i, (system, prompt) in enumerate(prompts)]
+    keys = [dedup_key(item.request, None) for item in items]
+    fan_out = ResultFanOut(plan=DedupPlan.build(lambda: iter(keys), expected_items=6))
+
+    def streamed():
+        for item in items:
+            consumed.append(item.index)
+            yield item
+
+    emitted = []
+
+    def on_result(result) -> None:
+        # A window is fully reported before the next one is read.
+        assert max(consumed) < (result.index // 3 + 1) * 3
+        emitted.append(result)
+
+    summary = run_batch_cache_scheduled(
+        PromptRunner(provider=RecordingProvider()),
+        streamed(),
+        provider="mock",
+        on_result=on_result,
+        fan_out=fan_out,
+        window=3,
+    )
+
+    # Grouping happens per window; the repeat in the second window is served
+    # from the first window's result.
+    assert calls == [("S1", "a"), ("S1", "c"), ("S2", "b"), ("S2", "d"), ("S2", "e")]
+    assert [result.index for result in emitted] == list(range(6))
+    assert emitted[4].payload["response"] == emitted[0].payload["response"]
+    assert summary.deduplicated == 1
+    with pytest.raises(ValueError, match="window must be greater than 0"):
+        run_batch_cache_scheduled(PromptRunner(provider=MockProvider()), items, "mock", emitted.append, window=0)
+
+
+def test_run_batch_parallel_cache_schedule_preserves_input_order() -> None:
+    items = [_item(i, f"p{i}", f"S{i % 3}") for i in range(12)]
+    emitted = []
+
+    summary = run_batch_parallel(
+        provider_factory=partial(MockProvider),
+        items=items,
+        provider="mock",
+        on_result=emitted.append,
+        processes=2,
+        cache_schedule=True,
+    )
+
+    assert [result.index for result in emitted] == list(range(12))
+    assert emitted[5].to_dict()["payload"]["response"] == "Echo: SYSTEM:\nS2\n\nUSER:\np5"
+    assert summary.succeeded == 12
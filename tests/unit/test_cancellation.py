@@ -0,0 +1,264 @@
+"""Unit tests for run deadlines, cancellation, stream stall detection and connection aborts."""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ai_prompt_runner.core.cancellation import CancellationToken, RunControl
+from ai_prompt_runner.core.error_taxonomy import normalize_runtime_error
+from ai_prompt_runner.core.errors import (
+    DeadlineExceededError,
+    ProviderError,
+    RunCancelledError,
+    StreamStallError,
+)
+from ai_prompt_runner.core.models import PromptRequest
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.services import call_control
+from ai_prompt_runner.services.openai_compatible_provider import (
+    OpenAICompatibleProvider,
+    OpenAICompatibleProviderConfig,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_run_control_deadline_clamps_timeouts_then_expires() -> None:
+    """Per-request timeouts never exceed the time left for the whole run."""
+    clock = FakeClock()
+    control = RunControl(deadline_seconds=10, clock=clock)
+
+    assert control.request_timeout(30, 60) == (10, 10)
+    clock.now += 8
+    assert control.request_timeout(1, 60) == (1, 2)
+    clock.now += 2
+    assert control.stopped
+    with pytest.raises(DeadlineExceededError, match="deadline of 10 second"):
+        control.check()
+
+
+def test_cancellation_token_runs_callbacks_once_and_late_registrations_immediately() -> None:
+    token = CancellationToken()
+    calls: list[str] = []
+    unregister = token.register(lambda: calls.append("removed"))
+    unregister()
+    token.register(lambda: calls.append("early"))
+
+    token.cancel()
+    token.cancel()
+    token.register(lambda: calls.append("late"))
+
+    assert calls == ["early", "late"]
+    with pytest.raises(RunCancelledError):
+        RunControl(token=token).check()
+
+
+def test_request_timeout_splits_connect_and_read() -> None:
+    """Without a control, a scalar timeout is kept unless connect is set separately."""
+    assert call_control.request_timeout(30, None, None) == 30
+    assert call_control.request_timeout(30, 2.5, None) == (2.5, 30)
+
+
+class _SlowDripHandler(BaseHTTPRequestHandler):
+    """Streams one SSE chunk, then stalls far longer than any test waits."""
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        self.wfile.write(b'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n')
+        # SSE comment padding pushes the chunk past the client's read buffer.
+        self.wfile.write(b": " + b"." * 1024 + b"\n\n")
+        self.wfile.flush()
+        time.sleep(10)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def slow_endpoint():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowDripHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _runner(endpoint: str, **config) -> PromptRunner:
+    return PromptRunner(
+        provider=OpenAICompatibleProvider(
+            OpenAICompatibleProviderConfig(
+                endpoint=endpoint,
+                api_key="dummy",
+                model="m1",
+                timeout_seconds=30,
+                max_retries=config.pop("max_retries", 3),
+                **config,
+            )
+        )
+    )
+
+
+def test_cancel_aborts_blocked_stream_read_promptly(slow_endpoint) -> None:
+    """Cancelling interrupts a stalled read instead of waiting for the 30s timeout."""
+    token = CancellationToken()
+    chunks: list[str] = []
+    threading.Timer(0.3, token.cancel).start()
+
+    start = time.monotonic()
+    with pytest.raises(RunCancelledError):
+        _runner(slow_endpoint).run(
+            PromptRequest(prompt_text="Hi", provider="openai", stream=True),
+            on_stream_chunk=chunks.append,
+            cancel_token=token,
+        )
+
+    assert chunks == ["Hel"]
+    assert time.monotonic() - start < 3
+
+
+def test_deadline_bounds_the_whole_run_including_retries(slow_endpoint) -> None:
+    """The deadline stops retries and the stream, whatever the per-read timeout."""
+    runner = _runner(slow_endpoint)
+    runner.deadline_seconds = 0.5
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        runner.run(PromptRequest(prompt_text="Hi", provider="openai", stream=True))
+
+    assert time.monotonic() - start < 3
+    assert runner.provider.run_control is None
+
+
+class _StallOnceHandler(BaseHTTPRequestHandler):
+    """First request sends headers and then nothing; later requests stream normally."""
+
+    requests_seen = 0
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        type(self).requests_seen += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        if type(self).requests_seen == 1:
+            self.wfile.flush()
+            time.sleep(10)
+            return
+        self.wfile.write(b'data: {"choices": [{"delta": {"content": "Hello"}}]}\n\ndata: [DONE]\n\n')
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_stall_before_first_chunk_is_retried(monkeypatch) -> None:
+    """A silent upstream is abandoned after the first-chunk timeout and retried."""
+    monkeypatch.setattr(_StallOnceHandler, "requests_seen", 0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StallOnceHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    runner = _runner(
+        f"http://127.0.0.1:{server.server_address[1]}",
+        max_retries=1,
+        first_chunk_timeout_seconds=0.3,
+    )
+    try:
+        start = time.monotonic()
+        payload = runner.run(PromptRequest(prompt_text="Hi", provider="openai", stream=True))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert payload["response"] == "Hello"
+    assert _StallOnceHandler.requests_seen == 2
+    assert time.monotonic() - start < 3
+
+
+def test_idle_stall_after_output_fails_with_timeout_subtype(slow_endpoint) -> None:
+    """Once chunks were emitted a stall is not retried and is reported as stream_idle."""
+    runner = _runner(slow_endpoint, stream_idle_timeout_seconds=0.3)
+    chunks: list[str] = []
+
+    start = time.monotonic()
+    with pytest.raises(ProviderError) as exc_info:
+        runner.run(
+            PromptRequest(prompt_text="Hi", provider="openai", stream=True),
+            on_stream_chunk=chunks.append,
+        )
+
+    assert time.monotonic() - start < 3
+    assert chunks == ["Hel"]
+    assert isinstance(exc_info.value.__cause__, StreamStallError)
+    error = normalize_runtime_error(exc_info.value).to_dict()
+    assert error["code"] == "timeout"
+    assert error["subtype"] == "stream_idle"
+
+
+def test_early_stop_drops_upstream_connection_without_waiting(slow_endpoint) -> None:
+    """Meeting a stop sequence returns immediately even though the upstream stalls."""
+    start = time.monotonic()
+    payload = _runner(slow_endpoint).run(
+        PromptRequest(prompt_text="Hi", provider="openai", stream=True, stop=("l",))
+    )
+
+    assert payload["response"] == "He"
+    assert payload["metadata"]["truncation"]["stop_sequence"] == "l"
+    assert time.monotonic() - start < 3
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """Sends only SSE keep-alive comments for seconds before any content."""
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        try:
+            for _ in range(30):
+                # Padded so each comment reaches the client past its read buffer.
+                self.wfile.write(b": keepalive" + b"." * 1024 + b"\n\n")
+                self.wfile.flush()
+                time.sleep(0.1)
+            self.wfile.write(b'data: {"choices": [{"delta": {"content": "late"}}]}\n\n')
+        except OSError:
+            pass
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_keep_alive_comments_do_not_satisfy_first_chunk_timeout() -> None:
+    """Only content counts as the first chunk; keep-alives cannot hide a stall."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    runner = _runner(
+        f"http://127.0.0.1:{server.server_address[1]}",
+        max_retries=0,
+        first_chunk_timeout_seconds=0.5,
+    )
+    try:
+        start = time.monotonic()
+        with pytest.raises(ProviderError) as exc_info:
+            runner.run(PromptRequest(prompt_text="Hi", provider="openai", stream=True))
+        elapsed = time.monotonic() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert elapsed < 2
+    assert normalize_runtime_error(exc_info.value).to_dict()["subtype"] == "stream_first_chunk"
@@ -0,0 +1,259 @@
+"""Unit tests for the record/replay cassette transports."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ai_prompt_runner.api import PromptClient
+from ai_prompt_runner.core.errors import RateLimitError
+from ai_prompt_runner.core.models import PromptRequest
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.services.cassette import (
+    REDACTED,
+    CassetteMissError,
+    RecordingTransport,
+    ReplayTransport,
+    exchange_key,
+)
+from ai_prompt_runner.services.provider_factory import ConfigurationError, create_provider
+from ai_prompt_runner.services.transport import Transport, iter_byte_lines, iter_byte_text
+
+SECRET = "sk-test-0123456789"
+# Gap the paced upstream leaves between stream events.
+GAP_SECONDS = 0.12
+
+
+class _PacedUpstreamHandler(BaseHTTPRequestHandler):
+    """OpenAI-style JSON and SSE; stream events are flushed GAP_SECONDS apart."""
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if self.path.startswith("/status/"):
+            self.send_response(int(self.path.split("/")[2]))
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+            return
+        if request.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for text in ("Hel", "lo", " wörld"):
+                event = {"choices": [{"delta": {"content": text}}]}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(GAP_SECONDS)
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+        body = json.dumps(
+            {
+                "model": request["model"],
+                "choices": [{"message": {"content": f"echo:{request['messages'][-1]['content']}"}}],
+                "usage": {"prompt_tokens": 2, "completion_tokens": 1, "total_tokens": 3},
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PacedUpstreamHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class _CannedResponse:
+    def __init__(self, body: str) -> None:
+        self.status_code = 200
+        self._body = body.encode("utf-8")
+
+    @property
+    def text(self) -> str:
+        return self._body.decode("utf-8")
+
+    def json(self):
+        return json.loads(self._body)
+
+    def iter_bytes(self):
+        # Split inside the first multi-byte character: chunks are stored as raw bytes.
+        cut = self._body.find("é".encode("utf-8")) + 1
+        yield from (self._body[:cut], self._body[cut:])
+
+    def iter_lines(self, decode_unicode: bool = False):
+        yield from iter_byte_lines(self.iter_bytes(), decode_unicode)
+
+    def iter_text(self):
+        yield from iter_byte_text(self.iter_bytes())
+
+    def close(self) -> None:
+        pass
+
+
+class _CannedTransport(Transport):
+    """Answers every request with a fixed body and records what was sent."""
+
+    name = "canned"
+
+    def __init__(self, body: str, stream_body: str) -> None:
+        self.body = body
+        self.stream_body = stream_body
+        self.sent: list[tuple[str, dict]] = []
+
+    def send(self, url, *, headers, json, timeout, scope=None):
+        self.sent.append((url, headers))
+        return _CannedResponse(self.body)
+
+    def stream(self, url, *, headers, json, timeout, scope=None):
+        self.sent.append((url, headers))
+        return _CannedResponse(self.stream_body)
+
+
+def _run(provider, prompt: str, stream: bool = False) -> tuple[str, list[str]]:
+    chunks: list[str] = []
+    payload = PromptRunner(provider=provider).run(
+        PromptRequest(prompt_text=prompt, provider="openai", stream=stream),
+        on_stream_chunk=chunks.append,
+    )
+    return payload["response"], chunks
+
+
+def _cassette_text(directory) -> str:
+    return "".join(path.read_text(encoding="utf-8") for path in sorted(directory.glob("*.json")))
+
+
+def test_recorded_exchanges_replay_without_the_upstream(upstream, tmp_path) -> None:
+    server, endpoint = upstream
+    recorder = create_provider("openai", api_endpoint=endpoint, api_key=SECRET, api_model="m1", record_dir=str(tmp_path))
+    recorded_json = _run(recorder, "ping")
+    recorded_stream = _run(recorder, "stream me", stream=True)
+    server.shutdown()
+
+    assert recorded_json == ("echo:ping", [])
+    assert recorded_stream == ("Hello wörld", ["Hel", "lo", " wörld"])
+    assert len(list(tmp_path.glob("*.json"))) == 2
+    text = _cassette_text(tmp_path)
+    assert SECRET not in text
+    assert f'"Authorization": "{REDACTED}"' in text
+
+    # Replay matches on path and body only: another host and key work.
+    replayer = create_provider(
+        "openai", api_endpoint="https://api.example.invalid/v1", api_key="other", api_model="m1", replay_dir=str(tmp_path)
+    )
+    assert _run(replayer, "ping") == recorded_json
+    assert _run(replayer, "stream me", stream=True) == recorded_stream
+
+
+def test_recorded_timing_reproduces_stream_gaps(upstream, tmp_path) -> None:
+    _, endpoint = upstream
+    recorder = create_provider("openai", api_endpoint=endpoint, api_key=SECRET, api_model="m1", record_dir=str(tmp_path))
+    _run(recorder, "stream me", stream=True)
+
+    def timed(timing: str) -> float:
+        provider = create_provider(
+            "openai", api_endpoint=endpoint, api_key=SECRET, api_model="m1", replay_dir=str(tmp_path), replay_timing=timing
+        )
+        started = time.monotonic()
+        assert _run(provider, "stream me", stream=True)[0] == "Hello wörld"
+        return time.monotonic() - started
+
+    assert timed("instant") < GAP_SECONDS
+    assert timed("recorded") >= 2 * GAP_SECONDS
+
+
+def test_error_statuses_are_recorded_and_replayed(upstream, tmp_path) -> None:
+    _, endpoint = upstream
+    endpoint = endpoint.replace("/v1", "/status/429")
+    recorder = create_provider("openai", api_endpoint=endpoint, api_key=SECRET, api_model="m1", record_dir=str(tmp_path))
+    with pytest.raises(RateLimitError):
+        _run(recorder, "ping")
+
+    replayer = create_provider("openai", api_endpoint=endpoint, api_key=SECRET, api_model="m1", replay_dir=str(tmp_path))
+    with pytest.raises(RateLimitError):
+        _run(replayer, "ping")
+
+
+def test_replay_miss_fails_without_retrying(tmp_path) -> None:
+    provider = create_provider(
+        "openai", api_endpoint="http://stub/v1", api_key="k", api_model="m1", max_retries=3, replay_dir=str(tmp_path)
+    )
+    with pytest.raises(CassetteMissError, match="No recorded exchange for POST /v1/chat/completions"):
+        _run(provider, "never recorded")
+
+
+@pytest.mark.parametrize(
+    ("provider_name", "body", "stream_body"),
+    [
+        (
+            "anthropic",
+            '{"content": [{"type": "text", "text": "héllo"}]}',
+            'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "hé"}}\n\n'
+            'data: {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "llo"}}\n\n'
+            'data: {"type": "message_stop"}\n\n',
+        ),
+        (
+            "google",
+            '{"candidates": [{"content": {"parts": [{"text": "héllo"}]}}]}',
+            'data: {"candidates": [{"content": {"parts": [{"text": "hé"}]}}]}\n\n'
+            'data: {"candidates": [{"content": {"parts": [{"text": "llo"}]}}]}\n\n',
+        ),
+    ],
+)
+def test_native_providers_round_trip_through_cassettes(tmp_path, provider_name, body, stream_body) -> None:
+    canned = _CannedTransport(body, stream_body)
+    recorder = create_provider(
+        provider_name, api_endpoint="http://stub", api_key=SECRET, api_model="m1", transport=canned, record_dir=str(tmp_path)
+    )
+    recorded = (_run(recorder, "hi"), _run(recorder, "hi", stream=True))
+    assert recorded[0][0] == "héllo"
+    assert recorded[1][0] == "héllo"
+    assert SECRET in json.dumps(canned.sent)
+    assert SECRET not in _cassette_text(tmp_path)
+    assert '"base64"' in _cassette_text(tmp_path)
+
+    replayer = create_provider(
+        provider_name, api_endpoint="http://stub", api_key=SECRET, api_model="m1", replay_dir=str(tmp_path)
+    )
+    assert (_run(replayer, "hi"), _run(replayer, "hi", stream=True)) == recorded
+
+
+def test_exchange_key_normalizes_the_request() -> None:
+    key = exchange_key("https://a.example/v1/chat?key=1", {"b": 1, "a": SECRET}, False, [SECRET])
+
+    assert key == exchange_key("http://127.0.0.1:9/v1/chat", {"a": "other", "b": 1}, False, ["other"])
+    assert key != exchange_key("https://a.example/v2/chat", {"b": 1, "a": SECRET}, False, [SECRET])
+    assert key != exchange_key("https://a.example/v1/chat", {"b": 1, "a": SECRET}, True, [SECRET])
+
+
+def test_record_and_replay_are_exclusive(tmp_path) -> None:
+    with pytest.raises(ConfigurationError, match="cannot be used together"):
+        create_provider("openai", api_endpoint="http://stub", api_key="k", record_dir=str(tmp_path), replay_dir=str(tmp_path))
+    with pytest.raises(ConfigurationError, match="does not exist"):
+        create_provider("openai", api_endpoint="http://stub", api_key="k", replay_dir=str(tmp_path / "missing"))
+    with pytest.raises(ValueError, match="Unknown replay timing"):
+        ReplayTransport(tmp_path, timing="slow")
+    assert RecordingTransport(_CannedTransport("{}", ""), tmp_path / "new").directory.is_dir()
+
+
+def test_prompt_client_pools_record_and_replay(upstream, tmp_path) -> None:
+    server, endpoint = upstream
+    with PromptClient(provider="openai", api_endpoint=endpoint, api_key=SECRET, api_model="m1", record_dir=tmp_path) as client:
+        recorded = client.run("ping")["response"]
+    server.shutdown()
+
+    with PromptClient(provider="openai", api_endpoint=endpoint, api_key=SECRET, api_model="m1", replay_dir=tmp_path) as client:
+        assert client.run("ping")["response"] == recorded == "echo:ping"
@@ -0,0 +1,69 @@
+import pytest
+
+from ai_prompt_runner.core.batch import BatchRequestDefaults, request_from_record
+from ai_prompt_runner.core.dedup import BloomFilter, DedupPlan, ResultFanOut, dedup_key
+
+
+DEFAULTS = BatchRequestDefaults(provider="mock")
+
+
+def _key(record: dict, model: str | None = "m1") -> bytes:
+    return dedup_key(request_from_record(record, 0, DEFAULTS), model)
+
+
+def test_dedup_key_covers_prompt_system_model_and_config() -> None:
+    """Any change to the effective request yields a different key."""
+    base = _key({"prompt": "hi"})
+
+    assert _key({"prompt": "hi"}) == base
+    assert _key({"prompt": " hi "}) == base
+    assert _key({"prompt": "hi", "system": "Be brief."}) != base
+    assert _key({"prompt": "hi", "temperature": 0.5}) != base
+    assert _key({"prompt": "hi", "max_tokens": 5}) != base
+    assert _key({"prompt": "hi"}, model="m2") != base
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    """Every inserted key is reported as present afterwards."""
+    bloom = BloomFilter(expected_items=500)
+    keys = [_key({"prompt": f"p{i}"}) for i in range(500)]
+
+    assert not any(bloom.add(key) for key in keys[:1])
+    for key in keys:
+        bloom.add(key)
+    assert all(bloom.add(key) for key in keys)
+
+
+def test_bloom_filter_rejects_invalid_false_positive_rate() -> None:
+    with pytest.raises(ValueError):
+        BloomFilter(expected_items=10, false_positive_rate=1.0)
+
+
+def test_dedup_plan_counts_repeats_exactly_despite_false_positives() -> None:
+    """Bloom false positives are dropped by the verification pass."""
+    keys = [_key({"prompt": f"p{i % 50}"}) for i in range(60)]
+    keys += [_key({"prompt": f"unique{i}"}) for i in range(200)]
+
+    # A deliberately undersized filter produces many false positives.
+    plan = DedupPlan.build(lambda: iter(keys), expected_items=4, false_positive_rate=0.5)
+
+    assert len(plan.repeated) == 10
+    assert set(plan.repeated.values()) == {2}
+
+
+def test_result_fan_out_serves_duplicates_and_evicts_after_last_one() -> None:
+    """Stored results are released once every duplicate position is served."""
+    key = _key({"prompt": "same"})
+    fan_out = ResultFanOut(plan=DedupPlan(repeated={key: 3}), model="m1")
+
+    assert fan_out.key_for(request_from_record({"prompt": "same"}, 0, DEFAULTS)) == key
+    assert fan_out.key_for(request_from_record({"prompt": "other"}, 0, DEFAULTS)) is None
+    assert fan_out.key_for(None) is None
+
+    assert fan_out.first_occurrence(key) is True
+    assert fan_out.first_occurrence(key) is False
+    fan_out.store(key, "result")
+    assert fan_out.take(key) == "result"
+    assert fan_out.take(key) == "result"
+    assert fan_out.deduplicated == 2
+    assert fan_out.first_occurrence(key) is True
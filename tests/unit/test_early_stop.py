@@ -0,0 +1,43 @@
+from ai_prompt_runner.core.early_stop import EarlyStop
+from ai_prompt_runner.core.models import TruncationMetadata
+
+
+def test_early_stop_cuts_at_stop_sequence_split_across_chunks() -> None:
+    """Partial matches are held back until they resolve; the stop text is dropped."""
+    early_stop = EarlyStop(stop=["\n\n"])
+
+    assert early_stop.feed("First para.\n") == "First para."
+    assert early_stop.feed("\nSecond") == ""
+    assert early_stop.truncation == TruncationMetadata(reason="stop_sequence", stop_sequence="\n\n")
+    assert early_stop.feed("more") == ""
+
+
+def test_early_stop_releases_held_text_that_did_not_become_a_stop() -> None:
+    early_stop = EarlyStop(stop=["END"])
+
+    assert early_stop.feed("The EN") == "The "
+    assert early_stop.feed("D") == ""
+    assert early_stop.truncation is not None
+
+    early_stop = EarlyStop(stop=["END"])
+    assert early_stop.feed("The EN") == "The "
+    assert early_stop.feed("tire") == "ENtire"
+    assert early_stop.flush() == ""
+    assert early_stop.truncation is None
+
+
+def test_early_stop_caps_response_length() -> None:
+    early_stop = EarlyStop(max_chars=5)
+
+    assert early_stop.feed("abc") == "abc"
+    assert early_stop.feed("defg") == "de"
+    assert early_stop.truncation == TruncationMetadata(reason="max_response_chars")
+    assert EarlyStop(max_chars=5).apply("abcde") == "abcde"
+    assert not EarlyStop().enabled
+
+
+def test_early_stop_applies_to_complete_responses() -> None:
+    early_stop = EarlyStop(stop=["}"], max_chars=100)
+
+    assert early_stop.apply('{"a": 1} trailing') == '{"a": 1'
+    assert early_stop.truncation.stop_sequence == "}"
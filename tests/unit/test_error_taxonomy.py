@@ -14,9 +14,12 @@ from ai_prompt_runner.core.error_taxonomy import (
 from ai_prompt_runner.core.errors import (
     AuthenticationError,
     AuthorizationError,
+    DeadlineExceededError,
     PromptRunnerError,
     ProviderError,
     RateLimitError,
+    RunCancelledError,
+    StreamStallError,
 )
 from ai_prompt_runner.services.provider_factory import ConfigurationError
 
@@ -29,6 +32,8 @@ from ai_prompt_runner.services.provider_factory import ConfigurationError
         (AuthorizationError("403"), "auth_error"),
         (TimeoutError("timeout"), "timeout"),
         (requests.Timeout("timed out"), "timeout"),
+        (DeadlineExceededError("deadline"), "timeout"),
+        (RunCancelledError("cancelled"), "cancelled"),
         (ConnectionError("network down"), "network_error"),
         (requests.ConnectionError("socket closed"), "network_error"),
         (ConfigurationError("bad config"), "invalid_request"),
@@ -100,3 +105,13 @@ def test_map_runtime_error_code_does_not_misclassify_auth_status_as_invalid_requ
     assert map_runtime_error_code(ProviderError("Provider returned HTTP 401.")) == "provider_error"
     assert map_runtime_error_code(ProviderError("Provider returned HTTP 403.")) == "provider_error"
     assert map_runtime_error_code(ProviderError("Provider returned HTTP 429.")) == "provider_error"
+
+
+def test_normalize_runtime_error_reports_timeout_subtype_only_when_known() -> None:
+    """Deadline and stream stall causes are exposed as a timeout subtype."""
+    stall = ProviderError("Provider request failed")
+    stall.__cause__ = StreamStallError("Stream stalled", phase="first_chunk")
+
+    assert normalize_runtime_error(stall).to_dict()["subtype"] == "stream_first_chunk"
+    assert normalize_runtime_error(DeadlineExceededError("late")).to_dict()["subtype"] == "deadline"
+    assert "subtype" not in normalize_runtime_error(requests.Timeout("timed out")).to_dict()
@@ -10,6 +10,7 @@ from ai_prompt_runner.core.errors import (
 )
 from ai_prompt_runner.core.models import GenerationConfig
 from ai_prompt_runner.services.google_provider import (
+    CachedContentRegistry,
     GoogleProvider,
     GoogleProviderConfig,
 )
@@ -135,6 +136,7 @@ def test_generate_includes_runtime_controls_when_provided(monkeypatch) -> None:
             temperature=0.2,
             max_tokens=120,
             top_p=0.95,
+            stop=("END",),
         ),
     )
 
@@ -143,6 +145,59 @@ def test_generate_includes_runtime_controls_when_provided(monkeypatch) -> None:
     assert generation_payload["temperature"] == 0.2
     assert generation_payload["maxOutputTokens"] == 120
     assert generation_payload["topP"] == 0.95
+    assert generation_payload["stopSequences"] == ["END"]
+
+
+def test_generate_forwards_at_most_five_stop_sequences(monkeypatch) -> None:
+    """generateContent caps `stopSequences` at five; the rest stay client-side."""
+    provider = _make_provider()
+    observed = {}
+
+    def fake_post(url, headers, json, timeout):
+        observed["payload"] = json
+        return DummyResponse(
+            {"candidates": [{"content": {"parts": [{"text": "ok"}]}}]},
+            status_code=200,
+        )
+
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.google_provider.requests.post",
+        fake_post,
+    )
+
+    provider.generate("hello", generation_config=GenerationConfig(stop=tuple("abcdef")))
+
+    assert observed["payload"]["generationConfig"]["stopSequences"] == list("abcde")
+
+
+def test_generate_samples_sends_candidate_count(monkeypatch) -> None:
+    provider = _make_provider()
+    observed = {}
+
+    def fake_post(url, headers, json, timeout):
+        observed["payload"] = json
+        return DummyResponse(
+            {
+                "candidates": [
+                    {"content": {"parts": [{"text": "a"}]}, "finishReason": "STOP", "index": 0},
+                    {"content": {"parts": [{"text": "b"}]}, "finishReason": "MAX_TOKENS", "index": 1},
+                ]
+            },
+            status_code=200,
+        )
+
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.google_provider.requests.post",
+        fake_post,
+    )
+
+    samples = provider.generate_samples("hello", generation_config=GenerationConfig(n=2))
+
+    assert observed["payload"]["generationConfig"] == {"candidateCount": 2}
+    assert [(sample.text, sample.finish_reason) for sample in samples] == [
+        ("a", "STOP"),
+        ("b", "MAX_TOKENS"),
+    ]
 
 
 def test_generate_extracts_usage_metadata(monkeypatch) -> None:
@@ -950,3 +1005,116 @@ def test_generate_stream_defensive_fallback_on_invalid_retry_config() -> None:
 
     with pytest.raises(ProviderError, match="Provider request failed unexpectedly."):
         list(provider.generate_stream("hello"))
+
+
+def _make_caching_provider(registry: CachedContentRegistry) -> GoogleProvider:
+    return GoogleProvider(
+        GoogleProviderConfig(
+            endpoint="https://generativelanguage.googleapis.com/v1beta/models",
+            api_key="dummy",
+            model="gemini-2.5-flash",
+            timeout_seconds=5,
+            prompt_cache=True,
+            cached_contents=registry,
+        )
+    )
+
+
+def test_prompt_cache_creates_cached_content_once_and_references_it(monkeypatch) -> None:
+    """The system prompt moves into one cachedContent reused by later calls."""
+    posts: list[tuple[str, dict]] = []
+
+    def fake_post(url, headers, json, timeout):
+        posts.append((url, json))
+        if url.endswith("/cachedContents"):
+            return DummyResponse(
+                {"name": "cachedContents/abc", "usageMetadata": {"totalTokenCount": 4000}}
+            )
+        return DummyResponse(
+            {
+                "candidates": [{"content": {"parts": [{"text": "ok"}]}}],
+                "usageMetadata": {
+                    "promptTokenCount": 4010,
+                    "candidatesTokenCount": 5,
+                    "totalTokenCount": 4015,
+                    "cachedContentTokenCount": 4000,
+                },
+            }
+        )
+
+    monkeypatch.setattr("ai_prompt_runner.services.google_provider.requests.post", fake_post)
+    registry = CachedContentRegistry()
+
+    first = _make_caching_provider(registry)
+    assert first.generate("a", system_prompt="Long rules.") == "ok"
+    first_usage = first.get_last_usage()
+    second = _make_caching_provider(registry)
+    assert second.generate("b", system_prompt="Long rules.") == "ok"
+
+    urls = [url for url, _ in posts]
+    assert urls == [
+        "https://generativelanguage.googleapis.com/v1beta/cachedContents",
+        "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent",
+        "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent",
+    ]
+    assert posts[0][1]["model"] == "models/gemini-2.5-flash"
+    assert posts[0][1]["systemInstruction"] == {"parts": [{"text": "Long rules."}]}
+    assert posts[0][1]["ttl"] == "300s"
+    for _, payload in posts[1:]:
+        assert payload["cachedContent"] == "cachedContents/abc"
+        assert "systemInstruction" not in payload
+
+    assert first_usage.cache_read_tokens == 4000
+    assert first_usage.cache_write_tokens == 4000
+    assert second.get_last_usage().cache_write_tokens is None
+
+
+def test_prompt_cache_remembers_prompts_the_api_refuses_to_cache(monkeypatch) -> None:
+    """A 400 (for example below the minimum size) falls back inline without re-trying."""
+    posts: list[str] = []
+
+    def fake_post(url, headers, json, timeout):
+        posts.append(url)
+        if url.endswith("/cachedContents"):
+            return DummyResponse({"error": {"message": "too small"}}, status_code=400)
+        assert json["systemInstruction"] == {"parts": [{"text": "Short."}]}
+        return DummyResponse({"candidates": [{"content": {"parts": [{"text": "ok"}]}}]})
+
+    monkeypatch.setattr("ai_prompt_runner.services.google_provider.requests.post", fake_post)
+    provider = _make_caching_provider(CachedContentRegistry())
+
+    assert provider.generate("a", system_prompt="Short.") == "ok"
+    assert provider.generate("b", system_prompt="Short.") == "ok"
+
+    assert sum(url.endswith("/cachedContents") for url in posts) == 1
+
+
+def test_prompt_cache_retries_creation_after_transport_failure(monkeypatch) -> None:
+    """A transport error is not remembered: this call goes inline, the next one retries."""
+    attempts = {"create": 0}
+
+    def fake_post(url, headers, json, timeout):
+        if url.endswith("/cachedContents"):
+            attempts["create"] += 1
+            raise requests.ConnectionError("reset")
+        assert "systemInstruction" in json
+        return DummyResponse({"candidates": [{"content": {"parts": [{"text": "ok"}]}}]})
+
+    monkeypatch.setattr("ai_prompt_runner.services.google_provider.requests.post", fake_post)
+    provider = _make_caching_provider(CachedContentRegistry())
+
+    assert provider.generate("a", system_prompt="Rules.") == "ok"
+    assert provider.generate("b", system_prompt="Rules.") == "ok"
+
+    assert attempts["create"] == 2
+
+
+def test_cached_content_registry_expires_entries_before_their_ttl() -> None:
+    now = {"value": 0.0}
+    registry = CachedContentRegistry(clock=lambda: now["value"])
+    registry.store("key", "cachedContents/abc", ttl_seconds=60)
+
+    assert registry.lookup("key") == (True, "cachedContents/abc")
+    now["value"] = 55.0
+    # Within the refresh margin the entry is dropped so it is recreated.
+    assert registry.lookup("key") == (False, None)
@@ -1,7 +1,14 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 import requests
 
-from ai_prompt_runner.services.http_provider import HTTPProvider, HTTPProviderConfig
+from ai_prompt_runner.core.models import GenerationConfig, PromptRequest
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.services.http_provider import HTTP_STREAM_MODES, HTTPProvider, HTTPProviderConfig
+from ai_prompt_runner.services.provider_factory import create_provider
 
 from ai_prompt_runner.core.errors import (
     AuthenticationError,
@@ -76,6 +83,25 @@ def test_generate_includes_system_prompt_in_effective_payload(monkeypatch) -> No
     assert observed["json"]["prompt"] == "SYSTEM:\nYou are strict.\n\nUSER:\nhello"
 
 
+def test_generate_samples_fans_out_concurrent_generate_calls(monkeypatch) -> None:
+    """The generic HTTP contract has no sample count, so each sample is one call."""
+    provider = HTTPProvider(
+        HTTPProviderConfig(endpoint="http://example.test/api", api_key="dummy")
+    )
+    calls = {"count": 0}
+
+    def fake_post(*args, **kwargs):
+        calls["count"] += 1
+        return DummyResponse({"response": "ok"})
+
+    monkeypatch.setattr("ai_prompt_runner.services.http_provider.requests.post", fake_post)
+
+    samples = provider.generate_samples("hello", generation_config=GenerationConfig(n=3))
+
+    assert calls["count"] == 3
+    assert [sample.text for sample in samples] == ["ok", "ok", "ok"]
+
+
 def test_generate_fails_after_retry_exhausted(monkeypatch) -> None:
     """Test that if the provider call fails with a transient error and we exhaust all retries, we raise a ProviderError."""
     provider = HTTPProvider(
@@ -214,3 +240,106 @@ def test_generate_rejects_non_string_response_field(monkeypatch) -> None:
 
     with pytest.raises(ProviderError, match="Provider response must contain a string field 'response'."):
           provider.generate("Hello")
+
+
+class _StreamingGatewayHandler(BaseHTTPRequestHandler):
+    """Answers `"stream": true` requests in the wire format named by the path."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        assert request["stream"] is True
+        events = [{"response": "Hé"}, {"response": "llo"}, {"done": True}]
+        if self.path == "/ndjson":
+            parts = [json.dumps(event).encode() + b"\n" for event in events]
+            content_type = "application/x-ndjson"
+        elif self.path == "/sse":
+            parts = [f"data: {json.dumps(event)}\n\n".encode() for event in events] + [b"data: [DONE]\n\n"]
+            content_type = "text/event-stream"
+        else:
+            # Split inside the two-byte "é" to exercise incremental decoding.
+            parts = [b"H\xc3", b"\xa9", b"llo"]
+            content_type = "text/plain; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for part in parts:
+            self.wfile.write(f"{len(part):x}\r\n".encode() + part + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def streaming_gateway():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StreamingGatewayHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("transport_name", ["requests", "urllib3"])
+@pytest.mark.parametrize("stream_mode", HTTP_STREAM_MODES)
+def test_generate_stream_reads_each_stream_mode(streaming_gateway, stream_mode: str, transport_name: str) -> None:
+    provider = create_provider(
+        "http",
+        api_endpoint=f"{streaming_gateway}/{stream_mode}",
+        api_key="dummy",
+        transport=transport_name,
+        http_stream_mode=stream_mode,
+    )
+
+    chunks = list(provider.generate_stream("Hello"))
+
+    assert "".join(chunks) == "Héllo"
+    if stream_mode != "text":
+        assert chunks == ["Hé", "llo"]
+
+
+def test_generate_stream_without_mode_falls_back_to_generate(monkeypatch) -> None:
+    """The runner falls back to one non-stream call when no stream mode is set."""
+    provider = HTTPProvider(
+        HTTPProviderConfig(endpoint="http://example.test/api", api_key="dummy", model="m1", timeout_seconds=5)
+    )
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.http_provider.requests.post",
+        lambda *args, **kwargs: DummyResponse({"response": "ok"}),
+    )
+
+    with pytest.raises(NotImplementedError, match="Streaming is not supported"):
+        provider.generate_stream("Hello")
+    payload = PromptRunner(provider=provider).run(PromptRequest(prompt_text="Hello", provider="http", stream=True))
+    assert payload["response"] == "ok"
+
+
+def test_extract_stream_delta_rejects_error_and_malformed_events() -> None:
+    provider = HTTPProvider(
+        HTTPProviderConfig(
+            endpoint="http://example.test/api", api_key="dummy", model="m1", timeout_seconds=5, stream_mode="ndjson"
+        )
+    )
+
+    assert provider._extract_stream_delta({"done": True}) is None
+    with pytest.raises(ProviderError, match="Provider stream error: model not loaded"):
+        provider._extract_stream_delta({"error": "model not loaded"})
+    with pytest.raises(ProviderError, match="'response' must be a string"):
+        provider._extract_stream_delta({"response": 1})
+
+
+def test_runner_reports_first_chunk_latency_for_http_streams(streaming_gateway) -> None:
+    provider = create_provider(
+        "http", api_endpoint=f"{streaming_gateway}/sse", api_key="dummy", http_stream_mode="sse"
+    )
+
+    payload = PromptRunner(provider=provider).run(PromptRequest(prompt_text="Hello", provider="http", stream=True))
+
+    assert payload["response"] == "Héllo"
+    assert payload["metadata"]["latency"]["first_chunk_ms"] >= 0
@@ -0,0 +1,173 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from ai_prompt_runner.core.errors import InputValidationError
+from ai_prompt_runner.utils.jsonl_input import (
+    JsonlInputReader,
+    JsonlRecord,
+    ShardSpec,
+    iter_read_ahead,
+    parse_shard_spec,
+)
+
+
+def _write_lines(path: Path, count: int) -> None:
+    path.write_text(
+        "".join(f'{{"prompt": "p{i}"}}\n' for i in range(count)),
+        encoding="utf-8",
+    )
+
+
+def test_parse_shard_spec_accepts_i_of_n() -> None:
+    """Shard selector is parsed into a 0-based index and a count."""
+    assert parse_shard_spec("1/4") == ShardSpec(index=1, count=4)
+    assert parse_shard_spec(" 0/1 ").label() == "0/1"
+
+
+@pytest.mark.parametrize("value", ["1", "a/2", "2/2", "-1/2", "0/0"])
+def test_parse_shard_spec_rejects_invalid_values(value: str) -> None:
+    """Malformed or out-of-range selectors raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_shard_spec(value)
+
+
+def test_reader_iterates_all_records_and_skips_blank_lines(tmp_path: Path) -> None:
+    """Records keep their physical line index; blank lines are skipped."""
+    source = tmp_path / "in.jsonl"
+    source.write_bytes(b'{"prompt": "a"}\n\n{"prompt": "b"}\r\n{"prompt": "c"}')
+
+    with JsonlInputReader(source) as reader:
+        records = list(reader.iter_records())
+        assert reader.line_count == 4
+
+    assert [record.index for record in records] == [0, 2, 3]
+    assert [record.decode()["prompt"] for record in records] == ["a", "b", "c"]
+
+
+def test_reader_persists_and_reuses_offset_index(tmp_path: Path) -> None:
+    """The sidecar index is written once and reused while the source is unchanged."""
+    source = tmp_path / "in.jsonl"
+    _write_lines(source, 5)
+
+    with JsonlInputReader(source) as reader:
+        assert reader.line_count == 5
+
+    index_path = tmp_path / "in.jsonl.idx"
+    assert index_path.exists()
+    first_mtime = index_path.stat().st_mtime_ns
+
+    with JsonlInputReader(source) as reader:
+        assert reader.line_count == 5
+    assert index_path.stat().st_mtime_ns == first_mtime
+
+
+def test_reader_rebuilds_stale_index(tmp_path: Path) -> None:
+    """A changed source invalidates the persisted index."""
+    source = tmp_path / "in.jsonl"
+    _write_lines(source, 2)
+    with JsonlInputReader(source) as reader:
+        assert reader.line_count == 2
+
+    _write_lines(source, 7)
+    with JsonlInputReader(source) as reader:
+        assert reader.line_count == 7
+        assert reader.read_line(6) == b'{"prompt": "p6"}'
+
+
+def test_reader_handles_empty_file(tmp_path: Path) -> None:
+    """Empty inputs produce no records."""
+    source = tmp_path / "empty.jsonl"
+    source.write_bytes(b"")
+
+    with JsonlInputReader(source) as reader:
+        assert reader.line_count == 0
+        assert list(reader.iter_records()) == []
+
+
+def test_reader_without_persisted_index_leaves_no_sidecar(tmp_path: Path) -> None:
+    """persist_index=False keeps the index private to the process."""
+    source = tmp_path / "in.jsonl"
+    _write_lines(source, 3)
+
+    with JsonlInputReader(source, persist_index=False) as reader:
+        assert len(list(reader.iter_records())) == 3
+    assert not (tmp_path / "in.jsonl.idx").exists()
+
+
+def test_reader_rejects_missing_file(tmp_path: Path) -> None:
+    """Unreadable input is reported as an input validation error."""
+    with pytest.raises(InputValidationError):
+        JsonlInputReader(tmp_path / "missing.jsonl")
+
+
+@pytest.mark.parametrize("count", [1, 3, 10, 101])
+def test_byte_range_shards_partition_every_line_exactly_once(
+    tmp_path: Path,
+    count: int,
+) -> None:
+    """Shards are disjoint, ordered and together cover the whole input."""
+    source = tmp_path / "in.jsonl"
+    _write_lines(source, 37)
+
+    seen: list[int] = []
+    with JsonlInputReader(source) as reader:
+        for shard_index in range(count):
+            shard = ShardSpec(index=shard_index, count=count)
+            seen.extend(record.index for record in reader.iter_records(shard))
+
+    assert seen == list(range(37))
+
+
+def test_record_decode_rejects_invalid_json_and_non_objects() -> None:
+    """Decoding errors carry the 1-based line number."""
+    with pytest.raises(InputValidationError, match="line 3 is not valid JSON"):
+        JsonlRecord(index=2, raw=b"{oops").decode()
+    with pytest.raises(InputValidationError, match="line 1 must be a JSON object"):
+        JsonlRecord(index=0, raw=b"[1, 2]").decode()
+
+
+def test_iter_read_ahead_preserves_order() -> None:
+    """Read-ahead yields items unchanged and in order."""
+    assert list(iter_read_ahead(range(100), max_pending=3)) == list(range(100))
+
+
+def test_iter_read_ahead_bounds_pending_items() -> None:
+    """The producer never runs further ahead than max_pending (+1 in hand)."""
+    produced = 0
+    lock = threading.Lock()
+
+    def _source():
+        nonlocal produced
+        for value in range(50):
+            with lock:
+                produced += 1
+            yield value
+
+    iterator = iter_read_ahead(_source(), max_pending=4)
+    assert next(iterator) == 0
+    # Give the producer time to fill the queue, then check the bound.
+    threading.Event().wait(0.2)
+    with lock:
+        assert produced <= 6
+    iterator.close()
+
+
+def test_iter_read_ahead_reraises_producer_errors() -> None:
+    """Producer failures surface in the consumer."""
+
+    def _source():
+        yield 1
+        raise InputValidationError("broken input")
+
+    iterator = iter_read_ahead(_source(), max_pending=2)
+    assert next(iterator) == 1
+    with pytest.raises(InputValidationError, match="broken input"):
+        next(iterator)
+
+
+def test_iter_read_ahead_rejects_non_positive_bound() -> None:
+    """A zero-sized buffer is a configuration mistake."""
+    with pytest.raises(ValueError):
+        next(iter_read_ahead([1], max_pending=0))
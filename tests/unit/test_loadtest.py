@@ -0,0 +1,171 @@
+"""Unit tests for the open-loop load generator."""
+
+import threading
+
+import pytest
+
+from ai_prompt_runner.core.loadtest import (
+    LatencyHistogram,
+    LoadTestSettings,
+    arrival_offsets,
+    run_load_test,
+)
+from ai_prompt_runner.core.models import PromptRequest
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.services.mock_provider import Distribution, MockProfile, MockProvider
+from ai_prompt_runner.services.provider_factory import ConfigurationError
+
+
+def _mock_runner_factory(profile: MockProfile):
+    def factory(worker_index: int) -> PromptRunner:
+        return PromptRunner(provider=MockProvider(profile=profile, seed=worker_index))
+
+    return factory
+
+
+def test_constant_and_ramp_schedules_hit_the_expected_counts() -> None:
+    constant = list(arrival_offsets("constant", rps=10, duration_seconds=2))
+    assert len(constant) == 20
+    assert constant[:3] == [0.0, 0.1, 0.2]
+
+    # A ramp from 0 to 20 rps over 10 s offers the average rate: 100 requests.
+    ramp = list(arrival_offsets("ramp", rps=20, duration_seconds=10))
+    assert len(ramp) == 100
+    gaps = [later - earlier for earlier, later in zip(ramp, ramp[1:])]
+    assert gaps[0] > gaps[-1]
+    assert gaps[-1] == pytest.approx(1 / 20, rel=0.05)
+
+    flat = list(arrival_offsets("ramp", rps=5, duration_seconds=2, ramp_start_rps=5))
+    assert flat == list(arrival_offsets("constant", rps=5, duration_seconds=2))
+    assert len(list(arrival_offsets("ramp", rps=10, duration_seconds=4, ramp_start_rps=30))) == 80
+
+
+def test_poisson_schedule_is_seeded_and_averages_the_target_rate() -> None:
+    offsets = list(arrival_offsets("poisson", rps=50, duration_seconds=40, seed=7))
+    assert offsets == list(arrival_offsets("poisson", rps=50, duration_seconds=40, seed=7))
+    assert offsets != list(arrival_offsets("poisson", rps=50, duration_seconds=40, seed=8))
+    assert len(offsets) == pytest.approx(2000, rel=0.1)
+    assert all(0 <= offset < 40 for offset in offsets)
+
+    with pytest.raises(ValueError, match="Unknown arrival schedule"):
+        list(arrival_offsets("burst", rps=1, duration_seconds=1))
+    with pytest.raises(ValueError, match="greater than 0"):
+        list(arrival_offsets("constant", rps=0, duration_seconds=1))
+
+
+def test_latency_histogram_keeps_three_significant_digits() -> None:
+    histogram = LatencyHistogram()
+    assert histogram.summary() is None
+    for millisecond in range(1, 10_001):
+        histogram.record(millisecond / 1000)
+
+    assert histogram.percentile_ms(50) == pytest.approx(5000, rel=0.001)
+    assert histogram.percentile_ms(99) == pytest.approx(9900, rel=0.001)
+    assert histogram.percentile_ms(100) == 10_000
+    summary = histogram.summary()
+    assert summary["count"] == 10_000
+    assert summary["min"] == 1.0
+    assert summary["mean"] == pytest.approx(5000.5)
+    assert summary["p99_9"] == pytest.approx(9990, rel=0.001)
+
+    # Small values are exact.
+    small = LatencyHistogram()
+    small.record(0.000_042)
+    assert small.percentile_ms(50) == 0.042
+
+
+def test_run_load_test_measures_an_open_loop_run() -> None:
+    profile = MockProfile(first_chunk_ms=Distribution("fixed", 20), tokens_per_second=2000)
+    progress = []
+    report = run_load_test(
+        _mock_runner_factory(profile),
+        [PromptRequest(prompt_text="one", provider="mock", stream=True), PromptRequest(prompt_text="two", provider="mock", stream=True)],
+        LoadTestSettings(schedule="constant", rps=40, duration_seconds=0.5, concurrency=8),
+        on_progress=progress.append,
+        progress_interval_seconds=0.1,
+    )
+
+    payload = report.to_dict()
+    assert payload["requests"] == {"scheduled": 20, "completed": 20, "succeeded": 20, "failed": 0, "interrupted": False}
+    assert payload["error_codes"] == {}
+    assert payload["latency_ms"]["min"] >= 20
+    assert payload["ttft_ms"]["count"] == 20
+    assert payload["ttft_ms"]["p50"] <= payload["latency_ms"]["p50"]
+    assert payload["throughput"]["achieved_rps"] == pytest.approx(40, rel=0.3)
+    assert progress and progress[-1].scheduled <= 20
+
+
+def test_concurrency_ceiling_queues_arrivals_and_counts_the_wait() -> None:
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    class SlowProvider(MockProvider):
+        def generate(self, prompt, system_prompt=None, generation_config=None):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            threading.Event().wait(0.1)
+            with lock:
+                running -= 1
+            return "ok"
+
+    report = run_load_test(
+        lambda worker_index: PromptRunner(provider=SlowProvider()),
+        [PromptRequest(prompt_text="hi", provider="mock")],
+        LoadTestSettings(schedule="constant", rps=50, duration_seconds=0.2, concurrency=2),
+    )
+
+    assert peak == report.max_in_flight == 2
+    assert report.succeeded == 10
+    # The last arrival (at 0.18 s) waits until 0.4 s for a slot; latency includes the wait.
+    assert report.dispatch_lag.percentile_ms(100) > 150
+    assert report.latency.percentile_ms(100) > 250
+    assert report.to_dict()["ttft_ms"] is None
+
+
+def test_failures_are_counted_by_taxonomy_code() -> None:
+    profile = MockProfile(rate_limit_probability=0.5, server_error_probability=0.5)
+    report = run_load_test(
+        _mock_runner_factory(profile),
+        [PromptRequest(prompt_text="hi", provider="mock")],
+        LoadTestSettings(schedule="poisson", rps=200, duration_seconds=0.3, concurrency=4, seed=1),
+    )
+
+    assert report.succeeded == 0
+    assert report.failed == report.scheduled > 0
+    assert set(report.error_codes) == {"rate_limit", "provider_error"}
+    assert sum(report.error_codes.values()) == report.failed
+    with pytest.raises(ValueError, match="At least one request"):
+        run_load_test(_mock_runner_factory(profile), [], LoadTestSettings("constant", 1, 1, 1))
+
+
+class _BrokenProvider(MockProvider):
+    def generate(self, prompt, system_prompt=None, generation_config=None):
+        raise KeyError("bug")
+
+
+def test_unexpected_exceptions_are_counted_and_release_their_slot() -> None:
+    report = run_load_test(
+        lambda worker_index: PromptRunner(provider=_BrokenProvider()),
+        [PromptRequest(prompt_text="hi", provider="mock")],
+        LoadTestSettings(schedule="constant", rps=100, duration_seconds=0.05, concurrency=2),
+    )
+
+    assert (report.scheduled, report.succeeded, report.failed) == (5, 0, 5)
+    assert report.error_codes == {"provider_error": 5}
+    assert report.latency.count == 5
+
+
+def test_runner_factory_failure_is_a_configuration_error() -> None:
+    def factory(worker_index: int) -> PromptRunner:
+        raise ValueError("no API key")
+
+    with pytest.raises(ConfigurationError, match="worker setup failed: no API key") as exc_info:
+        run_load_test(
+            factory,
+            [PromptRequest(prompt_text="hi", provider="mock")],
+            LoadTestSettings(schedule="constant", rps=20, duration_seconds=0.2, concurrency=2),
+        )
+    assert isinstance(exc_info.value.__cause__, ValueError)
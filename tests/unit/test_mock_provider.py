@@ -1,7 +1,23 @@
+import time
+
 import pytest
 
-from ai_prompt_runner.core.errors import ProviderError
-from ai_prompt_runner.services.mock_provider import MockProvider
+from ai_prompt_runner.core.cancellation import RunControl
+from ai_prompt_runner.core.errors import (
+    DeadlineExceededError,
+    ProviderError,
+    RateLimitError,
+    UpstreamServerError,
+)
+from ai_prompt_runner.core.models import UsageMetadata
+from ai_prompt_runner.services.mock_provider import (
+    MOCK_PROFILES,
+    Distribution,
+    MockProfile,
+    MockProvider,
+    resolve_mock_profile,
+)
+from ai_prompt_runner.services.provider_factory import ConfigurationError, create_provider
 
 
 def test_generate_includes_system_prompt_in_effective_prompt() -> None:
@@ -28,3 +44,94 @@ def test_generate_stream_raises_provider_error_when_configured_to_fail() -> None
 
     with pytest.raises(ProviderError, match="mock failure"):
         list(provider.generate_stream("hello"))
+
+
+def _profile(**overrides) -> MockProfile:
+    values = {"response_tokens": Distribution("fixed", 10), "chunk_tokens": Distribution("fixed", 1)}
+    values.update(overrides)
+    return MockProfile(**values)
+
+
+def test_profile_paces_first_chunk_and_throughput() -> None:
+    provider = MockProvider(
+        profile=_profile(first_chunk_ms=Distribution("fixed", 60), tokens_per_second=100)
+    )
+
+    started = time.monotonic()
+    arrivals = []
+    chunks = []
+    for chunk in provider.generate_stream("hello"):
+        arrivals.append(time.monotonic() - started)
+        chunks.append(chunk)
+
+    # 10 tokens of 4 characters, one token per chunk, 10 ms apart after the first.
+    assert [len(chunk) for chunk in chunks] == [4] * 10
+    assert "".join(chunks) == " ".join(["Echo: hello"] * 4)[:40]
+    assert arrivals[0] >= 0.06
+    assert arrivals[-1] - arrivals[0] >= 0.085
+    assert provider.get_last_usage() == UsageMetadata(prompt_tokens=2, completion_tokens=10, total_tokens=12)
+
+
+def test_seeded_profiles_are_reproducible() -> None:
+    profile = _profile(chunk_tokens=Distribution("uniform", 0.5, 3), response_tokens=Distribution("normal", 50, 20))
+
+    def chunk_lengths(seed: int) -> list[list[int]]:
+        provider = MockProvider(profile=profile, seed=seed)
+        return [[len(chunk) for chunk in provider.generate_stream("hello")] for _ in range(3)]
+
+    assert chunk_lengths(7) == chunk_lengths(7)
+    assert chunk_lengths(7) != chunk_lengths(8)
+
+
+def test_profile_failures_use_real_error_classes() -> None:
+    with pytest.raises(RateLimitError):
+        MockProvider(profile=_profile(rate_limit_probability=1.0)).generate("hello")
+    with pytest.raises(UpstreamServerError):
+        list(MockProvider(profile=_profile(server_error_probability=1.0)).generate_stream("hello"))
+
+    provider = MockProvider(profile=_profile(rate_limit_probability=0.2, server_error_probability=0.1), seed=3)
+    outcomes = {"ok": 0, "RateLimitError": 0, "UpstreamServerError": 0}
+    for _ in range(1000):
+        try:
+            provider.generate("hello")
+            outcomes["ok"] += 1
+        except ProviderError as exc:
+            outcomes[type(exc).__name__] += 1
+    assert 150 < outcomes["RateLimitError"] < 250
+    assert 60 < outcomes["UpstreamServerError"] < 140
+
+
+def test_profile_waits_honour_the_run_deadline() -> None:
+    provider = MockProvider(profile=_profile(first_chunk_ms=Distribution("fixed", 5000)))
+    provider.run_control = RunControl(deadline_seconds=0.05)
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        provider.generate("hello")
+    assert time.monotonic() - started < 1
+
+
+def test_profiles_resolve_from_names_and_config_tables() -> None:
+    assert resolve_mock_profile("fast") is MOCK_PROFILES["fast"]
+    custom = resolve_mock_profile({"base": "slow", "tokens_per_second": 90, "first_chunk_ms": "uniform:5,10"})
+    assert custom.tokens_per_second == 90.0
+    assert custom.first_chunk_ms == Distribution("uniform", 5, 10)
+    assert custom.response_tokens == MOCK_PROFILES["slow"].response_tokens
+    assert Distribution.parse(12) == Distribution.parse("fixed:12") == Distribution("fixed", 12)
+
+    with pytest.raises(ValueError, match="Unknown mock profile"):
+        resolve_mock_profile("glacial")
+    with pytest.raises(ValueError, match="Unknown mock profile keys"):
+        resolve_mock_profile({"latency": 5})
+    with pytest.raises(ValueError, match="takes 2 parameter"):
+        Distribution.parse("normal:5")
+    with pytest.raises(ValueError, match="at most 1"):
+        MockProfile(rate_limit_probability=0.7, server_error_probability=0.5)
+
+
+def test_mock_provider_is_registered_with_profiles() -> None:
+    provider = create_provider("mock", mock_profile={"response_tokens": 3}, mock_seed=1)
+    assert provider.generate("hello") == "Echo: hello "
+
+    with pytest.raises(ConfigurationError, match="Unknown mock profile"):
+        create_provider("mock", mock_profile="glacial")
@@ -38,6 +38,11 @@ def test_usage_metadata_to_dict_omits_none_fields() -> None:
     assert usage.to_dict() == {"prompt_tokens": 12, "total_tokens": 34}
 
 
+def test_usage_metadata_to_dict_includes_cache_counters_when_set() -> None:
+    usage = UsageMetadata(prompt_tokens=100, cache_read_tokens=80, cache_write_tokens=0)
+    assert usage.to_dict() == {"prompt_tokens": 100, "cache_read_tokens": 80, "cache_write_tokens": 0}
+
+
 def test_prompt_response_to_dict_omits_optional_metadata_by_default() -> None:
     """Legacy payload shape must stay valid when optional fields are unset."""
     response = PromptResponse(
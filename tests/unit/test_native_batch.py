@@ -0,0 +1,595 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from ai_prompt_runner.core.batch import BatchItem, BatchRequestDefaults, request_from_record
+from ai_prompt_runner.core.errors import (
+    AuthenticationError,
+    AuthorizationError,
+    InputValidationError,
+    ProviderError,
+    RateLimitError,
+    UpstreamServerError,
+)
+from ai_prompt_runner.services.native_batch import (
+    NativeBatchAdapter,
+    NativeBatchJob,
+    NativeBatchResult,
+    NativeBatchStatus,
+    collect_native_batch,
+    custom_id_for,
+    encode_multipart,
+    index_for_custom_id,
+    native_batch_adapter,
+    submit_native_batch,
+    wait_for_batch,
+)
+from ai_prompt_runner.services.provider_factory import ConfigurationError, create_provider
+from ai_prompt_runner.services.transport import Transport, TransportError
+
+
+class DummyResponse:
+    def __init__(self, status_code: int = 200, body=None, text: str = "") -> None:
+        self.status_code = status_code
+        self._body = body
+        self.text = text
+        self.closed = False
+
+    def json(self):
+        if self._body is None:
+            raise ValueError("no json")
+        return self._body
+
+    def iter_bytes(self):
+        # Split mid-line to exercise line reassembly across chunks.
+        data = self.text.encode("utf-8")
+        yield from (data[start : start + 7] for start in range(0, len(data), 7))
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class ScriptedTransport(Transport):
+    """Transport answering `(method, url)` routes and recording every request."""
+
+    def __init__(self, routes: dict) -> None:
+        self.routes = routes
+        self.calls: list[tuple[str, str, dict]] = []
+
+    def request(self, method, url, *, headers, body, timeout, stream=False, scope=None):
+        self.calls.append((method, url, {"headers": headers, "body": body, "stream": stream}))
+        route = self.routes[(method, url)]
+        if isinstance(route, Exception):
+            raise route
+        return route
+
+    def send(self, url, *, headers, json, timeout, scope=None):
+        raise AssertionError("batch calls use request()")
+
+    def stream(self, url, *, headers, json, timeout, scope=None):
+        raise AssertionError("batch calls use request()")
+
+
+def _items(provider: str, *records: dict) -> list[BatchItem]:
+    defaults = BatchRequestDefaults(provider=provider, max_tokens=64)
+    return [
+        BatchItem(index=index, request=request_from_record(record, index, defaults))
+        for index, record in enumerate(records)
+    ]
+
+
+def test_custom_id_round_trip_ignores_foreign_ids() -> None:
+    assert index_for_custom_id(custom_id_for(42)) == 42
+    assert index_for_custom_id("other-1") is None
+    assert index_for_custom_id("item-x") is None
+    assert index_for_custom_id(None) is None
+
+
+def test_native_batch_adapter_rejects_providers_without_batch_api() -> None:
+    provider = create_provider("http", api_endpoint="http://stub", api_key="k")
+
+    with pytest.raises(ConfigurationError, match="no native batch API"):
+        native_batch_adapter(provider)
+
+
+def test_anthropic_adapter_submits_polls_and_maps_results() -> None:
+    batches = "https://api.test/v1/messages/batches"
+    results = "\n".join(
+        json.dumps(line)
+        for line in (
+            {
+                "custom_id": "item-1",
+                "result": {
+                    "type": "errored",
+                    "error": {"type": "error", "error": {"type": "rate_limit_error", "message": "slow"}},
+                },
+            },
+            {
+                "custom_id": "item-0",
+                "result": {
+                    "type": "succeeded",
+                    "message": {
+                        "model": "claude-test-1",
+                        "content": [{"type": "text", "text": "hi"}],
+                        "usage": {"input_tokens": 3, "output_tokens": 1},
+                    },
+                },
+            },
+            {"custom_id": "item-2", "result": {"type": "expired"}},
+        )
+    )
+    transport = ScriptedTransport(
+        {
+            ("POST", batches): DummyResponse(body={"id": "msgbatch_1", "processing_status": "in_progress"}),
+            ("GET", f"{batches}/msgbatch_1"): DummyResponse(
+                body={
+                    "processing_status": "ended",
+                    "request_counts": {"succeeded": 1, "errored": 1, "expired": 1},
+                    "results_url": f"{batches}/msgbatch_1/results",
+                }
+            ),
+            ("GET", f"{batches}/msgbatch_1/results"): DummyResponse(text=results + "\n\n"),
+        }
+    )
+    provider = create_provider(
+        "anthropic",
+        api_endpoint="https://api.test/v1/messages",
+        api_key="secret",
+        api_model="claude-test",
+        transport=transport,
+    )
+    adapter = native_batch_adapter(provider)
+
+    items = _items("anthropic", {"prompt": "a", "system": "S"}, {"prompt": "b"}, {"prompt": "c"})
+    assert submit_native_batch(adapter, items) == ("msgbatch_1", 3)
+    sent = transport.calls[0][2]
+    assert sent["headers"] == {
+        "x-api-key": "secret",
+        "anthropic-version": "2023-06-01",
+        "Content-Type": "application/json",
+    }
+    assert json.loads(sent["body"])["requests"][0] == {
+        "custom_id": "item-0",
+        "params": {
+            "model": "claude-test",
+            "max_tokens": 64,
+            "messages": [{"role": "user", "content": "a"}],
+            "system": "S",
+        },
+    }
+
+    status = adapter.status("msgbatch_1")
+    assert status.to_dict() == {
+        "batch_id": "msgbatch_1",
+        "state": "completed",
+        "provider_status": "ended",
+        "request_counts": {"succeeded": 1, "errored": 1, "expired": 1},
+    }
+    outcomes = {result.custom_id: result for result in adapter.iter_results(status, [])}
+    assert outcomes["item-0"].body["content"][0]["text"] == "hi"
+    assert isinstance(outcomes["item-1"].error, RateLimitError)
+    assert "slow" in str(outcomes["item-1"].error)
+    assert "expired" in str(outcomes["item-2"].error)
+    # The result file is streamed and closed once read.
+    assert transport.calls[-1][2]["stream"] is True
+    assert transport.routes[("GET", f"{batches}/msgbatch_1/results")].closed
+
+
+def test_google_adapter_sends_inline_requests_and_reads_inlined_responses() -> None:
+    transport = ScriptedTransport(
+        {
+            ("POST", "https://g.test/v1beta/models/gemini-test:batchGenerateContent"): DummyResponse(
+                body={"name": "batches/b1"}
+            ),
+            ("GET", "https://g.test/v1beta/batches/b1"): DummyResponse(
+                body={
+                    "name": "batches/b1",
+                    "metadata": {
+                        "state": "BATCH_STATE_SUCCEEDED",
+                        "batchStats": {"requestCount": "2", "successfulRequestCount": "1"},
+                    },
+                    "response": {
+                        "inlinedResponses": {
+                            "inlinedResponses": [
+                                {"error": {"code": 8, "message": "quota"}},
+                                {
+                                    "response": {
+                                        "candidates": [{"content": {"parts": [{"text": "ok"}]}}]
+                                    },
+                                    "metadata": {"key": "item-1"},
+                                },
+                            ]
+                        }
+                    },
+                }
+            ),
+        }
+    )
+    provider = create_provider(
+        "google",
+        api_endpoint="https://g.test/v1beta/models",
+        api_key="secret",
+        api_model="gemini-test",
+        prompt_cache=True,
+        transport=transport,
+    )
+    adapter = native_batch_adapter(provider)
+
+    items = _items("google", {"prompt": "a", "system": "S"}, {"prompt": "b"})
+    assert submit_native_batch(adapter, items) == ("batches/b1", 2)
+    first = json.loads(transport.calls[0][2]["body"])["batch"]["inputConfig"]["requests"]["requests"][0]
+    # System prompts are always sent inline, never as a cachedContent reference.
+    assert first == {
+        "request": {
+            "contents": [{"parts": [{"text": "a"}]}],
+            "generationConfig": {"maxOutputTokens": 64},
+            "systemInstruction": {"parts": [{"text": "S"}]},
+        },
+        "metadata": {"key": "item-0"},
+    }
+
+    status = adapter.status("batches/b1")
+    assert (status.state, status.request_counts) == (
+        "completed",
+        {"requestCount": 2, "successfulRequestCount": 1},
+    )
+    outcomes = list(adapter.iter_results(status, ["item-0", "item-1"]))
+    # An entry without metadata is matched by submission position.
+    assert outcomes[0].custom_id == "item-0"
+    assert isinstance(outcomes[0].error, RateLimitError)
+    assert outcomes[1].body["candidates"][0]["content"]["parts"][0]["text"] == "ok"
+
+
+def test_submit_native_batch_requires_a_valid_record() -> None:
+    items = [BatchItem(index=0, error=InputValidationError("bad"))]
+
+    with pytest.raises(InputValidationError, match="no valid records"):
+        submit_native_batch(None, items)
+
+
+class _ScriptedAdapter(NativeBatchAdapter):
+    """Adapter returning scripted statuses and results without HTTP."""
+
+    def __init__(self, provider, states=(), results=()) -> None:
+        super().__init__(provider)
+        self._states = list(states)
+        self._results = list(results)
+
+    def submit(self, items):
+        raise AssertionError("not used")
+
+    def status(self, batch_id):
+        return NativeBatchStatus(batch_id=batch_id, state=self._states.pop(0), provider_status="x")
+
+    def iter_results(self, status, custom_ids):
+        return iter(self._results)
+
+
+def test_wait_for_batch_backs_off_and_stops_at_timeout() -> None:
+    provider = create_provider("openai_compatible", api_endpoint="http://stub/v1", api_key="k")
+    now = [0.0]
+    sleeps: list[float] = []
+
+    def sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    adapter = _ScriptedAdapter(provider, states=["in_progress"] * 4 + ["completed"])
+    status = wait_for_batch(adapter, "b", 1.0, 3.0, sleep=sleep, clock=lambda: now[0])
+    assert status.state == "completed"
+    assert sleeps == [1.0, 2.0, 3.0, 3.0]
+
+    sleeps.clear()
+    adapter = _ScriptedAdapter(provider, states=["in_progress"] * 5)
+    status = wait_for_batch(adapter, "b", 1.0, 60.0, timeout=2.5, sleep=sleep, clock=lambda: now[0])
+    assert status.state == "in_progress"
+    assert sleeps == [1.0, 1.5]
+
+
+def test_collect_native_batch_builds_runner_payloads_in_input_order() -> None:
+    provider = create_provider(
+        "openai_compatible",
+        api_endpoint="http://stub/v1",
+        api_key="k",
+        api_model="m",
+    )
+    body = {
+        "model": "m-2024",
+        "choices": [{"message": {"content": "hello world"}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7},
+    }
+    adapter = _ScriptedAdapter(
+        provider,
+        results=[
+            NativeBatchResult(custom_id="item-2", body=body),
+            NativeBatchResult(custom_id="foreign", body=body),
+            NativeBatchResult(custom_id="item-0", error=RateLimitError("Provider rate limit exceeded (HTTP 429).")),
+        ],
+    )
+    defaults = BatchRequestDefaults(provider="openai_compatible", max_response_chars=5)
+    items = [
+        BatchItem(index=0, request=request_from_record({"prompt": "a"}, 0, defaults)),
+        BatchItem(index=1, request=request_from_record({"prompt": "b"}, 1, defaults)),
+        BatchItem(index=2, request=request_from_record({"prompt": "c"}, 2, defaults)),
+        BatchItem(index=3, error=InputValidationError("Input line 4: bad")),
+    ]
+    status = NativeBatchStatus(batch_id="b", state="expired", provider_status="expired")
+    emitted = []
+
+    summary = collect_native_batch(adapter, status, items, "openai_compatible", emitted.append)
+
+    lines = [result.to_dict() for result in emitted]
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert lines[0]["error"]["code"] == "rate_limit"
+    assert lines[1]["error"]["message"] == "Native batch ended (expired) without a result for this request."
+    payload = lines[2]["payload"]
+    assert payload["response"] == "hello"
+    assert payload["metadata"]["truncation"]["reason"] == "max_response_chars"
+    assert payload["metadata"]["usage"]["total_tokens"] == 7
+    context = payload["metadata"]["execution_context"]
+    assert (context["provider_protocol"], context["model_requested"], context["model_resolved"]) == (
+        "openai-compatible",
+        "m",
+        "m-2024",
+    )
+    assert lines[3]["error"]["code"] == "invalid_request"
+    assert (summary.succeeded, summary.failed, summary.prompt_tokens) == (1, 3, 5)
+
+
+def test_native_batch_job_round_trips_through_json(tmp_path: Path) -> None:
+    job = NativeBatchJob(
+        provider="anthropic",
+        batch_id="msgbatch_1",
+        api_endpoint="https://api.test/v1/messages",
+        api_model="claude-test",
+        input_jsonl="/data/in.jsonl",
+        input_sha256="sha256:00",
+        defaults=BatchRequestDefaults(provider="anthropic", stop=("END",)),
+        submitted=3,
+        submitted_at_utc="2026-01-01T00:00:00+00:00",
+    )
+    path = tmp_path / "jobs" / "job.json"
+
+    job.save(path)
+
+    assert json.loads(path.read_text(encoding="utf-8"))["defaults"]["stop"] == ["END"]
+    assert NativeBatchJob.load(path) == job
+    path.write_text('{"provider": "x"}', encoding="utf-8")
+    with pytest.raises(InputValidationError, match="Batch job file"):
+        NativeBatchJob.load(path)
+
+
+def _openai_adapter(routes: dict) -> tuple[NativeBatchAdapter, ScriptedTransport]:
+    transport = ScriptedTransport(routes)
+    provider = create_provider(
+        "openai_compatible",
+        api_endpoint="https://o.test/v1",
+        api_key="secret",
+        api_model="m",
+        transport=transport,
+    )
+    return native_batch_adapter(provider), transport
+
+
+def test_openai_adapter_uploads_multipart_jsonl_and_reads_output_and_error_files() -> None:
+    adapter, transport = _openai_adapter(
+        {
+            ("POST", "https://o.test/v1/files"): DummyResponse(body={"id": "file-in"}),
+            ("POST", "https://o.test/v1/batches"): DummyResponse(body={"id": "batch_1"}),
+            ("GET", "https://o.test/v1/batches/batch_1"): DummyResponse(
+                body={
+                    "status": "expired",
+                    "request_counts": {"total": "2", "completed": 1, "failed": True, "bad": "x"},
+                    "output_file_id": "file-out",
+                    "error_file_id": "file-err",
+                }
+            ),
+            ("GET", "https://o.test/v1/files/file-out/content"): DummyResponse(
+                text=json.dumps(
+                    {"custom_id": "item-0", "response": {"status_code": 200, "body": {"choices": []}}}
+                )
+            ),
+            ("GET", "https://o.test/v1/files/file-err/content"): DummyResponse(
+                text="\n".join(
+                    json.dumps(line)
+                    for line in (
+                        {"custom_id": "item-1", "response": {"status_code": 401, "body": {"error": {"message": "key"}}}},
+                        {"custom_id": "item-2", "error": {"message": "expired"}},
+                    )
+                )
+            ),
+        }
+    )
+
+    items = _items("openai_compatible", {"prompt": "a"}, {"prompt": "b"}, {"prompt": "c"})
+    assert submit_native_batch(adapter, items) == ("batch_1", 3)
+    upload = transport.calls[0][2]
+    content_type = upload["headers"]["Content-Type"]
+    assert content_type.startswith("multipart/form-data; boundary=")
+    assert b'name="purpose"\r\n\r\nbatch\r\n' in upload["body"]
+    assert b'"custom_id": "item-2"' in upload["body"]
+    # The boundary is content-derived so recorded uploads replay.
+    assert encode_multipart({"purpose": "batch"}, {"f": ("a", b"x", "text/plain")}) == encode_multipart(
+        {"purpose": "batch"}, {"f": ("a", b"x", "text/plain")}
+    )
+    assert json.loads(transport.calls[1][2]["body"]) == {
+        "input_file_id": "file-in",
+        "endpoint": "/v1/chat/completions",
+        "completion_window": "24h",
+    }
+
+    status = adapter.status("batch_1")
+    assert (status.state, status.request_counts) == ("expired", {"total": 2, "completed": 1})
+    outcomes = {result.custom_id: result for result in adapter.iter_results(status, [])}
+    assert outcomes["item-0"].body == {"choices": []}
+    assert isinstance(outcomes["item-1"].error, AuthenticationError)
+    assert "key" in str(outcomes["item-1"].error)
+    assert type(outcomes["item-2"].error) is ProviderError
+    assert "expired" in str(outcomes["item-2"].error)
+
+
+@pytest.mark.parametrize(
+    ("status_code", "body", "error_type", "message"),
+    [
+        (401, {"error": {"message": "bad key"}}, AuthenticationError, r"HTTP 401\). bad key"),
+        (403, None, AuthorizationError, "HTTP 403"),
+        (429, {"error": {"error": {"message": "slow down"}}}, RateLimitError, "slow down"),
+        (503, {"error": "flat"}, UpstreamServerError, "HTTP 503"),
+        (404, {"error": {"message": " "}}, ProviderError, "HTTP 404.$"),
+    ],
+)
+def test_batch_requests_map_http_errors(status_code, body, error_type, message) -> None:
+    response = DummyResponse(status_code=status_code, body=body)
+    adapter, _ = _openai_adapter({("GET", "https://o.test/v1/batches/b"): response})
+
+    with pytest.raises(error_type, match=message):
+        adapter.status("b")
+    assert response.closed
+
+
+@pytest.mark.parametrize(
+    ("response", "message"),
+    [
+        (TransportError("connection refused"), "batch request failed: connection refused"),
+        (DummyResponse(text="<html>"), "invalid JSON"),
+        (DummyResponse(body=["not", "an", "object"]), "must be a JSON object"),
+        (DummyResponse(body={"status": "paused"}), "unknown batch status 'paused'"),
+    ],
+)
+def test_batch_status_rejects_transport_failures_and_bad_bodies(response, message) -> None:
+    adapter, _ = _openai_adapter({("GET", "https://o.test/v1/batches/b"): response})
+
+    with pytest.raises(ProviderError, match=message):
+        adapter.status("b")
+
+
+@pytest.mark.parametrize(
+    ("text", "message"),
+    [
+        ('{"custom_id": "item-0"}\n{"custom_id": ', "invalid batch result JSONL \\(line 2\\)"),
+        ('{"custom_id": "item-0"}\n\n["item-1"]\n', "line 3 must be a JSON object"),
+    ],
+)
+def test_batch_result_files_reject_malformed_records(text, message) -> None:
+    response = DummyResponse(text=text)
+    adapter, _ = _openai_adapter({("GET", "https://o.test/v1/files/f/content"): response})
+    status = NativeBatchStatus(batch_id="b", state="completed", provider_status="completed", raw={"output_file_id": "f"})
+
+    with pytest.raises(ProviderError, match=message):
+        list(adapter.iter_results(status, []))
+    assert response.closed
+
+
+@pytest.mark.parametrize(
+    ("provider_status", "state"),
+    [("failed", "failed"), ("expired", "expired"), ("cancelling", "in_progress"), ("cancelled", "cancelled")],
+)
+def test_openai_batch_states_map_to_runner_states(provider_status, state) -> None:
+    adapter, _ = _openai_adapter(
+        {("GET", "https://o.test/v1/batches/b"): DummyResponse(body={"status": provider_status})}
+    )
+
+    status = adapter.status("b")
+    assert (status.state, status.request_counts) == (state, {})
+    assert list(adapter.iter_results(status, [])) == []
+
+
+def test_openai_submit_requires_string_ids() -> None:
+    adapter, _ = _openai_adapter({("POST", "https://o.test/v1/files"): DummyResponse(body={"id": 7})})
+    items = _items("openai_compatible", {"prompt": "a"})
+
+    with pytest.raises(ProviderError, match="file upload response must contain string 'id'"):
+        adapter.submit(items)
+
+    adapter, _ = _openai_adapter(
+        {
+            ("POST", "https://o.test/v1/files"): DummyResponse(body={"id": "file-in"}),
+            ("POST", "https://o.test/v1/batches"): DummyResponse(body={}),
+        }
+    )
+    with pytest.raises(ProviderError, match="batch response must contain string 'id'"):
+        adapter.submit(items)
+
+
+def _adapter(provider_name: str, endpoint: str, routes: dict) -> NativeBatchAdapter:
+    provider = create_provider(
+        provider_name, api_endpoint=endpoint, api_key="secret", api_model="m", transport=ScriptedTransport(routes)
+    )
+    return native_batch_adapter(provider)
+
+
+def test_anthropic_and_google_adapters_reject_unknown_statuses_and_missing_ids() -> None:
+    anthropic = _adapter(
+        "anthropic",
+        "https://api.test/v1/messages",
+        {
+            ("POST", "https://api.test/v1/messages/batches"): DummyResponse(body={}),
+            ("GET", "https://api.test/v1/messages/batches/b"): DummyResponse(body={"processing_status": "paused"}),
+        },
+    )
+    google = _adapter(
+        "google",
+        "https://g.test/v1beta/models",
+        {
+            ("POST", "https://g.test/v1beta/models/m:batchGenerateContent"): DummyResponse(body={}),
+            ("GET", "https://g.test/v1beta/batches/b"): DummyResponse(body={"state": 3}),
+        },
+    )
+
+    for adapter, field_name, batch_id in ((anthropic, "id", "b"), (google, "name", "batches/b")):
+        with pytest.raises(ProviderError, match=f"must contain string '{field_name}'"):
+            adapter.submit(_items("openai_compatible", {"prompt": "a"}))
+        with pytest.raises(ProviderError, match="unknown batch status"):
+            adapter.status(batch_id)
+
+
+def test_adapters_without_result_locations_yield_nothing() -> None:
+    anthropic = _adapter(
+        "anthropic",
+        "https://api.test/v1/messages",
+        {("GET", "https://api.test/v1/messages/batches/b"): DummyResponse(body={"processing_status": "canceling"})},
+    )
+    google = _adapter(
+        "google",
+        "https://g.test/v1beta/models",
+        {
+            ("GET", "https://g.test/v1beta/batches/b"): DummyResponse(
+                body={
+                    "metadata": {
+                        "state": "JOB_STATE_CANCELLED",
+                        "output": {"inlinedResponses": ["not an object", {"response": {"candidates": []}}]},
+                    }
+                }
+            )
+        },
+    )
+
+    status = anthropic.status("b")
+    assert status.state == "in_progress"
+    assert list(anthropic.iter_results(status, [])) == []
+    status = google.status("batches/b")
+    assert status.state == "cancelled"
+    assert [result.custom_id for result in google.iter_results(status, ["item-0", "item-1"])] == ["item-1"]
+    status = NativeBatchStatus(
+        batch_id="batches/b",
+        state="completed",
+        provider_status="SUCCEEDED",
+        raw={"response": {"inlinedResponses": {"inlinedResponses": None}}},
+    )
+    assert list(google.iter_results(status, [])) == []
+
+
+def test_batch_result_downloads_that_fail_mid_stream_are_provider_errors() -> None:
+    class DroppedResponse(DummyResponse):
+        def iter_bytes(self):
+            yield b'{"custom_id": "item-0"}\n'
+            raise TransportError("connection reset")
+
+    response = DroppedResponse()
+    adapter, _ = _openai_adapter({("GET", "https://o.test/v1/files/f/content"): response})
+    status = NativeBatchStatus(batch_id="b", state="completed", provider_status="completed", raw={"output_file_id": "f"})
+
+    with pytest.raises(ProviderError, match="batch request failed: connection reset"):
+        list(adapter.iter_results(status, []))
+    assert response.closed
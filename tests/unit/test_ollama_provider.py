@@ -0,0 +1,220 @@
+import json
+
+import pytest
+
+from ai_prompt_runner.core.errors import ProviderError, RateLimitError
+from ai_prompt_runner.core.models import GenerationConfig, LatencyMetadata, PromptRequest
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.services.ollama_provider import (
+    OllamaProvider,
+    OllamaProviderConfig,
+    normalize_keep_alive,
+)
+
+_FINAL_TIMINGS = {
+    "done": True,
+    "done_reason": "stop",
+    "total_duration": 5_043_500_667,
+    "load_duration": 4_012_000_000,
+    "prompt_eval_count": 26,
+    "prompt_eval_duration": 325_953_000,
+    "eval_count": 12,
+    "eval_duration": 700_000_000,
+}
+
+
+class DummyResponse:
+    """Small test double for requests.Response-like JSON behavior."""
+
+    def __init__(self, payload: dict, status_code: int = 200) -> None:
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self) -> dict:
+        return self._payload
+
+
+class DummyStreamResponse:
+    """Small test double for streaming `iter_lines` behavior."""
+
+    def __init__(self, lines: list[str | None], status_code: int = 200) -> None:
+        self._lines = lines
+        self.status_code = status_code
+
+    def iter_lines(self, decode_unicode: bool = True):
+        assert decode_unicode is True
+        yield from self._lines
+
+
+def _make_provider(
+    *,
+    endpoint: str = "http://localhost:11434",
+    api_key: str = "",
+    keep_alive: str | None = None,
+    max_retries: int = 0,
+) -> OllamaProvider:
+    """Build provider instances with deterministic test defaults."""
+    return OllamaProvider(
+        OllamaProviderConfig(
+            endpoint=endpoint,
+            api_key=api_key,
+            model="llama3.2",
+            timeout_seconds=5,
+            max_retries=max_retries,
+            keep_alive=keep_alive,
+        )
+    )
+
+
+def _ndjson(*events: dict) -> list[str]:
+    return [json.dumps(event) for event in events]
+
+
+def test_generate_returns_text_usage_and_engine_timings(monkeypatch) -> None:
+    """Non-stream calls map token counts to usage and nanosecond durations to ms."""
+    provider = _make_provider()
+    observed = {}
+
+    def fake_post(url, headers, json, timeout):
+        observed.update(url=url, headers=headers, json=json)
+        return DummyResponse(
+            {"model": "llama3.2:latest", "message": {"role": "assistant", "content": "Hi!"}, **_FINAL_TIMINGS}
+        )
+
+    monkeypatch.setattr("ai_prompt_runner.services.ollama_provider.requests.post", fake_post)
+
+    assert provider.generate("hello", system_prompt="Be brief.") == "Hi!"
+    assert observed["url"] == "http://localhost:11434/api/chat"
+    assert "Authorization" not in observed["headers"]
+    assert observed["json"] == {
+        "model": "llama3.2",
+        "messages": [
+            {"role": "system", "content": "Be brief."},
+            {"role": "user", "content": "hello"},
+        ],
+        "stream": False,
+    }
+    usage = provider.get_last_usage()
+    assert (usage.prompt_tokens, usage.completion_tokens, usage.total_tokens) == (26, 12, 38)
+    assert provider.get_last_latency() == LatencyMetadata(
+        load_ms=4012, prompt_eval_ms=325, eval_ms=700, total_ms=5043
+    )
+    assert provider.get_last_model_resolved() == "llama3.2:latest"
+
+
+@pytest.mark.parametrize(
+    ("endpoint", "expected"),
+    [
+        ("http://localhost:11434/", "http://localhost:11434/api/chat"),
+        ("http://localhost:11434/api", "http://localhost:11434/api/chat"),
+        ("http://localhost:11434/api/chat", "http://localhost:11434/api/chat"),
+        ("http://localhost:11434/v1", "http://localhost:11434/api/chat"),
+        ("http://localhost:11434/v1/", "http://localhost:11434/api/chat"),
+        ("http://gpu-box:11434/v1/chat/completions", "http://gpu-box:11434/api/chat"),
+        ("unix:///run/ollama.sock:/v1", "unix:///run/ollama.sock:/api/chat"),
+    ],
+)
+def test_normalized_endpoint_accepts_root_api_base_or_chat_route(endpoint: str, expected: str) -> None:
+    assert _make_provider(endpoint=endpoint)._normalized_endpoint() == expected
+
+
+@pytest.mark.parametrize(
+    ("keep_alive", "sent"),
+    [("30m", "30m"), ("1h30m", "1h30m"), ("-1", -1), ("0", 0), ("90", 90), ("2.5", 2.5)],
+)
+def test_keep_alive_and_options_are_forwarded(monkeypatch, keep_alive: str, sent) -> None:
+    """Numbers are sent as seconds; duration strings pass through unchanged."""
+    provider = _make_provider(keep_alive=keep_alive, api_key="proxy-token")
+    observed = {}
+
+    def fake_post(url, headers, json, timeout):
+        observed.update(headers=headers, json=json)
+        return DummyResponse({"message": {"content": "ok"}, "done": True})
+
+    monkeypatch.setattr("ai_prompt_runner.services.ollama_provider.requests.post", fake_post)
+
+    provider.generate(
+        "hello",
+        generation_config=GenerationConfig(temperature=0.2, max_tokens=64, top_p=0.9, stop=("\n\n",)),
+    )
+    assert observed["json"]["keep_alive"] == sent
+    assert observed["json"]["options"] == {
+        "temperature": 0.2,
+        "num_predict": 64,
+        "top_p": 0.9,
+        "stop": ["\n\n"],
+    }
+    assert observed["headers"]["Authorization"] == "Bearer proxy-token"
+
+
+def test_normalize_keep_alive_rejects_malformed_values() -> None:
+    assert normalize_keep_alive(" 5m ") == "5m"
+    for value in ("", "forever", "5 minutes", "m5"):
+        with pytest.raises(ValueError, match="keep_alive must be"):
+            normalize_keep_alive(value)
+
+
+def test_generate_stream_parses_ndjson_and_records_final_timings(monkeypatch) -> None:
+    """Stream mode reads newline-delimited JSON and captures the `done` object."""
+    provider = _make_provider()
+    observed = {}
+
+    def fake_post(url, headers, json, timeout, stream):
+        observed.update(json=json, stream=stream)
+        return DummyStreamResponse(
+            _ndjson(
+                {"model": "llama3.2", "message": {"role": "assistant", "content": "Hel"}, "done": False},
+                {"model": "llama3.2", "message": {"role": "assistant", "content": "lo"}, "done": False},
+            )
+            + [""]
+            + _ndjson({"model": "llama3.2", "message": {"role": "assistant", "content": ""}, **_FINAL_TIMINGS})
+        )
+
+    monkeypatch.setattr("ai_prompt_runner.services.ollama_provider.requests.post", fake_post)
+
+    assert list(provider.generate_stream("hello")) == ["Hel", "lo"]
+    assert observed["json"]["stream"] is True
+    assert observed["stream"] is True
+    assert provider.get_last_usage().total_tokens == 38
+    assert provider.get_last_latency().load_ms == 4012
+
+
+def test_generate_stream_raises_in_band_error_objects(monkeypatch) -> None:
+    provider = _make_provider()
+
+    def fake_post(url, headers, json, timeout, stream):
+        return DummyStreamResponse(_ndjson({"error": "model 'llama3.2' not found"}))
+
+    monkeypatch.setattr("ai_prompt_runner.services.ollama_provider.requests.post", fake_post)
+
+    with pytest.raises(ProviderError, match="model 'llama3.2' not found"):
+        list(provider.generate_stream("hello"))
+
+
+def test_generate_maps_http_status_errors(monkeypatch) -> None:
+    provider = _make_provider()
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.ollama_provider.requests.post",
+        lambda url, headers, json, timeout: DummyResponse({}, status_code=429),
+    )
+
+    with pytest.raises(RateLimitError):
+        provider.generate("hello")
+
+
+def test_runner_reports_engine_timings_in_latency_metadata(monkeypatch) -> None:
+    provider = _make_provider()
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.ollama_provider.requests.post",
+        lambda url, headers, json, timeout: DummyResponse({"message": {"content": "ok"}, **_FINAL_TIMINGS}),
+    )
+
+    payload = PromptRunner(provider=provider).run(PromptRequest(prompt_text="hello", provider="ollama"))
+
+    assert payload["metadata"]["latency"] == {
+        "load_ms": 4012,
+        "prompt_eval_ms": 325,
+        "eval_ms": 700,
+        "total_ms": 5043,
+    }
+    assert payload["metadata"]["usage"] == {"prompt_tokens": 26, "completion_tokens": 12, "total_tokens": 38}
@@ -161,6 +161,7 @@ def test_generate_includes_runtime_controls_when_provided(monkeypatch) -> None:
             temperature=0.2,
             max_tokens=120,
             top_p=0.95,
+            stop=("END",),
         ),
     )
 
@@ -168,6 +169,122 @@ def test_generate_includes_runtime_controls_when_provided(monkeypatch) -> None:
     assert observed["payload"]["temperature"] == 0.2
     assert observed["payload"]["max_tokens"] == 120
     assert observed["payload"]["top_p"] == 0.95
+    assert observed["payload"]["stop"] == ["END"]
+
+
+def test_generate_forwards_at_most_four_stop_sequences(monkeypatch) -> None:
+    """Chat Completions caps `stop` at four; the rest stay client-side."""
+    provider = _make_provider()
+    observed = {}
+
+    def fake_post(url, headers, json, timeout):
+        observed["payload"] = json
+        return DummyResponse(
+            {"choices": [{"message": {"content": "ok"}}]},
+            status_code=200,
+        )
+
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.openai_compatible_provider.requests.post",
+        fake_post,
+    )
+
+    provider.generate("hello", generation_config=GenerationConfig(stop=("a", "b", "c", "d", "e")))
+
+    assert observed["payload"]["stop"] == ["a", "b", "c", "d"]
+
+
+def test_generate_samples_sends_n_and_returns_choices_in_index_order(monkeypatch) -> None:
+    """`n` samples come back as one choice each; usage covers the whole call."""
+    provider = _make_provider()
+    observed = {}
+
+    def fake_post(url, headers, json, timeout):
+        observed["payload"] = json
+        return DummyResponse(
+            {
+                "choices": [
+                    {"index": 1, "message": {"content": "b"}, "finish_reason": "length"},
+                    {"index": 0, "message": {"content": "a"}, "finish_reason": "stop"},
+                ],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 8, "total_tokens": 11},
+            },
+            status_code=200,
+        )
+
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.openai_compatible_provider.requests.post",
+        fake_post,
+    )
+
+    samples = provider.generate_samples("hello", generation_config=GenerationConfig(n=2))
+
+    assert observed["payload"]["n"] == 2
+    assert [(sample.text, sample.finish_reason) for sample in samples] == [
+        ("a", "stop"),
+        ("b", "length"),
+    ]
+    assert all(sample.usage is None for sample in samples)
+    assert provider.get_last_usage().total_tokens == 11
+
+
+@pytest.mark.parametrize(
+    ("choice", "expected"),
+    [
+        ({"finish_reason": "stop", "stop_reason": "END"}, "END"),
+        ({"finish_reason": "stop", "matched_stop": "END"}, "END"),
+        # A bare "stop" also covers a natural end, and token ids are not sequences.
+        ({"finish_reason": "stop"}, None),
+        ({"finish_reason": "stop", "stop_reason": 128001}, None),
+        ({"finish_reason": "length", "stop_reason": "END"}, None),
+    ],
+)
+def test_generate_reports_stop_sequence_only_when_server_names_it(
+    monkeypatch, choice, expected
+) -> None:
+    provider = _make_provider()
+
+    def fake_post(url, headers, json, timeout):
+        return DummyResponse(
+            {"choices": [{"message": {"content": "ok"}, **choice}]},
+            status_code=200,
+        )
+
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.openai_compatible_provider.requests.post",
+        fake_post,
+    )
+
+    provider.generate("hello")
+
+    assert provider.get_last_stop_sequence() == expected
+
+
+def test_generate_extracts_cached_prompt_tokens(monkeypatch) -> None:
+    """Automatic prefix cache hits are reported as cache_read_tokens."""
+    provider = _make_provider()
+
+    monkeypatch.setattr(
+        "ai_prompt_runner.services.openai_compatible_provider.requests.post",
+        lambda *args, **kwargs: DummyResponse(
+            {
+                "choices": [{"message": {"content": "ok"}}],
+                "usage": {
+                    "prompt_tokens": 2048,
+                    "completion_tokens": 10,
+                    "total_tokens": 2058,
+                    "prompt_tokens_details": {"cached_tokens": 1920},
+                },
+            },
+            status_code=200,
+        ),
+    )
+
+    assert provider.generate("hello") == "ok"
+    usage = provider.get_last_usage()
+    assert usage.prompt_tokens == 2048
+    assert usage.cache_read_tokens == 1920
+    assert usage.cache_write_tokens is None
 
 
 def test_generate_extracts_usage_metadata(monkeypatch) -> None:
@@ -0,0 +1,114 @@
+from functools import partial
+
+import pytest
+
+from ai_prompt_runner.core.batch import BatchItem, BatchRequestDefaults, request_from_record
+from ai_prompt_runner.core.dedup import DedupPlan, ResultFanOut, dedup_key
+from ai_prompt_runner.core.errors import InputValidationError
+from ai_prompt_runner.core.parallel import (
+    iter_ordered_results,
+    pooled_provider,
+    run_batch_parallel,
+)
+from ai_prompt_runner.services.call_control import AbortableHTTPAdapter
+from ai_prompt_runner.services.mock_provider import MockProvider
+from ai_prompt_runner.services.provider_factory import create_provider
+
+
+DEFAULTS = BatchRequestDefaults(provider="mock")
+
+
+def _items(count: int) -> list[BatchItem]:
+    return [
+        BatchItem(index=i, request=request_from_record({"prompt": f"p{i}"}, i, DEFAULTS))
+        for i in range(count)
+    ]
+
+
+def test_run_batch_parallel_preserves_order_and_payloads() -> None:
+    """Results from worker processes come back in input order, pre-serialized."""
+    items = _items(25) + [BatchItem(index=25, error=InputValidationError("bad line"))]
+    emitted = []
+
+    summary = run_batch_parallel(
+        provider_factory=partial(MockProvider),
+        items=items,
+        provider="mock",
+        on_result=emitted.append,
+        processes=3,
+        max_in_flight=4,
+        shard="0/1",
+    )
+
+    assert [result.index for result in emitted] == list(range(26))
+    assert emitted[7].to_dict()["payload"]["response"] == "Echo: p7"
+    assert emitted[25].error_code == "invalid_request"
+    assert summary.total == 26
+    assert summary.succeeded == 25
+    assert summary.shard == "0/1"
+
+
+def test_run_batch_parallel_isolates_provider_failures() -> None:
+    """Provider errors in a worker become per-item taxonomy errors."""
+    emitted = []
+
+    summary = run_batch_parallel(
+        provider_factory=partial(MockProvider, failure_message="upstream down"),
+        items=_items(3),
+        provider="mock",
+        on_result=emitted.append,
+        processes=2,
+    )
+
+    assert summary.failed == 3
+    assert all(result.error_code == "provider_error" for result in emitted)
+
+
+def test_parallel_rejects_invalid_settings() -> None:
+    """Process count and window size must be positive."""
+    with pytest.raises(ValueError):
+        run_batch_parallel(partial(MockProvider), [], "mock", print, processes=0)
+    with pytest.raises(ValueError):
+        next(iter_ordered_results(None, [], max_in_flight=0))
+
+
+def test_run_batch_parallel_fans_out_repeated_requests() -> None:
+    """Duplicates are not submitted and are rewritten to their own index."""
+    items = [
+        BatchItem(index=i, request=request_from_record({"prompt": f"p{i % 3}"}, i, DEFAULTS))
+        for i in range(12)
+    ]
+    keys = [dedup_key(item.request, None) for item in items]
+    fan_out = ResultFanOut(plan=DedupPlan.build(lambda: iter(keys), expected_items=12))
+    emitted = []
+
+    summary = run_batch_parallel(
+        provider_factory=partial(MockProvider),
+        items=items,
+        provider="mock",
+        on_result=emitted.append,
+        processes=2,
+        max_in_flight=2,
+        fan_out=fan_out,
+    )
+
+    lines = [result.to_dict() for result in emitted]
+    assert [line["index"] for line in lines] == list(range(12))
+    assert [line["payload"]["response"] for line in lines] == [f"Echo: p{i % 3}" for i in range(12)]
+    assert summary.deduplicated == 9
+
+
+def test_pooled_provider_gives_each_worker_its_own_connection_pool() -> None:
+    """Worker providers reuse one abortable session instead of one-off connections."""
+    factory = partial(
+        pooled_provider,
+        create_provider,
+        provider_name="openai",
+        api_key="dummy",
+    )
+
+    first, second = factory(), factory()
+
+    session = first.config.session
+    assert isinstance(session.get_adapter("https://example.test"), AbortableHTTPAdapter)
+    assert second.config.session is not session
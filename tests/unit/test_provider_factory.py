@@ -3,10 +3,14 @@ import pytest
 from ai_prompt_runner.services.anthropic_provider import AnthropicProvider
 from ai_prompt_runner.services.google_provider import GoogleProvider
 from ai_prompt_runner.services.http_provider import HTTPProvider
+from ai_prompt_runner.services.ollama_provider import OllamaProvider
 from ai_prompt_runner.services.openai_compatible_provider import OpenAICompatibleProvider
 from ai_prompt_runner.services.provider_factory import (
     ConfigurationError,
+    build_token_budget,
+    context_window_for,
     create_provider,
+    effective_capabilities,
     get_provider_spec,
 )
 
@@ -224,20 +228,25 @@ def test_create_provider_supports_x_aliases_with_registry_defaults(
     assert provider.config.api_key == "dummy"
 
 
-def test_create_provider_supports_ollama_alias_with_registry_defaults(monkeypatch) -> None:
-    """ollama alias should resolve to OpenAI-compatible provider local defaults."""
+def test_create_provider_supports_native_ollama_with_registry_defaults(monkeypatch) -> None:
+    """ollama should resolve to the native provider, without requiring an API key."""
     monkeypatch.delenv("AI_API_ENDPOINT", raising=False)
     monkeypatch.delenv("AI_API_MODEL", raising=False)
+    monkeypatch.delenv("AI_API_KEY", raising=False)
 
-    provider = create_provider(
-        provider_name="ollama",
-        api_key="dummy",
-    )
+    provider = create_provider(provider_name="ollama", keep_alive=" 30m ")
 
-    assert isinstance(provider, OpenAICompatibleProvider)
-    assert provider.config.endpoint == "http://localhost:11434/v1"
+    assert isinstance(provider, OllamaProvider)
+    assert provider.config.endpoint == "http://localhost:11434"
     assert provider.config.model == "llama3.2"
-    assert provider.config.api_key == "dummy"
+    assert provider.config.api_key == ""
+    assert provider.config.keep_alive == "30m"
+
+
+def test_create_provider_rejects_malformed_keep_alive() -> None:
+    """keep_alive must be seconds or a duration string."""
+    with pytest.raises(ConfigurationError, match="keep_alive must be"):
+        create_provider(provider_name="ollama", keep_alive="forever")
 
 
 def test_get_provider_spec_rejects_unknown_provider() -> None:
@@ -254,7 +263,7 @@ def test_http_provider_capabilities_are_explicitly_limited() -> None:
     exist in this implementation.
     """
     spec = get_provider_spec("http")
-    assert spec.capabilities.stream == "unsupported"
+    assert spec.capabilities.stream == "unknown"
     assert spec.capabilities.system == "supported"
     assert spec.capabilities.usage == "unsupported"
     assert spec.capabilities.temperature == "unsupported"
@@ -262,6 +271,19 @@ def test_http_provider_capabilities_are_explicitly_limited() -> None:
     assert spec.capabilities.max_tokens == "unsupported"
 
 
+def test_http_stream_mode_unlocks_streaming_capability() -> None:
+    """Streaming is supported once an http_stream_mode is configured; bad modes fail fast."""
+    spec = get_provider_spec("http")
+    assert effective_capabilities(spec).stream == "unknown"
+    assert effective_capabilities(spec, "ndjson").stream == "supported"
+    assert effective_capabilities(get_provider_spec("openai"), "ndjson") == get_provider_spec("openai").capabilities
+
+    provider = create_provider("http", api_endpoint="http://stub", api_key="k", http_stream_mode="sse")
+    assert provider.config.stream_mode == "sse"
+    with pytest.raises(ConfigurationError, match="Unknown http_stream_mode 'xml'"):
+        create_provider("http", api_endpoint="http://stub", api_key="k", http_stream_mode="xml")
+
+
 def test_openai_compatible_aliases_expose_unknown_runtime_controls() -> None:
     """
     OpenAI-compatible aliases map to heterogeneous backends.
@@ -301,3 +323,36 @@ def test_anthropic_and_google_capabilities_are_marked_supported() -> None:
         assert spec.capabilities.temperature == "supported"
         assert spec.capabilities.top_p == "supported"
         assert spec.capabilities.max_tokens == "supported"
+
+
+@pytest.mark.parametrize(
+    ("provider_name", "model", "expected"),
+    [
+        ("openai", "gpt-4o-mini", 128_000),
+        ("openai", "gpt-4", 8_192),
+        ("openai", "gpt-4.1-nano", 1_047_576),
+        ("anthropic", "claude-3-7-sonnet-latest", 200_000),
+        ("google", "gemini-1.5-pro-002", 2_097_152),
+        ("google", "gemini-2.5-flash", 1_048_576),
+        ("openai", "my-finetune", None),
+        ("ollama", "llama3.2", None),
+    ],
+)
+def test_context_window_for_uses_longest_model_prefix(provider_name: str, model: str, expected) -> None:
+    assert context_window_for(get_provider_spec(provider_name), model) == expected
+
+
+def test_build_token_budget_applies_overrides_and_validates() -> None:
+    budget = build_token_budget(get_provider_spec("anthropic"), "claude-3-5-haiku-latest")
+    assert (budget.family, budget.context_window, budget.policy) == ("anthropic", 200_000, "reject")
+
+    budget = build_token_budget(
+        get_provider_spec("ollama"), "llama3.2", context_window=8_192, context_policy="trim", tokens_per_minute=600
+    )
+    assert (budget.family, budget.context_window, budget.policy) == ("llama", 8_192, "trim")
+    assert budget.rate_limiter.tokens_per_minute == 600
+
+    with pytest.raises(ConfigurationError, match="Unknown context_policy 'shrink'"):
+        build_token_budget(get_provider_spec("openai"), "gpt-4o", context_policy="shrink")
+    with pytest.raises(ConfigurationError, match="tokens_per_minute must be greater than 0"):
+        build_token_budget(get_provider_spec("openai"), "gpt-4o", tokens_per_minute=0)
@@ -5,6 +5,8 @@ from jsonschema import Draft202012Validator, FormatChecker
 
 from ai_prompt_runner.core.models import GenerationConfig, PromptRequest
 from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.core.similarity_cache import SimilarityCache
+from ai_prompt_runner.core.token_budget import TokenBudget
 from ai_prompt_runner.services.base import BaseProvider
 
 
@@ -147,6 +149,8 @@ def test_response_schema_accepts_optional_usage_shape() -> None:
                 "prompt_tokens": 10,
                 "completion_tokens": 20,
                 "total_tokens": 30,
+                "cache_read_tokens": 8,
+                "cache_write_tokens": 0,
             },
         },
     }
@@ -231,3 +235,51 @@ def test_response_schema_rejects_invalid_prompt_hash_pattern() -> None:
 
     assert len(errors) == 1
     assert list(errors[0].path) == ["metadata", "execution_context", "prompt_hash"]
+
+
+def test_response_schema_accepts_truncation_metadata() -> None:
+    """Client-side early stop metadata must validate against the official schema."""
+    payload = PromptRunner(provider=FakeProvider()).run(
+        PromptRequest(prompt_text="Hello", provider="fake", stop=("llo",))
+    )
+
+    assert payload["metadata"]["truncation"]["reason"] == "stop_sequence"
+    assert list(_build_validator().iter_errors(payload)) == []
+
+
+def test_response_schema_accepts_multi_sample_responses() -> None:
+    """The additive `responses` array must validate against the official schema."""
+    payload = PromptRunner(provider=FakeProvider()).run(
+        PromptRequest(prompt_text="Hello", provider="fake", samples=2, max_response_chars=4)
+    )
+
+    assert [sample["index"] for sample in payload["responses"]] == [0, 1]
+    assert list(_build_validator().iter_errors(payload)) == []
+
+    payload["responses"][1]["finish_reason"] = 3
+    assert list(_build_validator().iter_errors(payload)) != []
+
+
+def test_response_schema_accepts_prompt_trim_metadata() -> None:
+    """A prompt shortened by the `trim` context policy must validate against the official schema."""
+    runner = PromptRunner(
+        provider=FakeProvider(),
+        token_budget=TokenBudget(context_window=40, policy="trim"),
+    )
+    payload = runner.run(PromptRequest(prompt_text="word " * 100, provider="fake"))
+
+    assert payload["metadata"]["prompt_trim"]["context_window"] == 40
+    assert list(_build_validator().iter_errors(payload)) == []
+
+
+def test_response_schema_accepts_similarity_cache_metadata(tmp_path: Path) -> None:
+    """A response served from the near-duplicate cache must validate against the official schema."""
+    runner = PromptRunner(
+        provider=FakeProvider(),
+        similarity_cache=SimilarityCache(tmp_path / "cache.sqlite"),
+    )
+    runner.run(PromptRequest(prompt_text="Summarize the ticket opened at 09:15 today.", provider="fake"))
+    payload = runner.run(PromptRequest(prompt_text="Summarize the ticket opened at 17:40 today.", provider="fake"))
+
+    assert payload["metadata"]["similarity_cache"]["similarity"] == 1.0
+    assert list(_build_validator().iter_errors(payload)) == []
@@ -1,5 +1,11 @@
-from ai_prompt_runner.core.errors import ProviderError
-from ai_prompt_runner.core.models import GenerationConfig, PromptRequest, UsageMetadata
+from ai_prompt_runner.core.errors import InputValidationError, ProviderError, StreamReplayDivergedError
+from ai_prompt_runner.core.models import (
+    GenerationConfig,
+    PromptRequest,
+    ResponseSample,
+    StreamCompletedEvent,
+    UsageMetadata,
+)
 from ai_prompt_runner.core.runner import PromptRunner
 from ai_prompt_runner.services.base import BaseProvider
 import pytest
@@ -239,6 +245,8 @@ def test_runner_stream_and_non_stream_payloads_match_except_timestamp() -> None:
     stream_payload["metadata"]["execution_ms"] = "<normalized>"
     non_stream_payload["metadata"]["execution_context"]["runtime"]["stream"] = "<normalized>"
     stream_payload["metadata"]["execution_context"]["runtime"]["stream"] = "<normalized>"
+    # Time to first chunk is only measured for streamed responses.
+    assert set(stream_payload["metadata"].pop("latency")) == {"first_chunk_ms"}
 
     assert stream_payload == non_stream_payload
 
@@ -566,3 +574,231 @@ def test_runner_rejects_invalid_resolved_model_metadata_type() -> None:
                 provider="fake",
             )
         )
+
+
+def test_runner_iter_run_yields_chunks_then_completed_payload() -> None:
+    """iter_run exposes provider chunks before the final normalized payload."""
+    runner = PromptRunner(provider=FakeProvider())
+    request = PromptRequest(prompt_text="Hello", provider="fake", stream=True)
+
+    events = list(runner.iter_run(request))
+
+    assert [event.type for event in events] == ["chunk", "chunk", "completed"]
+    assert [(event.index, event.text) for event in events[:2]] == [(0, "Echo: "), (1, "Hello")]
+    assert events[-1].payload["response"] == "Echo: Hello"
+    assert events[-1].payload.keys() == runner.run(request).keys()
+
+
+def test_runner_reports_time_to_first_chunk_for_streamed_responses() -> None:
+    """Both streaming entry points measure the first chunk; non-stream runs do not."""
+    runner = PromptRunner(provider=FakeProvider())
+    request = PromptRequest(prompt_text="Hello", provider="fake", stream=True)
+
+    latency = runner.run(request)["metadata"]["latency"]
+    events = list(runner.iter_run(request))
+
+    assert latency["first_chunk_ms"] >= 0
+    assert events[-1].payload["metadata"]["latency"]["first_chunk_ms"] >= 0
+    assert "latency" not in runner.run(PromptRequest(prompt_text="Hello", provider="fake"))["metadata"]
+
+
+def test_runner_iter_run_falls_back_to_single_chunk_and_reports_usage() -> None:
+    """Non-stream providers produce one chunk; usage rides on the final event."""
+    runner = PromptRunner(provider=FakeUsageProvider())
+
+    events = list(runner.iter_run(PromptRequest(prompt_text="Hi", provider="fake", stream=True)))
+
+    assert [event.text for event in events[:-1]] == ["Echo: Hi"]
+    assert events[-1].usage == UsageMetadata(prompt_tokens=12, completion_tokens=34, total_tokens=46)
+    assert events[-1].payload["metadata"]["usage"]["total_tokens"] == 46
+
+
+def test_runner_iter_run_closes_provider_stream_when_consumer_stops() -> None:
+    """Abandoning the event iterator closes the provider generator."""
+    closed: list[bool] = []
+
+    class EndlessProvider(FakeProvider):
+        def generate_stream(self, prompt, system_prompt=None, generation_config=None):
+            try:
+                while True:
+                    yield "x"
+            finally:
+                closed.append(True)
+
+    events = PromptRunner(provider=EndlessProvider()).iter_run(
+        PromptRequest(prompt_text="Hi", provider="fake", stream=True)
+    )
+    assert next(events).text == "x"
+    events.close()
+
+    assert closed == [True]
+
+
+class FlakyStreamProvider(FakeProvider):
+    """Streams scripted attempts; a None entry simulates a dropped connection."""
+
+    def __init__(self, attempts: list[list[str | None]]) -> None:
+        super().__init__()
+        self.attempts = attempts
+        self.calls = 0
+
+    def generate_stream(self, prompt, system_prompt=None, generation_config=None):
+        chunks = self.attempts[self.calls]
+        self.calls += 1
+        for chunk in chunks:
+            if chunk is None:
+                raise ProviderError("Provider request failed") from ConnectionError("reset")
+            yield chunk
+
+
+def test_runner_replays_failed_stream_and_skips_emitted_prefix() -> None:
+    """A deterministic stream resumes after a mid-stream drop without duplicate text."""
+    provider = FlakyStreamProvider([["Hel", "lo wo", None], ["Hello", " world"]])
+    chunks: list[str] = []
+
+    payload = PromptRunner(provider=provider).run(
+        PromptRequest(prompt_text="Hi", provider="fake", stream=True, temperature=0, stream_replays=1),
+        on_stream_chunk=chunks.append,
+    )
+
+    assert chunks == ["Hel", "lo wo", "rld"]
+    assert payload["response"] == "Hello world"
+    assert provider.calls == 2
+
+
+def test_runner_replay_aborts_when_replayed_output_diverges() -> None:
+    provider = FlakyStreamProvider([["Hel", None], ["Hex", "!"]])
+
+    with pytest.raises(StreamReplayDivergedError, match="at character 2"):
+        PromptRunner(provider=provider).run(
+            PromptRequest(prompt_text="Hi", provider="fake", stream=True, temperature=0, stream_replays=2)
+        )
+
+
+def test_runner_does_not_replay_without_opt_in_or_deterministic_settings() -> None:
+    """Without stream_replays the mid-stream error surfaces; replay needs temperature 0."""
+    with pytest.raises(ProviderError, match="Provider request failed"):
+        PromptRunner(provider=FlakyStreamProvider([["Hel", None], ["Hello"]])).run(
+            PromptRequest(prompt_text="Hi", provider="fake", stream=True, temperature=0)
+        )
+    with pytest.raises(InputValidationError, match="temperature 0"):
+        PromptRunner(provider=FlakyStreamProvider([["Hel"]])).run(
+            PromptRequest(prompt_text="Hi", provider="fake", stream=True, stream_replays=1)
+        )
+
+
+def test_runner_early_stop_closes_stream_and_records_truncation() -> None:
+    """Meeting a stop sequence closes the provider stream and marks the payload."""
+    closed: list[bool] = []
+
+    class ParagraphProvider(FakeProvider):
+        def generate_stream(self, prompt, system_prompt=None, generation_config=None):
+            try:
+                yield from ["First ", "para.\n", "\nSecond", " para.", " never read"]
+            finally:
+                closed.append(True)
+
+    chunks: list[str] = []
+    payload = PromptRunner(provider=ParagraphProvider()).run(
+        PromptRequest(prompt_text="Hi", provider="fake", stream=True, stop=("\n\n",)),
+        on_stream_chunk=chunks.append,
+    )
+
+    assert "".join(chunks) == payload["response"] == "First para."
+    assert payload["metadata"]["truncation"] == {"reason": "stop_sequence", "stop_sequence": "\n\n"}
+    assert closed == [True]
+
+
+def test_runner_records_truncation_for_provider_reported_stop() -> None:
+    """A natively enforced stop never reaches EarlyStop; the provider signal does."""
+
+    class NativeStopProvider(FakeProvider):
+        def __init__(self, stop_sequence):
+            self.stop_sequence = stop_sequence
+
+        def generate(self, prompt, system_prompt=None, generation_config=None):
+            return "First para."
+
+        def get_last_stop_sequence(self):
+            return self.stop_sequence
+
+    request = PromptRequest(prompt_text="Hi", provider="fake", stop=("\n\n",))
+
+    payload = PromptRunner(provider=NativeStopProvider("\n\n")).run(request)
+    assert payload["response"] == "First para."
+    assert payload["metadata"]["truncation"] == {"reason": "stop_sequence", "stop_sequence": "\n\n"}
+
+    # Sequences the request did not ask for are not reported as truncation.
+    payload = PromptRunner(provider=NativeStopProvider("</s>")).run(request)
+    assert "truncation" not in payload["metadata"]
+
+
+def test_runner_caps_non_stream_response_length() -> None:
+    payload = PromptRunner(provider=FakeProvider()).run(
+        PromptRequest(prompt_text="Hello", provider="fake", max_response_chars=4)
+    )
+
+    assert payload["response"] == "Echo"
+    assert payload["metadata"]["truncation"] == {"reason": "max_response_chars"}
+    assert "truncation" not in PromptRunner(provider=FakeProvider()).run(
+        PromptRequest(prompt_text="Hello", provider="fake")
+    )["metadata"]
+
+
+def test_runner_samples_fall_back_to_one_generate_call_per_sample() -> None:
+    class CountingUsageProvider(FakeUsageProvider):
+        calls = 0
+
+        def generate(self, prompt, system_prompt=None, generation_config=None):
+            self.calls += 1
+            return f"Echo {self.calls}"
+
+    provider = CountingUsageProvider()
+    payload = PromptRunner(provider=provider).run(
+        PromptRequest(prompt_text="Hi", provider="fake", samples=2, max_response_chars=6)
+    )
+
+    assert provider.calls == 2
+    assert payload["response"] == "Echo 1"
+    assert [sample["response"] for sample in payload["responses"]] == ["Echo 1", "Echo 2"]
+    assert payload["responses"][1]["usage"]["total_tokens"] == 46
+    assert payload["metadata"]["usage"]["total_tokens"] == 92
+    # Without samples the payload shape is unchanged.
+    single = PromptRunner(provider=provider).run(
+        PromptRequest(prompt_text="Hi", provider="fake", samples=1)
+    )
+    assert "responses" not in single
+
+
+def test_runner_samples_use_native_provider_samples_and_cut_each() -> None:
+    class NativeSamplesProvider(FakeProvider):
+        def generate_samples(self, prompt, system_prompt=None, generation_config=None):
+            self.last_config = generation_config
+            return [
+                ResponseSample(text="one END two", finish_reason="stop"),
+                ResponseSample(text="short", finish_reason="length"),
+            ]
+
+    provider = NativeSamplesProvider()
+    request = PromptRequest(prompt_text="Hi", provider="fake", samples=2, stop=("END",))
+    events = list(PromptRunner(provider=provider).iter_run(request))
+
+    assert provider.last_config.n == 2
+    assert events[0].text == "one "
+    assert isinstance(events[-1], StreamCompletedEvent)
+    responses = events[-1].payload["responses"]
+    assert responses[0] == {
+        "index": 0,
+        "response": "one ",
+        "finish_reason": "stop",
+        "truncation": {"reason": "stop_sequence", "stop_sequence": "END"},
+    }
+    assert responses[1] == {"index": 1, "response": "short", "finish_reason": "length"}
+    assert events[-1].payload["metadata"]["truncation"]["reason"] == "stop_sequence"
+
+
+def test_runner_rejects_streamed_samples() -> None:
+    with pytest.raises(InputValidationError, match="streaming"):
+        PromptRunner(provider=FakeProvider()).run(
+            PromptRequest(prompt_text="Hi", provider="fake", samples=2, stream=True)
+        )
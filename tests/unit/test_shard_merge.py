@@ -0,0 +1,133 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from ai_prompt_runner.core.errors import InputValidationError
+from ai_prompt_runner.core.shard_merge import (
+    MergeReport,
+    apply_summaries,
+    iter_result_lines,
+    load_shard_run_log,
+    load_summary,
+    merge_result_streams,
+    merge_run_logs,
+)
+
+
+def _ok(index: int) -> dict:
+    return {"index": index, "status": "ok", "payload": {"response": f"r{index}"}}
+
+
+def _error(index: int, code: str = "timeout") -> dict:
+    return {"index": index, "status": "error", "error": {"code": code}}
+
+
+def test_merge_result_streams_orders_by_index() -> None:
+    """Interleaved shard streams are merged into global input order."""
+    merged: list[dict] = []
+
+    report = merge_result_streams(
+        [[_ok(0), _ok(3), _ok(4)], [_ok(1), _error(2)]],
+        on_line=merged.append,
+    )
+
+    assert [line["index"] for line in merged] == [0, 1, 2, 3, 4]
+    assert report.total == 5
+    assert report.succeeded == 4
+    assert report.failed == 1
+    assert report.error_codes == {"timeout": 1}
+    assert report.duplicates == 0
+
+
+def test_merge_result_streams_drops_duplicates_preferring_success() -> None:
+    """A re-run shard can replace an earlier failed line for the same index."""
+    merged: list[dict] = []
+
+    report = merge_result_streams(
+        [[_error(0), _ok(1)], [_ok(0), _ok(1)]],
+        on_line=merged.append,
+    )
+
+    assert [line["index"] for line in merged] == [0, 1]
+    assert merged[0]["status"] == "ok"
+    assert report.duplicates == 2
+    assert report.failed == 0
+
+
+def test_iter_result_lines_rejects_unsorted_and_invalid_files(tmp_path: Path) -> None:
+    """Shard outputs must be JSON lines sorted by integer index."""
+    unsorted = tmp_path / "unsorted.jsonl"
+    unsorted.write_text(json.dumps(_ok(2)) + "\n" + json.dumps(_ok(1)) + "\n", encoding="utf-8")
+    with pytest.raises(InputValidationError, match="not sorted"):
+        list(iter_result_lines(unsorted))
+
+    no_index = tmp_path / "no-index.jsonl"
+    no_index.write_text('{"status": "ok"}\n', encoding="utf-8")
+    with pytest.raises(InputValidationError, match="integer 'index'"):
+        list(iter_result_lines(no_index))
+
+    broken = tmp_path / "broken.jsonl"
+    broken.write_text("{nope\n", encoding="utf-8")
+    with pytest.raises(InputValidationError, match="not valid JSON"):
+        list(iter_result_lines(broken))
+
+
+def test_load_summary_accepts_file_or_run_log_directory(tmp_path: Path) -> None:
+    """Summaries can be passed directly or through a batch run-log directory."""
+    run_dir = tmp_path / "run-1"
+    run_dir.mkdir()
+    (run_dir / "summary.json").write_text('{"shard": "0/2"}', encoding="utf-8")
+
+    assert load_summary(run_dir) == {"shard": "0/2"}
+    assert load_summary(run_dir / "summary.json") == {"shard": "0/2"}
+    with pytest.raises(InputValidationError):
+        load_summary(tmp_path / "missing.json")
+
+
+def test_apply_summaries_keeps_slowest_shard_duration() -> None:
+    """Parallel shards report the slowest wall-clock duration."""
+    report = apply_summaries(
+        MergeReport(),
+        [{"shard": "0/2", "execution_ms": 40}, {"shard": "1/2", "execution_ms": 90}],
+    )
+
+    payload = report.to_dict()
+    assert payload["execution_ms"] == 90
+    assert payload["merged_shards"] == ["0/2", "1/2"]
+
+
+def test_apply_summaries_adds_up_cache_token_counters() -> None:
+    report = apply_summaries(
+        MergeReport(),
+        [
+            {"prompt_tokens": 600, "cache_read_tokens": 500, "cache_write_tokens": 100},
+            {"prompt_tokens": 400, "cache_read_tokens": 300, "cache_write_tokens": 0},
+            {"shard": "2/3"},
+        ],
+    )
+
+    payload = report.to_dict()
+    assert payload["prompt_tokens"] == 1000
+    assert payload["cache_read_tokens"] == 800
+    assert payload["cache_write_tokens"] == 100
+    assert payload["cache_hit_ratio"] == 0.8
+
+
+def test_merge_run_logs_combines_shard_requests_and_errors(tmp_path: Path) -> None:
+    """Request logs are collected per shard; aborted shards contribute their error."""
+    finished = tmp_path / "run-0"
+    finished.mkdir()
+    (finished / "summary.json").write_text('{"shard": "0/2"}', encoding="utf-8")
+    (finished / "request.json").write_text('{"mode": "batch"}', encoding="utf-8")
+    aborted = tmp_path / "run-1"
+    aborted.mkdir()
+    (aborted / "error.json").write_text('{"error": {"code": "network_error"}}', encoding="utf-8")
+
+    run_logs = [load_shard_run_log(finished), load_shard_run_log(aborted)]
+    requests, errors = merge_run_logs(run_logs)
+
+    assert run_logs[1].summary == {}
+    assert requests == [{"source": str(finished), "shard": "0/2", "request": {"mode": "batch"}}]
+    assert errors == [{"source": str(aborted), "shard": None, "error": {"code": "network_error"}}]
+    assert load_shard_run_log(finished / "summary.json").request is None
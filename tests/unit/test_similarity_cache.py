@@ -0,0 +1,167 @@
+import importlib.util
+
+import pytest
+
+from ai_prompt_runner.core import similarity_cache
+from ai_prompt_runner.core.models import GenerationConfig, PromptRequest
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.core.similarity_cache import (
+    MinHasher,
+    SimilarityCache,
+    estimated_similarity,
+    lsh_layout,
+    normalize_prompt,
+    similarity_scope,
+)
+from ai_prompt_runner.services.base import BaseProvider
+
+_TICKET = (
+    "Summarize the support ticket opened at {timestamp} by request {request_id}: the login "
+    "page shows a blank screen on {browser} after submitting the form, and clearing the "
+    "cache did not help."
+)
+
+
+def _ticket(
+    timestamp: str = "2024-05-01T10:22:03Z",
+    request_id: str = "0f8fad5b-d9cb-469f-a165-70867728950e",
+    browser: str = "Safari",
+) -> str:
+    return _TICKET.format(timestamp=timestamp, request_id=request_id, browser=browser)
+
+
+class CountingProvider(BaseProvider):
+    """Counts calls and answers with a numbered response."""
+
+    class config:
+        model = "m1"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def generate(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> str:
+        self.calls += 1
+        return f"answer {self.calls}"
+
+
+def test_normalize_prompt_masks_volatile_spans_and_whitespace() -> None:
+    assert normalize_prompt("  Ping\tAT 2024-05-01T10:22:03+02:00 \n or 09:15  ") == (
+        "ping at <timestamp> or <time>"
+    )
+    assert normalize_prompt(_ticket()) == normalize_prompt(
+        _ticket("2025-01-09 08:00", "6ba7b810-9dad-11d1-80b4-00c04fd430c8").upper()
+    )
+    # Plain numbers change the meaning of a prompt and are kept.
+    assert normalize_prompt("What is 2 + 2?") != normalize_prompt("What is 3 + 3?")
+
+
+def test_estimated_similarity_tracks_prompt_edits() -> None:
+    hasher = MinHasher()
+    base = hasher.signature(_ticket())
+
+    assert estimated_similarity(base, hasher.signature(_ticket(timestamp="2023-12-31T23:59:59Z"))) == 1.0
+    assert 0.6 < estimated_similarity(base, hasher.signature(_ticket(browser="Firefox"))) < 1.0
+    assert estimated_similarity(base, hasher.signature("Write a haiku about the sea.")) < 0.2
+
+
+@pytest.mark.skipif(importlib.util.find_spec("numpy") is None, reason="numpy not installed")
+def test_numpy_and_python_signatures_are_identical(monkeypatch) -> None:
+    hasher = MinHasher(num_perm=64)
+    text = _ticket() * 40
+    vectorized = hasher.signature(text)
+
+    monkeypatch.setattr(similarity_cache, "np", None)
+    assert hasher.signature(text) == vectorized
+
+
+def test_lsh_layout_moves_the_candidate_curve_with_the_threshold() -> None:
+    strict_bands, strict_rows = lsh_layout(0.9, 128)
+    loose_bands, loose_rows = lsh_layout(0.5, 128)
+
+    assert strict_bands * strict_rows <= 128
+    assert strict_rows > loose_rows
+    assert strict_bands < loose_bands
+
+
+def test_cache_serves_near_duplicates_within_scope(tmp_path) -> None:
+    cache = SimilarityCache(tmp_path / "cache.sqlite", threshold=0.9)
+    scope = similarity_scope(PromptRequest(prompt_text="", provider="openai"), "m1")
+    cache.store(scope, _ticket(), "stored", "m1-2024", "sha256:" + "a" * 64)
+
+    hit = cache.lookup(scope, _ticket(timestamp="2025-02-11T08:00:00Z"))
+    assert (hit.response, hit.model, hit.similarity, hit.prompt_hash) == (
+        "stored",
+        "m1-2024",
+        1.0,
+        "sha256:" + "a" * 64,
+    )
+    assert cache.lookup(scope, _ticket(browser="Internet Explorer 11 on Windows XP")) is None
+
+    other_model = similarity_scope(PromptRequest(prompt_text="", provider="openai"), "m2")
+    other_config = similarity_scope(PromptRequest(prompt_text="", provider="openai", temperature=0.0), "m1")
+    assert cache.lookup(other_model, _ticket()) is None
+    assert cache.lookup(other_config, _ticket()) is None
+
+
+def test_cache_file_keeps_its_index_layout_when_reopened(tmp_path) -> None:
+    path = tmp_path / "cache.sqlite"
+    scope = similarity_scope(PromptRequest(prompt_text="", provider="openai"), "m1")
+    with SimilarityCache(path, threshold=0.9) as cache:
+        cache.store(scope, _ticket(), "stored", None, "sha256:" + "a" * 64)
+        layout = (cache.num_perm, cache.bands, cache.rows)
+
+    with SimilarityCache(path, threshold=0.5, num_perm=32) as reopened:
+        assert (reopened.num_perm, reopened.bands, reopened.rows) == layout
+        assert len(reopened) == 1
+        assert reopened.lookup(scope, _ticket()).response == "stored"
+
+
+def test_cache_rejects_invalid_threshold(tmp_path) -> None:
+    with pytest.raises(ValueError, match="threshold"):
+        SimilarityCache(tmp_path / "cache.sqlite", threshold=0)
+
+
+def test_runner_answers_near_duplicates_from_cache(tmp_path) -> None:
+    provider = CountingProvider()
+    runner = PromptRunner(provider=provider, similarity_cache=SimilarityCache(tmp_path / "c.sqlite"))
+
+    first = runner.run(PromptRequest(prompt_text=_ticket(), provider="openai"))
+    chunks: list[str] = []
+    second = runner.run(
+        PromptRequest(prompt_text=_ticket(timestamp="2025-02-11T08:00:00Z"), provider="openai", stream=True),
+        on_stream_chunk=chunks.append,
+    )
+
+    assert provider.calls == 1
+    assert "similarity_cache" not in first["metadata"]
+    assert second["response"] == "answer 1"
+    assert chunks == ["answer 1"]
+    assert second["prompt"] == _ticket(timestamp="2025-02-11T08:00:00Z")
+    assert second["metadata"]["similarity_cache"] == {
+        "similarity": 1.0,
+        "matched_prompt_hash": first["metadata"]["execution_context"]["prompt_hash"],
+    }
+    assert "usage" not in second["metadata"]
+
+    events = list(runner.iter_run(PromptRequest(prompt_text=_ticket(), provider="openai")))
+    assert [event.type for event in events] == ["chunk", "completed"]
+    assert provider.calls == 1
+
+    # A different generation config is a different scope.
+    runner.run(PromptRequest(prompt_text=_ticket(), provider="openai", max_tokens=10))
+    assert provider.calls == 2
+
+
+def test_runner_bypasses_cache_for_multi_sample_requests(tmp_path) -> None:
+    provider = CountingProvider()
+    cache = SimilarityCache(tmp_path / "c.sqlite")
+    runner = PromptRunner(provider=provider, similarity_cache=cache)
+
+    runner.run(PromptRequest(prompt_text=_ticket(), provider="openai", samples=2))
+
+    assert len(cache) == 0
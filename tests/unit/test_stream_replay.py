@@ -0,0 +1,30 @@
+import pytest
+
+from ai_prompt_runner.core.errors import StreamReplayDivergedError
+from ai_prompt_runner.core.stream_replay import StreamReplay
+
+
+def test_stream_replay_suppresses_prefix_across_chunk_boundaries() -> None:
+    replay = StreamReplay("Hello wo")
+
+    assert replay.feed("He") == ""
+    assert replay.feed("llo") == ""
+    assert replay.feed(" world") == "rld"
+    assert replay.feed("!") == "!"
+    replay.finish()
+
+
+def test_stream_replay_reports_divergence_offset() -> None:
+    replay = StreamReplay("Hello")
+    replay.feed("He")
+
+    with pytest.raises(StreamReplayDivergedError, match="at character 3"):
+        replay.feed("lp")
+
+
+def test_stream_replay_rejects_replay_shorter_than_emitted_output() -> None:
+    replay = StreamReplay("Hello")
+    replay.feed("Hel")
+
+    with pytest.raises(StreamReplayDivergedError, match="3 of 5"):
+        replay.finish()
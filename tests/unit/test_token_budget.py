@@ -0,0 +1,173 @@
+import pytest
+
+from ai_prompt_runner.core import token_budget
+from ai_prompt_runner.core.cancellation import CancellationToken, RunControl
+from ai_prompt_runner.core.error_taxonomy import map_runtime_error_code
+from ai_prompt_runner.core.errors import ContextWindowExceededError, RunCancelledError
+from ai_prompt_runner.core.models import GenerationConfig, PromptRequest
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.core.token_budget import (
+    TRIM_MARKER,
+    TokenBudget,
+    TokenRateLimiter,
+    count_tokens,
+    trim_middle,
+)
+from ai_prompt_runner.services.base import BaseProvider
+
+
+class RecordingProvider(BaseProvider):
+    """Records the prompts it receives."""
+
+    def __init__(self) -> None:
+        self.prompts: list[str] = []
+
+    def generate(
+        self,
+        prompt: str,
+        system_prompt: str | None = None,
+        generation_config: GenerationConfig | None = None,
+    ) -> str:
+        self.prompts.append(prompt)
+        return "ok"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_count_tokens_uses_family_byte_ratio() -> None:
+    """Bytes rather than characters keep non-Latin text from being under-counted."""
+    assert count_tokens("a" * 40, "openai") == (10, "heuristic")
+    assert count_tokens("a" * 35, "anthropic") == (10, "heuristic")
+    assert count_tokens("a" * 33, "unknown-family") == (11, "heuristic")
+    assert count_tokens("日本語", "openai")[0] == 3
+
+
+def test_count_tokens_prefers_exact_tokenizer_when_available(monkeypatch) -> None:
+    class FakeEncoding:
+        def encode(self, text: str, disallowed_special=()) -> list[int]:
+            return list(range(len(text.split())))
+
+    monkeypatch.setattr(token_budget, "_tiktoken_encoding", lambda model: FakeEncoding())
+
+    assert count_tokens("one two three", "openai", "gpt-4o") == (3, "tiktoken")
+    # Exact counts only apply to OpenAI models.
+    assert count_tokens("one two three", "anthropic", "claude-3") == (4, "heuristic")
+
+
+def test_trim_middle_keeps_head_and_tail() -> None:
+    assert trim_middle("abcdefghij", 4) == f"ab{TRIM_MARKER}ij"
+    assert trim_middle("abcdefghij", 1) == f"a{TRIM_MARKER}"
+    assert trim_middle("abc", 10) == "abc"
+
+
+def test_estimate_counts_system_prompt_message_overhead_and_max_tokens() -> None:
+    budget = TokenBudget(family="openai", context_window=100)
+    estimate = budget.estimate(
+        PromptRequest(prompt_text="a" * 40, provider="openai", system_prompt="b" * 20, max_tokens=30)
+    )
+
+    assert estimate.prompt_tokens == 10 + 5 + 2 * 4
+    assert estimate.total_tokens == 53
+    assert estimate.fits is True
+    assert TokenBudget().estimate(PromptRequest(prompt_text="x", provider="http")).fits is None
+
+
+def test_reject_policy_raises_invalid_request_before_dispatch() -> None:
+    provider = RecordingProvider()
+    runner = PromptRunner(provider=provider, token_budget=TokenBudget(family="openai", model="gpt-4", context_window=50))
+
+    with pytest.raises(ContextWindowExceededError, match=r"\+ 40 max_tokens exceed the 50-token context window of 'gpt-4'") as exc_info:
+        runner.run(PromptRequest(prompt_text="a" * 80, provider="openai", max_tokens=40))
+
+    assert provider.prompts == []
+    assert map_runtime_error_code(exc_info.value) == "invalid_request"
+
+
+def test_trim_policy_removes_the_middle_until_the_request_fits() -> None:
+    provider = RecordingProvider()
+    budget = TokenBudget(family="openai", context_window=40, policy="trim")
+    prompt = "HEAD " + "filler " * 100 + "TAIL"
+
+    payload = PromptRunner(provider=provider, token_budget=budget).run(
+        PromptRequest(prompt_text=prompt, provider="openai", max_tokens=10)
+    )
+
+    sent = provider.prompts[0]
+    assert sent.startswith("HEAD") and sent.endswith("TAIL") and TRIM_MARKER in sent
+    assert payload["prompt"] == sent
+    assert budget.estimate(PromptRequest(prompt_text=sent, provider="openai", max_tokens=10)).fits
+    assert payload["metadata"]["prompt_trim"]["context_window"] == 40
+    assert payload["metadata"]["prompt_trim"]["removed_tokens"] > 100
+
+
+def test_trim_policy_rejects_when_max_tokens_alone_exceeds_the_window() -> None:
+    budget = TokenBudget(context_window=40, policy="trim")
+
+    with pytest.raises(ContextWindowExceededError):
+        budget.apply(PromptRequest(prompt_text="hello", provider="http", max_tokens=64))
+
+
+def test_off_policy_and_unknown_window_send_the_request_unchanged() -> None:
+    request = PromptRequest(prompt_text="a" * 1000, provider="http")
+
+    assert TokenBudget(context_window=10, policy="off").apply(request)[0] is request
+    assert TokenBudget().apply(request)[0] is request
+    with pytest.raises(ValueError, match="Unknown context policy"):
+        TokenBudget(policy="truncate")
+
+
+def test_rate_limiter_admits_a_burst_then_paces_to_the_budget() -> None:
+    clock = FakeClock()
+    limiter = TokenRateLimiter(600, clock=clock, sleep=clock.sleep)
+
+    assert limiter.acquire(400) == 0
+    assert limiter.acquire(200) == 0
+    # 600 tokens/min refill at 10 tokens/s: 100 tokens of debt take 10 s.
+    assert limiter.acquire(100) == pytest.approx(10)
+    # Requests above the budget are charged the full budget.
+    assert limiter.acquire(10_000) == pytest.approx(60)
+
+
+def test_rate_limiter_wait_honours_cancellation_and_refunds() -> None:
+    clock = FakeClock()
+    limiter = TokenRateLimiter(60, clock=clock, sleep=clock.sleep)
+    token = CancellationToken()
+    limiter.acquire(60)
+
+    def cancelling_sleep(seconds: float) -> None:
+        clock.sleep(seconds)
+        token.cancel()
+
+    limiter._sleep = cancelling_sleep
+    with pytest.raises(RunCancelledError):
+        limiter.acquire(30, RunControl(token=token))
+
+    limiter._sleep = clock.sleep
+    # Only the elapsed 0.1 s was refilled; the cancelled 30 tokens were returned.
+    assert limiter.acquire(1) == pytest.approx(0.9)
+
+
+def test_throttle_charges_prompt_and_completion_budget_per_sample() -> None:
+    charged: list[int] = []
+
+    class RecordingLimiter:
+        def acquire(self, tokens, control=None) -> float:
+            charged.append(tokens)
+            return 0.0
+
+    budget = TokenBudget(family="openai", rate_limiter=RecordingLimiter())
+    runner = PromptRunner(provider=RecordingProvider(), token_budget=budget)
+    runner.run(PromptRequest(prompt_text="a" * 40, provider="openai", max_tokens=20, samples=3))
+
+    assert charged == [10 + 4 + 20 * 3]
@@ -0,0 +1,434 @@
+"""Unit tests for HTTP transports, exercised through a real provider against a local server."""
+
+import importlib.util
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ai_prompt_runner.core.cancellation import CancellationToken
+from ai_prompt_runner.core.errors import (
+    AuthenticationError,
+    AuthorizationError,
+    ProviderError,
+    RateLimitError,
+    RunCancelledError,
+    UpstreamServerError,
+)
+from ai_prompt_runner.core.models import PromptRequest
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.services.openai_compatible_provider import (
+    OpenAICompatibleProvider,
+    OpenAICompatibleProviderConfig,
+)
+from ai_prompt_runner.services.provider_factory import ConfigurationError, create_provider
+from ai_prompt_runner.services.transport import (
+    Transport,
+    TransportError,
+    Urllib3Transport,
+    create_transport,
+    iter_byte_lines,
+    iter_byte_text,
+    raise_for_mapped_status,
+    unix_socket_url,
+)
+
+HTTPX_MISSING = importlib.util.find_spec("httpx") is None
+H2_MISSING = HTTPX_MISSING or importlib.util.find_spec("h2") is None
+needs_h2 = pytest.mark.skipif(H2_MISSING, reason="httpx[http2] not installed")
+
+TRANSPORT_NAMES = [
+    "requests",
+    "urllib3",
+    pytest.param("httpx", marks=pytest.mark.skipif(HTTPX_MISSING, reason="httpx not installed")),
+    # Over cleartext HTTP/1.1 the http2 transport exercises its ALPN-less fallback.
+    pytest.param("http2", marks=needs_h2),
+]
+
+
+class _UpstreamHandler(BaseHTTPRequestHandler):
+    """OpenAI-style JSON and SSE responses; `/status/N` answers with HTTP N."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if self.path.startswith("/status/"):
+            self._send(int(self.path.split("/")[2]), b"{}", "application/json")
+            return
+        if request.get("stream"):
+            events = [
+                {"choices": [{"delta": {"content": "Hel"}}]},
+                {"choices": [{"delta": {"content": "lo"}}]},
+                {"choices": [], "usage": {"prompt_tokens": 2, "completion_tokens": 1, "total_tokens": 3}},
+            ]
+            body = "".join(f"data: {json.dumps(event)}\r\n\r\n" for event in events) + "data: [DONE]\n\n"
+            self._send(200, body.encode("utf-8"), "text/event-stream")
+            return
+        body = {
+            "model": request["model"],
+            "choices": [{"message": {"content": f"echo:{request['messages'][-1]['content']}"}}],
+            "usage": {"prompt_tokens": 2, "completion_tokens": 1, "total_tokens": 3},
+        }
+        self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class _StallingStreamHandler(BaseHTTPRequestHandler):
+    """Streams one SSE chunk, then stalls far longer than any test waits."""
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        self.wfile.write(b'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n')
+        self.wfile.flush()
+        time.sleep(10)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _serve(handler: type[BaseHTTPRequestHandler]):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def upstream():
+    server = _serve(_UpstreamHandler)
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _provider(endpoint: str, transport_name: str, **config) -> OpenAICompatibleProvider:
+    return OpenAICompatibleProvider(
+        OpenAICompatibleProviderConfig(
+            endpoint=endpoint,
+            api_key="dummy",
+            model="m1",
+            timeout_seconds=5,
+            transport=create_transport(transport_name),
+            **config,
+        )
+    )
+
+
+def test_iter_byte_lines_joins_chunks_and_strips_crlf() -> None:
+    chunks = [b"data: a\r", b"\n\ndata: b", b"c\n", b"", b"tail"]
+
+    assert list(iter_byte_lines(chunks)) == [b"data: a", b"", b"data: bc", b"tail"]
+    assert list(iter_byte_lines([b"\xc3", b"\xa9\n"], decode_unicode=True)) == ["é"]
+
+
+@pytest.mark.parametrize(
+    ("status_code", "error_type"),
+    [
+        (401, AuthenticationError),
+        (403, AuthorizationError),
+        (429, RateLimitError),
+        (502, UpstreamServerError),
+        (404, ProviderError),
+    ],
+)
+def test_raise_for_mapped_status_maps_error_statuses(status_code: int, error_type: type) -> None:
+    class _Response:
+        pass
+
+    response = _Response()
+    response.status_code = status_code
+    with pytest.raises(error_type, match=f"HTTP {status_code}"):
+        raise_for_mapped_status(response)
+
+    response.status_code = 200
+    raise_for_mapped_status(response)
+
+
+@pytest.mark.parametrize("transport_name", TRANSPORT_NAMES)
+def test_transports_serve_json_and_sse_requests(upstream, transport_name: str) -> None:
+    provider = _provider(f"{upstream}/v1", transport_name)
+
+    assert provider.generate("Hi") == "echo:Hi"
+    assert list(provider.generate_stream("Hi")) == ["Hel", "lo"]
+    assert provider.get_last_usage().total_tokens == 3
+    provider.config.transport.close()
+
+
+@pytest.mark.parametrize("transport_name", TRANSPORT_NAMES)
+def test_transports_return_error_statuses_for_mapping(upstream, transport_name: str) -> None:
+    provider = _provider(f"{upstream}/status/429", transport_name)
+
+    with pytest.raises(RateLimitError):
+        provider.generate("Hi")
+
+
+def test_urllib3_transport_wraps_connection_failures() -> None:
+    server = _serve(_UpstreamHandler)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+    with pytest.raises(TransportError):
+        Urllib3Transport().send(endpoint, headers={}, json={}, timeout=1)
+    with pytest.raises(ProviderError, match="Provider request failed"):
+        _provider(endpoint, "urllib3", max_retries=1).generate("Hi")
+
+
+@pytest.mark.parametrize("transport_name", ["urllib3", pytest.param("http2", marks=needs_h2)])
+def test_cancel_aborts_blocked_stream_read(transport_name: str) -> None:
+    """Requests in flight on a transport are registered with the abort scope."""
+    server = _serve(_StallingStreamHandler)
+    token = CancellationToken()
+    chunks: list[str] = []
+    threading.Timer(0.3, token.cancel).start()
+    runner = PromptRunner(
+        provider=_provider(f"http://127.0.0.1:{server.server_address[1]}", transport_name)
+    )
+
+    start = time.monotonic()
+    try:
+        with pytest.raises(RunCancelledError):
+            runner.run(
+                PromptRequest(prompt_text="Hi", provider="openai", stream=True),
+                on_stream_chunk=chunks.append,
+                cancel_token=token,
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert chunks == ["Hel"]
+    assert time.monotonic() - start < 3
+
+
+def test_unknown_transport_is_a_configuration_error() -> None:
+    with pytest.raises(ValueError, match="Unknown transport 'carrier-pigeon'"):
+        create_transport("carrier-pigeon")
+    with pytest.raises(ConfigurationError, match="Supported: requests, urllib3, httpx"):
+        create_provider("http", api_endpoint="http://stub", api_key="k", transport="carrier-pigeon")
+
+
+def test_factory_keeps_requests_default_and_attaches_named_transports() -> None:
+    provider = create_provider("http", api_endpoint="http://stub", api_key="k", transport="requests")
+    assert provider.config.transport is None
+
+    provider = create_provider("http", api_endpoint="http://stub", api_key="k", transport="urllib3")
+    assert isinstance(provider.config.transport, Urllib3Transport)
+
+
+@needs_h2
+def test_http2_transport_limits_concurrent_streams(upstream) -> None:
+    from ai_prompt_runner.services.transport import Http2Transport
+
+    transport = Http2Transport(pool_maxsize=1, max_streams_per_connection=1)
+    request = {"headers": {}, "json": {"model": "m", "messages": [{"content": "x"}]}}
+    try:
+        held = transport.stream(upstream, timeout=1, **request)
+        with pytest.raises(TransportError, match="No HTTP/2 stream became available"):
+            transport.send(upstream, timeout=0.2, **request)
+
+        held.close()
+        assert transport.send(upstream, timeout=1, **request).json()["choices"]
+    finally:
+        transport.close()
+
+
+@pytest.mark.skipif(not H2_MISSING, reason="httpx[http2] is installed")
+def test_http2_transport_names_its_extra_when_missing() -> None:
+    with pytest.raises(ConfigurationError, match=r"ai-prompt-runner\[http2\]"):
+        create_provider("openai", api_endpoint="http://stub", api_key="k", transport="http2")
+
+
+class _UnixUpstreamServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def unix_upstream(tmp_path):
+    socket_path = str(tmp_path / "Upstream.sock")
+    server = _UnixUpstreamServer(socket_path, _UpstreamHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield socket_path
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_unix_socket_url_normalizes_socket_endpoints() -> None:
+    assert unix_socket_url("unix:///run/llm.sock") == "http+unix://%2Frun%2Fllm.sock"
+    assert unix_socket_url("unix:///run/llm.sock:/v1") == "http+unix://%2Frun%2Fllm.sock/v1"
+    assert unix_socket_url("http+unix://%2Frun%2Fllm.sock/v1") == "http+unix://%2Frun%2Fllm.sock/v1"
+    assert unix_socket_url("http://127.0.0.1/v1") is None
+
+    for endpoint in ("unix://run/llm.sock", "unix:///run/llm.sock:v1", "http+unix://localhost/v1"):
+        with pytest.raises(ValueError):
+            unix_socket_url(endpoint)
+
+
+@pytest.mark.parametrize("transport_name", ["requests", "urllib3"])
+def test_unix_socket_endpoints_serve_json_and_sse_requests(unix_upstream, transport_name: str) -> None:
+    provider = create_provider(
+        "openai",
+        api_endpoint=f"unix://{unix_upstream}:/v1",
+        api_key="k",
+        api_model="m1",
+        transport=transport_name,
+    )
+
+    assert provider.config.endpoint.startswith("http+unix://%2F")
+    assert isinstance(provider.config.transport, Urllib3Transport)
+    assert provider.generate("Hi") == "echo:Hi"
+    assert list(provider.generate_stream("Hi")) == ["Hel", "lo"]
+    provider.config.transport.close()
+
+
+def test_unix_socket_endpoint_configuration_errors() -> None:
+    with pytest.raises(ConfigurationError, match="unix endpoints must look like"):
+        create_provider("http", api_endpoint="unix://relative.sock", api_key="k")
+    with pytest.raises(ConfigurationError, match="Transport 'httpx' cannot reach Unix socket endpoints"):
+        create_provider("http", api_endpoint="unix:///run/llm.sock", api_key="k", transport="httpx")
+
+
+def test_iter_byte_text_decodes_characters_split_across_chunks() -> None:
+    assert list(iter_byte_text([b"H\xc3", b"\xa9", b"", b"llo"])) == ["H", "é", "llo"]
+
+
+class _RawHandler(BaseHTTPRequestHandler):
+    """Echoes any method's raw body; `/lines` serves JSONL, `/truncated` drops mid-body."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/lines":
+            self._send(b'{"n": 1}\r\n{"n": 2}\n', "application/jsonl")
+            return
+        if self.path == "/truncated":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/jsonl")
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            self.wfile.write(b'{"n": 1}\n{"n"')
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        echo = {
+            "method": self.command,
+            "content_type": self.headers.get("Content-Type"),
+            "body": body.decode("utf-8"),
+        }
+        self._send(json.dumps(echo).encode("utf-8"), "application/json")
+
+    do_GET = do_PUT = do_POST = _handle  # noqa: N815 - http.server API
+
+    def _send(self, body: bytes, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def raw_upstream():
+    server = _serve(_RawHandler)
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("transport_name", TRANSPORT_NAMES)
+def test_transports_send_generic_requests_with_raw_bodies(raw_upstream, transport_name: str) -> None:
+    transport = create_transport(transport_name)
+    try:
+        response = transport.request(
+            "PUT",
+            f"{raw_upstream}/echo",
+            headers={"Content-Type": "text/plain"},
+            body=b"payload",
+            timeout=5,
+        )
+        assert response.status_code == 200
+        assert response.json() == {"method": "PUT", "content_type": "text/plain", "body": "payload"}
+        assert json.loads(response.text)["method"] == "PUT"
+        response.close()
+
+        response = transport.request("GET", f"{raw_upstream}/lines", headers={}, body=None, timeout=5, stream=True)
+        assert list(response.iter_lines(decode_unicode=True)) == ['{"n": 1}', '{"n": 2}']
+        response.close()
+        response = transport.request("GET", f"{raw_upstream}/lines", headers={}, body=None, timeout=5, stream=True)
+        assert "".join(response.iter_text()) == '{"n": 1}\r\n{"n": 2}\n'
+        response.close()
+    finally:
+        transport.close()
+
+
+@pytest.mark.parametrize("transport_name", TRANSPORT_NAMES)
+@pytest.mark.parametrize("reader", ["iter_bytes", "iter_lines"])
+def test_transports_wrap_bodies_cut_off_mid_stream(raw_upstream, transport_name: str, reader: str) -> None:
+    transport = create_transport(transport_name)
+    try:
+        response = transport.request(
+            "GET", f"{raw_upstream}/truncated", headers={}, body=None, timeout=5, stream=True
+        )
+        with pytest.raises(TransportError):
+            list(getattr(response, reader)())
+        response.close()
+    finally:
+        transport.close()
+
+
+@pytest.mark.parametrize("transport_name", TRANSPORT_NAMES)
+def test_transports_wrap_connection_failures(transport_name: str) -> None:
+    server = _serve(_RawHandler)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    transport = create_transport(transport_name)
+    try:
+        with pytest.raises(TransportError):
+            transport.request("GET", endpoint, headers={}, body=None, timeout=1)
+        with pytest.raises(TransportError):
+            transport.stream(endpoint, headers={}, json={}, timeout=1)
+    finally:
+        transport.close()
+    # Closing twice is harmless.
+    transport.close()
+
+
+def test_transports_without_generic_requests_say_so() -> None:
+    class SendOnly(Transport):
+        name = "send-only"
+
+        def send(self, url, *, headers, json, timeout, scope=None):
+            raise AssertionError
+
+        def stream(self, url, *, headers, json, timeout, scope=None):
+            raise AssertionError
+
+    with pytest.raises(NotImplementedError, match="send-only transport does not support generic requests"):
+        SendOnly().request("GET", "http://stub", headers={}, body=None, timeout=1)
@@ -169,6 +169,8 @@ def test_validate_response_payload_accepts_optional_usage_object() -> None:
                 "prompt_tokens": 10,
                 "completion_tokens": 20,
                 "total_tokens": 30,
+                "cache_read_tokens": 8,
+                "cache_write_tokens": 0,
             },
         },
     }
@@ -210,6 +212,34 @@ def test_validate_response_payload_rejects_unknown_usage_key() -> None:
         validate_response_payload(payload)
 
 
+@pytest.mark.parametrize(
+    ("latency", "message"),
+    [
+        ({"load_ms": 12, "eval_ms": 0}, None),
+        ({"load_seconds": 1}, "Unsupported latency keys"),
+        ({"load_ms": 1.5}, "'metadata.latency.load_ms' must be an integer."),
+        ({"eval_ms": -1}, "'metadata.latency.eval_ms' must be greater than or equal to 0."),
+    ],
+)
+def test_validate_response_payload_checks_latency_object(latency: dict, message: str | None) -> None:
+    """metadata.latency accepts known non-negative integer timings only."""
+    payload = {
+        "prompt": "Hello",
+        "response": "Hi there",
+        "metadata": {
+            "provider": "ollama",
+            "timestamp_utc": "2026-02-18T10:00:00+00:00",
+            "latency": latency,
+        },
+    }
+
+    if message is None:
+        validate_response_payload(payload)
+        return
+    with pytest.raises(ValidationError, match=message):
+        validate_response_payload(payload)
+
+
 def test_validate_response_payload_rejects_non_integer_usage_value() -> None:
     """Reject payloads where a usage counter is not an integer."""
     payload = {
@@ -541,3 +571,51 @@ def test_validate_response_payload_allows_additional_runtime_keys() -> None:
     payload["metadata"]["execution_context"]["runtime"]["extra_runtime_key"] = "allowed"
 
     validate_response_payload(payload)
+
+
+@pytest.mark.parametrize(
+    "truncation",
+    [
+        "stop_sequence",
+        {"reason": "too_long"},
+        {"reason": "stop_sequence", "stop_sequence": 1},
+        {"reason": "max_response_chars", "chars": 10},
+    ],
+)
+def test_validate_response_payload_rejects_invalid_truncation(truncation) -> None:
+    payload = {
+        "prompt": "Hello",
+        "response": "Hi",
+        "metadata": {
+            "provider": "http",
+            "timestamp_utc": "2026-02-18T10:00:00+00:00",
+            "truncation": truncation,
+        },
+    }
+
+    with pytest.raises(ValidationError, match="truncation"):
+        validate_response_payload(payload)
+
+
+@pytest.mark.parametrize(
+    ("responses", "message"),
+    [
+        ([], "non-empty array"),
+        ([{"index": 1, "response": "a"}], r"responses\[0\]\.index"),
+        ([{"index": 0, "response": None}], r"responses\[0\]\.response"),
+        ([{"index": 0, "response": "a", "finish_reason": 1}], "finish_reason"),
+        ([{"index": 0, "response": "a", "usage": {"total_tokens": -1}}], r"responses\[0\]\.usage"),
+        ([{"index": 0, "response": "a", "truncation": {"reason": "x"}}], r"responses\[0\]\.truncation"),
+        ([{"index": 0, "response": "a", "logprobs": []}], "Unsupported response sample keys"),
+    ],
+)
+def test_validate_response_payload_rejects_invalid_responses(responses, message) -> None:
+    payload = {
+        "prompt": "Hello",
+        "response": "a",
+        "metadata": {"provider": "http", "timestamp_utc": "2026-02-18T10:00:00+00:00"},
+        "responses": responses,
+    }
+
+    with pytest.raises(ValidationError, match=message):
+        validate_response_payload(payload)
@@ -0,0 +1,223 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+from ai_prompt_runner.core.batch import BatchItemResult, BatchRequestDefaults
+from ai_prompt_runner.core.runner import PromptRunner
+from ai_prompt_runner.core.work_queue import (
+    LeaseHeartbeat,
+    WorkQueue,
+    WorkQueueError,
+    run_worker,
+)
+from ai_prompt_runner.services.mock_provider import MockProvider
+
+
+class FakeClock:
+    """Manually advanced clock for lease expiry tests."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _records(count: int) -> list[tuple[int, str]]:
+    return [(i, json.dumps({"prompt": f"p{i}"})) for i in range(count)]
+
+
+def test_enqueue_is_idempotent(tmp_path: Path) -> None:
+    """Re-enqueueing the same indexes does not duplicate work."""
+    with WorkQueue(tmp_path / "q.db") as queue:
+        assert queue.enqueue(_records(3)) == 3
+        assert queue.enqueue(_records(5)) == 2
+        assert queue.counts() == {"pending": 5, "leased": 0, "done": 0}
+
+
+def test_claim_leases_lowest_index_once(tmp_path: Path) -> None:
+    """Two workers never receive the same item."""
+    path = tmp_path / "q.db"
+    with WorkQueue(path) as first, WorkQueue(path) as second:
+        first.enqueue(_records(2))
+        claimed_a = first.claim("a")
+        claimed_b = second.claim("b")
+        assert (claimed_a.index, claimed_b.index) == (0, 1)
+        assert first.claim("a") is None
+        assert first.counts()["leased"] == 2
+
+
+def test_expired_lease_is_requeued_and_old_owner_cannot_complete(tmp_path: Path) -> None:
+    """A lease that is not renewed goes back to pending for another worker."""
+    clock = FakeClock()
+    with WorkQueue(tmp_path / "q.db", lease_seconds=10, clock=clock) as queue:
+        queue.enqueue(_records(1))
+        claimed = queue.claim("slow")
+
+        clock.now += 11
+        reclaimed = queue.claim("fast")
+        assert reclaimed.index == claimed.index
+        assert reclaimed.attempts == 2
+
+        stale = BatchItemResult(index=0, payload={"response": "late"})
+        assert queue.complete(stale, "slow") is False
+        assert queue.renew(0, "slow") is False
+        assert queue.complete(BatchItemResult(index=0, payload={"response": "ok"}), "fast")
+        assert list(queue.iter_results())[0]["payload"] == {"response": "ok"}
+
+
+def test_renew_extends_lease(tmp_path: Path) -> None:
+    """Heartbeat renewal keeps the lease from expiring."""
+    clock = FakeClock()
+    with WorkQueue(tmp_path / "q.db", lease_seconds=10, clock=clock) as queue:
+        queue.enqueue(_records(1))
+        queue.claim("a")
+        clock.now += 8
+        assert queue.renew(0, "a") is True
+        clock.now += 8
+        assert queue.claim("b") is None
+
+
+def test_item_is_failed_after_max_attempts(tmp_path: Path) -> None:
+    """Poison items stop cycling once their attempts are exhausted."""
+    clock = FakeClock()
+    with WorkQueue(tmp_path / "q.db", lease_seconds=1, max_attempts=2, clock=clock) as queue:
+        queue.enqueue(_records(1))
+        queue.claim("a")
+        clock.now += 2
+        queue.claim("b")
+        clock.now += 2
+        assert queue.claim("c") is None
+
+        results = list(queue.iter_results())
+        assert results[0]["status"] == "error"
+        assert "expired after 2 attempt(s)" in results[0]["error"]["message"]
+
+
+def test_run_worker_drains_queue_and_records_results(tmp_path: Path) -> None:
+    """A worker executes every item and reports invalid records per position."""
+    with WorkQueue(tmp_path / "q.db") as queue:
+        queue.enqueue(_records(3) + [(3, "not json"), (4, '{"prompt": ""}')])
+        summary = run_worker(
+            queue=queue,
+            runner=PromptRunner(provider=MockProvider()),
+            defaults=BatchRequestDefaults(provider="mock"),
+            worker_id="w1",
+        )
+        results = list(queue.iter_results())
+
+    assert summary.total == 5
+    assert summary.succeeded == 3
+    assert summary.error_codes == {"invalid_request": 2}
+    assert [line["index"] for line in results] == [0, 1, 2, 3, 4]
+    assert results[0]["payload"]["response"] == "Echo: p0"
+
+
+def test_concurrent_workers_share_the_queue(tmp_path: Path) -> None:
+    """Workers in parallel drain the queue with exactly one result per item."""
+    path = tmp_path / "q.db"
+    with WorkQueue(path) as queue:
+        queue.enqueue(_records(30))
+
+    totals: list[int] = []
+
+    def _work(worker_id: str) -> None:
+        with WorkQueue(path) as queue:
+            summary = run_worker(
+                queue=queue,
+                runner=PromptRunner(provider=MockProvider()),
+                defaults=BatchRequestDefaults(provider="mock"),
+                worker_id=worker_id,
+                poll_interval=0.01,
+            )
+        totals.append(summary.total)
+
+    threads = [threading.Thread(target=_work, args=(f"w{i}",)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(totals) == 30
+    with WorkQueue(path) as queue:
+        assert [line["index"] for line in queue.iter_results()] == list(range(30))
+
+
+def test_lost_lease_cancels_the_in_flight_run(tmp_path: Path) -> None:
+    """The heartbeat cancels its token once another worker took the item over."""
+    clock = FakeClock()
+    with WorkQueue(tmp_path / "q.db", lease_seconds=10, clock=clock) as queue:
+        queue.enqueue(_records(1))
+        queue.claim("slow")
+        clock.now += 11
+        queue.claim("fast")
+
+        with LeaseHeartbeat(queue, 0, "slow", interval=0.01) as heartbeat:
+            for _ in range(200):
+                if heartbeat.cancel_token.cancelled:
+                    break
+                threading.Event().wait(0.01)
+
+        assert heartbeat.cancel_token.cancelled
+
+
+def test_heartbeat_that_cannot_open_the_queue_stops_the_worker(tmp_path: Path, monkeypatch) -> None:
+    """A heartbeat without a connection cancels the run and the worker raises its error."""
+    path = tmp_path / "q.db"
+    with WorkQueue(path, lease_seconds=0.03) as queue:
+        queue.enqueue(_records(1))
+        original_init = WorkQueue.__init__
+
+        def failing_init(self, *args, **kwargs):
+            if threading.current_thread().name == "lease-heartbeat":
+                raise WorkQueueError("Work queue could not be opened: database is locked")
+            original_init(self, *args, **kwargs)
+
+        monkeypatch.setattr(WorkQueue, "__init__", failing_init)
+        with pytest.raises(WorkQueueError, match="Lease heartbeat could not open the work queue"):
+            run_worker(queue, PromptRunner(provider=MockProvider()), BatchRequestDefaults(provider="mock"), "w1")
+        # No result was stored: the lease expires and the item is re-queued.
+        assert queue.counts()["leased"] == 1
+        assert list(queue.iter_results()) == []
+
+
+class _FailingCommitConnection:
+    """Connection proxy whose COMMIT fails like a busy database."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def execute(self, sql: str, *args):
+        if sql == "COMMIT":
+            raise sqlite3.OperationalError("database is locked")
+        return self._conn.execute(sql, *args)
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+
+def test_database_errors_surface_as_work_queue_errors(tmp_path: Path) -> None:
+    """SQLite failures outside BEGIN are mapped to the domain error as well."""
+    with WorkQueue(tmp_path / "q.db") as queue:
+        real_conn = queue._conn
+        queue._conn = _FailingCommitConnection(real_conn)
+        with pytest.raises(WorkQueueError, match="update failed"):
+            queue.enqueue(_records(1))
+        queue._conn = real_conn
+        assert queue.counts()["pending"] == 0
+
+        real_conn.close()
+        with pytest.raises(WorkQueueError, match="could not be read"):
+            queue.counts()
+        with pytest.raises(WorkQueueError, match="could not be read"):
+            list(queue.iter_results())
+
+
+@pytest.mark.parametrize("kwargs", [{"lease_seconds": 0}, {"max_attempts": 0}])
+def test_work_queue_rejects_invalid_settings(tmp_path: Path, kwargs: dict) -> None:
+    """Lease duration and attempt budget must be positive."""
+    with pytest.raises(ValueError):
+        WorkQueue(tmp_path / "q.db", **kwargs)